@@ -22,30 +22,38 @@ from datetime import datetime
 from pathlib import Path
 import subprocess
 import sys
+import importlib
 from typing import Dict, List, Any, Optional
 import logging
 
-# Import analyzers for automated sections
-try:
-    from simplified_market_saturation_analyzer import SimplifiedMarketSaturationAnalyzer
-    from traffic_transportation_analyzer import TrafficTransportationAnalyzer
-    from site_characteristics_analyzer import SiteCharacteristicsAnalyzer
-    from business_habitat_analyzer import BusinessHabitatAnalyzer
-    from revenue_projections_analyzer import RevenueProjectionsAnalyzer
-    from cost_analysis_analyzer import CostAnalysisAnalyzer
-    from risk_assessment_analyzer import RiskAssessmentAnalyzer
-    from zoning_permits_analyzer import ZoningPermitsAnalyzer
-    from infrastructure_analyzer import InfrastructureAnalyzer
-    from universal_competitive_analyzer import UniversalCompetitiveAnalyzer
-    from integrated_business_analyzer import IntegratedBusinessAnalyzer
-    from geocoding import OpenStreetMapGeocoder
-    from recommendations_generator import RecommendationsGenerator
-    from implementation_plan_generator import ImplementationPlanGenerator
-    from financial_institution_analyzer import FinancialInstitutionAnalyzer
-    ANALYZERS_AVAILABLE = True
-except ImportError as e:
-    print(f"Warning: Some analyzers not available: {e}")
-    ANALYZERS_AVAILABLE = False
+# Headless plotting - set once, before any analyzer pulls in matplotlib.pyplot
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+# Analyzers for automated sections are imported lazily when a section runs, so
+# commands that do no analysis (--list-projects, resume) don't pay for
+# matplotlib, seaborn, networkx, pandas, geopy, shapely or BigQuery at startup.
+ANALYZER_MODULES = {
+    "SimplifiedMarketSaturationAnalyzer": "simplified_market_saturation_analyzer",
+    "TrafficTransportationAnalyzer": "traffic_transportation_analyzer",
+    "SiteCharacteristicsAnalyzer": "site_characteristics_analyzer",
+    "BusinessHabitatAnalyzer": "business_habitat_analyzer",
+    "RevenueProjectionsAnalyzer": "revenue_projections_analyzer",
+    "CostAnalysisAnalyzer": "cost_analysis_analyzer",
+    "RiskAssessmentAnalyzer": "risk_assessment_analyzer",
+    "ZoningPermitsAnalyzer": "zoning_permits_analyzer",
+    "InfrastructureAnalyzer": "infrastructure_analyzer",
+    "UniversalCompetitiveAnalyzer": "universal_competitive_analyzer",
+    "IntegratedBusinessAnalyzer": "integrated_business_analyzer",
+    "OpenStreetMapGeocoder": "geocoding",
+    "RecommendationsGenerator": "recommendations_generator",
+    "ImplementationPlanGenerator": "implementation_plan_generator",
+    "FinancialInstitutionAnalyzer": "financial_institution_analyzer",
+}
+
+def load_analyzer(class_name: str):
+    """Import an analyzer class on first use (modules are cached in sys.modules)"""
+    module = importlib.import_module(ANALYZER_MODULES[class_name])
+    return getattr(module, class_name)
 
 logging.basicConfig(level=logging.INFO)
 
@@ -270,7 +278,7 @@ class UniversalBusinessAnalysisEngine:
             
             # Import and run competitive analyzer
             try:
-                from universal_competitive_analyzer import UniversalCompetitiveAnalyzer
+                UniversalCompetitiveAnalyzer = load_analyzer("UniversalCompetitiveAnalyzer")
                 analyzer = UniversalCompetitiveAnalyzer(business_type, lat, lng, address)
                 
                 # Check if Google Places data exists
@@ -308,15 +316,14 @@ class UniversalBusinessAnalysisEngine:
         
         # Get coordinates for location-based analysis
         lat, lon = None, None
-        if ANALYZERS_AVAILABLE:
-            try:
-                geocoder = OpenStreetMapGeocoder()
-                result = geocoder.geocode_address(address, "", "WI")
-                if result and result.latitude is not None and result.longitude is not None:
-                    lat, lon = result.latitude, result.longitude
-                    print(f"  📍 Geocoded location: {lat}, {lon}")
-            except Exception as e:
-                print(f"  ⚠️ Geocoding failed: {e}")
+        try:
+            geocoder = load_analyzer("OpenStreetMapGeocoder")()
+            result = geocoder.geocode_address(address, "", "WI")
+            if result and result.latitude is not None and result.longitude is not None:
+                lat, lon = result.latitude, result.longitude
+                print(f"  📍 Geocoded location: {lat}, {lon}")
+        except Exception as e:
+            print(f"  ⚠️ Geocoding failed: {e}")
         
         for section_id in implemented_sections:
             section_config = self.sections_config[section_id]
@@ -326,66 +333,66 @@ class UniversalBusinessAnalysisEngine:
                 
                 try:
                     # Generate section based on type
-                    if section_id == "2.2" and ANALYZERS_AVAILABLE:
+                    if section_id == "2.2":
                         # Generate Market Saturation Analysis (with fallback coordinates)
                         fallback_lat, fallback_lon = lat or 43.0731, lon or -89.4014  # Madison, WI
                         content = self._generate_market_saturation_section(
                             business_type, address, fallback_lat, fallback_lon, project_path
                         )
-                    elif section_id == "3.1" and ANALYZERS_AVAILABLE:
+                    elif section_id == "3.1":
                         # Generate Traffic & Transportation Analysis
                         fallback_lat, fallback_lon = lat or 43.0731, lon or -89.4014  # Madison, WI
                         content = self._generate_traffic_transportation_section(
                             business_type, address, fallback_lat, fallback_lon, project_path
                         )
-                    elif section_id == "3.2" and ANALYZERS_AVAILABLE:
+                    elif section_id == "3.2":
                         # Generate Site Characteristics Analysis
                         fallback_lat, fallback_lon = lat or 43.0731, lon or -89.4014  # Madison, WI
                         content = self._generate_site_characteristics_section(
                             business_type, address, fallback_lat, fallback_lon, project_path
                         )
-                    elif section_id == "3.3" and ANALYZERS_AVAILABLE:
+                    elif section_id == "3.3":
                         # Generate Business Habitat Mapping Analysis
                         fallback_lat, fallback_lon = lat or 43.0731, lon or -89.4014  # Madison, WI
                         content = self._generate_business_habitat_section(
                             business_type, address, fallback_lat, fallback_lon, project_path
                         )
-                    elif section_id == "4.1" and ANALYZERS_AVAILABLE:
+                    elif section_id == "4.1":
                         # Generate Revenue Projections Analysis
                         fallback_lat, fallback_lon = lat or 43.0731, lon or -89.4014  # Madison, WI
                         content = self._generate_revenue_projections_section(
                             business_type, address, fallback_lat, fallback_lon, project_path
                         )
-                    elif section_id == "4.2" and ANALYZERS_AVAILABLE:
+                    elif section_id == "4.2":
                         # Generate Cost Analysis
                         fallback_lat, fallback_lon = lat or 43.0731, lon or -89.4014  # Madison, WI
                         content = self._generate_cost_analysis_section(
                             business_type, address, fallback_lat, fallback_lon, project_path
                         )
-                    elif section_id == "4.3" and ANALYZERS_AVAILABLE:
+                    elif section_id == "4.3":
                         # Generate Risk Assessment
                         fallback_lat, fallback_lon = lat or 43.0731, lon or -89.4014  # Madison, WI
                         content = self._generate_risk_assessment_section(
                             business_type, address, fallback_lat, fallback_lon, project_path
                         )
-                    elif section_id == "5.1" and ANALYZERS_AVAILABLE:
+                    elif section_id == "5.1":
                         # Generate Zoning & Permits Analysis
                         fallback_lat, fallback_lon = lat or 43.0731, lon or -89.4014  # Madison, WI
                         content = self._generate_zoning_permits_section(
                             business_type, address, fallback_lat, fallback_lon, project_path
                         )
-                    elif section_id == "5.2" and ANALYZERS_AVAILABLE:
+                    elif section_id == "5.2":
                         # Generate Infrastructure Analysis
                         fallback_lat, fallback_lon = lat or 43.0731, lon or -89.4014  # Madison, WI
                         content = self._generate_infrastructure_section(
                             business_type, address, fallback_lat, fallback_lon, project_path
                         )
-                    elif section_id == "6.1" and ANALYZERS_AVAILABLE:
+                    elif section_id == "6.1":
                         # Generate Final Recommendations
                         content = self._generate_recommendations_section(
                             business_type, address, project_path
                         )
-                    elif section_id == "6.2" and ANALYZERS_AVAILABLE:
+                    elif section_id == "6.2":
                         # Generate Implementation Plan
                         content = self._generate_implementation_plan_section(
                             business_type, address, project_path
@@ -400,7 +407,7 @@ class UniversalBusinessAnalysisEngine:
                         content = self._generate_investment_opportunity_section(
                             business_type, address, project_path
                         )
-                    elif section_id == "6.3" and ANALYZERS_AVAILABLE:
+                    elif section_id == "6.3":
                         # Generate Economic Development Centers Analysis
                         fallback_lat, fallback_lon = lat or 43.0731, lon or -89.4014  # Madison, WI
                         content = self._generate_economic_development_section(
@@ -450,7 +457,7 @@ class UniversalBusinessAnalysisEngine:
                                           lat: float, lon: float, project_path: str) -> Optional[str]:
         """Generate Market Saturation Analysis section"""
         try:
-            analyzer = SimplifiedMarketSaturationAnalyzer()
+            analyzer = load_analyzer("SimplifiedMarketSaturationAnalyzer")()
             
             # Run analysis
             print("    🔍 Running market saturation analysis...")
@@ -480,7 +487,7 @@ class UniversalBusinessAnalysisEngine:
                                                lat: float, lon: float, project_path: str) -> Optional[str]:
         """Generate Traffic & Transportation Analysis section"""
         try:
-            analyzer = TrafficTransportationAnalyzer()
+            analyzer = load_analyzer("TrafficTransportationAnalyzer")()
             
             # Run analysis
             print("    🚦 Running traffic and transportation analysis...")
@@ -510,7 +517,7 @@ class UniversalBusinessAnalysisEngine:
                                              lat: float, lon: float, project_path: str) -> Optional[str]:
         """Generate Site Characteristics Analysis section"""
         try:
-            analyzer = SiteCharacteristicsAnalyzer()
+            analyzer = load_analyzer("SiteCharacteristicsAnalyzer")()
             
             # Check for manual data enhancement
             manual_data_file = f"{project_path}/manual_data_entry/MANUAL_DATA_ENTRY_3_2.md"
@@ -547,7 +554,7 @@ class UniversalBusinessAnalysisEngine:
                                         lat: float, lon: float, project_path: str) -> Optional[str]:
         """Generate Business Habitat Mapping section"""
         try:
-            analyzer = BusinessHabitatAnalyzer()
+            analyzer = load_analyzer("BusinessHabitatAnalyzer")()
             
             print("    🧬 Running business habitat mapping analysis...")
             
@@ -607,7 +614,7 @@ class UniversalBusinessAnalysisEngine:
                                            lat: float, lon: float, project_path: str) -> Optional[str]:
         """Generate Revenue Projections section"""
         try:
-            analyzer = RevenueProjectionsAnalyzer()
+            analyzer = load_analyzer("RevenueProjectionsAnalyzer")()
             
             print("    💰 Running revenue projections analysis...")
             
@@ -635,7 +642,8 @@ class UniversalBusinessAnalysisEngine:
                     "revenue_drivers": projection.revenue_drivers,
                     "risk_factors": projection.risk_factors,
                     "model_validation": projection.model_validation,
-                    "seasonal_adjustments": projection.seasonal_adjustments
+                    "seasonal_adjustments": projection.seasonal_adjustments,
+                    "sensitivity_analysis": projection.sensitivity_analysis
                 }, f, indent=2)
             
             # Load template and populate with revenue data
@@ -662,7 +670,7 @@ class UniversalBusinessAnalysisEngine:
                                       lat: float, lon: float, project_path: str) -> Optional[str]:
         """Generate Cost Analysis section"""
         try:
-            analyzer = CostAnalysisAnalyzer()
+            analyzer = load_analyzer("CostAnalysisAnalyzer")()
             
             print("    💰 Running cost analysis...")
             
@@ -745,7 +753,7 @@ class UniversalBusinessAnalysisEngine:
                                         lat: float, lon: float, project_path: str) -> Optional[str]:
         """Generate Risk Assessment section"""
         try:
-            analyzer = RiskAssessmentAnalyzer()
+            analyzer = load_analyzer("RiskAssessmentAnalyzer")()
             
             print("    ⚠️ Running comprehensive risk assessment...")
             
@@ -756,7 +764,9 @@ class UniversalBusinessAnalysisEngine:
             risk_analysis = analyzer.analyze_comprehensive_risk(
                 business_type=business_type,
                 location=address,
-                integrated_data=integrated_data
+                integrated_data=integrated_data,
+                lat=lat,
+                lon=lon
             )
             
             # Save raw analysis data
@@ -776,7 +786,8 @@ class UniversalBusinessAnalysisEngine:
                     "key_risk_factors": risk_analysis.key_risk_factors,
                     "risk_mitigation_strategies": risk_analysis.risk_mitigation_strategies,
                     "monte_carlo_results": risk_analysis.monte_carlo_results,
-                    "risk_correlations": risk_analysis.risk_correlations
+                    "risk_correlations": risk_analysis.risk_correlations,
+                    "stress_test_grid": risk_analysis.stress_test_grid
                 }, f, indent=2)
             
             # Load template and populate with risk data
@@ -930,7 +941,7 @@ class UniversalBusinessAnalysisEngine:
                                        lat: float, lon: float, project_path: str) -> Optional[str]:
         """Generate Zoning & Permits section"""
         try:
-            analyzer = ZoningPermitsAnalyzer()
+            analyzer = load_analyzer("ZoningPermitsAnalyzer")()
             
             print("    🏛️ Running zoning and permits analysis...")
             
@@ -1134,7 +1145,7 @@ Please complete the following manual research and verification tasks. Replace [P
                                        lat: float, lon: float, project_path: str) -> Optional[str]:
         """Generate Infrastructure Analysis section"""
         try:
-            analyzer = InfrastructureAnalyzer()
+            analyzer = load_analyzer("InfrastructureAnalyzer")()
             
             print("    🏗️ Running infrastructure analysis...")
             
@@ -1205,7 +1216,7 @@ Please complete the following manual research and verification tasks. Replace [P
                                         project_path: str) -> Optional[str]:
         """Generate Final Recommendations section"""
         try:
-            generator = RecommendationsGenerator()
+            generator = load_analyzer("RecommendationsGenerator")()
             
             print("    🎯 Generating final recommendations...")
             
@@ -1304,7 +1315,7 @@ Please complete the following manual research and verification tasks. Replace [P
                                             project_path: str) -> Optional[str]:
         """Generate Implementation Plan section"""
         try:
-            generator = ImplementationPlanGenerator()
+            generator = load_analyzer("ImplementationPlanGenerator")()
             
             print("    📋 Generating implementation plan...")
             
@@ -1437,7 +1448,7 @@ Please complete the following manual research and verification tasks. Replace [P
             }
             
             # Generate financial institution analysis
-            analyzer = FinancialInstitutionAnalyzer()
+            analyzer = load_analyzer("FinancialInstitutionAnalyzer")()
             analysis_result = analyzer.generate_financial_institution_analysis(
                 business_type, address, integrated_data, recommendations_data
             )
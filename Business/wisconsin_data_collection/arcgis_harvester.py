@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+ArcGIS Feature Harvester
+========================
+
+Complete, parallel harvesting of ArcGIS REST feature/map service layers.
+Instead of a single query capped at the server's maxRecordCount, the
+harvester lists the layer's object IDs once, splits them into ID windows of
+one page each, and fetches the windows concurrently. Geometry is requested
+in WGS84 and generalized server-side (maxAllowableOffset, geometryPrecision)
+to keep payloads small. Completed pages are checkpointed to disk so an
+interrupted harvest resumes where it stopped.
+
+Features:
+- Object-ID window paging (resultOffset paging when IDs are unavailable)
+- Thread pool page fetches with per-page retry
+- Server-side generalization and coordinate precision for compact payloads
+- Esri JSON or GeoJSON output, streamed page by page to the caller's parser
+- Resumable harvests checkpointed under data_cache/arcgis_harvest
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterator, List, Any
+
+from tenacity import retry, stop_after_attempt, wait_exponential
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_DIR = os.path.join("data_cache", "arcgis_harvest")
+
+# Used when the layer does not report maxRecordCount
+DEFAULT_PAGE_SIZE = 1000
+
+# Checkpoints older than this are discarded instead of resumed
+DEFAULT_CHECKPOINT_MAX_AGE_HOURS = 24
+
+
+class ArcGISError(Exception):
+    """Error payload returned by an ArcGIS REST endpoint"""
+    pass
+
+
+class ArcGISLayerHarvester:
+    """Parallel, resumable harvest of every feature in one ArcGIS layer"""
+
+    def __init__(self, session, layer_url: str, where: str = '1=1', out_fields: str = '*',
+                 output_format: str = 'json', return_geometry: bool = True,
+                 max_allowable_offset: float = None, geometry_precision: int = 6,
+                 page_size: int = None, workers: int = 4, timeout: int = 60,
+                 checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR,
+                 checkpoint_max_age_hours: float = DEFAULT_CHECKPOINT_MAX_AGE_HOURS):
+        self.session = session
+        self.layer_url = layer_url.rstrip('/')
+        self.where = where
+        self.out_fields = out_fields
+        self.output_format = output_format
+        self.return_geometry = return_geometry
+        self.max_allowable_offset = max_allowable_offset
+        self.geometry_precision = geometry_precision
+        self.page_size = page_size
+        self.workers = workers
+        self.timeout = timeout
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.checkpoint_max_age_hours = checkpoint_max_age_hours
+        self.checkpoint_path = self._checkpoint_for(None)
+
+    def _checkpoint_for(self, max_records: int = None) -> Path:
+        """Checkpoint directory of this query and record limit"""
+        key = json.dumps([self.layer_url, self.where, self.out_fields, self.output_format,
+                          self.return_geometry, self.max_allowable_offset, self.geometry_precision,
+                          max_records or None])
+        return self.checkpoint_dir / hashlib.sha1(key.encode()).hexdigest()[:16]
+
+    # ------------------------------------------------------------------- HTTP
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+    def _get(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.session.get(url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        if isinstance(data, dict) and 'error' in data:
+            raise ArcGISError(f"{url}: {data['error'].get('message', data['error'])}")
+        return data
+
+    def layer_info(self) -> Dict[str, Any]:
+        """Layer metadata (maxRecordCount, objectIdField, pagination support)"""
+        return self._get(self.layer_url, {'f': 'json'})
+
+    def _query_params(self) -> Dict[str, Any]:
+        params = {
+            'where': self.where,
+            'outFields': self.out_fields,
+            'returnGeometry': 'true' if self.return_geometry else 'false',
+            'outSR': 4326,
+            'f': self.output_format
+        }
+        if self.return_geometry:
+            if self.max_allowable_offset:
+                params['maxAllowableOffset'] = self.max_allowable_offset
+            if self.geometry_precision is not None:
+                params['geometryPrecision'] = self.geometry_precision
+        return params
+
+    # ----------------------------------------------------------------- paging
+
+    def _plan_pages(self, max_records: int = None) -> Dict[str, Any]:
+        """Page list: object-ID windows when IDs can be listed, else offsets"""
+        info = self.layer_info()
+        page_size = self.page_size or info.get('maxRecordCount') or DEFAULT_PAGE_SIZE
+        query_url = f"{self.layer_url}/query"
+
+        try:
+            ids = self._get(query_url, {'where': self.where, 'returnIdsOnly': 'true', 'f': 'json'})
+            id_field = ids.get('objectIdFieldName') or info.get('objectIdField') or 'OBJECTID'
+            object_ids = sorted(ids.get('objectIds') or [])
+        except Exception as e:
+            logger.info(f"Object IDs unavailable for {self.layer_url} ({e}); using offset paging")
+            object_ids, id_field = None, None
+
+        if object_ids is not None:
+            if max_records:
+                object_ids = object_ids[:max_records]
+            pages = [{'where': f"({self.where}) AND {id_field} >= {chunk[0]} AND {id_field} <= {chunk[-1]}"}
+                     for chunk in (object_ids[i:i + page_size] for i in range(0, len(object_ids), page_size))]
+            return {'mode': 'object_ids', 'total': len(object_ids), 'pages': pages}
+
+        counted = self._get(query_url, {'where': self.where, 'returnCountOnly': 'true', 'f': 'json'})
+        total = counted.get('count', 0)
+        if max_records:
+            total = min(total, max_records)
+        id_field = info.get('objectIdField') or 'OBJECTID'
+        pages = [{'resultOffset': offset, 'resultRecordCount': min(page_size, total - offset),
+                  'orderByFields': id_field}
+                 for offset in range(0, total, page_size)]
+        return {'mode': 'offset', 'total': total, 'pages': pages}
+
+    def _page_file(self, number: int) -> Path:
+        return self.checkpoint_path / f"page_{number:05d}.json.gz"
+
+    def _fetch_page(self, number: int, page: Dict[str, Any]) -> List[Dict[str, Any]]:
+        data = self._get(f"{self.layer_url}/query", {**self._query_params(), **page})
+        features = data.get('features', [])
+        # Write-then-rename so a crash never leaves a truncated page marked complete
+        partial = self._page_file(number).with_suffix('.part')
+        with gzip.open(partial, 'wt', encoding='utf-8') as f:
+            json.dump(features, f)
+        os.replace(partial, self._page_file(number))
+        return features
+
+    def _read_page(self, number: int) -> List[Dict[str, Any]]:
+        with gzip.open(self._page_file(number), 'rt', encoding='utf-8') as f:
+            return json.load(f)
+
+    def plan(self, max_records: int = None) -> Dict[str, Any]:
+        """
+        Page plan of the harvest: the checkpointed one when resuming, else a new one
+
+        The plan is stored with the checkpoint, so a resumed harvest fetches
+        exactly the pages that did not finish. Checkpoints older than
+        checkpoint_max_age_hours are dropped and the harvest starts over.
+        """
+        self.checkpoint_path = self._checkpoint_for(max_records)
+        plan_file = self.checkpoint_path / "plan.json"
+        if plan_file.exists():
+            plan = json.loads(plan_file.read_text())
+            age_hours = (time.time() - plan.get('created', 0)) / 3600
+            if age_hours <= self.checkpoint_max_age_hours:
+                logger.info(f"Resuming harvest of {self.layer_url}")
+                return plan
+            logger.info(f"Discarding {age_hours:.0f}h old checkpoint of {self.layer_url}")
+            self.clear()
+        plan = self._plan_pages(max_records)
+        plan['created'] = time.time()
+        self.checkpoint_path.mkdir(parents=True, exist_ok=True)
+        plan_file.write_text(json.dumps(plan))
+        return plan
+
+    def pages(self, max_records: int = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Feature lists page by page (completion order), resuming a checkpointed harvest
+
+        The checkpoint is removed once every page has been delivered.
+        """
+        plan = self.plan(max_records)
+        pages = plan['pages']
+
+        done = [n for n in range(len(pages)) if self._page_file(n).exists()]
+        pending = [n for n in range(len(pages)) if not self._page_file(n).exists()]
+        logger.info(f"Harvesting {plan['total']:,} features from {self.layer_url}: "
+                    f"{len(pages)} pages ({len(done)} already checkpointed, {plan['mode']} paging)")
+
+        for number in done:
+            yield self._read_page(number)
+
+        failures = 0
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            futures = {pool.submit(self._fetch_page, n, pages[n]): n for n in pending}
+            for future in as_completed(futures):
+                try:
+                    yield future.result()
+                except Exception as e:
+                    failures += 1
+                    logger.warning(f"Page {futures[future]} of {self.layer_url} failed: {e}")
+
+        if failures:
+            raise ArcGISError(f"{failures} of {len(pages)} pages failed for {self.layer_url}; "
+                              f"re-run to resume from the checkpoint")
+        self.clear()
+
+    def features(self, max_records: int = None) -> Iterator[Dict[str, Any]]:
+        """Every feature of the layer (up to max_records), streamed"""
+        for page in self.pages(max_records):
+            yield from page
+
+    def clear(self):
+        """Drop the checkpoint of this harvest"""
+        shutil.rmtree(self.checkpoint_path, ignore_errors=True)
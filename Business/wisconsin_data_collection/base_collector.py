@@ -29,6 +29,7 @@ from models import (
     BusinessEntity, SBALoanRecord, BusinessLicense, 
     DataCollectionSummary, BusinessType, BusinessStatus, DataSource
 )
+from watermark_store import WatermarkStore
 
 
 class DataCollectionError(Exception):
@@ -49,6 +50,13 @@ class BaseDataCollector(abc.ABC):
     for collecting business data from various sources
     """
     
+    # Watermarked sources -> (record ID, record date) accessors
+    WATERMARK_FIELDS = {
+        'business_registrations': (lambda r: r.business_id, lambda r: r.registration_date),
+        'sba_loans': (lambda r: r.loan_id, lambda r: r.approval_date),
+        'business_licenses': (lambda r: r.license_id, lambda r: r.issue_date)
+    }
+    
     def __init__(self, state_code: str, config_path: str = "data_sources.yaml"):
         """
         Initialize base data collector
@@ -93,6 +101,9 @@ class BaseDataCollector(abc.ABC):
         # Data collection summary
         self.collection_summary = DataCollectionSummary(state=self.state_code)
         
+        # High-water marks of time-windowed sources for incremental runs
+        self.watermarks = WatermarkStore()
+        
     def _load_config(self, config_path: str) -> Dict:
         """Load configuration from YAML file"""
         try:
@@ -313,7 +324,11 @@ class BaseDataCollector(abc.ABC):
             table_id = self.bq_config.get('tables', {}).get('sba_loans', 'sba_loan_approvals')
             full_table_id = f"{self.bq_config['project_id']}.{dataset_id}.{table_id}"
             
-            job_config = bigquery.LoadJobConfig(write_disposition="WRITE_APPEND")
+            # loan_status was added after the table was first created
+            job_config = bigquery.LoadJobConfig(
+                write_disposition="WRITE_APPEND",
+                schema_update_options=[bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION]
+            )
             job = self.bq_client.load_table_from_dataframe(df, full_table_id, job_config=job_config)
             job.result()
             
@@ -395,12 +410,38 @@ class BaseDataCollector(abc.ABC):
         """
         pass
     
-    def run_full_collection(self, days_back: int = 90) -> DataCollectionSummary:
+    def _watermark_source(self, name: str) -> str:
+        return f"{self.state_code}.{name}"
+    
+    def _collection_windows(self, days_back: Dict[str, int], incremental: bool) -> Dict[str, int]:
+        """Lookback per source: since its watermark (minus overlap) when incremental"""
+        if not incremental:
+            return dict(days_back)
+        windows = {name: self.watermarks.days_back(self._watermark_source(name), days)
+                   for name, days in days_back.items()}
+        self.logger.info(f"Incremental lookback windows (days): {windows}")
+        return windows
+    
+    def _drop_loaded(self, collected: Dict[str, List]) -> Dict[str, List]:
+        """Remove records already loaded inside the previous run's overlap"""
+        return {name: self.watermarks.unseen(self._watermark_source(name), records,
+                                             self.WATERMARK_FIELDS[name][0])
+                for name, records in collected.items()}
+    
+    def _advance_watermarks(self, collected: Dict[str, List]):
+        """Record the latest loaded date of every source (call only after a successful load)"""
+        for name, records in collected.items():
+            key, mark_of = self.WATERMARK_FIELDS[name]
+            self.watermarks.advance(self._watermark_source(name), records, mark_of, key)
+    
+    def run_full_collection(self, days_back: int = 90, incremental: bool = True) -> DataCollectionSummary:
         """
         Run complete data collection process
         
         Args:
-            days_back: Number of days to look back
+            days_back: Number of days to look back (for sources without a watermark
+                when incremental)
+            incremental: Request only data newer than each source's watermark
             
         Returns:
             DataCollectionSummary with results
@@ -410,9 +451,17 @@ class BaseDataCollector(abc.ABC):
         
         try:
             # Collect all data sources
-            businesses = self.collect_business_registrations(days_back)
-            sba_loans = self.collect_sba_loans(days_back)
-            licenses = self.collect_business_licenses(days_back)
+            windows = self._collection_windows({name: days_back for name in self.WATERMARK_FIELDS}, incremental)
+            collected = {
+                'business_registrations': self.collect_business_registrations(windows['business_registrations']),
+                'sba_loans': self.collect_sba_loans(windows['sba_loans']),
+                'business_licenses': self.collect_business_licenses(windows['business_licenses'])
+            }
+            if incremental:
+                collected = self._drop_loaded(collected)
+            businesses = collected['business_registrations']
+            sba_loans = collected['sba_loans']
+            licenses = collected['business_licenses']
             
             # Update summary
             self.collection_summary.businesses_collected = len(businesses)
@@ -423,6 +472,8 @@ class BaseDataCollector(abc.ABC):
             # Save to BigQuery
             success = self.save_to_bigquery(businesses, sba_loans, licenses)
             self.collection_summary.success = success
+            if success and incremental:
+                self._advance_watermarks(collected)
             
             # Calculate processing time
             self.collection_summary.processing_time_seconds = time.time() - start_time
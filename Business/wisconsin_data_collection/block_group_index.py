@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Block Group Index
+=================
+
+Local spatial index of Census block-group polygons with their ACS
+attributes (population, households, income, ...). Trade-area polygons are
+matched against an STRtree of block groups, interior block groups are
+detected with prepared-geometry predicates, and only block groups crossing a
+polygon edge pay for an exact intersection. Attributes are apportioned by the
+share of each block group's area inside the polygon.
+
+Features:
+- One vectorized pass for many polygons (nested rings, whole portfolios)
+- Areal-weighted totals plus household-weighted income medians
+- Compact on-disk store (WKB + NumPy arrays) under data_cache/block_groups
+- One-time build from Census cartographic boundaries and the ACS API
+"""
+
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
+from shapely import STRtree
+
+# Download support for boundaries and ACS tables (optional)
+try:
+    import requests
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+    requests = None
+
+# Shapefile reading for the one-time build (optional)
+try:
+    import geopandas as gpd
+    GEOPANDAS_AVAILABLE = True
+except ImportError:
+    GEOPANDAS_AVAILABLE = False
+    gpd = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = os.path.join("data_cache", "block_groups")
+DEFAULT_ACS_YEAR = 2022
+
+# Census cartographic boundary block groups (1:500k)
+BOUNDARY_URL = "https://www2.census.gov/geo/tiger/GENZ{year}/shp/cb_{year}_{state_fips}_bg_500k.zip"
+ACS_URL = "https://api.census.gov/data/{year}/acs/acs5"
+
+# Stored attribute name -> ACS 5-year block-group variable (names follow census_demographics)
+ACS_BLOCK_GROUP_VARIABLES = {
+    'total_population': 'B01003_001E',
+    'total_households': 'B11001_001E',
+    'median_household_income': 'B19013_001E',
+    'median_age': 'B01002_001E',
+    'labor_force': 'B23025_003E',
+    'unemployment_count': 'B23025_005E',
+    'total_education_pop': 'B15003_001E',
+    'bachelor_degree_count': 'B15003_022E',
+    'total_housing_units': 'B25001_001E',
+    'occupied_housing_units': 'B25003_001E',
+    'owner_occupied_units': 'B25003_002E',
+    'total_commuters': 'B08301_001E',
+    'public_transport_commuters': 'B08301_010E',
+    'worked_from_home': 'B08301_021E',
+    'aggregate_travel_time': 'B08013_001E',
+}
+
+# Medians can't be summed; they are combined as weighted medians over these weights
+MEDIAN_ATTRIBUTES = {
+    'median_household_income': 'total_households',
+    'median_age': 'total_population',
+}
+
+
+def weighted_median(values: np.ndarray, weights: np.ndarray) -> Optional[float]:
+    """Weighted median ignoring NaN values and non-positive weights"""
+    values = np.asarray(values, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    valid = ~np.isnan(values) & (weights > 0)
+    if not valid.any():
+        return None
+    values, weights = values[valid], weights[valid]
+    order = np.argsort(values)
+    cumulative = np.cumsum(weights[order])
+    return float(values[order][np.searchsorted(cumulative, cumulative[-1] / 2.0)])
+
+
+@dataclass
+class AreaAggregate:
+    """Block-group attributes apportioned to one polygon"""
+    population: float
+    households: float
+    median_household_income: Optional[float]
+    block_groups: int
+    totals: Dict[str, float] = field(default_factory=dict)
+    medians: Dict[str, Optional[float]] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'population': int(round(self.population)),
+            'households': int(round(self.households)),
+            'median_household_income': self.median_household_income,
+            'block_groups': self.block_groups,
+        }
+
+
+class BlockGroupIndex:
+    """STRtree over block-group polygons (lon/lat) with parallel attribute arrays"""
+
+    def __init__(self, geoids: np.ndarray, geometries: np.ndarray,
+                 attributes: Dict[str, np.ndarray], acs_year: int = None):
+        self.geoids = np.asarray(geoids)
+        self.geometries = np.asarray(geometries, dtype=object)
+        self.attributes = {name: np.asarray(values, dtype=float) for name, values in attributes.items()}
+        self.acs_year = acs_year
+        self.areas = shapely.area(self.geometries)
+        self.tree = STRtree(self.geometries)
+        self._centroids: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return int(self.geoids.size)
+
+    @property
+    def population(self) -> np.ndarray:
+        return self.attributes['total_population']
+
+    @property
+    def households(self) -> np.ndarray:
+        return self.attributes['total_households']
+
+    @property
+    def centroids(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(lat, lon) of each block group's polygon centroid"""
+        if self._centroids is None:
+            points = shapely.centroid(self.geometries)
+            self._centroids = (shapely.get_y(points), shapely.get_x(points))
+        return self._centroids
+
+    # ------------------------------------------------------------ apportioning
+
+    def overlap(self, polygons: Sequence) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Areal overlap of every polygon with every block group it touches
+
+        Returns parallel arrays (polygon index, block-group index, fraction of
+        the block group's area inside the polygon).
+        """
+        polygons = np.asarray(polygons, dtype=object)
+        shapely.prepare(polygons)
+        polygon_index, group_index = self.tree.query(polygons, predicate='intersects')
+
+        fraction = np.ones(polygon_index.size)
+        # Block groups wholly inside a polygon skip the intersection entirely
+        edge = ~shapely.contains(polygons[polygon_index], self.geometries[group_index])
+        if edge.any():
+            clipped = shapely.intersection(polygons[polygon_index[edge]], self.geometries[group_index[edge]])
+            fraction[edge] = shapely.area(clipped) / np.maximum(self.areas[group_index[edge]], 1e-15)
+
+        # Area ratios are taken in degrees; the cos(latitude) factor cancels within a block group
+        fraction = np.clip(fraction, 0.0, 1.0)
+        return polygon_index, group_index, fraction
+
+    def aggregate(self, polygons: Sequence, attributes: Sequence[str] = None) -> List[AreaAggregate]:
+        """Areal-weighted totals and weighted medians for each polygon"""
+        names = list(attributes or self.attributes)
+        polygon_index, group_index, fraction = self.overlap(polygons)
+        count = len(polygons)
+
+        totals = {}
+        for name in names:
+            if name in MEDIAN_ATTRIBUTES:
+                continue
+            values = np.nan_to_num(self.attributes[name][group_index]) * fraction
+            totals[name] = np.bincount(polygon_index, weights=values, minlength=count)
+        block_groups = np.bincount(polygon_index, minlength=count)
+
+        order = np.argsort(polygon_index, kind='stable')
+        bounds = np.searchsorted(polygon_index[order], np.arange(count + 1))
+
+        results = []
+        for i in range(count):
+            members = order[bounds[i]:bounds[i + 1]]
+            groups, weights = group_index[members], fraction[members]
+            medians = {
+                name: weighted_median(self.attributes[name][groups],
+                                      np.nan_to_num(self.attributes[weight_name][groups]) * weights)
+                for name, weight_name in MEDIAN_ATTRIBUTES.items()
+                if name in names and name in self.attributes and weight_name in self.attributes
+            }
+            polygon_totals = {name: float(values[i]) for name, values in totals.items()}
+            results.append(AreaAggregate(
+                population=polygon_totals.get('total_population', 0.0),
+                households=polygon_totals.get('total_households', 0.0),
+                median_household_income=medians.get('median_household_income'),
+                block_groups=int(block_groups[i]),
+                totals=polygon_totals,
+                medians=medians
+            ))
+        return results
+
+    def ring_aggregates(self, rings: Dict[str, Any]) -> Dict[str, AreaAggregate]:
+        """Cumulative aggregates for nested trade-area polygons, e.g. {"5_min": ..., "10_min": ...}"""
+        return self.batch_ring_aggregates([rings])[0]
+
+    def batch_ring_aggregates(self, ring_sets: Sequence[Dict[str, Any]]) -> List[Dict[str, AreaAggregate]]:
+        """Aggregates for the rings of many sites in a single STRtree query"""
+        keys = [(site, name) for site, rings in enumerate(ring_sets) for name in rings]
+        polygons = [ring_sets[site][name] for site, name in keys]
+        aggregates = self.aggregate(polygons, ['total_population', 'total_households', 'median_household_income'])
+
+        results: List[Dict[str, AreaAggregate]] = [{} for _ in ring_sets]
+        for (site, name), aggregate in zip(keys, aggregates):
+            results[site][name] = aggregate
+        return results
+
+    # ---------------------------------------------------------------- storage
+
+    @classmethod
+    def open_default(cls) -> Optional['BlockGroupIndex']:
+        """The default store if it has been built, else None"""
+        if not (Path(DEFAULT_STORE_DIR) / "meta.json").exists():
+            return None
+        try:
+            return cls.load(DEFAULT_STORE_DIR)
+        except Exception as e:
+            logger.warning(f"Could not load block-group index: {e}")
+            return None
+
+    def save(self, store_dir: str = DEFAULT_STORE_DIR):
+        store = Path(store_dir)
+        store.mkdir(parents=True, exist_ok=True)
+
+        blobs = shapely.to_wkb(self.geometries)
+        offsets = np.cumsum([0] + [len(blob) for blob in blobs]).astype(np.int64)
+        with open(store / "geometry.wkb", 'wb') as f:
+            for blob in blobs:
+                f.write(blob)
+        np.save(store / "geometry_offsets.npy", offsets)
+        np.save(store / "geoids.npy", self.geoids.astype(str))
+        np.savez(store / "attributes.npz", **self.attributes)
+
+        with open(store / "meta.json", 'w') as f:
+            json.dump({
+                'block_groups': len(self),
+                'acs_year': self.acs_year,
+                'attributes': sorted(self.attributes),
+                'built': datetime.now().isoformat()
+            }, f, indent=2)
+        logger.info(f"Saved {len(self):,} block groups to {store}")
+
+    @classmethod
+    def load(cls, store_dir: str = DEFAULT_STORE_DIR) -> 'BlockGroupIndex':
+        store = Path(store_dir)
+        with open(store / "meta.json") as f:
+            meta = json.load(f)
+        offsets = np.load(store / "geometry_offsets.npy")
+        data = (store / "geometry.wkb").read_bytes()
+        geometries = shapely.from_wkb([data[start:end] for start, end in zip(offsets[:-1], offsets[1:])])
+        with np.load(store / "attributes.npz") as arrays:
+            attributes = {name: arrays[name] for name in arrays.files}
+        return cls(np.load(store / "geoids.npy"), geometries, attributes, meta.get('acs_year'))
+
+    # ------------------------------------------------------------------ build
+
+    @classmethod
+    def from_geodataframe(cls, gdf, geoid_column: str = 'GEOID',
+                          attribute_columns: Sequence[str] = None,
+                          acs_year: int = None) -> 'BlockGroupIndex':
+        """Index a GeoDataFrame of block groups (reprojected to lon/lat)"""
+        if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
+            gdf = gdf.to_crs(epsg=4326)
+        columns = attribute_columns or [name for name in ACS_BLOCK_GROUP_VARIABLES if name in gdf.columns]
+        attributes = {name: gdf[name].to_numpy(dtype=float) for name in columns}
+        return cls(gdf[geoid_column].astype(str).to_numpy(), gdf.geometry.to_numpy(), attributes, acs_year)
+
+    @classmethod
+    def build_from_census(cls, state_fips: str = "55", acs_year: int = DEFAULT_ACS_YEAR,
+                          api_key: str = None, store_dir: str = DEFAULT_STORE_DIR) -> 'BlockGroupIndex':
+        """Download boundaries and ACS block-group tables, then save the index"""
+        if not (REQUESTS_AVAILABLE and GEOPANDAS_AVAILABLE):
+            raise RuntimeError("Building the block-group index requires requests and geopandas")
+
+        store = Path(store_dir)
+        store.mkdir(parents=True, exist_ok=True)
+        url = BOUNDARY_URL.format(year=acs_year, state_fips=state_fips)
+        archive = store / Path(url).name
+        if not archive.exists():
+            logger.info(f"Downloading block-group boundaries from {url}")
+            response = requests.get(url, timeout=120)
+            response.raise_for_status()
+            archive.write_bytes(response.content)
+        boundaries = gpd.read_file(f"zip://{archive}")[['GEOID', 'geometry']]
+        logger.info(f"Read {len(boundaries):,} block groups from {archive.name}")
+
+        acs = fetch_acs_block_groups(state_fips, acs_year, api_key)
+        gdf = boundaries.merge(acs, on='GEOID', how='left')
+        index = cls.from_geodataframe(gdf, acs_year=acs_year)
+        index.save(store_dir)
+        return index
+
+
+def fetch_acs_block_groups(state_fips: str = "55", acs_year: int = DEFAULT_ACS_YEAR,
+                           api_key: str = None):
+    """ACS 5-year block-group attributes for a state as a DataFrame keyed by GEOID"""
+    import pandas as pd
+
+    names = list(ACS_BLOCK_GROUP_VARIABLES)
+    params = {
+        'get': ','.join(ACS_BLOCK_GROUP_VARIABLES[name] for name in names),
+        'for': 'block group:*',
+        'in': [f'state:{state_fips}', 'county:*', 'tract:*'],
+    }
+    if api_key:
+        params['key'] = api_key
+    response = requests.get(ACS_URL.format(year=acs_year), params=params, timeout=120)
+    response.raise_for_status()
+    header, *rows = response.json()
+
+    df = pd.DataFrame(rows, columns=header)
+    df['GEOID'] = df['state'] + df['county'] + df['tract'] + df['block group']
+    for name in names:
+        values = pd.to_numeric(df[ACS_BLOCK_GROUP_VARIABLES[name]], errors='coerce')
+        # ACS marks suppressed estimates with large negative sentinels (-666666666 etc.)
+        df[name] = values.where(values >= 0)
+    logger.info(f"Fetched ACS {acs_year} attributes for {len(df):,} block groups")
+    return df[['GEOID'] + names]
+
+
+def main():
+    """Build the default block-group index: python block_group_index.py [state_fips] [acs_year]"""
+    import sys
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    state_fips = sys.argv[1] if len(sys.argv) > 1 else "55"
+    acs_year = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_ACS_YEAR
+    index = BlockGroupIndex.build_from_census(state_fips, acs_year, os.environ.get("CENSUS_API_KEY"))
+    print(f"✅ Indexed {len(index):,} block groups "
+          f"({int(np.nansum(index.population)):,} people) for ACS {acs_year}")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,6 +22,8 @@ from pathlib import Path
 
 from google.cloud import bigquery
 
+from response_archive import archive_response
+
 
 class BLSDataCollector:
     """Collector for Bureau of Labor Statistics data"""
@@ -217,40 +219,7 @@ class BLSDataCollector:
                 county_data = self._make_bls_api_request(series_ids, start_year, end_year)
                 
                 if county_data:
-                    # Parse and format the data
-                    for series in county_data.get('Results', {}).get('series', []):
-                        series_id = series['seriesID']
-                        
-                        # Determine data type based on series ID pattern
-                        if '105000000' in series_id:
-                            data_type = 'employment'
-                        elif '205000000' in series_id:
-                            data_type = 'average_weekly_wages'
-                        elif '305000000' in series_id:
-                            data_type = 'total_quarterly_wages'
-                        else:
-                            continue
-                        
-                        # Process each data point
-                        for data_point in series.get('data', []):
-                            record = {
-                                'county_fips': county_fips,
-                                'county_name': county_name,
-                                'year': int(data_point.get('year', 0)),
-                                'period': data_point.get('period', ''),
-                                'period_name': data_point.get('periodName', ''),
-                                'value': self._safe_float(data_point.get('value')),
-                                'data_type': data_type,
-                                'series_id': series_id,
-                                'data_source': 'BLS_QCEW',
-                                'data_extraction_date': datetime.now()
-                            }
-                            
-                            # Add quarter information
-                            if record['period'].startswith('Q'):
-                                record['quarter'] = int(record['period'][1:])
-                            
-                            qcew_records.append(record)
+                    qcew_records.extend(self._parse_qcew_series(county_data, county_fips, county_name))
                 
                 # Rate limiting
                 time.sleep(self.request_delay)
@@ -289,42 +258,7 @@ class BLSDataCollector:
                 county_data = self._make_bls_api_request(series_ids, start_year, end_year)
                 
                 if county_data:
-                    # Parse and format the data
-                    for series in county_data.get('Results', {}).get('series', []):
-                        series_id = series['seriesID']
-                        
-                        # Determine measure type
-                        if series_id.endswith('0000000003'):
-                            measure_type = 'unemployment_rate'
-                        elif series_id.endswith('0000000004'):
-                            measure_type = 'unemployment_level'
-                        elif series_id.endswith('0000000005'):
-                            measure_type = 'employment_level'
-                        elif series_id.endswith('0000000006'):
-                            measure_type = 'labor_force'
-                        else:
-                            continue
-                        
-                        # Process each data point
-                        for data_point in series.get('data', []):
-                            record = {
-                                'county_fips': county_fips,
-                                'county_name': county_name,
-                                'year': int(data_point.get('year', 0)),
-                                'period': data_point.get('period', ''),
-                                'period_name': data_point.get('periodName', ''),
-                                'value': self._safe_float(data_point.get('value')),
-                                'measure_type': measure_type,
-                                'series_id': series_id,
-                                'data_source': 'BLS_LAUS',
-                                'data_extraction_date': datetime.now()
-                            }
-                            
-                            # Add month information
-                            if record['period'].startswith('M'):
-                                record['month'] = int(record['period'][1:])
-                            
-                            laus_records.append(record)
+                    laus_records.extend(self._parse_laus_series(county_data, county_fips, county_name))
                 
                 # Rate limiting
                 time.sleep(self.request_delay)
@@ -335,6 +269,84 @@ class BLSDataCollector:
         
         return laus_records
     
+    def _parse_qcew_series(self, county_data: Dict[str, Any], county_fips: str, county_name: str) -> List[Dict[str, Any]]:
+        """QCEW records of one county's BLS API response"""
+        records = []
+        for series in county_data.get('Results', {}).get('series', []):
+            series_id = series['seriesID']
+            
+            # Determine data type based on series ID pattern
+            if '105000000' in series_id:
+                data_type = 'employment'
+            elif '205000000' in series_id:
+                data_type = 'average_weekly_wages'
+            elif '305000000' in series_id:
+                data_type = 'total_quarterly_wages'
+            else:
+                continue
+            
+            # Process each data point
+            for data_point in series.get('data', []):
+                record = {
+                    'county_fips': county_fips,
+                    'county_name': county_name,
+                    'year': int(data_point.get('year', 0)),
+                    'period': data_point.get('period', ''),
+                    'period_name': data_point.get('periodName', ''),
+                    'value': self._safe_float(data_point.get('value')),
+                    'data_type': data_type,
+                    'series_id': series_id,
+                    'data_source': 'BLS_QCEW',
+                    'data_extraction_date': datetime.now()
+                }
+                
+                # Add quarter information
+                if record['period'].startswith('Q'):
+                    record['quarter'] = int(record['period'][1:])
+                
+                records.append(record)
+        return records
+    
+    def _parse_laus_series(self, county_data: Dict[str, Any], county_fips: str, county_name: str) -> List[Dict[str, Any]]:
+        """LAUS records of one county's BLS API response"""
+        records = []
+        for series in county_data.get('Results', {}).get('series', []):
+            series_id = series['seriesID']
+            
+            # Determine measure type
+            if series_id.endswith('0000000003'):
+                measure_type = 'unemployment_rate'
+            elif series_id.endswith('0000000004'):
+                measure_type = 'unemployment_level'
+            elif series_id.endswith('0000000005'):
+                measure_type = 'employment_level'
+            elif series_id.endswith('0000000006'):
+                measure_type = 'labor_force'
+            else:
+                continue
+            
+            # Process each data point
+            for data_point in series.get('data', []):
+                record = {
+                    'county_fips': county_fips,
+                    'county_name': county_name,
+                    'year': int(data_point.get('year', 0)),
+                    'period': data_point.get('period', ''),
+                    'period_name': data_point.get('periodName', ''),
+                    'value': self._safe_float(data_point.get('value')),
+                    'measure_type': measure_type,
+                    'series_id': series_id,
+                    'data_source': 'BLS_LAUS',
+                    'data_extraction_date': datetime.now()
+                }
+                
+                # Add month information
+                if record['period'].startswith('M'):
+                    record['month'] = int(record['period'][1:])
+                
+                records.append(record)
+        return records
+    
     def _make_bls_api_request(self, series_ids: List[str], start_year: int, end_year: int) -> Optional[Dict[str, Any]]:
         """Make API request to BLS"""
         
@@ -360,6 +372,8 @@ class BLSDataCollector:
                     timeout=30
                 )
                 response.raise_for_status()
+                archive_response('bls_timeseries', response.content,
+                                 {'url': f"{self.base_url}/timeseries/data/", **data})
                 
                 result = response.json()
                 
@@ -452,6 +466,26 @@ class BLSDataCollector:
         self.logger.info(f"Stored {len(laus_data)} LAUS records to BigQuery")
 
 
+_reprocess_collector = None
+
+def reprocess_bls_response(payload: bytes, request: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """QCEW or LAUS records of an archived BLS API response (response archive reprocessor)"""
+    global _reprocess_collector
+    if _reprocess_collector is None:
+        _reprocess_collector = BLSDataCollector()
+    collector = _reprocess_collector
+    
+    # Requests are per county: ENU<fips>... (QCEW) or LAUCN<fips>... (LAUS)
+    series_id = request['seriesid'][0]
+    county_data = json.loads(payload)
+    if series_id.startswith('ENU'):
+        county_fips = series_id[3:8]
+        return collector._parse_qcew_series(county_data, county_fips, collector.wisconsin_counties.get(county_fips))
+    if series_id.startswith('LAUCN'):
+        county_fips = series_id[5:10]
+        return collector._parse_laus_series(county_data, county_fips, collector.wisconsin_counties.get(county_fips))
+    return []
+
 def main():
     """Test the BLS collector"""
     print("🏭 BLS Data Collector - Phase 1 Implementation")
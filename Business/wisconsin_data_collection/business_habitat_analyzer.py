@@ -26,6 +26,9 @@ import time
 from trade_area_analyzer import TradeAreaAnalyzer
 from universal_competitive_analyzer import UniversalCompetitiveAnalyzer
 from transportation_accessibility_analysis import TransportationAccessibilityAnalyzer
+from habitat_features import (HabitatFeatureStore, NORMALIZATION_RANGES, normalize, to_vector,
+                              weighted_similarity)
+from habitat_model import HabitatModel, HabitatModelRegistry, load_labeled_locations, train_habitat_model
 
 logger = logging.getLogger(__name__)
 
@@ -78,7 +81,7 @@ class BusinessHabitatAnalyzer:
     # Urban vs Rural population thresholds
     URBAN_POPULATION_THRESHOLD = 50000  # Urban if county population > 50K
     
-    def __init__(self, google_places_api_key: Optional[str] = None):
+    def __init__(self, google_places_api_key: Optional[str] = None, feature_workers: int = 4):
         self.google_places_api_key = google_places_api_key
         self.trade_area_analyzer = TradeAreaAnalyzer()
         self.accessibility_analyzer = TransportationAccessibilityAnalyzer()
@@ -86,6 +89,13 @@ class BusinessHabitatAnalyzer:
         # Cache for environmental data
         self.environmental_cache = {}
         
+        # Environmental feature rows of training locations, computed once and persisted
+        self.feature_store = HabitatFeatureStore.load()
+        self.feature_workers = feature_workers
+        
+        # Trained habitat models, loaded lazily per business type
+        self.habitat_models = HabitatModelRegistry()
+        
         # Training data storage
         self.training_data = defaultdict(list)
         
@@ -225,13 +235,14 @@ class BusinessHabitatAnalyzer:
         business_lower = business_name.lower()
         return any(indicator in business_lower for indicator in franchise_indicators)
     
-    def collect_environmental_data(self, lat: float, lon: float) -> Dict[str, float]:
+    def collect_environmental_data(self, lat: float, lon: float, fallback: bool = True) -> Dict[str, float]:
         """
         Collect environmental variables for habitat modeling
         
         Args:
             lat: Latitude
             lon: Longitude
+            fallback: Return default variables when collection fails (otherwise raise)
             
         Returns:
             Dictionary of environmental variables
@@ -283,9 +294,15 @@ class BusinessHabitatAnalyzer:
             return environmental_vars
             
         except Exception as e:
+            if not fallback:
+                raise
             logger.warning(f"Error collecting environmental data: {e}")
             return self._get_default_environmental_vars()
     
+    def _measured_environmental_data(self, lat: float, lon: float) -> Dict[str, float]:
+        """Environmental variables for the feature store, which must never hold defaults"""
+        return self.collect_environmental_data(lat, lon, fallback=False)
+    
     def _calculate_urban_score(self, lat: float, lon: float) -> float:
         """Calculate urban vs rural score (0-100, higher = more urban)"""
         
@@ -344,6 +361,77 @@ class BusinessHabitatAnalyzer:
             'visibility_score': 70,
         }
     
+    def build_feature_store(self, business_types: Optional[List[str]] = None,
+                            location_type: str = 'urban') -> HabitatFeatureStore:
+        """
+        Compute environmental features for every training location in one batch
+        
+        After this one-time build, habitat scoring reads feature rows instead of
+        re-running trade-area, accessibility and competition analyses.
+        """
+        for business_type in business_types or list(self.SUCCESS_THRESHOLDS):
+            if business_type not in self.training_data:
+                self.training_data[business_type] = self.collect_training_data(business_type, location_type)
+            points = [(record.lat, record.lon) for record in self.training_data[business_type]]
+            self.feature_store.add(points, self._measured_environmental_data, self.feature_workers)
+        
+        self.feature_store.save()
+        logger.info(f"Habitat feature store holds {len(self.feature_store)} locations")
+        return self.feature_store
+    
+    def train_model(self, business_type: str, client=None, locations: Optional[List[Dict]] = None,
+                    geocoder=None, l2: float = 1.0, folds: int = 5) -> HabitatModel:
+        """
+        Train and persist a habitat model for one business type
+        
+        Args:
+            business_type: Type of business to model
+            client: BigQuery client used to load DFI/SBA labels when locations is None
+            locations: Labeled locations as dicts with 'lat', 'lon' and 'label' (1 = success)
+            geocoder: Optional geocoder that adds SBA borrowers to the training set
+            l2: L2 regularization strength
+            folds: Cross-validation folds
+            
+        Returns:
+            Trained HabitatModel (also saved under data_cache/habitat_models)
+        """
+        if locations is None:
+            locations = load_labeled_locations(client, business_type,
+                                               self.SUCCESS_THRESHOLDS.get(business_type, 3.0), geocoder=geocoder)
+        
+        rows = self.feature_store.rows([(loc['lat'], loc['lon']) for loc in locations],
+                                       self._measured_environmental_data, self.feature_workers)
+        self.feature_store.save()
+        labels = np.array([loc['label'] for loc in locations], dtype=np.int64)
+        
+        # Locations whose features could not be collected are left out of training
+        measured = rows >= 0
+        if not measured.all():
+            logger.warning(f"Training without {int((~measured).sum())} locations missing habitat features")
+        model = train_habitat_model(business_type, self.feature_store.raw[rows[measured]], labels[measured],
+                                    l2=l2, folds=folds)
+        self.habitat_models.put(model)
+        return model
+    
+    def predict_success_probabilities(self, business_type: str,
+                                      points: List[Tuple[float, float]]) -> Optional[np.ndarray]:
+        """
+        Batch success probabilities for many candidate sites from the trained model
+        
+        Returns None if no model has been trained for the business type; sites whose
+        features could not be collected get NaN.
+        """
+        model = self.habitat_models.get(business_type)
+        if model is None:
+            return None
+        rows = self.feature_store.rows(points, self._measured_environmental_data, self.feature_workers)
+        self.feature_store.save()
+        probabilities = np.full(len(rows), np.nan)
+        measured = rows >= 0
+        if measured.any():
+            probabilities[measured] = model.predict_proba(self.feature_store.raw[rows[measured]])
+        return probabilities
+    
     def analyze_habitat_suitability(self, business_type: str, lat: float, lon: float,
                                   location_type: str = 'urban', 
                                   franchise_model: bool = False) -> HabitatSuitability:
@@ -362,13 +450,18 @@ class BusinessHabitatAnalyzer:
         """
         logger.info(f"Analyzing habitat suitability for {business_type} at {lat}, {lon}")
         
+        # Get environmental data for the site
+        environmental_data = self.collect_environmental_data(lat, lon)
+        
+        # A trained model, when one exists, replaces similarity averaging
+        model = self.habitat_models.get(business_type)
+        if model is not None:
+            return self._model_habitat_suitability(model, environmental_data)
+        
         # Collect training data if not already cached
         if business_type not in self.training_data:
             self.training_data[business_type] = self.collect_training_data(business_type, location_type)
         
-        # Get environmental data for the site
-        environmental_data = self.collect_environmental_data(lat, lon)
-        
         # Filter training data by location type and franchise model
         filtered_training = self._filter_training_data(
             self.training_data[business_type], location_type, franchise_model
@@ -406,6 +499,32 @@ class BusinessHabitatAnalyzer:
             environmental_variables=env_variables
         )
     
+    def _model_habitat_suitability(self, model: HabitatModel,
+                                   environmental_data: Dict[str, float]) -> HabitatSuitability:
+        """Habitat suitability from a trained model's prediction and importances"""
+        success_probability = float(model.predict_proba(to_vector(environmental_data))[0])
+        success_factors = self._analyze_success_factors(environmental_data, [])
+        
+        env_variables = [
+            EnvironmentalVariable(
+                name=key,
+                value=value,
+                importance=abs(model.importances.get(key, 0.0)),
+                description=self._get_variable_description(key)
+            )
+            for key, value in environmental_data.items()
+        ]
+        
+        return HabitatSuitability(
+            business_type=model.business_type,
+            success_probability=success_probability,
+            confidence_level=self._calculate_confidence_level(model.sample_size),
+            sample_size=model.sample_size,
+            key_success_factors=success_factors['positive'],
+            risk_factors=success_factors['negative'],
+            environmental_variables=env_variables
+        )
+    
     def _filter_training_data(self, training_data: List[BusinessRecord], 
                             location_type: str, franchise_model: bool) -> List[BusinessRecord]:
         """Filter training data by location type and franchise model"""
@@ -442,18 +561,14 @@ class BusinessHabitatAnalyzer:
         if not successful:
             return 0.1  # Very low probability if no successful examples
         
-        # Calculate similarity to successful businesses
-        similarity_scores = []
-        for business in successful:
-            # Get environmental data for this business
-            business_env = self.collect_environmental_data(business.lat, business.lon)
-            
-            # Calculate similarity score
-            similarity = self._calculate_environmental_similarity(environmental_data, business_env)
-            similarity_scores.append(similarity)
+        # Similarity to every successful business in one pass over their feature rows
+        rows = self.feature_store.rows([(b.lat, b.lon) for b in successful],
+                                       self._measured_environmental_data, self.feature_workers)
+        self.feature_store.save()
+        similarity_scores = self.feature_store.similarity(environmental_data, rows)
         
         # Average similarity to successful businesses
-        avg_similarity = np.mean(similarity_scores)
+        avg_similarity = float(np.mean(similarity_scores)) if similarity_scores.size else 0.5
         
         # Convert similarity to probability (0.1 to 0.9 range)
         probability = 0.1 + (avg_similarity * 0.8)
@@ -464,53 +579,15 @@ class BusinessHabitatAnalyzer:
                                           business_env: Dict[str, float]) -> float:
         """Calculate similarity between environmental conditions"""
         
-        # Weight different environmental factors
-        weights = {
-            'population_density': 0.15,
-            'median_income': 0.15,
-            'highway_accessibility': 0.10,
-            'competitor_density': 0.10,
-            'urban_score': 0.10,
-            'traffic_volume': 0.10,
-            'visibility_score': 0.10,
-            'parking_availability': 0.10,
-            'overall_accessibility': 0.10
-        }
-        
-        similarity_score = 0
-        total_weight = 0
-        
-        for var, weight in weights.items():
-            if var in site_env and var in business_env:
-                # Normalize values to 0-1 range
-                site_val = self._normalize_value(site_env[var], var)
-                business_val = self._normalize_value(business_env[var], var)
-                
-                # Calculate similarity (1 - absolute difference)
-                similarity = 1 - abs(site_val - business_val)
-                similarity_score += similarity * weight
-                total_weight += weight
-        
-        return similarity_score / total_weight if total_weight > 0 else 0.5
+        site = normalize(to_vector(site_env))
+        business = normalize(to_vector(business_env))
+        return float(weighted_similarity(site, business)[0])
     
     def _normalize_value(self, value: float, variable: str) -> float:
         """Normalize values to 0-1 range"""
         
-        # Define normalization ranges for different variables
-        ranges = {
-            'population_density': (0, 10000),
-            'median_income': (30000, 100000),
-            'highway_accessibility': (0, 100),
-            'competitor_density': (0, 20),
-            'urban_score': (0, 100),
-            'traffic_volume': (0, 100000),
-            'visibility_score': (0, 100),
-            'parking_availability': (0, 100),
-            'overall_accessibility': (0, 100)
-        }
-        
-        if variable in ranges:
-            min_val, max_val = ranges[variable]
+        if variable in NORMALIZATION_RANGES:
+            min_val, max_val = NORMALIZATION_RANGES[variable]
             return (value - min_val) / (max_val - min_val)
         
         return 0.5  # Default normalized value
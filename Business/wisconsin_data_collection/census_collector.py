@@ -12,6 +12,7 @@ Key Features:
 - Data validation and quality scoring
 """
 
+import json
 import requests
 import time
 import logging
@@ -22,6 +23,19 @@ from pathlib import Path
 
 from models import CensusGeography, CensusDataSummary
 from base_collector import BaseDataCollector
+from geocoding import OpenStreetMapGeocoder
+from response_archive import archive_response
+
+# Local ACS block-group radius summaries (optional, needs shapely and scipy)
+try:
+    from block_group_index import BlockGroupIndex
+    from demographic_summary_engine import DemographicSummaryEngine
+    DEMOGRAPHIC_ENGINE_AVAILABLE = True
+except ImportError:
+    DEMOGRAPHIC_ENGINE_AVAILABLE = False
+
+# Census API `for` geography -> geo_level of _parse_census_response
+CENSUS_GEO_LEVELS = {'county': 'county', 'tract': 'tract', 'block group': 'block_group'}
 
 
 class CensusDataCollector:
@@ -284,6 +298,8 @@ class CensusDataCollector:
             try:
                 response = requests.get(url, params=params, timeout=30)
                 response.raise_for_status()
+                archive_response('census_acs', response.content,
+                                 {'url': url, 'params': params, 'acs_year': acs_year})
                 
                 data = response.json()
                 return data
@@ -504,6 +520,8 @@ class CensusDataCollector:
                                 geography: str, state: str) -> Optional[List[List[str]]]:
         """Make API request to Census Population Estimates Program"""
         
+        requested_year = pep_year
+        
         # Use 2019 PEP API (most recent year with full county support)
         if pep_year >= 2020:
             pep_year = 2019
@@ -523,6 +541,8 @@ class CensusDataCollector:
             try:
                 response = requests.get(url, params=params, timeout=30)
                 response.raise_for_status()
+                archive_response('census_pep', response.content,
+                                 {'url': url, 'params': params, 'pep_year': requested_year})
                 
                 data = response.json()
                 return data
@@ -615,20 +635,76 @@ class CensusDataCollector:
         
         return updated_records
     
-    def get_demographic_summary(self, location: str, radius_miles: float = 5.0) -> Dict[str, Any]:
+    def get_demographic_summary(self, location, radius_miles=5.0) -> Dict[str, Any]:
         """
         Get demographic summary for a specific location
         
         Args:
-            location: Address or lat/lng
-            radius_miles: Radius for demographic analysis
+            location: Address, "lat,lng" string or (lat, lng) tuple
+            radius_miles: Radius for demographic analysis, or a list of radii
             
         Returns:
-            Dictionary with demographic summary
+            Dictionary with demographic summary ({radius: summary} when several radii are given)
+        """
+        radii = list(radius_miles) if isinstance(radius_miles, (list, tuple)) else [radius_miles]
+        engine = self._get_summary_engine()
+        point = self._resolve_location(location) if engine is not None else None
+        
+        if engine is None or point is None:
+            empty = {radius: self._empty_demographic_summary(location, radius) for radius in radii}
+            return empty if len(radii) > 1 else empty[radii[0]]
+        
+        summaries = engine.summarize(point[0], point[1], radii)
+        for summary in summaries.values():
+            summary['location'] = location
+        return summaries if len(radii) > 1 else summaries[float(radii[0])]
+    
+    def get_demographic_summaries(self, points: List[Tuple[float, float]],
+                                  radii: List[float] = (1.0, 3.0, 5.0)) -> List[Dict[float, Dict[str, Any]]]:
         """
-        # This would integrate with geocoding and spatial analysis
-        # For now, return placeholder structure
+        Demographic summaries for many (lat, lng) sites at several radii in one vectorized pass
+        
+        Returns one {radius: summary} dict per site.
+        """
+        engine = self._get_summary_engine()
+        if engine is None:
+            return [{float(radius): self._empty_demographic_summary(f"{lat},{lng}", radius) for radius in radii}
+                    for lat, lng in points]
+        return engine.summarize_many(points, radii)
+    
+    def _get_summary_engine(self):
+        """Radius summary engine over the local block-group store, built on first use"""
+        if not DEMOGRAPHIC_ENGINE_AVAILABLE:
+            self.logger.warning("shapely/scipy not installed; radius summaries unavailable")
+            return None
+        if getattr(self, '_summary_engine', None) is None:
+            index = BlockGroupIndex.open_default()
+            if index is None:
+                self.logger.warning("Block-group index not built; run block_group_index.py for radius summaries")
+                return None
+            self._summary_engine = DemographicSummaryEngine(index)
+        return self._summary_engine
+    
+    def _resolve_location(self, location) -> Optional[Tuple[float, float]]:
+        """(lat, lng) from a tuple, a "lat,lng" string, or a geocoded address"""
+        if isinstance(location, (list, tuple)) and len(location) == 2:
+            return float(location[0]), float(location[1])
+        
+        parts = str(location).split(',')
+        if len(parts) == 2:
+            try:
+                return float(parts[0]), float(parts[1])
+            except ValueError:
+                pass
         
+        result = OpenStreetMapGeocoder().geocode_address(str(location), "", "WI")
+        if not result.success:
+            self.logger.warning(f"Could not geocode location for demographic summary: {location}")
+            return None
+        return result.latitude, result.longitude
+    
+    def _empty_demographic_summary(self, location, radius_miles: float) -> Dict[str, Any]:
+        """Summary structure with no values, used when local data is unavailable"""
         return {
             'location': location,
             'radius_miles': radius_miles,
@@ -656,3 +732,30 @@ class CensusDataCollector:
             'last_updated': datetime.now().isoformat()
         }
     
+
+
+_reprocess_collector = None
+
+def _reprocessing_collector() -> CensusDataCollector:
+    global _reprocess_collector
+    if _reprocess_collector is None:
+        _reprocess_collector = CensusDataCollector()
+    return _reprocess_collector
+
+def reprocess_acs_response(payload: bytes, request: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """CensusGeography records of an archived ACS response (response archive reprocessor)"""
+    collector = _reprocessing_collector()
+    params = request['params']
+    variables = params['get'].split(',')
+    geo_level = CENSUS_GEO_LEVELS[params['for'].split(':')[0]]
+    records = (collector._parse_census_response(row, variables, geo_level, request['acs_year'])
+               for row in json.loads(payload)[1:])  # Skip header
+    return [record.model_dump() for record in records if record]
+
+def reprocess_pep_response(payload: bytes, request: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """County population estimates of an archived PEP response (response archive reprocessor)"""
+    collector = _reprocessing_collector()
+    variables = request['params']['get'].split(',')
+    estimates = (collector._parse_pep_response(row, variables, request['pep_year'])
+                 for row in json.loads(payload)[1:])  # Skip header
+    return [estimate for estimate in estimates if estimate]
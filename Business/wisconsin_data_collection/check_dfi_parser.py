@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Check DFI Results Parser Backends
+=================================
+
+Equivalence and throughput check for dfi_results_parser.py. Every installed
+backend must return exactly what the BeautifulSoup reference backend returns
+for the saved DFI response pages (dfi_*.html), with and without a
+max_results cut-off. A large results page built from the saved result rows
+is then parsed repeatedly by each backend; the check fails if the fastest
+backend is not at least --min-speedup times faster than the reference.
+
+Usage:
+    python check_dfi_parser.py [--rows 1000] [--seconds 2] [--min-speedup 10]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from dfi_results_parser import available_backends, get_results_parser
+
+REFERENCE_BACKEND = "beautifulsoup"
+RESULTS_FIXTURE = "dfi_simple_search_results.html"
+
+
+def fixtures(module_dir: Path) -> List[Path]:
+    """Saved DFI responses (with and without a results table)"""
+    return sorted(module_dir.glob("dfi_*.html"))
+
+
+def check_equivalence(pages: List[Path], backends: List[str]) -> List[str]:
+    """Compare every backend with the reference on every fixture"""
+    reference = get_results_parser(REFERENCE_BACKEND)
+    failures = []
+    for page in pages:
+        html = page.read_bytes()
+        differing = set()
+        for max_results in (None, 5):
+            expected = reference.parse(html, max_results)
+            for backend in backends:
+                actual = get_results_parser(backend).parse(html, max_results)
+                if actual != expected:
+                    differing.add(backend)
+                    failures.append(f"{backend} differs from {REFERENCE_BACKEND} on {page.name} "
+                                    f"(max_results={max_results})")
+        rows = expected[1] if expected else 0
+        print(f"🔎 {page.name}: {rows} result rows, "
+              f"{len(backends) - len(differing)}/{len(backends)} backend(s) match the reference")
+    return failures
+
+
+def large_page(module_dir: Path, rows: int) -> bytes:
+    """The saved results page with its result rows repeated to about `rows` rows"""
+    html = (module_dir / RESULTS_FIXTURE).read_bytes()
+    table = html.find(b'id="results"')
+    first_row = html.find(b'<tr', html.find(b'</tr>', table))
+    end = html.find(b'</table>', first_row)
+    body = html[first_row:end]
+    copies = max(1, rows // max(1, body.count(b'<tr')))
+    return html[:first_row] + body * copies + html[end:]
+
+
+def benchmark(html: bytes, backends: List[str], seconds: float) -> Dict[str, float]:
+    """Result rows parsed per second by each backend"""
+    throughput = {}
+    for backend in backends:
+        parser = get_results_parser(backend)
+        runs, start = 0, time.perf_counter()
+        while True:
+            _, row_count = parser.parse(html)
+            runs += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= seconds:
+                break
+        throughput[backend] = row_count * runs / elapsed
+        print(f"⏱️  {backend:14} {elapsed / runs * 1000:8.1f} ms/page {throughput[backend]:12,.0f} rows/s")
+    return throughput
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DFI results parser equivalence and throughput check")
+    parser.add_argument("--rows", type=int, default=1000, help="Result rows in the benchmark page")
+    parser.add_argument("--seconds", type=float, default=2.0, help="Benchmark time per backend")
+    parser.add_argument("--min-speedup", type=float, default=10.0,
+                        help="Required speedup of the fastest backend over the reference")
+    args = parser.parse_args()
+
+    module_dir = Path(__file__).resolve().parent
+    backends = available_backends()
+    if REFERENCE_BACKEND not in backends:
+        print(f"❌ The {REFERENCE_BACKEND} reference backend is not installed")
+        sys.exit(1)
+    fast_backends = [backend for backend in backends if backend != REFERENCE_BACKEND]
+    print(f"📦 Installed backends: {', '.join(backends)}")
+
+    failures = check_equivalence(fixtures(module_dir), fast_backends)
+
+    html = large_page(module_dir, args.rows)
+    throughput = benchmark(html, backends, args.seconds)
+    if fast_backends:
+        fastest = max(fast_backends, key=throughput.get)
+        speedup = throughput[fastest] / throughput[REFERENCE_BACKEND]
+        print(f"🚀 {fastest} is {speedup:.1f}x the {REFERENCE_BACKEND} reference")
+        if speedup < args.min_speedup:
+            failures.append(f"{fastest} speedup {speedup:.1f}x < {args.min_speedup:.0f}x")
+    else:
+        print("⚠️  No fast backend installed (pip install selectolax or lxml); speedup not checked")
+
+    if failures:
+        print("❌ DFI parser check failed:")
+        for failure in failures:
+            print(f"   - {failure}")
+        sys.exit(1)
+    print("✅ DFI parser check passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Check Analysis Engine Import Time
+=================================
+
+Startup-time regression check for UNIVERSAL_BUSINESS_ANALYSIS_ENGINE.py.
+Runs `python -X importtime` on the engine module and fails if its cumulative
+import time exceeds the budget, or if any heavy analysis dependency is pulled
+in before a section actually runs. Also times `--list-projects` end to end.
+
+Usage:
+    python check_import_time.py [--budget-ms 300] [--cli-budget-ms 1000]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ENGINE_MODULE = "UNIVERSAL_BUSINESS_ANALYSIS_ENGINE"
+
+# Modules that must only load when an analyzer section runs
+HEAVY_MODULES = [
+    "matplotlib", "seaborn", "networkx", "pandas", "numpy",
+    "geopy", "shapely", "google.cloud.bigquery", "requests",
+]
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """Parse `-X importtime` output into {module: cumulative microseconds}"""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative[parts[2].strip()] = int(parts[1].strip())
+        except ValueError:
+            continue
+    return cumulative
+
+
+def measure_import(module_dir: Path) -> Dict[str, int]:
+    """Import the engine in a fresh interpreter with -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {ENGINE_MODULE}"],
+        capture_output=True, text=True, cwd=str(module_dir)
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {ENGINE_MODULE} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def measure_list_projects(module_dir: Path) -> float:
+    """Wall-clock seconds for `--list-projects` in an empty working directory"""
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ, PYTHONPATH=str(module_dir))
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, str(module_dir / f"{ENGINE_MODULE}.py"), "--list-projects"],
+            capture_output=True, text=True, cwd=workdir, env=env
+        )
+        elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"--list-projects failed:\n{result.stderr[-2000:]}")
+    return elapsed
+
+
+def check_import_time(budget_ms: float, cli_budget_ms: float) -> List[str]:
+    """Run all startup checks, returning a list of failures"""
+    module_dir = Path(__file__).resolve().parent
+    failures = []
+
+    timings = measure_import(module_dir)
+    engine_ms = timings.get(ENGINE_MODULE, 0) / 1000
+    print(f"⏱️  {ENGINE_MODULE} cumulative import: {engine_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+    if engine_ms > budget_ms:
+        failures.append(f"engine import took {engine_ms:.1f} ms > {budget_ms:.0f} ms")
+
+    loaded_heavy = sorted(
+        heavy for heavy in HEAVY_MODULES
+        if any(name == heavy or name.startswith(heavy + ".") for name in timings)
+    )
+    if loaded_heavy:
+        failures.append(f"heavy modules imported at startup: {', '.join(loaded_heavy)}")
+    else:
+        print("✅ No heavy analysis dependencies imported at startup")
+
+    cli_ms = measure_list_projects(module_dir) * 1000
+    print(f"⏱️  --list-projects wall clock: {cli_ms:.1f} ms (budget {cli_budget_ms:.0f} ms)")
+    if cli_ms > cli_budget_ms:
+        failures.append(f"--list-projects took {cli_ms:.1f} ms > {cli_budget_ms:.0f} ms")
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analysis engine startup-time regression check")
+    parser.add_argument("--budget-ms", type=float, default=300.0,
+                        help="Max cumulative import time of the engine module")
+    parser.add_argument("--cli-budget-ms", type=float, default=1000.0,
+                        help="Max wall-clock time for --list-projects")
+    args = parser.parse_args()
+
+    failures = check_import_time(args.budget_ms, args.cli_budget_ms)
+    if failures:
+        print("❌ Startup-time check failed:")
+        for failure in failures:
+            print(f"   - {failure}")
+        sys.exit(1)
+    print("✅ Startup-time check passed")
+
+
+if __name__ == "__main__":
+    main()
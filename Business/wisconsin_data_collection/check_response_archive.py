@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Check Response Archive
+======================
+
+Round-trip and reprocessing check for response_archive.py. Payloads of every
+supported type are archived in a temporary archive and read back (zstd and
+gzip blobs alike); identical content must be stored once and secrets must
+never reach the index. The saved DFI response pages (dfi_*.html) are then
+archived as dfi_search fetches and replayed through the registered parser on
+worker processes; the records must equal a direct parse of the same pages.
+A reprocess with an unimportable parser must report failures, not abort.
+
+Usage:
+    python check_response_archive.py [--workers 2]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import List
+
+import response_archive
+from response_archive import ResponseArchive, ZSTD_AVAILABLE, reprocess
+
+ARCHIVE_FIELDS = ('archive_fetched_at', 'archive_request_key')
+
+
+def check_round_trip(archive: ResponseArchive) -> List[str]:
+    """Archive payloads of every type, read them back and check deduplication and scrubbing"""
+    failures = []
+    compressions = ['zstd', 'gzip'] if ZSTD_AVAILABLE else ['gzip']
+    archived = []
+    for compression in compressions:
+        # Distinct content per compression, so each round writes its own blobs
+        payloads = [b'\x00raw bytes\xff' + compression.encode(), f'text payload é {compression}',
+                    {'rows': [1, 2, 3], 'name': compression}, [[compression], 1]]
+        response_archive.ZSTD_AVAILABLE = compression == 'zstd'
+        try:
+            for number, payload in enumerate(payloads):
+                source = f"roundtrip_{compression}"
+                entry = archive.put(source, payload, {'page': number, 'api_key': 'secret',
+                                                      'nested': {'token': 'secret', 'q': 'x'}})
+                archive.put(source, payload, {'page': number})  # same content, second fetch
+                archived.append((source, number, payload, entry))
+        finally:
+            response_archive.ZSTD_AVAILABLE = ZSTD_AVAILABLE
+
+    for source, number, payload, entry in archived:
+        if archive.get(entry.digest) != response_archive._as_bytes(payload):
+            failures.append(f"{source}: payload {number} does not round-trip")
+        if 'secret' in str(entry.request):
+            failures.append(f"{source}: secret kept in request {entry.request}")
+
+    for source, counts in archive.stats().items():
+        print(f"🔎 {source}: {counts['fetches']} fetches, {counts['payloads']} payloads")
+        if counts['payloads'] * 2 != counts['fetches']:
+            failures.append(f"{source}: {counts['payloads']} blobs for {counts['fetches'] // 2} distinct payloads")
+    index_text = ''.join(path.read_text() for path in (archive.root / "index").glob("*.jsonl"))
+    if 'secret' in index_text:
+        failures.append("a secret request parameter reached the index")
+    return failures
+
+
+def check_reprocessing(archive: ResponseArchive, pages: List[Path], workers: int) -> List[str]:
+    """Replay archived DFI pages on worker processes and compare with a direct parse"""
+    from dfi_collector import reprocess_search_page
+
+    failures = []
+    expected = []
+    for page in pages:
+        html = page.read_bytes()
+        request = {'keyword': page.stem, 'max_results': 100}
+        archive.put('dfi_search', html, request)
+        expected.extend(reprocess_search_page(html, request))
+
+    replayed = [record for batch in reprocess('dfi_search', archive, workers=workers, batch_size=1)
+                for record in batch]
+    if any(name not in record for record in replayed for name in ARCHIVE_FIELDS):
+        failures.append("reprocessed records lack archive provenance fields")
+    stripped = [{k: v for k, v in record.items() if k not in ARCHIVE_FIELDS} for record in replayed]
+    key = lambda record: (record.get('business_id') or '', record.get('business_name') or '')
+    if sorted(stripped, key=key) != sorted(expected, key=key):
+        failures.append(f"reprocessing returned {len(stripped)} records, direct parse {len(expected)}")
+    print(f"🔁 dfi_search: {len(pages)} archived pages replayed into {len(replayed)} records")
+
+    try:
+        broken = [record for batch in reprocess('dfi_search', archive, workers=workers,
+                                                parser='no_such_module:parse')
+                  for record in batch]
+        if broken:
+            failures.append("an unimportable parser produced records")
+    except Exception as e:
+        failures.append(f"an unimportable parser aborted the reprocess run: {e}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response archive round-trip and reprocessing check")
+    parser.add_argument("--workers", type=int, default=2, help="Reprocessing worker processes")
+    args = parser.parse_args()
+
+    module_dir = Path(__file__).resolve().parent
+    os.chdir(module_dir)  # collectors read data_sources.yaml from the working directory
+    print(f"📦 Compression: {'zstd and gzip' if ZSTD_AVAILABLE else 'gzip (zstandard not installed)'}")
+
+    failures = []
+    with tempfile.TemporaryDirectory() as root:
+        failures += check_round_trip(ResponseArchive(os.path.join(root, "roundtrip")))
+        failures += check_reprocessing(ResponseArchive(os.path.join(root, "replay")),
+                                       sorted(module_dir.glob("dfi_*.html")), args.workers)
+
+    if failures:
+        print("❌ Response archive check failed:")
+        for failure in failures:
+            print(f"   - {failure}")
+        sys.exit(1)
+    print("✅ Response archive check passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,12 @@ Usage:
     python comprehensive_data_refresh.py --dfi-only      # DFI registrations only
     python comprehensive_data_refresh.py --census-only   # Census data only
     python comprehensive_data_refresh.py --all           # Force refresh everything
+
+Refreshes run through the refresh orchestrator: independent sources load in
+parallel (one request stream per API host), sources refreshed within their
+update_frequency are skipped unless --force is given, and a failed run
+resumes with the unfinished tasks on the next invocation (--no-resume to
+start over).
 """
 
 import os
@@ -21,7 +27,9 @@ import sys
 import argparse
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+import yaml
 
 # Add current directory to path
 sys.path.append('.')
@@ -32,6 +40,22 @@ from census_collector import CensusDataCollector
 from collect_census_2013_2023 import collect_acs_year, collect_pep_2019, store_to_bigquery
 from bls_collector import BLSDataCollector
 from google.cloud import bigquery
+from refresh_orchestrator import RefreshOrchestrator, RefreshTask
+
+# Task selections of the scheduled refresh types
+REFRESH_SELECTIONS = {
+    'weekly': ['dfi'],
+    'monthly': ['dfi', 'bls_current', 'sba_check', 'licenses_check'],
+    'quarterly': ['dfi', 'census_current', 'bls_current', 'sba_check', 'licenses_check'],
+    'annual': ['dfi', 'census_current', 'census_historical', 'population_estimates',
+               'bls_historical', 'sba_check', 'licenses_check'],
+    'all': ['dfi', 'census_current', 'census_historical', 'population_estimates',
+            'bls_current', 'bls_historical', 'sba_check', 'licenses_check'],
+    'check_status': ['sba_check', 'licenses_check']
+}
+
+# Concurrent tasks per host (the public APIs are rate limited per key)
+HOST_LIMITS = {'apps.dfi.wi.gov': 1, 'api.census.gov': 1, 'api.bls.gov': 1, 'bigquery': 4}
 
 
 class ComprehensiveDataRefresh:
@@ -42,6 +66,9 @@ class ComprehensiveDataRefresh:
         self.client = bigquery.Client(project="location-optimizer-1")
         self.refresh_results = {}
         
+        with open('data_sources.yaml', 'r') as f:
+            self.sources_config = yaml.safe_load(f)['states']['wisconsin']
+        
     def setup_logging(self):
         """Setup comprehensive logging"""
         log_dir = '/workspaces/Test_for_Claude/Business/wisconsin_data_collection/logs'
@@ -392,6 +419,51 @@ class ComprehensiveDataRefresh:
             }
             return False
     
+    def _update_frequency(self, *path: str) -> Optional[str]:
+        """update_frequency of a source in data_sources.yaml"""
+        node = self.sources_config
+        for key in path:
+            node = node.get(key, {})
+        return node.get('update_frequency')
+    
+    def _dfi_last_loaded(self) -> Optional[datetime]:
+        """Latest DFI load in BigQuery (freshness probe)"""
+        query = """
+        SELECT MAX(created_at) AS last_update
+        FROM `location-optimizer-1.raw_business_data.dfi_business_registrations`
+        WHERE source = 'DFI'
+        """
+        rows = list(self.client.query(query).result())
+        return rows[0].last_update if rows else None
+    
+    def build_refresh_tasks(self) -> List[RefreshTask]:
+        """Every refresh as an orchestrator task with its dependencies and freshness rule"""
+        return [
+            RefreshTask('dfi', self.refresh_dfi_registrations, host='apps.dfi.wi.gov',
+                        update_frequency=self._update_frequency('business_registrations', 'primary'),
+                        last_updated=self._dfi_last_loaded),
+            RefreshTask('population_estimates', self.refresh_population_estimates,
+                        host='api.census.gov', update_frequency='annual'),
+            RefreshTask('census_current', self.refresh_census_current_year, host='api.census.gov',
+                        update_frequency=self._update_frequency('demographics', 'census_acs')),
+            RefreshTask('census_historical', self.refresh_historical_census, host='api.census.gov',
+                        update_frequency='annual'),
+            RefreshTask('bls_historical', self.refresh_bls_historical, host='api.bls.gov',
+                        update_frequency='annual'),
+            # Current-year figures replace the historical load's partial year
+            RefreshTask('bls_current', self.refresh_bls_current_year, depends_on=('bls_historical',),
+                        host='api.bls.gov', update_frequency='monthly'),
+            RefreshTask('sba_check', self.check_sba_loans_update, host='bigquery'),
+            RefreshTask('licenses_check', self.check_business_licenses_update, host='bigquery')
+        ]
+    
+    def run_refresh(self, selected: List[str], force: bool = False, resume: bool = True,
+                    max_workers: int = 4):
+        """Run the selected refresh tasks through the orchestrator"""
+        orchestrator = RefreshOrchestrator(self.build_refresh_tasks(), max_workers=max_workers,
+                                           host_limits=HOST_LIMITS)
+        return orchestrator.run(selected, force=force, resume=resume)
+    
     def print_refresh_summary(self):
         """Print summary of all refresh operations"""
         self.print_header("Data Refresh Summary")
@@ -447,77 +519,52 @@ def main():
     # Utility options
     parser.add_argument('--check-status', action='store_true',
                        help='Check status of all data sources without refreshing')
+    parser.add_argument('--force', action='store_true',
+                       help='Refresh even sources updated within their update frequency')
+    parser.add_argument('--no-resume', action='store_true',
+                       help='Start over instead of resuming an unfinished run')
+    parser.add_argument('--workers', type=int, default=4,
+                       help='Maximum refresh tasks running at once')
     
     args = parser.parse_args()
     
     # Initialize refresh system
     refresh_system = ComprehensiveDataRefresh()
     
-    # Determine refresh type
+    # Determine refresh type; single-source options always run their task
+    single_sources = [
+        (args.dfi_only, 'dfi'),
+        (args.census_only, 'census_current'),
+        (args.historical_census, 'census_historical'),
+        (args.population_estimates, 'population_estimates'),
+        (args.bls_current, 'bls_current'),
+        (args.bls_historical, 'bls_historical')
+    ]
+    force = args.force
     if args.check_status:
         refresh_system.print_header("Data Sources Status Check")
-        refresh_system.check_sba_loans_update()
-        refresh_system.check_business_licenses_update()
-        
-    elif args.dfi_only:
-        refresh_system.refresh_dfi_registrations()
-        
-    elif args.census_only:
-        refresh_system.refresh_census_current_year()
-        
-    elif args.historical_census:
-        refresh_system.refresh_historical_census()
-        
-    elif args.population_estimates:
-        refresh_system.refresh_population_estimates()
-        
-    elif args.bls_current:
-        refresh_system.refresh_bls_current_year()
-        
-    elif args.bls_historical:
-        refresh_system.refresh_bls_historical()
-        
+        selected = REFRESH_SELECTIONS['check_status']
+    elif any(flag for flag, _ in single_sources):
+        selected = [next(task for flag, task in single_sources if flag)]
+        force = True
     elif args.all:
         refresh_system.print_header("FULL DATA REFRESH - ALL SOURCES")
-        print("⚠️  This will take 60-90 minutes to complete")
-        refresh_system.refresh_dfi_registrations()
-        refresh_system.refresh_census_current_year()
-        refresh_system.refresh_historical_census()
-        refresh_system.refresh_population_estimates()
-        refresh_system.refresh_bls_current_year()
-        refresh_system.refresh_bls_historical()
-        refresh_system.check_sba_loans_update()
-        refresh_system.check_business_licenses_update()
-        
+        selected, force = REFRESH_SELECTIONS['all'], True
     elif args.annual:
         refresh_system.print_header("ANNUAL DATA REFRESH")
-        print("⚠️  This will take 60-90 minutes to complete")
-        refresh_system.refresh_dfi_registrations()
-        refresh_system.refresh_census_current_year()
-        refresh_system.refresh_historical_census()
-        refresh_system.refresh_population_estimates()
-        refresh_system.refresh_bls_historical()
-        refresh_system.check_sba_loans_update()
-        refresh_system.check_business_licenses_update()
-        
+        selected = REFRESH_SELECTIONS['annual']
     elif args.quarterly:
         refresh_system.print_header("QUARTERLY DATA REFRESH")
-        refresh_system.refresh_dfi_registrations()
-        refresh_system.refresh_census_current_year()
-        refresh_system.refresh_bls_current_year()
-        refresh_system.check_sba_loans_update()
-        refresh_system.check_business_licenses_update()
-        
+        selected = REFRESH_SELECTIONS['quarterly']
     elif args.monthly:
         refresh_system.print_header("MONTHLY DATA REFRESH")
-        refresh_system.refresh_dfi_registrations()
-        refresh_system.refresh_bls_current_year()
-        refresh_system.check_sba_loans_update()
-        refresh_system.check_business_licenses_update()
-        
+        selected = REFRESH_SELECTIONS['monthly']
     else:  # Default: weekly
         refresh_system.print_header("WEEKLY DATA REFRESH (Default)")
-        refresh_system.refresh_dfi_registrations()
+        selected = REFRESH_SELECTIONS['weekly']
+    
+    refresh_system.run_refresh(selected, force=force, resume=not args.no_resume,
+                               max_workers=args.workers)
     
     # Print summary
     refresh_system.print_refresh_summary()
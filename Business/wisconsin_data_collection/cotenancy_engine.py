@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Co-tenancy Engine
+=================
+
+Local spatial join that mines which business types locate near each other.
+Businesses are hashed into square grid cells one distance threshold wide, so
+every pair within the threshold sits in the same or an adjacent cell. Only
+those cell pairs are compared, and type-pair counts, distance sums and
+neighbour-presence flags are accumulated with NumPy for several distance
+thresholds in a single pass.
+
+Features:
+- Grid-hash join (~250 m cells) instead of a quadratic self-join
+- Multiple distance thresholds per run
+- Pair counts, mean distances, lift and confidence per type pair
+- Works on the OSM business index or any DataFrame of typed points (e.g. Places)
+"""
+
+import logging
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Any, Sequence, Tuple
+
+import numpy as np
+
+from road_graph import EARTH_RADIUS_MILES, haversine_miles
+
+logger = logging.getLogger(__name__)
+
+METERS_PER_MILE = 1609.344
+METERS_PER_DEGREE = EARTH_RADIUS_MILES * METERS_PER_MILE * math.pi / 180
+
+# Neighbour offsets that visit each unordered pair of adjacent cells exactly once
+HALF_NEIGHBORHOOD = ((0, 0), (0, 1), (1, -1), (1, 0), (1, 1))
+
+
+@dataclass
+class CotenancyResult:
+    """Type-pair statistics per distance threshold (arrays are [threshold, type, type])"""
+    types: np.ndarray
+    type_counts: np.ndarray
+    thresholds_meters: Tuple[float, ...]
+    pair_counts: np.ndarray          # Ordered pairs: [t, a, b] == [t, b, a]
+    mean_distance: np.ndarray        # Meters, NaN where no pairs
+    lift: np.ndarray                 # Observed / expected pairs under random type assignment
+    confidence: np.ndarray           # Share of type-a businesses with a type-b neighbour
+
+    def threshold_index(self, threshold_meters: float) -> int:
+        return self.thresholds_meters.index(float(threshold_meters))
+
+    def top_pairs(self, threshold_meters: float = None, min_count: int = 5,
+                  sort_by: str = 'frequency', include_same_type: bool = True) -> List[Dict[str, Any]]:
+        """Unordered type pairs at one threshold, most frequent (or highest lift) first"""
+        t = self.threshold_index(threshold_meters) if threshold_meters is not None else 0
+        counts = self.pair_counts[t]
+        a, b = np.triu_indices(self.types.size, k=0 if include_same_type else 1)
+        # Same-type pairs are counted in both orders on the diagonal
+        frequency = np.where(a == b, counts[a, b] // 2, counts[a, b])
+        keep = frequency >= min_count
+        a, b, frequency = a[keep], b[keep], frequency[keep]
+
+        rows = [{
+            'type_1': str(self.types[i]),
+            'type_2': str(self.types[j]),
+            'frequency': int(f),
+            'avg_distance_meters': round(float(self.mean_distance[t, i, j]), 1),
+            'lift': round(float(self.lift[t, i, j]), 3),
+            'confidence_1_to_2': round(float(self.confidence[t, i, j]), 3),
+            'confidence_2_to_1': round(float(self.confidence[t, j, i]), 3),
+            'threshold_meters': self.thresholds_meters[t]
+        } for i, j, f in zip(a, b, frequency)]
+        key = 'lift' if sort_by == 'lift' else 'frequency'
+        return sorted(rows, key=lambda row: row[key], reverse=True)
+
+
+class CotenancyEngine:
+    """Grid-hash co-tenancy mining over typed business locations"""
+
+    def __init__(self, lat: np.ndarray, lon: np.ndarray, business_types: Sequence[str],
+                 groups: Sequence[str] = None, chunk_pairs: int = 5_000_000):
+        valid = ~(np.isnan(np.asarray(lat, dtype=float)) | np.isnan(np.asarray(lon, dtype=float)))
+        self.lat = np.asarray(lat, dtype=float)[valid]
+        self.lon = np.asarray(lon, dtype=float)[valid]
+        self.types, self.type_codes = np.unique(np.asarray(business_types).astype(str)[valid], return_inverse=True)
+        self.group_codes = self._group_codes(np.asarray(groups)[valid]) if groups is not None else None
+        self.chunk_pairs = chunk_pairs
+
+    @staticmethod
+    def _group_codes(groups: np.ndarray) -> np.ndarray:
+        """Integer group codes; empty or missing groups get -1, which matches no group"""
+        names = np.array([str(g).strip() if g is not None else '' for g in groups], dtype=object)
+        missing = np.isin(names, ['', 'None', 'nan', 'NaN', '<NA>'])
+        codes = np.full(names.size, -1, dtype=np.int64)
+        if (~missing).any():
+            codes[~missing] = np.unique(names[~missing].astype(str), return_inverse=True)[1]
+        return codes
+
+    @classmethod
+    def from_business_index(cls, index, group_by_city: bool = False) -> 'CotenancyEngine':
+        """Engine over an OSMBusinessIndex"""
+        groups = index.columns['address_city'] if group_by_city else None
+        return cls(index.lat, index.lon, index.columns['business_type'], groups)
+
+    @classmethod
+    def from_dataframe(cls, df, type_column: str, lat_column: str = 'latitude',
+                       lon_column: str = 'longitude', group_column: str = None) -> 'CotenancyEngine':
+        """Engine over any DataFrame of typed points (e.g. Places with primary_type)"""
+        df = df.dropna(subset=[type_column, lat_column, lon_column])
+        groups = df[group_column].fillna('') if group_column else None
+        return cls(df[lat_column].to_numpy(float), df[lon_column].to_numpy(float), df[type_column], groups)
+
+    def __len__(self) -> int:
+        return int(self.lat.size)
+
+    # ------------------------------------------------------------------- join
+
+    def _cells(self, cell_meters: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Integer (row, col) grid cell of every business"""
+        mean_lat = float(np.mean(self.lat)) if self.lat.size else 0.0
+        # Cells are widened by the worst east-west scale error across the data's latitude span
+        scale = math.cos(math.radians(mean_lat))
+        worst = max(abs(math.cos(math.radians(float(self.lat.min()))) / scale - 1.0),
+                    abs(math.cos(math.radians(float(self.lat.max()))) / scale - 1.0)) if self.lat.size else 0.0
+        size = cell_meters * (1.0 + worst) * 1.01
+        rows = np.floor(self.lat * METERS_PER_DEGREE / size).astype(np.int64)
+        cols = np.floor(self.lon * METERS_PER_DEGREE * scale / size).astype(np.int64)
+        return rows, cols
+
+    def candidate_pairs(self, cell_meters: float):
+        """Yield chunks of (i, j) index pairs, i != j, from the same or adjacent cells"""
+        if len(self) < 2:
+            return
+        rows, cols = self._cells(cell_meters)
+        # Column offsets stay far below 2**32, so (row, col) packs into one sortable key
+        keys = (rows << 32) + (cols - cols.min())
+        order = np.argsort(keys, kind='stable')
+        cell_keys, starts, sizes = np.unique(keys[order], return_index=True, return_counts=True)
+
+        for d_row, d_col in HALF_NEIGHBORHOOD:
+            wanted = cell_keys + (d_row << 32) + d_col
+            target = np.minimum(np.searchsorted(cell_keys, wanted), cell_keys.size - 1)
+            matched = cell_keys[target] == wanted
+            source, target = np.nonzero(matched)[0], target[matched]
+            counts = sizes[source] * sizes[target]
+
+            # Cell pairs are processed in chunks that keep the pair arrays bounded
+            chunk_of = (np.cumsum(counts) - counts) // self.chunk_pairs
+            for part in np.split(np.arange(source.size), np.flatnonzero(np.diff(chunk_of)) + 1):
+                src, dst, n = source[part], target[part], counts[part]
+                if n.sum() == 0:
+                    continue
+                pair_cell = np.repeat(np.arange(src.size), n)
+                offset = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+                i = order[starts[src][pair_cell] + offset // sizes[dst][pair_cell]]
+                j = order[starts[dst][pair_cell] + offset % sizes[dst][pair_cell]]
+                if d_row == 0 and d_col == 0:
+                    keep = i < j
+                    i, j = i[keep], j[keep]
+                yield i, j
+
+    # ---------------------------------------------------------------- metrics
+
+    def analyze(self, thresholds_meters: Sequence[float] = (250.0,), same_group_only: bool = False) -> CotenancyResult:
+        """Type-pair counts, mean distance, lift and confidence for every threshold in one join"""
+        thresholds = tuple(sorted(float(t) for t in thresholds_meters))
+        k = self.types.size
+        counts = np.zeros((len(thresholds), k * k))
+        distance_sums = np.zeros((len(thresholds), k * k))
+        neighbor_codes: List[List[np.ndarray]] = [[] for _ in thresholds]
+
+        for i, j in self.candidate_pairs(max(thresholds)):
+            if same_group_only and self.group_codes is not None:
+                same = (self.group_codes[i] == self.group_codes[j]) & (self.group_codes[i] >= 0)
+                i, j = i[same], j[same]
+            meters = haversine_miles(self.lat[i], self.lon[i], self.lat[j], self.lon[j]) * METERS_PER_MILE
+            within = meters <= thresholds[-1]
+            i, j, meters = i[within], j[within], meters[within]
+            ti, tj = self.type_codes[i], self.type_codes[j]
+
+            # Smallest threshold each pair satisfies; cumulative sums make larger thresholds inclusive
+            level = np.searchsorted(np.array(thresholds), meters, side='left')
+            for t in range(len(thresholds)):
+                mask = level <= t
+                forward = ti[mask] * k + tj[mask]
+                backward = tj[mask] * k + ti[mask]
+                codes = np.concatenate([forward, backward])
+                counts[t] += np.bincount(codes, minlength=k * k)
+                distance_sums[t] += np.bincount(codes, weights=np.concatenate([meters[mask], meters[mask]]),
+                                                minlength=k * k)
+                # (business, neighbour type) presence for confidence
+                neighbor_codes[t].append(np.unique(np.concatenate([i[mask] * k + tj[mask], j[mask] * k + ti[mask]])))
+
+        type_counts = np.bincount(self.type_codes, minlength=k).astype(float)
+        counts = counts.reshape(len(thresholds), k, k)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_distance = distance_sums.reshape(len(thresholds), k, k) / counts
+
+        n = float(len(self))
+        expected_share = np.outer(type_counts, type_counts) - np.diag(type_counts)
+        expected_share /= max(n * (n - 1), 1.0)
+        lift = np.zeros_like(counts)
+        confidence = np.zeros_like(counts)
+        for t in range(len(thresholds)):
+            total = counts[t].sum()
+            with np.errstate(invalid='ignore', divide='ignore'):
+                lift[t] = np.where(expected_share > 0, counts[t] / (total * expected_share), 0.0)
+            if neighbor_codes[t]:
+                present = np.unique(np.concatenate(neighbor_codes[t]))
+                business, neighbor_type = present // k, present % k
+                has_neighbor = np.bincount(self.type_codes[business] * k + neighbor_type, minlength=k * k)
+                confidence[t] = has_neighbor.reshape(k, k) / np.maximum(type_counts, 1.0)[:, None]
+        lift = np.nan_to_num(lift)
+
+        logger.info(f"Co-tenancy: {len(self):,} businesses, {k} types, "
+                    f"{int(counts[-1].sum() // 2):,} pairs within {thresholds[-1]:.0f} m")
+        return CotenancyResult(self.types, type_counts.astype(np.int64), thresholds,
+                               counts.astype(np.int64), mean_distance, lift, confidence)
@@ -14,6 +14,9 @@ from google.oauth2 import service_account
 from collections import defaultdict
 import json
 
+from cotenancy_engine import CotenancyEngine
+from osm_business_index import OSMBusinessIndex
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -43,6 +46,10 @@ class CotenancyAnalyzer:
             'medical': ['dental', 'medical', 'clinic', 'chiro', 'therapy', 'veterinary'],
             'retail_general': ['retail', 'store', 'shop', 'boutique', 'apparel', 'clothing']
         }
+
+        # Latest CotenancyResult from each local pair-mining run
+        self.osm_cotenancy = None
+        self.places_cotenancy = None
     
     def categorize_business(self, business_name: str) -> str:
         """Categorize a business based on its name"""
@@ -159,72 +166,59 @@ class CotenancyAnalyzer:
         
         return sorted(results, key=lambda x: x['success_score'], reverse=True)
     
-    def analyze_osm_cotenancy(self) -> List[Dict]:
+    def analyze_osm_cotenancy(self, thresholds_meters: Tuple[float, ...] = (100.0, 250.0, 400.0),
+                              min_pairs: int = 5) -> List[Dict]:
         """
         Analyze co-tenancy patterns from OpenStreetMap data
+
+        Pairs of businesses in the same city within 250 meters are mined locally
+        with the grid-hash join in cotenancy_engine. The full result for every
+        threshold (lift, confidence, mean distance) is kept on self.osm_cotenancy.
         """
         logger.info("Analyzing OSM data for current co-tenancy patterns...")
-        
-        # Check if OSM data exists
+
         try:
-            query = f"""
-            SELECT COUNT(*) as count
-            FROM `{PROJECT_ID}.raw_business_data.osm_businesses`
-            """
-            result = self.client.query(query).to_dataframe()
-            if result['count'][0] == 0:
-                logger.warning("No OSM data found. Skipping OSM analysis.")
-                return []
+            index = OSMBusinessIndex.load_or_fetch(self.client, PROJECT_ID)
         except Exception as e:
             logger.warning(f"OSM businesses table not found or error: {e}. Skipping OSM analysis.")
             return []
-        
-        # Query for businesses within 250 meters of each other
-        try:
-            cluster_query = f"""
-        WITH business_clusters AS (
-            SELECT 
-                a.name as business_a,
-                b.name as business_b,
-                a.amenity as type_a,
-                b.amenity as type_b,
-                a.city,
-                ST_DISTANCE(a.location, b.location) as distance_meters
-            FROM `{PROJECT_ID}.raw_business_data.osm_businesses` a
-            JOIN `{PROJECT_ID}.raw_business_data.osm_businesses` b
-                ON a.city = b.city
-                AND a.osm_id != b.osm_id
-                AND ST_DISTANCE(a.location, b.location) <= 250  -- Within 250 meters
-            WHERE a.state = 'Wisconsin'
-                AND b.state = 'Wisconsin'
-        )
-        SELECT 
-            type_a,
-            type_b,
-            COUNT(*) as pair_count,
-            AVG(distance_meters) as avg_distance
-        FROM business_clusters
-        GROUP BY type_a, type_b
-        HAVING pair_count >= 5
-        ORDER BY pair_count DESC
+        if len(index) == 0:
+            logger.warning("No OSM data found. Skipping OSM analysis.")
+            return []
+
+        engine = CotenancyEngine.from_business_index(index, group_by_city=True)
+        self.osm_cotenancy = engine.analyze(thresholds_meters, same_group_only=True)
+        threshold = 250.0 if 250.0 in self.osm_cotenancy.thresholds_meters else None
+        return self.osm_cotenancy.top_pairs(threshold, min_count=min_pairs)
+
+    def analyze_places_cotenancy(self, thresholds_meters: Tuple[float, ...] = (100.0, 250.0, 400.0),
+                                 min_pairs: int = 5) -> List[Dict]:
         """
-        
-            df = self.client.query(cluster_query).to_dataframe()
-            
-            results = []
-            for _, row in df.iterrows():
-                results.append({
-                    'type_1': row['type_a'],
-                    'type_2': row['type_b'],
-                    'frequency': row['pair_count'],
-                    'avg_distance_meters': row['avg_distance']
-                })
-            
-            return results
+        Analyze co-tenancy patterns from collected Google Places businesses
+        """
+        logger.info("Analyzing Google Places data for co-tenancy patterns...")
+
+        query = f"""
+        SELECT primary_type, city_name,
+               geometry_location_lat AS latitude, geometry_location_lng AS longitude
+        FROM `{PROJECT_ID}.raw_business_data.google_places_businesses`
+        WHERE primary_type IS NOT NULL
+            AND geometry_location_lat IS NOT NULL
+            AND geometry_location_lng IS NOT NULL
+        """
+        try:
+            df = self.client.query(query).to_dataframe()
         except Exception as e:
-            logger.warning(f"Error analyzing OSM cotenancy: {e}")
+            logger.warning(f"Error loading Google Places businesses: {e}")
             return []
-    
+        if df.empty:
+            return []
+
+        engine = CotenancyEngine.from_dataframe(df, 'primary_type', group_column='city_name')
+        self.places_cotenancy = engine.analyze(thresholds_meters, same_group_only=True)
+        threshold = 250.0 if 250.0 in self.places_cotenancy.thresholds_meters else None
+        return self.places_cotenancy.top_pairs(threshold, min_count=min_pairs)
+
     def generate_cotenancy_recommendations(self) -> Dict:
         """
         Generate comprehensive co-tenancy recommendations
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Demographic Summary Engine
+==========================
+
+Radius demographics around a point from locally stored ACS block-group data
+(see block_group_index). Block-group centroids sit in a KD-tree on 3-D unit
+vectors so radius searches are exact great-circle queries statewide. Block
+groups wholly inside a radius count in full, block groups straddling the
+edge are apportioned by the share of their area inside the circle, and
+medians are combined as weighted medians.
+
+Features:
+- Several radii per call from a single KD-tree search
+- Vectorized batches of many sites (one edge-intersection call per batch)
+- LRU cache keyed by (rounded point, radii, ACS year)
+- Output matches CensusDataCollector.get_demographic_summary
+"""
+
+import copy
+import logging
+import math
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
+from scipy.spatial import cKDTree
+
+from block_group_index import BlockGroupIndex, MEDIAN_ATTRIBUTES, weighted_median
+from isochrone_engine import circle_polygon
+from road_graph import chord_length, haversine_miles, unit_vectors
+
+logger = logging.getLogger(__name__)
+
+# Attributes that must be present for a block group to count as fully reported
+QUALITY_ATTRIBUTES = ('total_population', 'median_household_income', 'median_age', 'total_housing_units')
+
+
+@dataclass
+class DemographicSummaryConfig:
+    """Cache and geometry settings for radius summaries"""
+    coordinate_precision: int = 4     # Decimal places of the cache key (~11 m)
+    cache_size: int = 4096            # Cached (point, radii) summaries
+    circle_segments: int = 16         # Segments per quarter circle for edge apportionment
+
+
+class DemographicSummaryEngine:
+    """Multi-radius, batched demographic summaries over a BlockGroupIndex"""
+
+    def __init__(self, index: BlockGroupIndex, config: DemographicSummaryConfig = None):
+        self.index = index
+        self.config = config or DemographicSummaryConfig()
+        self._cache: 'OrderedDict[Tuple, Dict[float, Dict[str, Any]]]' = OrderedDict()
+
+        self.centroid_lat, self.centroid_lon = index.centroids
+        self.tree = cKDTree(unit_vectors(self.centroid_lat, self.centroid_lon))
+
+        # Farthest vertex from each centroid bounds which block groups a circle can touch
+        coords, owner = shapely.get_coordinates(index.geometries, return_index=True)
+        vertex_miles = haversine_miles(self.centroid_lat[owner], self.centroid_lon[owner],
+                                       coords[:, 1], coords[:, 0])
+        self.group_radius = np.zeros(len(index))
+        np.maximum.at(self.group_radius, owner, vertex_miles)
+        self.max_group_radius = float(self.group_radius.max()) if len(index) else 0.0
+
+    @property
+    def acs_year(self) -> Optional[int]:
+        return self.index.acs_year
+
+    # ------------------------------------------------------------------ public
+
+    def summarize(self, lat: float, lon: float, radii: Sequence[float] = (5.0,)) -> Dict[float, Dict[str, Any]]:
+        """{radius_miles: summary} for one point"""
+        return self.summarize_many([(lat, lon)], radii)[0]
+
+    def summarize_many(self, points: Sequence[Tuple[float, float]],
+                       radii: Sequence[float] = (5.0,)) -> List[Dict[float, Dict[str, Any]]]:
+        """
+        {radius_miles: summary} for each (lat, lon), computing only cache misses
+
+        Summaries are copies, so callers may modify them without touching the cache.
+        """
+        radii = tuple(sorted({float(r) for r in radii}))
+        keys = [self._cache_key(lat, lon, radii) for lat, lon in points]
+
+        missing = [i for i, key in enumerate(keys) if key not in self._cache]
+        if missing:
+            # Compute at the rounded point so cached and fresh answers agree
+            computed = self._compute([keys[i][:2] for i in missing], radii)
+            for i, summaries in zip(missing, computed):
+                self._remember(keys[i], summaries)
+
+        results = []
+        for key in keys:
+            self._cache.move_to_end(key)
+            results.append(copy.deepcopy(self._cache[key]))
+        return results
+
+    # ------------------------------------------------------------------- cache
+
+    def _cache_key(self, lat: float, lon: float, radii: Tuple[float, ...]) -> Tuple:
+        precision = self.config.coordinate_precision
+        return (round(float(lat), precision), round(float(lon), precision), radii, self.acs_year)
+
+    def _remember(self, key: Tuple, summaries: Dict[float, Dict[str, Any]]):
+        self._cache[key] = summaries
+        while len(self._cache) > self.config.cache_size:
+            self._cache.popitem(last=False)
+
+    # ------------------------------------------------------------- computation
+
+    def _candidates(self, lat: np.ndarray, lon: np.ndarray, reach_miles: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(site, block group) pairs whose centroid lies within reach of each site"""
+        neighbors = self.tree.query_ball_point(unit_vectors(lat, lon), r=chord_length(reach_miles))
+        counts = np.array([len(found) for found in neighbors], dtype=np.int64)
+        sites = np.repeat(np.arange(lat.size), counts)
+        groups = (np.concatenate([np.asarray(found, dtype=np.int64) for found in neighbors])
+                  if counts.sum() else np.zeros(0, dtype=np.int64))
+        return sites, groups
+
+    def _compute(self, points: Sequence[Tuple[float, float]],
+                 radii: Tuple[float, ...]) -> List[Dict[float, Dict[str, Any]]]:
+        lat = np.array([p[0] for p in points], dtype=float)
+        lon = np.array([p[1] for p in points], dtype=float)
+        sites, groups = self._candidates(lat, lon, max(radii) + self.max_group_radius)
+        distance = haversine_miles(lat[sites], lon[sites], self.centroid_lat[groups], self.centroid_lon[groups])
+
+        # One (site, radius) slot per circle; fractions for every pair touching it
+        slot_parts, group_parts, fraction_parts = [], [], []
+        edge_slots, edge_groups, edge_positions = [], [], []
+        offset = 0
+        for r_index, radius in enumerate(radii):
+            inside = distance + self.group_radius[groups] <= radius
+            touching = distance - self.group_radius[groups] < radius
+            edge = touching & ~inside
+
+            slot = sites * len(radii) + r_index
+            slot_parts += [slot[inside], slot[edge]]
+            group_parts += [groups[inside], groups[edge]]
+            fraction_parts += [np.ones(int(inside.sum())), np.zeros(int(edge.sum()))]
+
+            start = offset + int(inside.sum())
+            edge_slots.append(slot[edge])
+            edge_groups.append(groups[edge])
+            edge_positions.append(np.arange(start, start + int(edge.sum())))
+            offset = start + int(edge.sum())
+
+        slots = np.concatenate(slot_parts)
+        pair_groups = np.concatenate(group_parts)
+        fractions = np.concatenate(fraction_parts)
+
+        edge_slots = np.concatenate(edge_slots)
+        if edge_slots.size:
+            edge_groups = np.concatenate(edge_groups)
+            circles = np.array([circle_polygon(lat[s], lon[s], radius, self.config.circle_segments)
+                                for s in range(lat.size) for radius in radii], dtype=object)
+            shapely.prepare(circles)
+            clipped = shapely.intersection(circles[edge_slots], self.index.geometries[edge_groups])
+            fractions[np.concatenate(edge_positions)] = np.clip(
+                shapely.area(clipped) / np.maximum(self.index.areas[edge_groups], 1e-15), 0.0, 1.0)
+
+        return self._summaries(lat, lon, radii, slots, pair_groups, fractions)
+
+    def _summaries(self, lat: np.ndarray, lon: np.ndarray, radii: Tuple[float, ...],
+                   slots: np.ndarray, groups: np.ndarray, fractions: np.ndarray) -> List[Dict[float, Dict[str, Any]]]:
+        attributes = self.index.attributes
+        slot_count = lat.size * len(radii)
+
+        totals = {}
+        for name, values in attributes.items():
+            if name not in MEDIAN_ATTRIBUTES:
+                totals[name] = np.bincount(slots, weights=np.nan_to_num(values[groups]) * fractions,
+                                           minlength=slot_count)
+
+        complete = np.ones(len(self.index), dtype=bool)
+        for name in QUALITY_ATTRIBUTES:
+            if name in attributes:
+                complete &= ~np.isnan(attributes[name])
+        population = np.nan_to_num(attributes['total_population'][groups]) * fractions
+        reported = np.bincount(slots, weights=population * complete[groups], minlength=slot_count)
+
+        order = np.argsort(slots, kind='stable')
+        bounds = np.searchsorted(slots[order], np.arange(slot_count + 1))
+
+        results = []
+        for site in range(lat.size):
+            summaries = {}
+            for r_index, radius in enumerate(radii):
+                slot = site * len(radii) + r_index
+                members = order[bounds[slot]:bounds[slot + 1]]
+                medians = {
+                    name: weighted_median(attributes[name][groups[members]],
+                                          np.nan_to_num(attributes[weight][groups[members]]) * fractions[members])
+                    for name, weight in MEDIAN_ATTRIBUTES.items() if name in attributes and weight in attributes
+                }
+                slot_totals = {name: float(values[slot]) for name, values in totals.items()}
+                summaries[radius] = self._format(lat[site], lon[site], radius, slot_totals, medians,
+                                                 reported[slot], int(members.size))
+            results.append(summaries)
+        return results
+
+    def _format(self, lat: float, lon: float, radius: float, totals: Dict[str, float],
+                medians: Dict[str, Optional[float]], reported_population: float,
+                block_groups: int) -> Dict[str, Any]:
+        """Summary dict in the shape returned by CensusDataCollector.get_demographic_summary"""
+        def ratio(numerator: str, denominator: str, scale: float = 100.0) -> Optional[float]:
+            if numerator not in totals or totals.get(denominator, 0.0) <= 0:
+                return None
+            return round(totals[numerator] / totals[denominator] * scale, 2)
+
+        population = totals.get('total_population', 0.0)
+        area_sq_miles = math.pi * radius ** 2
+        commuters_away = totals.get('total_commuters', 0.0) - totals.get('worked_from_home', 0.0)
+        avg_commute = (round(totals['aggregate_travel_time'] / commuters_away, 1)
+                       if 'aggregate_travel_time' in totals and commuters_away > 0 else None)
+
+        return {
+            'location': f"{lat:.6f},{lon:.6f}",
+            'radius_miles': radius,
+            'population': {
+                'total': int(round(population)),
+                'density': round(population / area_sq_miles, 1),
+                'median_age': medians.get('median_age'),
+                'households': int(round(totals.get('total_households', 0.0)))
+            },
+            'economic': {
+                'median_income': medians.get('median_household_income'),
+                'unemployment_rate': ratio('unemployment_count', 'labor_force')
+            },
+            'education': {
+                'bachelor_degree_pct': ratio('bachelor_degree_count', 'total_education_pop')
+            },
+            'housing': {
+                'total_units': int(round(totals['total_housing_units'])) if 'total_housing_units' in totals else None,
+                'owner_occupied_pct': ratio('owner_occupied_units', 'occupied_housing_units')
+            },
+            'transportation': {
+                'avg_commute_time': avg_commute,
+                'public_transport_pct': ratio('public_transport_commuters', 'total_commuters')
+            },
+            'block_groups': block_groups,
+            'acs_year': self.acs_year,
+            'data_quality_score': round(reported_population / population, 3) if population > 0 else 0.0,
+            'last_updated': datetime.now().isoformat()
+        }
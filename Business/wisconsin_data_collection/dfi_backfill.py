@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+DFI Backfill Engine
+===================
+
+Resumable historical backfill of Wisconsin DFI business registrations. The
+(date window x keyword) search space is materialized as a work queue on disk
+and processed by a small worker pool that shares one polite request pace.
+Each shard is de-duplicated and flushed to the loader as soon as it finishes,
+so an interrupted backfill resumes from the last completed shard instead of
+starting over. Windows whose searches hit max_results are split in half until
+they fit, so no window is silently truncated.
+
+Features:
+- Work queue of keyword/date-window shards checkpointed under data_cache/dfi_backfill
+- Worker pool with a shared requests-per-minute pace (one DFI session per worker)
+- Per-shard flush to the loader with cross-shard business_id de-duplication
+- Adaptive window splitting for searches that reach max_results
+- Failed shards retried, then left in the queue for the next run
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Any, Optional
+
+from dfi_collector import DFIBusinessCollector, DFIBusinessRecord
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_DIR = os.path.join("data_cache", "dfi_backfill")
+
+# DFI asks for no more than 5 requests per minute (data_sources.yaml rate_limit)
+DEFAULT_REQUESTS_PER_MINUTE = 5
+
+
+@dataclass
+class BackfillShard:
+    """One keyword search over one inclusive registration date window"""
+    keyword: str
+    start: str  # ISO dates
+    end: str
+    status: str = 'pending'  # pending, done, split, failed
+    rows: int = 0
+    found: int = 0
+    loaded: int = 0
+    attempts: int = 0
+    truncated: bool = False
+    error: Optional[str] = None
+
+    @property
+    def shard_id(self) -> str:
+        return f"{self.keyword}|{self.start}|{self.end}"
+
+    @property
+    def days(self) -> int:
+        return (date.fromisoformat(self.end) - date.fromisoformat(self.start)).days + 1
+
+    def halves(self) -> List['BackfillShard']:
+        """The window split into two pending shards"""
+        start = date.fromisoformat(self.start)
+        middle = start + timedelta(days=self.days // 2 - 1)
+        return [BackfillShard(self.keyword, self.start, middle.isoformat()),
+                BackfillShard(self.keyword, (middle + timedelta(days=1)).isoformat(), self.end)]
+
+
+class RequestPacer:
+    """Minimum spacing between requests, shared by every worker thread"""
+
+    def __init__(self, requests_per_minute: float):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class DFIBackfill:
+    """Sharded, checkpointed DFI registration backfill"""
+
+    def __init__(self, keywords: Iterable[str], start_date: date, end_date: date,
+                 loader: Callable[[List[DFIBusinessRecord]], int],
+                 window_days: int = 90, max_results: int = 100, workers: int = 3,
+                 requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+                 known_ids: Iterable[str] = (), max_attempts: int = 3,
+                 collector_factory: Callable[[], DFIBusinessCollector] = DFIBusinessCollector,
+                 name: str = 'historical', state_dir: str = DEFAULT_STATE_DIR):
+        """
+        Args:
+            loader: Loads one shard's new records, returning the number loaded
+                (raise to leave the shard for a retry)
+            known_ids: business_ids already stored, never passed to the loader
+            name: Queue name; an unfinished queue of that name with the same
+                keywords and search settings is resumed (keeping its dates)
+        """
+        self.keywords = list(keywords)
+        self.start_date = start_date.date() if isinstance(start_date, datetime) else start_date
+        self.end_date = end_date.date() if isinstance(end_date, datetime) else end_date
+        self.loader = loader
+        self.window_days = window_days
+        self.max_results = max_results
+        self.workers = workers
+        self.pacer = RequestPacer(requests_per_minute)
+        self.max_attempts = max_attempts
+        self.collector_factory = collector_factory
+
+        self.queue_path = Path(state_dir) / f"{name}.json"
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.loaded_ids = set(known_ids)
+        self.loaded_types: Counter = Counter()
+        self.loaded_years: Counter = Counter()
+        self.shards: List[BackfillShard] = self._load_queue()
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        return {'keywords': self.keywords, 'start': self.start_date.isoformat(),
+                'end': self.end_date.isoformat(), 'window_days': self.window_days,
+                'max_results': self.max_results}
+
+    # ------------------------------------------------------------------ queue
+
+    def _plan(self) -> List[BackfillShard]:
+        shards = []
+        window_start = self.start_date
+        while window_start <= self.end_date:
+            window_end = min(window_start + timedelta(days=self.window_days - 1), self.end_date)
+            shards.extend(BackfillShard(keyword, window_start.isoformat(), window_end.isoformat())
+                          for keyword in self.keywords)
+            window_start = window_end + timedelta(days=1)
+        return shards
+
+    def _load_queue(self) -> List[BackfillShard]:
+        if self.queue_path.exists():
+            try:
+                saved = json.loads(self.queue_path.read_text())
+                shards = [BackfillShard(**shard) for shard in saved['shards']]
+                params = saved['params']
+            except (OSError, ValueError, TypeError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable backfill queue {self.queue_path}: {e}")
+                return self._plan()
+            same_search = all(params[key] == self.params[key] for key in ('keywords', 'window_days', 'max_results'))
+            unfinished = any(shard.status in ('pending', 'failed') for shard in shards)
+            if same_search and unfinished:
+                self.start_date = date.fromisoformat(params['start'])
+                self.end_date = date.fromisoformat(params['end'])
+                logger.info(f"Resuming DFI backfill of {params['start']} - {params['end']} from {self.queue_path}")
+                return shards
+        return self._plan()
+
+    def _save_queue(self):
+        self.queue_path.parent.mkdir(parents=True, exist_ok=True)
+        partial = self.queue_path.with_suffix('.tmp')
+        partial.write_text(json.dumps({'params': self.params, 'updated': datetime.now().isoformat(),
+                                       'shards': [asdict(shard) for shard in self.shards]}, indent=1))
+        os.replace(partial, self.queue_path)
+
+    def progress(self) -> Dict[str, int]:
+        """Shard counts by status"""
+        return dict(Counter(shard.status for shard in self.shards))
+
+    def reset(self):
+        """Drop the checkpointed queue, so the next run starts from scratch"""
+        self.queue_path.unlink(missing_ok=True)
+        self.shards = self._plan()
+
+    # -------------------------------------------------------------------- run
+
+    def run(self) -> Dict[str, Any]:
+        """Process every unfinished shard; returns a summary of this run"""
+        with self._lock:
+            # Shards that failed in an earlier run get a fresh set of attempts
+            for shard in self.shards:
+                if shard.status == 'failed':
+                    shard.status, shard.attempts = 'pending', 0
+            self._save_queue()
+        pending = [shard for shard in self.shards if shard.status == 'pending']
+        completed = sum(1 for shard in self.shards if shard.status == 'done')
+        print(f"📋 DFI backfill: {len(pending):,} shards to search ({completed:,} already complete)")
+
+        searched, loaded, started = 0, 0, time.time()
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            running = {pool.submit(self._process, shard): shard for shard in pending}
+            while running:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    shard = running.pop(future)
+                    searched += 1
+                    try:
+                        follow_up = future.result()
+                    except Exception as e:
+                        follow_up = self._failed(shard, e)
+                    loaded += shard.loaded if shard.status == 'done' else 0
+                    for next_shard in follow_up:
+                        running[pool.submit(self._process, next_shard)] = next_shard
+                    if searched % 25 == 0:
+                        print(f"   🔄 {searched:,} searches, {loaded:,} businesses loaded, "
+                              f"{len(running):,} shards queued ({time.time() - started:.0f}s)")
+
+        summary = {'searches': searched, 'loaded': loaded, 'shards': self.progress(),
+                   'truncated': [shard.shard_id for shard in self.shards if shard.truncated],
+                   'seconds': time.time() - started}
+        if 'failed' not in summary['shards']:
+            logger.info(f"DFI backfill complete: {loaded:,} businesses loaded")
+        return summary
+
+    def _collector(self) -> DFIBusinessCollector:
+        """Per-worker collector: its own session, pacing left to the shared pacer"""
+        collector = getattr(self._local, 'collector', None)
+        if collector is None:
+            collector = self.collector_factory()
+            collector.rate_limit_delay = 0
+            # Duplicates are settled by business_id below, not per-row BigQuery lookups
+            collector._check_for_duplicates = lambda name, registration_date: False
+            self._local.collector = collector
+        return collector
+
+    def _process(self, shard: BackfillShard) -> List[BackfillShard]:
+        """Search one shard; returns shards to queue next (the halves of a split)"""
+        shard.attempts += 1
+        self.pacer.wait()
+        start = date.fromisoformat(shard.start).strftime('%m/%d/%Y')
+        end = date.fromisoformat(shard.end).strftime('%m/%d/%Y')
+        records, rows = self._collector().search_registrations_with_count(
+            shard.keyword, start, end, self.max_results)
+
+        if rows >= self.max_results:
+            if shard.days > 1:
+                halves = shard.halves()
+                with self._lock:
+                    shard.status, shard.rows = 'split', rows
+                    self.shards.extend(halves)
+                    self._save_queue()
+                logger.info(f"Split {shard.shard_id}: {rows} rows reached max_results")
+                return halves
+            shard.truncated = True
+            logger.warning(f"{shard.shard_id}: single-day search still returns {rows} rows; "
+                           f"results beyond {self.max_results} are not available")
+
+        with self._lock:
+            new = list({record.business_id: record for record in records
+                        if record.business_id not in self.loaded_ids}.values())
+            self.loaded_ids.update(record.business_id for record in new)
+        try:
+            loaded = self.loader(new) if new else 0
+        except Exception:
+            with self._lock:
+                self.loaded_ids.difference_update(record.business_id for record in new)
+            raise
+
+        with self._lock:
+            shard.status, shard.rows, shard.found, shard.loaded, shard.error = 'done', rows, len(records), loaded, None
+            self.loaded_types.update(record.business_type or 'Unclassified' for record in new)
+            self.loaded_years.update(record.registration_date[-4:] for record in new if record.registration_date)
+            self._save_queue()
+        return []
+
+    def _failed(self, shard: BackfillShard, error: Exception) -> List[BackfillShard]:
+        """Retry a failed shard, or leave it failed for the next run"""
+        with self._lock:
+            shard.error = str(error)
+            if shard.attempts < self.max_attempts:
+                logger.warning(f"{shard.shard_id} failed (attempt {shard.attempts}): {error}; retrying")
+                return [shard]
+            shard.status = 'failed'
+            self._save_queue()
+        logger.error(f"{shard.shard_id} failed after {shard.attempts} attempts: {error}")
+        return []
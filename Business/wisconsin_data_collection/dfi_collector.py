@@ -11,11 +11,18 @@ from bs4 import BeautifulSoup
 import time
 import re
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import logging
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 import yaml
 
+from dfi_results_parser import get_results_parser
+from response_archive import archive_response
+from watermark_store import WatermarkStore
+
+# Watermark source of the registration searches
+DFI_WATERMARK_SOURCE = "WI.dfi_registrations"
+
 @dataclass
 class DFIBusinessRecord:
     """Wisconsin DFI business registration record"""
@@ -45,7 +52,7 @@ class DFIBusinessRecord:
 class DFIBusinessCollector:
     """Collector for Wisconsin DFI business registration data"""
     
-    def __init__(self):
+    def __init__(self, results_parser: str = 'auto'):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
@@ -60,6 +67,13 @@ class DFIBusinessCollector:
         self.base_url = "https://apps.dfi.wi.gov/apps/corpsearch/"
         self.search_url = self.base_url + "Advanced.aspx"
         self.rate_limit_delay = 12  # 5 requests per minute = 12 seconds between requests
+        self.watermarks = WatermarkStore()
+        # Keywords whose search failed or hit max_results in the last
+        # collection; the watermark is not advanced past a collection with gaps
+        self.failed_keywords = []
+        self.truncated_keywords = []
+        # selectolax/lxml when installed, BeautifulSoup otherwise
+        self.results_parser = get_results_parser(results_parser)
         
     def classify_business_type(self, business_name: str, naics_code: str = None) -> Optional[str]:
         """
@@ -199,156 +213,138 @@ class DFIBusinessCollector:
         businesses = []
         
         try:
-            self.logger.info(f"Searching DFI registrations for '{keyword}' from {start_date} to {end_date}")
-            
-            # Get the search form first to extract any required hidden fields
-            response = self.session.get(self.search_url)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract ASP.NET ViewState and other hidden fields
-            form_data = {}
-            
-            for hidden in soup.find_all('input', type='hidden'):
-                name = hidden.get('name')
-                value = hidden.get('value', '')
-                if name:
-                    form_data[name] = value
-            
-            # Add search parameters
-            form_data.update({
-                'ctl00$cpContent$txtSearchString': keyword,              # Search keyword
-                'ctl00$cpContent$rblTextSearchType': 'AllWords',         # Using all words
-                'ctl00$cpContent$rblNameSet': 'Entities',                # Search entity names
-                'ctl00$cpContent$rblIncludeActiveEntities': 'Only',      # Active businesses only
-                'ctl00$cpContent$rblIncludeOldNames': 'Exclude',         # Current names only
-                'ctl00$cpContent$txtIncorporationDateStart': start_date, # Start date
-                'ctl00$cpContent$txtIncorporationDateEnd': end_date,     # End date
-                'ctl00$cpContent$btnSearch2': 'Search Records'           # Search button
-            })
-            
-            # Submit search
-            time.sleep(self.rate_limit_delay)  # Rate limiting
-            search_response = self.session.post(self.search_url, data=form_data)
-            
-            if search_response.status_code != 200:
-                self.logger.error(f"Search request failed: {search_response.status_code}")
-                return businesses
-            
-            # Parse results
-            businesses = self.parse_search_results(search_response.content, max_results)
-            
-            self.logger.info(f"Found {len(businesses)} '{keyword}' business registrations")
-            
+            businesses, _ = self.search_registrations_with_count(keyword, start_date, end_date, max_results)
         except Exception as e:
             self.logger.error(f"Error searching registrations for '{keyword}': {e}")
             
         return businesses
     
+    def search_registrations_with_count(self, keyword: str, start_date: str, end_date: str,
+                                        max_results: int = 100) -> Tuple[List[DFIBusinessRecord], int]:
+        """
+        Search like search_registrations_by_keyword, raising on request errors
+        
+        Returns:
+            (target business records, number of result rows DFI returned);
+            a row count of max_results or more means the window was truncated
+        """
+        self.logger.info(f"Searching DFI registrations for '{keyword}' from {start_date} to {end_date}")
+        
+        # Get the search form first to extract any required hidden fields
+        response = self.session.get(self.search_url)
+        response.raise_for_status()
+        soup = BeautifulSoup(response.content, 'html.parser')
+        
+        # Extract ASP.NET ViewState and other hidden fields
+        form_data = {}
+        
+        for hidden in soup.find_all('input', type='hidden'):
+            name = hidden.get('name')
+            value = hidden.get('value', '')
+            if name:
+                form_data[name] = value
+        
+        # Add search parameters
+        form_data.update({
+            'ctl00$cpContent$txtSearchString': keyword,              # Search keyword
+            'ctl00$cpContent$rblTextSearchType': 'AllWords',         # Using all words
+            'ctl00$cpContent$rblNameSet': 'Entities',                # Search entity names
+            'ctl00$cpContent$rblIncludeActiveEntities': 'Only',      # Active businesses only
+            'ctl00$cpContent$rblIncludeOldNames': 'Exclude',         # Current names only
+            'ctl00$cpContent$txtIncorporationDateStart': start_date, # Start date
+            'ctl00$cpContent$txtIncorporationDateEnd': end_date,     # End date
+            'ctl00$cpContent$btnSearch2': 'Search Records'           # Search button
+        })
+        
+        # Submit search
+        time.sleep(self.rate_limit_delay)  # Rate limiting
+        search_response = self.session.post(self.search_url, data=form_data)
+        search_response.raise_for_status()
+        archive_response('dfi_search', search_response.content,
+                         {'keyword': keyword, 'start_date': start_date, 'end_date': end_date,
+                          'max_results': max_results})
+        
+        # Parse results
+        businesses, row_count = self._parse_results_page(search_response.content, max_results)
+        
+        self.logger.info(f"Found {len(businesses)} '{keyword}' business registrations")
+        return businesses, row_count
+    
     def parse_search_results(self, html_content: bytes, max_results: int) -> List[DFIBusinessRecord]:
         """Parse search results from DFI response"""
-        businesses = []
-        
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Find results table - based on real DFI response structure
-            results_table = soup.find('table', {'id': 'results'})
-            
-            if not results_table:
-                self.logger.warning("No results table found in response")
-                # Save response for debugging
-                with open('dfi_debug_response.html', 'w', encoding='utf-8') as f:
-                    f.write(soup.prettify())
-                return businesses
-            
-            rows = results_table.find_all('tr')[1:]  # Skip header row
-            self.logger.info(f"Found {len(rows)} result rows to parse")
-            
-            for i, row in enumerate(rows[:max_results]):
-                try:
-                    cells = row.find_all('td')
-                    if len(cells) >= 4:  # Expected columns: ID, Name/Type, Date, Status
-                        
-                        # Extract business ID from first column
-                        business_id = cells[0].get_text(strip=True)
-                        
-                        # Extract business name and entity type from second column
-                        name_cell = cells[1]
-                        name_link = name_cell.find('span', class_='name')
-                        if name_link and name_link.find('a'):
-                            business_name = name_link.find('a').get_text(strip=True)
-                        else:
-                            business_name = name_cell.get_text(strip=True).split('\n')[0].strip()
-                        
-                        # Extract entity type description
-                        type_span = name_cell.find('span', class_='typeDescription')
-                        if type_span:
-                            entity_type = type_span.get_text(strip=True)
-                        else:
-                            # Fallback: look for type in the cell text
-                            cell_text = name_cell.get_text()
-                            lines = [line.strip() for line in cell_text.split('\n') if line.strip()]
-                            entity_type = lines[1] if len(lines) > 1 else ''
-                        
-                        # Extract registration date from third column
-                        registration_date = cells[2].get_text(strip=True)
-                        
-                        # Extract status from fourth column
-                        status_cell = cells[3]
-                        status_span = status_cell.find('span', class_='statusDescription')
-                        if status_span:
-                            status = status_span.get_text(strip=True)
-                        else:
-                            status = status_cell.get_text(strip=True).split('\n')[0].strip()
-                        
-                        # Only process target businesses
-                        if self.is_target_business(business_name):
-                            # Check for duplicates
-                            if not self._check_for_duplicates(business_name, registration_date):
-                                business_type = self.classify_business_type(business_name)
-                                
-                                record = DFIBusinessRecord(
-                                    business_name=business_name,
-                                    entity_type=entity_type,
-                                    registration_date=registration_date,
-                                    status=status,
-                                    business_id=business_id,
-                                    business_type=business_type,
-                                    source='DFI'
-                                )
-                                
-                                businesses.append(record)
-                                self.logger.debug(f"Found target business: {business_name} ({business_type})")
-                            else:
-                                self.logger.debug(f"Skipping duplicate business: {business_name}")
-                        else:
-                            self.logger.debug(f"Skipping non-target business: {business_name}")
-                
-                except Exception as e:
-                    self.logger.warning(f"Error parsing row {i}: {e}")
-                    continue
-        
+            return self._parse_results_page(html_content, max_results)[0]
         except Exception as e:
             self.logger.error(f"Error parsing search results: {e}")
+            return []
+    
+    def _parse_results_page(self, html_content: bytes, max_results: int) -> Tuple[List[DFIBusinessRecord], int]:
+        """Target business records of a results page and its total result row count"""
+        businesses = []
+        parsed = self.results_parser.parse(html_content, max_results)
         
-        return businesses
+        if parsed is None:
+            # The page itself is kept in the response archive for debugging
+            self.logger.warning("No results table found in response")
+            return businesses, 0
+        
+        rows, row_count = parsed
+        self.logger.info(f"Found {row_count} result rows to parse")
+        
+        for row in rows:
+            # Only process target businesses
+            if not self.is_target_business(row.business_name):
+                self.logger.debug(f"Skipping non-target business: {row.business_name}")
+                continue
+            
+            # Check for duplicates
+            if self._check_for_duplicates(row.business_name, row.registration_date):
+                self.logger.debug(f"Skipping duplicate business: {row.business_name}")
+                continue
+            
+            business_type = self.classify_business_type(row.business_name)
+            businesses.append(DFIBusinessRecord(
+                business_name=row.business_name,
+                entity_type=row.entity_type,
+                registration_date=row.registration_date,
+                status=row.status,
+                business_id=row.business_id,
+                business_type=business_type,
+                source='DFI'
+            ))
+            self.logger.debug(f"Found target business: {row.business_name} ({business_type})")
+        
+        return businesses, row_count
     
-    def collect_recent_registrations(self, days_back: int = 90) -> List[DFIBusinessRecord]:
+    def collect_recent_registrations(self, days_back: int = 90, incremental: bool = False,
+                                     max_results: int = 100) -> List[DFIBusinessRecord]:
         """
         Collect recent business registrations for target business types
         
         Args:
             days_back: Number of days to look back for registrations
+            incremental: Search only from the last loaded registration date (minus
+                overlap) and drop registrations already loaded; call
+                commit_watermark() after the load succeeds (skipped when any
+                keyword search failed or was truncated, see failed_keywords
+                and truncated_keywords)
+            max_results: Result rows per keyword search
             
         Returns:
             List of recent business registrations
         """
         all_businesses = []
+        unique_businesses = []
+        self.failed_keywords = []
+        self.truncated_keywords = []
         
         try:
             # Calculate date range
             end_date = datetime.now()
-            start_date = end_date - timedelta(days=days_back)
+            if incremental:
+                start_date = self.watermarks.since(DFI_WATERMARK_SOURCE, days_back, end_date)
+            else:
+                start_date = end_date - timedelta(days=days_back)
             
             # Format dates for DFI search (MM/DD/YYYY)
             start_date_str = start_date.strftime('%m/%d/%Y')
@@ -372,8 +368,13 @@ class DFIBusinessCollector:
             # Search using each keyword
             for keyword in search_keywords:
                 try:
-                    businesses = self.search_registrations_by_keyword(keyword, start_date_str, end_date_str)
+                    businesses, row_count = self.search_registrations_with_count(
+                        keyword, start_date_str, end_date_str, max_results)
                     all_businesses.extend(businesses)
+                    if row_count >= max_results:
+                        self.logger.warning(f"'{keyword}' search returned {row_count} rows "
+                                            f"(max_results {max_results}); results may be missing")
+                        self.truncated_keywords.append(keyword)
                     
                     # Rate limiting between searches
                     if keyword != search_keywords[-1]:  # Don't wait after last search
@@ -381,6 +382,7 @@ class DFIBusinessCollector:
                         
                 except Exception as e:
                     self.logger.warning(f"Error searching for '{keyword}': {e}")
+                    self.failed_keywords.append(keyword)
                     continue
             
             # Remove duplicates based on business_id
@@ -404,12 +406,52 @@ class DFIBusinessCollector:
                     filtered_businesses.append(business)
                 unique_businesses = filtered_businesses
             
+            if incremental:
+                unique_businesses = self.watermarks.unseen(DFI_WATERMARK_SOURCE, unique_businesses,
+                                                           lambda b: b.business_id)
+            
             self.logger.info(f"Collected {len(unique_businesses)} unique target businesses from DFI")
             
         except Exception as e:
             self.logger.error(f"Error collecting recent registrations: {e}")
         
         return unique_businesses
+    
+    def commit_watermark(self, businesses: List[DFIBusinessRecord]) -> bool:
+        """
+        Advance the registration watermark after businesses were loaded
+
+        Returns False without advancing when a keyword search of the last
+        collection failed or reached max_results, so the next incremental run
+        searches that window again.
+        """
+        if self.failed_keywords:
+            self.logger.warning(f"Not advancing the DFI watermark: searches failed for "
+                                f"{', '.join(self.failed_keywords)}")
+            return False
+        if self.truncated_keywords:
+            self.logger.warning(f"Not advancing the DFI watermark: searches truncated for "
+                                f"{', '.join(self.truncated_keywords)}")
+            return False
+        def registration_date(business):
+            try:
+                return datetime.strptime(business.registration_date, '%m/%d/%Y')
+            except (TypeError, ValueError):
+                return None
+        self.watermarks.advance(DFI_WATERMARK_SOURCE, businesses, registration_date,
+                                lambda b: b.business_id)
+        return True
+
+_reprocess_collector = None
+
+def reprocess_search_page(payload: bytes, request: Dict) -> List[Dict]:
+    """Target businesses of an archived DFI results page (response archive reprocessor)"""
+    global _reprocess_collector
+    if _reprocess_collector is None:
+        _reprocess_collector = DFIBusinessCollector()
+        _reprocess_collector._check_for_duplicates = lambda name, registration_date: False
+    businesses, _ = _reprocess_collector._parse_results_page(payload, request.get('max_results', 100))
+    return [asdict(business) for business in businesses]
 
 if __name__ == "__main__":
     # Test the collector
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+DFI Results Parser
+==================
+
+Parser backends for DFI corporate search result pages. Every backend pulls
+the same fields out of the rows of `table#results` (entity ID, name, entity
+type, registration date, status); DFIBusinessCollector then applies its
+target-business rules. The BeautifulSoup backend is the reference
+implementation. The selectolax and lxml backends use precompiled selectors
+on a C parser and stream rows from the table without building Python
+objects for the rest of the page.
+
+Features:
+- One parse() contract for all backends: (rows, total result row count)
+- selectolax (lexbor) and lxml backends with precompiled CSS/XPath selectors
+- BeautifulSoup html.parser reference backend
+- Automatic selection of the fastest installed backend
+"""
+
+import logging
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+# Optional parser backends (fastest installed one is used)
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+    LexborHTMLParser = None
+
+try:
+    import lxml.html
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+    etree = None
+
+try:
+    from bs4 import BeautifulSoup
+    BS4_AVAILABLE = True
+except ImportError:
+    BS4_AVAILABLE = False
+    BeautifulSoup = None
+
+logger = logging.getLogger(__name__)
+
+
+class ResultRow(NamedTuple):
+    """Fields of one DFI search result row"""
+    business_id: str
+    business_name: str
+    entity_type: str
+    registration_date: str
+    status: str
+
+
+def _stripped(texts) -> str:
+    """Text nodes stripped and joined, like BeautifulSoup get_text(strip=True)"""
+    return ''.join(text.strip() for text in texts)
+
+
+def _first_line(text: str) -> str:
+    return text.split('\n')[0].strip()
+
+
+def _second_line(text: str) -> str:
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    return lines[1] if len(lines) > 1 else ''
+
+
+class ResultsParser:
+    """Backend interface: rows of the results table of a DFI search page"""
+
+    name = 'base'
+
+    def parse(self, html_content: bytes, max_results: int = None) -> Optional[Tuple[List[ResultRow], int]]:
+        """
+        Parsed rows among the first max_results result rows, and the total
+        number of result rows; None when the page has no results table
+        """
+        # HTML newline normalization (CRLF -> LF), which the C parsers apply
+        # themselves, so every backend returns identical text
+        if isinstance(html_content, bytes):
+            html_content = html_content.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+        else:
+            html_content = html_content.replace('\r\n', '\n').replace('\r', '\n')
+        rows = self._result_rows(html_content)
+        if rows is None:
+            return None
+        parsed, row_count = [], 0
+        for row in rows:
+            row_count += 1
+            if max_results is not None and row_count > max_results:
+                continue  # counted, not parsed
+            try:
+                result = self._parse_row(row)
+            except Exception as e:
+                logger.warning(f"Error parsing row {row_count - 1}: {e}")
+                continue
+            if result is not None:
+                parsed.append(result)
+        return parsed, row_count
+
+    def _result_rows(self, html_content: bytes) -> Optional[Iterator]:
+        raise NotImplementedError
+
+    def _parse_row(self, row) -> Optional[ResultRow]:
+        raise NotImplementedError
+
+
+class SoupResultsParser(ResultsParser):
+    """Reference backend: BeautifulSoup with the pure-Python html.parser"""
+
+    name = 'beautifulsoup'
+
+    def _result_rows(self, html_content: bytes) -> Optional[List]:
+        table = BeautifulSoup(html_content, 'html.parser').find('table', {'id': 'results'})
+        return None if table is None else table.find_all('tr')[1:]  # Skip header row
+
+    def _parse_row(self, row) -> Optional[ResultRow]:
+        cells = row.find_all('td')
+        if len(cells) < 4:  # Expected columns: ID, Name/Type, Date, Status
+            return None
+        name_cell, status_cell = cells[1], cells[3]
+
+        name_span = name_cell.find('span', class_='name')
+        if name_span and name_span.find('a'):
+            business_name = name_span.find('a').get_text(strip=True)
+        else:
+            business_name = _first_line(name_cell.get_text(strip=True))
+
+        type_span = name_cell.find('span', class_='typeDescription')
+        entity_type = type_span.get_text(strip=True) if type_span else _second_line(name_cell.get_text())
+
+        status_span = status_cell.find('span', class_='statusDescription')
+        status = status_span.get_text(strip=True) if status_span else _first_line(status_cell.get_text(strip=True))
+
+        return ResultRow(cells[0].get_text(strip=True), business_name, entity_type,
+                         cells[2].get_text(strip=True), status)
+
+
+class LxmlResultsParser(ResultsParser):
+    """lxml.html backend with precompiled XPath selectors"""
+
+    name = 'lxml'
+
+    if LXML_AVAILABLE:
+        _table = etree.XPath("(//table[@id='results'])[1]")
+        _rows = etree.XPath(".//tr")
+        _cells = etree.XPath(".//td")
+        _name_link = etree.XPath("(.//span[contains(concat(' ', normalize-space(@class), ' '), ' name ')])[1]//a")
+        _type = etree.XPath("(.//span[contains(concat(' ', normalize-space(@class), ' '), ' typeDescription ')])[1]")
+        _status = etree.XPath("(.//span[contains(concat(' ', normalize-space(@class), ' '), ' statusDescription ')])[1]")
+        _text = etree.XPath(".//text()[not(parent::script or parent::style)]")
+
+    def _result_rows(self, html_content: bytes) -> Optional[Iterator]:
+        tables = self._table(lxml.html.document_fromstring(html_content))
+        if not tables:
+            return None
+        rows = iter(self._rows(tables[0]))
+        next(rows, None)  # Skip header row
+        return rows
+
+    def _get_text(self, element, strip: bool = True) -> str:
+        texts = self._text(element)
+        return _stripped(texts) if strip else ''.join(texts)
+
+    def _parse_row(self, row) -> Optional[ResultRow]:
+        cells = self._cells(row)
+        if len(cells) < 4:
+            return None
+        name_cell, status_cell = cells[1], cells[3]
+
+        name_links = self._name_link(name_cell)
+        business_name = (self._get_text(name_links[0]) if name_links
+                         else _first_line(self._get_text(name_cell)))
+
+        type_span = self._type(name_cell)
+        entity_type = (self._get_text(type_span[0]) if type_span
+                       else _second_line(self._get_text(name_cell, strip=False)))
+
+        status_span = self._status(status_cell)
+        status = (self._get_text(status_span[0]) if status_span
+                  else _first_line(self._get_text(status_cell)))
+
+        return ResultRow(self._get_text(cells[0]), business_name, entity_type,
+                         self._get_text(cells[2]), status)
+
+
+class SelectolaxResultsParser(ResultsParser):
+    """selectolax (lexbor) backend with CSS selectors"""
+
+    name = 'selectolax'
+
+    def _result_rows(self, html_content: bytes) -> Optional[Iterator]:
+        if isinstance(html_content, bytes):
+            html_content = html_content.decode('utf-8', errors='replace')
+        table = LexborHTMLParser(html_content).css_first('table#results')
+        if table is None:
+            return None
+        rows = iter(table.css('tr'))
+        next(rows, None)  # Skip header row
+        return rows
+
+    @staticmethod
+    def _get_text(node, strip: bool = True) -> str:
+        return node.text(deep=True, separator='', strip=strip)
+
+    def _parse_row(self, row) -> Optional[ResultRow]:
+        cells = row.css('td')
+        if len(cells) < 4:
+            return None
+        name_cell, status_cell = cells[1], cells[3]
+
+        name_span = name_cell.css_first('span.name')
+        name_link = name_span.css_first('a') if name_span is not None else None
+        business_name = (self._get_text(name_link) if name_link is not None
+                         else _first_line(self._get_text(name_cell)))
+
+        type_span = name_cell.css_first('span.typeDescription')
+        entity_type = (self._get_text(type_span) if type_span is not None
+                       else _second_line(self._get_text(name_cell, strip=False)))
+
+        status_span = status_cell.css_first('span.statusDescription')
+        status = (self._get_text(status_span) if status_span is not None
+                  else _first_line(self._get_text(status_cell)))
+
+        return ResultRow(self._get_text(cells[0]), business_name, entity_type,
+                         self._get_text(cells[2]), status)
+
+
+BACKENDS = {
+    'selectolax': (SelectolaxResultsParser, SELECTOLAX_AVAILABLE),
+    'lxml': (LxmlResultsParser, LXML_AVAILABLE),
+    'beautifulsoup': (SoupResultsParser, BS4_AVAILABLE),
+}
+
+
+def available_backends() -> List[str]:
+    """Installed backends, fastest first"""
+    return [name for name, (_, available) in BACKENDS.items() if available]
+
+
+def get_results_parser(backend: str = 'auto') -> ResultsParser:
+    """Parser for a named backend, or the fastest installed one"""
+    if backend == 'auto':
+        installed = available_backends()
+        if not installed:
+            raise RuntimeError("No HTML parser installed (selectolax, lxml or beautifulsoup4)")
+        backend = installed[0]
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown results parser backend: {backend}")
+    parser_class, available = BACKENDS[backend]
+    if not available:
+        raise RuntimeError(f"Results parser backend '{backend}' is not installed")
+    return parser_class()
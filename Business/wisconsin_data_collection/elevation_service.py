@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Elevation Service
+=================
+
+Local elevation, slope and aspect from a Wisconsin DEM. USGS 3DEP GeoTIFF
+tiles are imported once (with rasterio) into uncompressed .npy rasters that
+are opened memory-mapped, so a query only touches the pages it needs.
+Windows of each raster are decoded into fixed-size blocks held in a small
+LRU, which keeps repeated queries in the same area at near-zero I/O.
+
+Features:
+- One-time import of 3DEP GeoTIFF tiles (geographic CRS) to data_cache/dem
+- Bilinear point sampling and vectorized batch sampling of coordinate arrays
+- Slope (degrees and percent) and aspect from a 3x3 Horn kernel
+- LRU of decoded blocks shared by all queries
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# rasterio is only needed to import GeoTIFF tiles
+try:
+    import rasterio
+    RASTERIO_AVAILABLE = True
+except ImportError:
+    RASTERIO_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEM_DIR = os.path.join("data_cache", "dem")
+METERS_PER_DEGREE_LAT = 111_320.0
+FEET_PER_METER = 3.28084
+BLOCK_SIZE = 512
+
+
+class DEMTile:
+    """One memory-mapped raster with its north-west corner and pixel size in degrees"""
+
+    def __init__(self, name: str, data: np.ndarray, west: float, north: float,
+                 x_res: float, y_res: float, nodata: Optional[float] = None):
+        self.name = name
+        self.data = data
+        self.west, self.north = west, north
+        self.x_res, self.y_res = x_res, y_res
+        self.nodata = nodata
+        self.rows, self.cols = data.shape
+        self.east = west + self.cols * x_res
+        self.south = north - self.rows * y_res
+
+    def pixel(self, lat: np.ndarray, lon: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Fractional (row, col) of points, measured between pixel centres"""
+        return (self.north - lat) / self.y_res - 0.5, (lon - self.west) / self.x_res - 0.5
+
+    def covers(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        return (lat <= self.north) & (lat >= self.south) & (lon >= self.west) & (lon <= self.east)
+
+
+class ElevationService:
+    """Bilinear elevation sampling and terrain derivatives over local DEM tiles"""
+
+    def __init__(self, tiles: Sequence[DEMTile], cache_blocks: int = 64):
+        # Finer tiles first, so overlapping coverage uses the best resolution
+        self.tiles = sorted(tiles, key=lambda tile: tile.x_res * tile.y_res)
+        self.cache_blocks = cache_blocks
+        self._blocks: 'OrderedDict[Tuple[int, int, int], np.ndarray]' = OrderedDict()
+        self.block_reads = 0
+
+    def __len__(self) -> int:
+        return len(self.tiles)
+
+    # --------------------------------------------------------------- sampling
+
+    def elevation(self, lat: float, lon: float) -> Optional[float]:
+        """Elevation in meters at a point, or None outside the DEM"""
+        value = float(self.sample(np.array([lat]), np.array([lon]))[0])
+        return None if math.isnan(value) else value
+
+    def sample(self, lat, lon) -> np.ndarray:
+        """Bilinear elevations (meters) for arrays of points; NaN outside the DEM or on nodata"""
+        lat = np.atleast_1d(np.asarray(lat, dtype=float))
+        lon = np.atleast_1d(np.asarray(lon, dtype=float))
+        result = np.full(lat.shape, np.nan)
+        pending = np.ones(lat.shape, dtype=bool)
+
+        for t, tile in enumerate(self.tiles):
+            inside = pending & tile.covers(lat, lon)
+            if not inside.any():
+                continue
+            row, col = tile.pixel(lat[inside], lon[inside])
+            row = np.clip(row, 0, tile.rows - 1)
+            col = np.clip(col, 0, tile.cols - 1)
+            r0 = np.minimum(np.floor(row).astype(np.int64), tile.rows - 2)
+            c0 = np.minimum(np.floor(col).astype(np.int64), tile.cols - 2)
+            fr, fc = row - r0, col - c0
+
+            corners = self._corner_values(t, tile, r0, c0)
+            values = (corners[0] * (1 - fr) * (1 - fc) + corners[1] * (1 - fr) * fc +
+                      corners[2] * fr * (1 - fc) + corners[3] * fr * fc)
+            result[inside] = values
+            pending &= ~inside
+            if not pending.any():
+                break
+        return result
+
+    def terrain(self, lat: float, lon: float) -> Dict[str, Optional[float]]:
+        """Elevation, slope and aspect at a point"""
+        return {name: (None if np.isnan(values[0]) else float(values[0]))
+                for name, values in self.terrain_many([lat], [lon]).items()}
+
+    def terrain_many(self, lat, lon) -> Dict[str, np.ndarray]:
+        """
+        Elevation (m), slope (degrees and percent) and aspect for arrays of points
+
+        Slope uses Horn's 3x3 kernel on bilinear samples one DEM pixel apart;
+        aspect is the downslope direction in degrees clockwise from north.
+        """
+        lat = np.atleast_1d(np.asarray(lat, dtype=float))
+        lon = np.atleast_1d(np.asarray(lon, dtype=float))
+        step_lat, step_lon = self._pixel_size(lat, lon)
+
+        offsets = np.array([(dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)], dtype=float)
+        grid_lat = lat[:, None] - offsets[:, 0] * step_lat[:, None]
+        grid_lon = lon[:, None] + offsets[:, 1] * step_lon[:, None]
+        z = self.sample(grid_lat.ravel(), grid_lon.ravel()).reshape(lat.size, 9)
+
+        dx = step_lon * METERS_PER_DEGREE_LAT * np.cos(np.radians(lat))
+        dy = step_lat * METERS_PER_DEGREE_LAT
+        # Rows of z are north to south, columns west to east
+        dz_dx = ((z[:, 2] + 2 * z[:, 5] + z[:, 8]) - (z[:, 0] + 2 * z[:, 3] + z[:, 6])) / (8 * dx)
+        dz_dy = ((z[:, 0] + 2 * z[:, 1] + z[:, 2]) - (z[:, 6] + 2 * z[:, 7] + z[:, 8])) / (8 * dy)
+        gradient = np.hypot(dz_dx, dz_dy)
+
+        aspect = np.degrees(np.arctan2(-dz_dx, -dz_dy)) % 360.0
+        aspect = np.where(gradient > 0, aspect, np.nan)
+        return {
+            'elevation_m': z[:, 4],
+            'slope_degrees': np.degrees(np.arctan(gradient)),
+            'slope_percent': gradient * 100.0,
+            'aspect_degrees': aspect
+        }
+
+    def _pixel_size(self, lat: np.ndarray, lon: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Pixel size (degrees) of the tile covering each point"""
+        step_lat = np.full(lat.shape, np.nan)
+        step_lon = np.full(lat.shape, np.nan)
+        for tile in reversed(self.tiles):
+            inside = tile.covers(lat, lon)
+            step_lat[inside], step_lon[inside] = tile.y_res, tile.x_res
+        missing = np.isnan(step_lat)
+        if self.tiles:
+            step_lat[missing], step_lon[missing] = self.tiles[0].y_res, self.tiles[0].x_res
+        return step_lat, step_lon
+
+    # ----------------------------------------------------------------- blocks
+
+    def _block(self, t: int, tile: DEMTile, block_row: int, block_col: int) -> np.ndarray:
+        """Decoded block with a one-pixel overlap on the south and east edges"""
+        key = (t, block_row, block_col)
+        block = self._blocks.get(key)
+        if block is not None:
+            self._blocks.move_to_end(key)
+            return block
+
+        r, c = block_row * BLOCK_SIZE, block_col * BLOCK_SIZE
+        block = np.array(tile.data[r:r + BLOCK_SIZE + 1, c:c + BLOCK_SIZE + 1], dtype=np.float32)
+        if tile.nodata is not None:
+            block[block == tile.nodata] = np.nan
+        self.block_reads += 1
+        self._blocks[key] = block
+        while len(self._blocks) > self.cache_blocks:
+            self._blocks.popitem(last=False)
+        return block
+
+    def _corner_values(self, t: int, tile: DEMTile, r0: np.ndarray, c0: np.ndarray) -> List[np.ndarray]:
+        """Values at (r0, c0), (r0, c0+1), (r0+1, c0), (r0+1, c0+1) read through the block cache"""
+        block_rows, block_cols = r0 // BLOCK_SIZE, c0 // BLOCK_SIZE
+        keys = block_rows * (tile.cols // BLOCK_SIZE + 1) + block_cols
+        corners = [np.empty(r0.size, dtype=np.float32) for _ in range(4)]
+        for key in np.unique(keys):
+            members = np.flatnonzero(keys == key)
+            br, bc = int(block_rows[members[0]]), int(block_cols[members[0]])
+            block = self._block(t, tile, br, bc)
+            rr, cc = r0[members] - br * BLOCK_SIZE, c0[members] - bc * BLOCK_SIZE
+            corners[0][members] = block[rr, cc]
+            corners[1][members] = block[rr, cc + 1]
+            corners[2][members] = block[rr + 1, cc]
+            corners[3][members] = block[rr + 1, cc + 1]
+        return corners
+
+    # ------------------------------------------------------------ build/load
+
+    @classmethod
+    def load(cls, dem_dir: str = DEFAULT_DEM_DIR, cache_blocks: int = 64) -> 'ElevationService':
+        path = Path(dem_dir)
+        with open(path / "tiles.json") as f:
+            entries = json.load(f)['tiles']
+        tiles = [DEMTile(entry['name'], np.load(path / f"{entry['name']}.npy", mmap_mode='r'),
+                         entry['west'], entry['north'], entry['x_res'], entry['y_res'], entry.get('nodata'))
+                 for entry in entries]
+        return cls(tiles, cache_blocks)
+
+    @classmethod
+    def open_default(cls, dem_dir: str = DEFAULT_DEM_DIR) -> Optional['ElevationService']:
+        """Service over the imported DEM, or None if no tiles were imported"""
+        if not (Path(dem_dir) / "tiles.json").exists():
+            return None
+        try:
+            return cls.load(dem_dir)
+        except Exception as e:
+            logger.warning(f"Could not open DEM tiles: {e}")
+            return None
+
+
+def save_tile(dem_dir: str, name: str, data: np.ndarray, west: float, north: float,
+              x_res: float, y_res: float, nodata: Optional[float] = None):
+    """Write a raster as a memory-mappable .npy and register it in tiles.json"""
+    path = Path(dem_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    np.save(path / f"{name}.npy", np.ascontiguousarray(data, dtype=np.float32))
+
+    index_path = path / "tiles.json"
+    entries = json.loads(index_path.read_text())['tiles'] if index_path.exists() else []
+    entries = [entry for entry in entries if entry['name'] != name]
+    entries.append({'name': name, 'west': west, 'north': north, 'x_res': x_res, 'y_res': y_res,
+                    'nodata': None if nodata is None else float(nodata)})
+    index_path.write_text(json.dumps({'tiles': entries}, indent=2))
+
+
+def import_geotiff(tif_path: str, dem_dir: str = DEFAULT_DEM_DIR) -> str:
+    """Import one 3DEP GeoTIFF tile (geographic coordinates, e.g. NAD83) into the DEM store"""
+    if not RASTERIO_AVAILABLE:
+        raise ImportError("rasterio is required to import GeoTIFF DEM tiles: pip install rasterio")
+    with rasterio.open(tif_path) as dataset:
+        if dataset.crs is not None and not dataset.crs.is_geographic:
+            raise ValueError(f"{tif_path} is projected ({dataset.crs}); reproject it to NAD83/WGS84 first")
+        transform = dataset.transform
+        data = dataset.read(1)
+        name = Path(tif_path).stem
+        save_tile(dem_dir, name, data, transform.c, transform.f, transform.a, -transform.e, dataset.nodata)
+    logger.info(f"Imported DEM tile {name} ({data.shape[0]}x{data.shape[1]})")
+    return name
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local DEM elevation service")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='Import 3DEP GeoTIFF tiles')
+    import_parser.add_argument('tiles', nargs='+', help='GeoTIFF files')
+    import_parser.add_argument('--dem-dir', default=DEFAULT_DEM_DIR)
+
+    query_parser = subparsers.add_parser('query', help='Elevation, slope and aspect at a point')
+    query_parser.add_argument('lat', type=float)
+    query_parser.add_argument('lon', type=float)
+    query_parser.add_argument('--dem-dir', default=DEFAULT_DEM_DIR)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == 'import':
+        for tif in args.tiles:
+            name = import_geotiff(tif, args.dem_dir)
+            print(f"✅ Imported {name}")
+    else:
+        service = ElevationService.open_default(args.dem_dir)
+        if service is None:
+            print("❌ No DEM tiles imported; run: python elevation_service.py import <tiles.tif>")
+            return
+        terrain = service.terrain(args.lat, args.lon)
+        if terrain['elevation_m'] is None:
+            print("❌ Point is outside the imported DEM")
+            return
+        print(f"🏔️  Elevation: {terrain['elevation_m']:.1f} m ({terrain['elevation_m'] * FEET_PER_METER:.0f} ft)")
+        print(f"📐 Slope: {terrain['slope_degrees']:.2f}° ({terrain['slope_percent']:.1f}%)")
+        if terrain['aspect_degrees'] is not None:
+            print(f"🧭 Aspect: {terrain['aspect_degrees']:.0f}°")
+
+
+if __name__ == "__main__":
+    main()
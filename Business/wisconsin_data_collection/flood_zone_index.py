@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Flood Zone Index
+================
+
+Local point-in-polygon lookup of FEMA National Flood Hazard Layer (NFHL)
+flood zones for Wisconsin. Flood hazard polygons (S_FLD_HAZ_AR) from the
+downloaded state NFHL geodatabase are stored as WKB with their zone codes.
+Lookups run in one vectorized pass: an STRtree finds candidate polygons,
+simplified inner/outer envelopes settle most points immediately, and only
+points in the narrow band between them are tested against the prepared
+full-resolution polygon.
+
+Features:
+- Batch classification of coordinate arrays into NFHL zone codes
+- STRtree candidates, simplified envelopes, prepared exact tests
+- Highest-hazard zone wins where polygons overlap
+- Risk categories shared by the site, risk and infrastructure analyzers
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import shapely
+from shapely import STRtree
+
+# Reading the NFHL geodatabase needs geopandas (optional)
+try:
+    import geopandas as gpd
+    GEOPANDAS_AVAILABLE = True
+except ImportError:
+    GEOPANDAS_AVAILABLE = False
+    gpd = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = os.path.join("data_cache", "flood_zones")
+
+# Degrees (~11 m) by which envelopes are shrunk/grown before simplification
+ENVELOPE_TOLERANCE = 1e-4
+
+# Zone code -> (rank, risk score 0-100, category); higher rank wins on overlap
+FLOOD_ZONE_RISK = {
+    'VE': (7, 100, 'Very high risk (coastal high hazard, 1% annual chance)'),
+    'V': (7, 100, 'Very high risk (coastal high hazard, 1% annual chance)'),
+    'AE': (6, 90, 'High risk (1% annual chance flood, SFHA)'),
+    'A': (6, 90, 'High risk (1% annual chance flood, SFHA)'),
+    'AH': (6, 85, 'High risk (1% annual chance shallow ponding, SFHA)'),
+    'AO': (6, 85, 'High risk (1% annual chance sheet flow, SFHA)'),
+    'AR': (5, 80, 'High risk (levee restoration area, SFHA)'),
+    'A99': (5, 75, 'High risk (protected by levee under construction, SFHA)'),
+    'OPEN WATER': (4, 100, 'Open water'),
+    'X500': (3, 45, 'Moderate risk (0.2% annual chance flood)'),
+    'D': (2, 40, 'Undetermined risk (unstudied area)'),
+    'X': (1, 10, 'Minimal risk (outside 0.2% annual chance floodplain)'),
+    '': (0, 20, 'Not mapped in local NFHL data'),
+}
+
+# Zones inside the Special Flood Hazard Area (flood insurance required on federally backed loans)
+SFHA_ZONES = {'A', 'AE', 'AH', 'AO', 'AR', 'A99', 'V', 'VE'}
+
+
+def zone_code(fld_zone: str, zone_subtype: str = None) -> str:
+    """NFHL FLD_ZONE/ZONE_SUBTY pair as one code (shaded X becomes X500)"""
+    zone = (fld_zone or '').strip().upper()
+    if zone == 'X' and '0.2 PCT' in (zone_subtype or '').upper():
+        return 'X500'
+    # Pre-1986 numbered zones (A1-A30, V1-V30) are the detailed-study AE/VE equivalents
+    if zone[:1] in ('A', 'V') and zone[1:].isdigit():
+        return zone[0] + 'E'
+    return zone
+
+
+def describe_zone(code: str) -> Dict[str, Any]:
+    """Risk score, category and SFHA flag of a zone code"""
+    _, score, category = FLOOD_ZONE_RISK.get(code, FLOOD_ZONE_RISK[''])
+    return {'flood_zone': code or None, 'risk_score': score, 'category': category,
+            'special_flood_hazard_area': code in SFHA_ZONES}
+
+
+class FloodZoneIndex:
+    """Batch point-in-polygon classification against NFHL flood hazard areas"""
+
+    def __init__(self, geometries: np.ndarray, zones: np.ndarray,
+                 inner: np.ndarray = None, outer: np.ndarray = None, source: str = None):
+        self.geometries = np.asarray(geometries, dtype=object)
+        self.zones = np.asarray(zones).astype(str)
+        self.source = source
+        if inner is None or outer is None:
+            inner, outer = self._envelopes(self.geometries)
+        self.inner, self.outer = np.asarray(inner, dtype=object), np.asarray(outer, dtype=object)
+
+        self.tree = STRtree(self.geometries)
+        self.rank = np.array([FLOOD_ZONE_RISK.get(zone, (0,))[0] for zone in self.zones], dtype=np.int64)
+        # Polygons are prepared on first exact test
+        self._prepared = np.zeros(len(self.geometries), dtype=bool)
+        shapely.prepare(self.inner)
+        shapely.prepare(self.outer)
+
+    def __len__(self) -> int:
+        return int(self.geometries.size)
+
+    @staticmethod
+    def _envelopes(geometries: np.ndarray, tolerance: float = ENVELOPE_TOLERANCE) -> Tuple[np.ndarray, np.ndarray]:
+        """Simplified polygons strictly inside and strictly around every geometry"""
+        inner = shapely.simplify(shapely.buffer(geometries, -tolerance), tolerance / 4)
+        outer = shapely.simplify(shapely.buffer(geometries, tolerance), tolerance / 4)
+        # Simplification may move edges by up to tolerance/4, which the buffers absorb
+        inner = shapely.buffer(inner, -tolerance / 2)
+        outer = shapely.buffer(outer, tolerance / 2)
+        return inner, outer
+
+    # ----------------------------------------------------------------- lookup
+
+    def classify(self, lat, lon) -> np.ndarray:
+        """Zone code of every point ('' where no flood hazard polygon covers it)"""
+        lat = np.atleast_1d(np.asarray(lat, dtype=float))
+        lon = np.atleast_1d(np.asarray(lon, dtype=float))
+        codes = np.full(lat.size, '', dtype=object)
+        if lat.size == 0 or len(self) == 0:
+            return codes
+
+        points, polygons = self.tree.query(shapely.points(lon, lat))
+        if points.size == 0:
+            return codes
+        x, y = lon[points], lat[points]
+
+        # Coarse pass on simplified envelopes
+        inside = shapely.contains_xy(self.inner[polygons], x, y)
+        maybe = ~inside & shapely.contains_xy(self.outer[polygons], x, y)
+
+        # Exact pass only for points in the band between the envelopes
+        if maybe.any():
+            band = polygons[maybe]
+            unprepared = np.unique(band[~self._prepared[band]])
+            if unprepared.size:
+                shapely.prepare(self.geometries[unprepared])
+                self._prepared[unprepared] = True
+            inside[maybe] = shapely.contains_xy(self.geometries[band], x[maybe], y[maybe])
+
+        points, polygons = points[inside], polygons[inside]
+        if points.size:
+            # Highest-ranked zone per point (first polygon on ties): sort by
+            # (point, rank, -polygon) and keep each point's last entry
+            order = np.lexsort((-polygons, self.rank[polygons], points))
+            points, polygons = points[order], polygons[order]
+            last = np.append(points[1:] != points[:-1], True)
+            codes[points[last]] = self.zones[polygons[last]]
+        return codes
+
+    def assess(self, lat: float, lon: float) -> Dict[str, Any]:
+        """Zone, risk score, category and SFHA flag at one point"""
+        return self.assess_many([lat], [lon])[0]
+
+    def assess_many(self, lat, lon) -> List[Dict[str, Any]]:
+        return [describe_zone(code) for code in self.classify(lat, lon)]
+
+    # ------------------------------------------------------------ persistence
+
+    @classmethod
+    def open_default(cls) -> Optional['FloodZoneIndex']:
+        """The default store if it has been built, else None"""
+        if not (Path(DEFAULT_STORE_DIR) / "meta.json").exists():
+            return None
+        try:
+            return cls.load(DEFAULT_STORE_DIR)
+        except Exception as e:
+            logger.warning(f"Could not load flood zone index: {e}")
+            return None
+
+    def save(self, store_dir: str = DEFAULT_STORE_DIR):
+        store = Path(store_dir)
+        store.mkdir(parents=True, exist_ok=True)
+        for name, geometries in (('geometry', self.geometries), ('inner', self.inner), ('outer', self.outer)):
+            blobs = shapely.to_wkb(geometries)
+            offsets = np.cumsum([0] + [len(blob) for blob in blobs]).astype(np.int64)
+            with open(store / f"{name}.wkb", 'wb') as f:
+                for blob in blobs:
+                    f.write(blob)
+            np.save(store / f"{name}_offsets.npy", offsets)
+        np.save(store / "zones.npy", self.zones)
+
+        counts = dict(zip(*np.unique(self.zones, return_counts=True)))
+        with open(store / "meta.json", 'w') as f:
+            json.dump({
+                'polygons': len(self),
+                'zones': {str(zone): int(count) for zone, count in counts.items()},
+                'source': self.source,
+                'built': datetime.now().isoformat()
+            }, f, indent=2)
+        logger.info(f"Saved {len(self):,} flood hazard polygons to {store}")
+
+    @classmethod
+    def load(cls, store_dir: str = DEFAULT_STORE_DIR) -> 'FloodZoneIndex':
+        store = Path(store_dir)
+        with open(store / "meta.json") as f:
+            meta = json.load(f)
+
+        def read(name: str) -> np.ndarray:
+            offsets = np.load(store / f"{name}_offsets.npy")
+            data = (store / f"{name}.wkb").read_bytes()
+            return shapely.from_wkb([data[start:end] for start, end in zip(offsets[:-1], offsets[1:])])
+
+        return cls(read('geometry'), np.load(store / "zones.npy"), read('inner'), read('outer'), meta.get('source'))
+
+    # ------------------------------------------------------------------ build
+
+    @classmethod
+    def from_nfhl(cls, path: str, layer: str = 'S_FLD_HAZ_AR',
+                  store_dir: str = DEFAULT_STORE_DIR) -> 'FloodZoneIndex':
+        """
+        Build from a downloaded NFHL state geodatabase (e.g. NFHL_55_<date>.zip
+        from the FEMA Map Service Center) and save the index
+        """
+        if not GEOPANDAS_AVAILABLE:
+            raise RuntimeError("Building the flood zone index requires geopandas")
+        source = f"zip://{path}" if str(path).endswith('.zip') else str(path)
+        gdf = gpd.read_file(source, layer=layer, columns=['FLD_ZONE', 'ZONE_SUBTY'])
+        if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
+            gdf = gdf.to_crs(epsg=4326)
+        gdf = gdf[gdf.geometry.notna() & ~gdf.geometry.is_empty]
+
+        geometries = shapely.make_valid(gdf.geometry.to_numpy())
+        zones = np.array([zone_code(zone, subtype) for zone, subtype in zip(gdf['FLD_ZONE'], gdf['ZONE_SUBTY'])])
+        logger.info(f"Building flood zone envelopes for {len(geometries):,} polygons")
+        index = cls(geometries, zones, source=Path(path).name)
+        index.save(store_dir)
+        return index
+
+
+def main():
+    """Build the default index: python flood_zone_index.py <NFHL_55_*.zip> [lat lon]"""
+    import sys
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if len(sys.argv) < 2:
+        print("Usage: python flood_zone_index.py <NFHL_55_*.zip|.gdb> [lat lon]")
+        return
+    index = FloodZoneIndex.from_nfhl(sys.argv[1])
+    print(f"✅ Indexed {len(index):,} flood hazard polygons")
+    if len(sys.argv) >= 4:
+        result = index.assess(float(sys.argv[2]), float(sys.argv[3]))
+        print(f"🌊 Zone {result['flood_zone'] or 'none'}: {result['category']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,12 +20,13 @@ import time
 import json
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Any, Tuple
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 import math
 from geopy.distance import geodesic
 import numpy as np
 
 from base_collector import BaseDataCollector
+from response_archive import archive_response
 
 
 @dataclass
@@ -45,11 +46,11 @@ class GooglePlacesCollector(BaseDataCollector):
     Collects business data from Google Places API for Wisconsin analysis
     """
     
-    def __init__(self, api_key: str, config_path: str = "data_sources.yaml"):
+    def __init__(self, api_key: Optional[str], config_path: str = "data_sources.yaml"):
         super().__init__("WI", config_path)
         
-        # Initialize Google Maps client
-        self.gmaps = googlemaps.Client(key=api_key)
+        # Initialize Google Maps client (no key: offline reprocessing of archived responses only)
+        self.gmaps = googlemaps.Client(key=api_key) if api_key else None
         self.api_key = api_key
         
         # API configuration
@@ -477,6 +478,8 @@ class GooglePlacesCollector(BaseDataCollector):
                 response = self.gmaps.places_nearby(**query_params)
             
             self.api_calls_made += 1
+            archive_request = {'search_area': asdict(search_area), 'business_type': business_type}
+            archive_response('google_places_nearby', response, {**archive_request, 'params': query_params})
             
             # Process results
             if response.get('status') == 'OK':
@@ -496,6 +499,8 @@ class GooglePlacesCollector(BaseDataCollector):
                     # Get next page
                     next_response = self.gmaps.places_nearby(page_token=next_page_token)
                     self.api_calls_made += 1
+                    archive_response('google_places_nearby', next_response,
+                                     {**archive_request, 'page_token': next_page_token})
                     
                     if next_response.get('status') == 'OK':
                         next_results = next_response.get('results', [])
@@ -1210,6 +1215,20 @@ class GooglePlacesCollector(BaseDataCollector):
         return []
 
 
+_reprocess_collector = None
+
+def reprocess_places_response(payload: bytes, request: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Enhanced places of an archived nearby-search response (response archive reprocessor)"""
+    global _reprocess_collector
+    if _reprocess_collector is None:
+        _reprocess_collector = GooglePlacesCollector(None)
+    response = json.loads(payload)
+    if response.get('status') != 'OK':
+        return []
+    search_area = SearchArea(**request['search_area'])
+    return [_reprocess_collector._enhance_place_data(place, search_area, request.get('business_type'))
+            for place in response.get('results', [])]
+
 def main():
     """Test Google Places collection with sample API key"""
     logging.basicConfig(
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Habitat Feature Store
+=====================
+
+Environmental variables for business habitat modeling, computed once per
+training location and kept as a float matrix (one row per location, one
+column per variable). Candidate sites are scored against every stored
+location with a single vectorized weighted-distance operation instead of
+re-collecting trade-area, accessibility and competition data per record.
+
+Features:
+- Fixed variable order shared by similarity scoring and trained models
+- Range normalization and weighted similarity over whole matrices
+- Batch build of missing locations with a thread pool
+- Local persistence under data_cache/habitat_features
+"""
+
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join("data_cache", "habitat_features")
+
+# Column order of every feature matrix
+HABITAT_VARIABLES = (
+    'population_density', 'median_income', 'average_age', 'household_size',
+    'highway_accessibility', 'transit_accessibility', 'overall_accessibility',
+    'competitor_density', 'nearest_competitor_distance',
+    'urban_score', 'traffic_volume', 'parking_availability', 'visibility_score'
+)
+
+# Weights of the variables that enter environmental similarity
+SIMILARITY_WEIGHTS = {
+    'population_density': 0.15,
+    'median_income': 0.15,
+    'highway_accessibility': 0.10,
+    'competitor_density': 0.10,
+    'urban_score': 0.10,
+    'traffic_volume': 0.10,
+    'visibility_score': 0.10,
+    'parking_availability': 0.10,
+    'overall_accessibility': 0.10
+}
+
+# (min, max) mapped to 0-1 for similarity; values outside the range are not clipped
+NORMALIZATION_RANGES = {
+    'population_density': (0, 10000),
+    'median_income': (30000, 100000),
+    'highway_accessibility': (0, 100),
+    'competitor_density': (0, 20),
+    'urban_score': (0, 100),
+    'traffic_volume': (0, 100000),
+    'visibility_score': (0, 100),
+    'parking_availability': (0, 100),
+    'overall_accessibility': (0, 100)
+}
+
+_RANGE_MIN = np.array([NORMALIZATION_RANGES.get(v, (0, 1))[0] for v in HABITAT_VARIABLES], dtype=float)
+_RANGE_SPAN = np.array([NORMALIZATION_RANGES.get(v, (0, 1))[1] - NORMALIZATION_RANGES.get(v, (0, 1))[0]
+                        for v in HABITAT_VARIABLES], dtype=float)
+_HAS_RANGE = np.array([v in NORMALIZATION_RANGES for v in HABITAT_VARIABLES])
+_WEIGHTS = np.array([SIMILARITY_WEIGHTS.get(v, 0.0) for v in HABITAT_VARIABLES], dtype=float)
+
+
+def to_vector(environment: Dict[str, float]) -> np.ndarray:
+    """Environmental dict as a row in HABITAT_VARIABLES order (NaN where missing)"""
+    values = [environment.get(name) for name in HABITAT_VARIABLES]
+    return np.array([np.nan if value is None else value for value in values], dtype=float)
+
+
+def normalize(raw: np.ndarray) -> np.ndarray:
+    """Range-normalize rows of raw values; variables without a range map to 0.5"""
+    raw = np.asarray(raw, dtype=float)
+    return np.where(_HAS_RANGE, (raw - _RANGE_MIN) / _RANGE_SPAN, 0.5)
+
+
+def weighted_similarity(site: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """
+    Similarity of one normalized site row to every normalized matrix row
+
+    Mean of (1 - |difference|) weighted by SIMILARITY_WEIGHTS over the variables
+    present in both; 0.5 where no weighted variable is available.
+    """
+    matrix = np.atleast_2d(matrix)
+    present = ~np.isnan(matrix) & ~np.isnan(site) & (_WEIGHTS > 0)
+    weights = np.where(present, _WEIGHTS, 0.0)
+    similarity = np.where(present, 1.0 - np.abs(np.nan_to_num(matrix) - np.nan_to_num(site)), 0.0)
+    total = weights.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total > 0, (similarity * weights).sum(axis=1) / total, 0.5)
+
+
+class HabitatFeatureStore:
+    """Environmental feature rows keyed by rounded (lat, lon)"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, precision: int = 4):
+        self.cache_dir = cache_dir
+        self.precision = precision
+        self.keys: Dict[Tuple[float, float], int] = {}
+        self.raw = np.zeros((0, len(HABITAT_VARIABLES)))
+        self.normalized = np.zeros((0, len(HABITAT_VARIABLES)))
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def key(self, lat: float, lon: float) -> Tuple[float, float]:
+        return (round(float(lat), self.precision), round(float(lon), self.precision))
+
+    def rows(self, points: Sequence[Tuple[float, float]],
+             compute: Callable[[float, float], Dict[str, float]] = None, workers: int = 8) -> np.ndarray:
+        """
+        Matrix row of every (lat, lon), computing missing locations with compute
+
+        Points without a stored row and no compute function get -1.
+        """
+        keys = [self.key(lat, lon) for lat, lon in points]
+        missing = list(dict.fromkeys(k for k in keys if k not in self.keys))
+        if missing and compute is not None:
+            self.add(missing, compute, workers)
+        return np.array([self.keys.get(k, -1) for k in keys], dtype=np.int64)
+
+    def add(self, points: Sequence[Tuple[float, float]],
+            compute: Callable[[float, float], Dict[str, float]], workers: int = 8):
+        """
+        Compute and append feature rows for new locations
+
+        compute should raise when a location's features cannot be collected;
+        such locations are not stored, so a later call retries them.
+        """
+        points = [self.key(lat, lon) for lat, lon in points]
+        points = [p for p in dict.fromkeys(points) if p not in self.keys]
+        if not points:
+            return
+        logger.info(f"Computing habitat features for {len(points)} locations")
+
+        def attempt(point: Tuple[float, float]) -> Optional[Dict[str, float]]:
+            try:
+                return compute(*point)
+            except Exception as e:
+                logger.debug(f"Habitat features unavailable for {point}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(points)))) as pool:
+            environments = list(pool.map(attempt, points))
+        failed = sum(env is None for env in environments)
+        if failed:
+            logger.warning(f"Habitat features could not be collected for {failed} of {len(points)} locations")
+        points = [p for p, env in zip(points, environments) if env is not None]
+        environments = [env for env in environments if env is not None]
+        if not points:
+            return
+
+        new_rows = np.array([to_vector(env) for env in environments]).reshape(-1, len(HABITAT_VARIABLES))
+        start = len(self.keys)
+        for offset, point in enumerate(points):
+            self.keys[point] = start + offset
+        self.raw = np.vstack([self.raw, new_rows])
+        self.normalized = np.vstack([self.normalized, normalize(new_rows)])
+        self._dirty = True
+
+    def similarity(self, environment: Dict[str, float], rows: np.ndarray) -> np.ndarray:
+        """Weighted similarity of a site's environment to the given stored rows"""
+        rows = rows[rows >= 0]
+        return weighted_similarity(normalize(to_vector(environment)), self.normalized[rows])
+
+    # ------------------------------------------------------------ persistence
+
+    def save(self, name: str = "features"):
+        if not self._dirty:
+            return
+        path = Path(self.cache_dir)
+        path.mkdir(parents=True, exist_ok=True)
+        points = np.array(list(self.keys), dtype=float).reshape(-1, 2)
+        np.savez_compressed(path / f"{name}.npz", points=points, raw=self.raw)
+        with open(path / f"{name}.json", 'w') as f:
+            json.dump({'variables': list(HABITAT_VARIABLES), 'locations': len(self),
+                       'saved': datetime.now().isoformat()}, f, indent=2)
+        self._dirty = False
+
+    @classmethod
+    def load(cls, cache_dir: str = DEFAULT_CACHE_DIR, name: str = "features",
+             precision: int = 4) -> 'HabitatFeatureStore':
+        """Stored features, or an empty store if none were saved (or the variables changed)"""
+        store = cls(cache_dir, precision)
+        path = Path(cache_dir)
+        if not (path / f"{name}.npz").exists():
+            return store
+        with open(path / f"{name}.json") as f:
+            if tuple(json.load(f)['variables']) != HABITAT_VARIABLES:
+                logger.warning("Habitat feature variables changed; rebuilding feature store")
+                return store
+        with np.load(path / f"{name}.npz") as arrays:
+            points, store.raw = arrays['points'], arrays['raw']
+        store.keys = {store.key(lat, lon): i for i, (lat, lon) in enumerate(points)}
+        store.normalized = normalize(store.raw)
+        return store
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Habitat Suitability Model
+=========================
+
+Trainable business habitat model: L2-regularized logistic regression over
+the environmental feature matrix of habitat_features, with success labels
+derived from DFI registration status and SBA loan outcomes. One model is
+trained offline per business type and serialized together with its feature
+standardization, cross-validation report and variable importances, then
+loaded lazily for batch scoring of candidate sites or grid cells.
+
+Features:
+- Success labels from DFI status/age and SBA loan status (PIF vs CHGOFF)
+- NumPy/SciPy training (L-BFGS), mean imputation and standardization
+- Stratified k-fold report (AUC, log loss, Brier score, accuracy)
+- Standardized-coefficient variable importances
+- JSON model files under data_cache/habitat_models with a lazy loader
+"""
+
+import json
+import logging
+import os
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, date
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+from scipy.optimize import minimize
+
+from habitat_features import HABITAT_VARIABLES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_DIR = os.path.join("data_cache", "habitat_models")
+
+# DFI statuses of entities still in good standing vs. closed
+DFI_ACTIVE_STATUSES = ('organized', 'incorporated', 'registered', 'restored', 'in existence')
+DFI_FAILED_STATUSES = ('dissolved', 'revoked', 'delinquent')
+
+# SBA loan statuses with a known outcome (others, e.g. EXEMPT/COMMIT, are still open)
+SBA_SUCCESS_STATUSES = ('PIF',)
+SBA_FAILED_STATUSES = ('CHGOFF',)
+
+# Name keywords and NAICS prefixes that select each habitat business type
+HABITAT_BUSINESS_TYPES = {
+    'restaurant': {'keywords': ['restaurant', 'pizza', 'grill', 'cafe', 'diner', 'bistro', 'kitchen'],
+                   'naics_prefixes': ['7225']},
+    'hair_salon': {'keywords': ['salon', 'barber', 'hair'], 'naics_prefixes': ['81211']},
+    'auto_repair': {'keywords': ['auto repair', 'automotive', 'mechanic', 'garage', 'tire'],
+                    'naics_prefixes': ['8111']},
+    'retail_clothing': {'keywords': ['clothing', 'apparel', 'boutique', 'fashion'], 'naics_prefixes': ['448', '4581']},
+    'gym': {'keywords': ['gym', 'fitness', 'crossfit', 'yoga'], 'naics_prefixes': ['71394']}
+}
+
+
+def dfi_success_label(status: str, registration_date, success_years: float,
+                      as_of: date = None) -> Optional[int]:
+    """
+    1 for entities in good standing at least success_years old, 0 for closed
+    entities, None for young active entities whose outcome is not known yet
+    """
+    status = (status or '').lower()
+    if any(s in status for s in DFI_FAILED_STATUSES):
+        return 0
+    if not any(s in status for s in DFI_ACTIVE_STATUSES) or registration_date is None:
+        return None
+    if isinstance(registration_date, str):
+        try:
+            registration_date = datetime.strptime(registration_date[:10], '%Y-%m-%d').date()
+        except ValueError:
+            try:
+                registration_date = datetime.strptime(registration_date, '%m/%d/%Y').date()
+            except ValueError:
+                return None
+    if isinstance(registration_date, datetime):
+        registration_date = registration_date.date()
+    age_years = ((as_of or date.today()) - registration_date).days / 365.25
+    return 1 if age_years >= success_years else None
+
+
+def sba_success_label(loan_status: str) -> Optional[int]:
+    """1 for loans paid in full, 0 for charge-offs, None while the loan is open"""
+    status = (loan_status or '').strip().upper()
+    if status in SBA_SUCCESS_STATUSES:
+        return 1
+    if status in SBA_FAILED_STATUSES:
+        return 0
+    return None
+
+
+def load_labeled_locations(client, business_type: str, success_years: float,
+                           project_id: str = "location-optimizer-1", geocoder=None,
+                           max_sba_geocodes: int = 500) -> List[Dict[str, Any]]:
+    """
+    Labeled (lat, lon) training locations for a habitat business type
+
+    DFI registrations are already geocoded; SBA borrowers are included only when
+    a geocoder (OpenStreetMapGeocoder) is given, up to max_sba_geocodes lookups.
+    """
+    selector = HABITAT_BUSINESS_TYPES.get(business_type, {'keywords': [business_type], 'naics_prefixes': []})
+    pattern = '|'.join(selector['keywords'])
+    locations = []
+
+    dfi_query = f"""
+    SELECT business_name, status, registration_date, latitude, longitude
+    FROM `{project_id}.raw_business_data.dfi_business_registrations`
+    WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+        AND REGEXP_CONTAINS(LOWER(business_name), r'{pattern}')
+    """
+    for row in client.query(dfi_query).result():
+        label = dfi_success_label(row['status'], row['registration_date'], success_years)
+        if label is not None:
+            locations.append({'lat': float(row['latitude']), 'lon': float(row['longitude']),
+                              'label': label, 'source': 'DFI', 'name': row['business_name']})
+
+    if geocoder is not None and selector['naics_prefixes']:
+        naics_filter = ' OR '.join(f"STARTS_WITH(CAST(naics_code AS STRING), '{p}')"
+                                   for p in selector['naics_prefixes'])
+        sba_query = f"""
+        SELECT borrower_name, borrower_address, borrower_city, borrower_zip, loan_status
+        FROM `{project_id}.raw_business_data.sba_loan_approvals`
+        WHERE borrower_state = 'WI' AND loan_status IN ('PIF', 'CHGOFF') AND ({naics_filter})
+        LIMIT {int(max_sba_geocodes)}
+        """
+        for row in client.query(sba_query).result():
+            result = geocoder.geocode_address(row['borrower_address'], row['borrower_city'], 'WI',
+                                              row['borrower_zip'])
+            if result.success:
+                locations.append({'lat': result.latitude, 'lon': result.longitude,
+                                  'label': sba_success_label(row['loan_status']), 'source': 'SBA',
+                                  'name': row['borrower_name']})
+
+    positives = sum(loc['label'] for loc in locations)
+    logger.info(f"{business_type}: {len(locations)} labeled locations ({positives} successful)")
+    return locations
+
+
+# ------------------------------------------------------------------ training
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 0.5 * (1.0 + np.tanh(0.5 * z))
+
+
+def _fit_logistic(X: np.ndarray, y: np.ndarray, l2: float,
+                  sample_weight: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Weighted L2-penalized logistic regression on standardized features"""
+    n, k = X.shape
+    total = sample_weight.sum()
+
+    def loss(params):
+        w, b = params[:k], params[k]
+        z = X @ w + b
+        # log(1 + e^z) - y z, computed stably
+        nll = np.sum(sample_weight * (np.logaddexp(0.0, z) - y * z)) / total
+        residual = sample_weight * (_sigmoid(z) - y) / total
+        gradient = np.append(X.T @ residual + l2 * w / n, residual.sum())
+        return nll + 0.5 * l2 * np.dot(w, w) / n, gradient
+
+    result = minimize(loss, np.zeros(k + 1), jac=True, method='L-BFGS-B')
+    return result.x[:k], float(result.x[k])
+
+
+def roc_auc(y: np.ndarray, scores: np.ndarray) -> float:
+    """Area under the ROC curve by the rank-sum formula (ties get average ranks)"""
+    y = np.asarray(y, dtype=bool)
+    positives, negatives = int(y.sum()), int((~y).sum())
+    if positives == 0 or negatives == 0:
+        return float('nan')
+    order = np.argsort(scores, kind='mergesort')
+    ranks = np.empty(scores.size)
+    sorted_scores = scores[order]
+    # Average rank within runs of tied scores
+    boundaries = np.flatnonzero(np.diff(sorted_scores)) + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries, [scores.size]])
+    ranks[order] = np.repeat((starts + ends + 1) / 2.0, ends - starts)
+    return float((ranks[y].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+def stratified_folds(y: np.ndarray, folds: int, seed: int = 0) -> np.ndarray:
+    """Fold number of every sample, balancing classes across folds"""
+    rng = np.random.default_rng(seed)
+    assignment = np.zeros(y.size, dtype=np.int64)
+    for label in np.unique(y):
+        members = rng.permutation(np.flatnonzero(y == label))
+        assignment[members] = np.arange(members.size) % folds
+    return assignment
+
+
+@dataclass
+class HabitatModel:
+    """Serialized habitat suitability model for one business type"""
+    business_type: str
+    variables: List[str]
+    mean: List[float]
+    scale: List[float]
+    coefficients: List[float]
+    intercept: float
+    l2: float
+    sample_size: int
+    positive_rate: float
+    importances: Dict[str, float] = field(default_factory=dict)
+    cv_report: Dict[str, Any] = field(default_factory=dict)
+    trained_at: str = ''
+
+    def _design(self, features: np.ndarray) -> np.ndarray:
+        """Mean-impute and standardize raw features in the model's variable order"""
+        features = np.atleast_2d(np.asarray(features, dtype=float))
+        mean, scale = np.asarray(self.mean), np.asarray(self.scale)
+        return (np.where(np.isnan(features), mean, features) - mean) / scale
+
+    def predict_proba(self, features: np.ndarray, batch_size: int = 65536) -> np.ndarray:
+        """Success probability for every row of a raw (n, variables) feature matrix"""
+        features = np.atleast_2d(np.asarray(features, dtype=float))
+        coefficients = np.asarray(self.coefficients)
+        out = np.empty(features.shape[0])
+        for start in range(0, features.shape[0], batch_size):
+            chunk = slice(start, start + batch_size)
+            out[chunk] = _sigmoid(self._design(features[chunk]) @ coefficients + self.intercept)
+        return out
+
+    def save(self, model_dir: str = DEFAULT_MODEL_DIR) -> Path:
+        path = Path(model_dir)
+        path.mkdir(parents=True, exist_ok=True)
+        target = path / f"{self.business_type}.json"
+        with open(target, 'w') as f:
+            json.dump(asdict(self), f, indent=2)
+        return target
+
+    @classmethod
+    def load(cls, business_type: str, model_dir: str = DEFAULT_MODEL_DIR) -> Optional['HabitatModel']:
+        target = Path(model_dir) / f"{business_type}.json"
+        if not target.exists():
+            return None
+        with open(target) as f:
+            model = cls(**json.load(f))
+        if tuple(model.variables) != HABITAT_VARIABLES:
+            logger.warning(f"Habitat model for {business_type} uses other variables; retrain it")
+            return None
+        return model
+
+
+def _standardization(features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    mean = np.nanmean(features, axis=0)
+    mean = np.where(np.isnan(mean), 0.0, mean)
+    scale = np.nanstd(features, axis=0)
+    scale = np.where(np.isnan(scale) | (scale < 1e-12), 1.0, scale)
+    return mean, scale
+
+
+def _fit(features: np.ndarray, labels: np.ndarray, l2: float, balanced: bool):
+    mean, scale = _standardization(features)
+    X = (np.where(np.isnan(features), mean, features) - mean) / scale
+    weights = np.ones(labels.size)
+    positive_share = labels.mean()
+    if balanced and 0 < positive_share < 1:  # Single-class data has nothing to balance
+        weights = np.where(labels == 1, 0.5 / positive_share, 0.5 / (1 - positive_share))
+    coefficients, intercept = _fit_logistic(X, labels.astype(float), l2, weights)
+    return mean, scale, coefficients, intercept
+
+
+def train_habitat_model(business_type: str, features: np.ndarray, labels: np.ndarray,
+                        l2: float = 1.0, folds: int = 5, balanced: bool = True,
+                        seed: int = 0) -> HabitatModel:
+    """
+    Fit a habitat model on raw features (columns in HABITAT_VARIABLES order)
+
+    The cross-validation report refits the same pipeline (imputation,
+    standardization, class balancing) inside every fold; it is skipped when
+    a class has fewer than two examples.
+    """
+    features = np.asarray(features, dtype=float)
+    labels = np.asarray(labels, dtype=np.int64)
+    if labels.size == 0 or labels.min() == labels.max():
+        raise ValueError(f"Training a habitat model for {business_type} needs both successful and failed examples")
+
+    smallest_class = int(np.bincount(labels).min())
+    folds = int(max(2, min(folds, smallest_class))) if smallest_class >= 2 else 0
+    assignment = stratified_folds(labels, folds, seed) if folds else None
+    metrics = []
+    for fold in range(folds):
+        train, test = assignment != fold, assignment == fold
+        if not train.any() or not test.any():
+            continue
+        if labels[train].min() == labels[train].max():
+            continue  # A class with a single example leaves its fold's training set one-class
+        mean, scale, coefficients, intercept = _fit(features[train], labels[train], l2, balanced)
+        model = HabitatModel(business_type, list(HABITAT_VARIABLES), mean.tolist(), scale.tolist(),
+                             coefficients.tolist(), intercept, l2, int(train.sum()), 0.0)
+        probability = np.clip(model.predict_proba(features[test]), 1e-9, 1 - 1e-9)
+        y = labels[test]
+        metrics.append({
+            'auc': roc_auc(y, probability),
+            'log_loss': float(-np.mean(y * np.log(probability) + (1 - y) * np.log(1 - probability))),
+            'brier': float(np.mean((probability - y) ** 2)),
+            'accuracy': float(np.mean((probability >= 0.5) == y))
+        })
+
+    cv_report = {'folds': folds, 'l2': l2, 'class_balanced': balanced, 'scored_folds': len(metrics)}
+    for name in (metrics[0] if metrics else []):
+        values = np.array([m[name] for m in metrics])
+        cv_report[name] = {'mean': round(float(np.nanmean(values)), 4), 'std': round(float(np.nanstd(values)), 4)}
+
+    mean, scale, coefficients, intercept = _fit(features, labels, l2, balanced)
+    # Standardized coefficients: effect of a one-standard-deviation change in each variable
+    magnitude = np.abs(coefficients)
+    share = magnitude / magnitude.sum() if magnitude.sum() > 0 else magnitude
+    importances = {name: round(float(s) * float(np.sign(c) or 1.0), 4)
+                   for name, s, c in zip(HABITAT_VARIABLES, share, coefficients)}
+
+    model = HabitatModel(
+        business_type=business_type,
+        variables=list(HABITAT_VARIABLES),
+        mean=mean.tolist(),
+        scale=scale.tolist(),
+        coefficients=coefficients.tolist(),
+        intercept=intercept,
+        l2=l2,
+        sample_size=int(labels.size),
+        positive_rate=round(float(labels.mean()), 4),
+        importances=importances,
+        cv_report=cv_report,
+        trained_at=datetime.now().isoformat()
+    )
+    cv_auc = f"CV AUC {cv_report['auc']['mean']:.3f}" if metrics else "not cross-validated"
+    logger.info(f"Trained {business_type} habitat model on {labels.size} locations ({cv_auc})")
+    return model
+
+
+class HabitatModelRegistry:
+    """Lazily loaded habitat models, one per business type"""
+
+    def __init__(self, model_dir: str = DEFAULT_MODEL_DIR):
+        self.model_dir = model_dir
+        self._models: Dict[str, Optional[HabitatModel]] = {}
+
+    def get(self, business_type: str) -> Optional[HabitatModel]:
+        if business_type not in self._models:
+            self._models[business_type] = HabitatModel.load(business_type, self.model_dir)
+        return self._models[business_type]
+
+    def put(self, model: HabitatModel):
+        model.save(self.model_dir)
+        self._models[model.business_type] = model
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Huff Model Engine
+=================
+
+Huff gravity model of retail market share over Census block groups. Builds a
+block-group x store distance matrix from block-group population centroids and
+the Places/OSM competitor set, converts it to Huff patronage probabilities
+
+    P_ij = A_j^alpha * d_ij^-beta / sum_k(A_k^alpha * d_ik^-beta)
+
+and allocates each block group's category spending across every store with
+NumPy matrix operations.
+
+Features:
+- Market share and captured spending for the proposed site and every competitor
+- Distance matrices cached per region in memory and on disk (.npz)
+- Batch evaluation of hundreds of candidate sites against the same matrix
+- Cannibalization of existing competitors for each candidate
+"""
+
+import csv
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Download support for the Census centroid file (optional)
+try:
+    import requests
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+    requests = None
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_MILES = 3959.0
+
+# Census 2020 centers of population by block group (Wisconsin = state FIPS 55)
+BLOCK_GROUP_CENTROIDS_URL = (
+    "https://www2.census.gov/geo/docs/reference/cenpop2020/blkgrp/CenPop2020_Mean_BG{state_fips}.txt"
+)
+DEFAULT_CACHE_DIR = os.path.join("data_cache", "huff")
+
+# Annual per household category spending (BLS CEX-based estimates)
+CATEGORY_SPENDING_PER_HOUSEHOLD = {
+    'restaurant': 3500,             # Food service
+    'hair_salon': 800,              # Personal care
+    'auto_repair': 1200,            # Vehicle maintenance
+    'retail_clothing': 1800,        # Clothing
+    'retail': 1800,
+    'gym': 600,                     # Fitness
+    'coffee_shop': 1200,            # Beverages
+    'gas_station': 4000,            # Fuel
+    'hardware_store': 800,          # Home improvement
+    'professional_services': 1000,
+    'healthcare': 2500,
+    'default': 1500
+}
+
+
+def haversine_matrix(lat1: np.ndarray, lon1: np.ndarray,
+                     lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """Great-circle distances in miles between every point in set 1 and set 2"""
+    lat1 = np.radians(np.asarray(lat1, dtype=float))[:, None]
+    lon1 = np.radians(np.asarray(lon1, dtype=float))[:, None]
+    lat2 = np.radians(np.asarray(lat2, dtype=float))[None, :]
+    lon2 = np.radians(np.asarray(lon2, dtype=float))[None, :]
+
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(1.0, a)))
+
+
+def store_attractiveness(ratings: Sequence[float], review_counts: Sequence[float],
+                         default_rating: float = 4.0) -> np.ndarray:
+    """Attractiveness proxy from Google rating and review volume
+
+    Review volume stands in for store size/draw and rating for quality, so a
+    4.5-star store with 800 reviews outdraws a 4.0-star store with 40 reviews.
+    """
+    ratings = np.asarray(ratings, dtype=float)
+    reviews = np.asarray(review_counts, dtype=float)
+    ratings = np.where(np.isfinite(ratings) & (ratings > 0), ratings, default_rating)
+    reviews = np.where(np.isfinite(reviews) & (reviews > 0), reviews, 0.0)
+    return (ratings / 5.0) * (1.0 + np.log1p(reviews))
+
+
+def region_tile(lat: float, lon: float, tile_degrees: float) -> Tuple[float, float, float]:
+    """Center of the fixed lat/lon tile containing a point, and the tile's half-diagonal in miles
+
+    Sites in the same tile share one Huff region centered on the tile, reaching
+    the region radius plus the half-diagonal, so they share one distance matrix.
+    """
+    center_lat = (np.floor(lat / tile_degrees) + 0.5) * tile_degrees
+    center_lon = (np.floor(lon / tile_degrees) + 0.5) * tile_degrees
+    half = tile_degrees / 2
+    corner_lat = center_lat - half if center_lat >= 0 else center_lat + half  # widest (equatorward) corner
+    half_diagonal = haversine_matrix([center_lat], [center_lon], [corner_lat], [center_lon + half])[0, 0]
+    return float(center_lat), float(center_lon), float(half_diagonal)
+
+
+@dataclass
+class BlockGroupDemand:
+    """Block-group centroids and the household data that drives spending"""
+    geoids: np.ndarray
+    lat: np.ndarray
+    lon: np.ndarray
+    population: np.ndarray
+    households: np.ndarray
+    median_income: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return int(self.geoids.size)
+
+    def subset(self, mask: np.ndarray) -> 'BlockGroupDemand':
+        """Block groups selected by a boolean mask"""
+        return BlockGroupDemand(
+            geoids=self.geoids[mask],
+            lat=self.lat[mask],
+            lon=self.lon[mask],
+            population=self.population[mask],
+            households=self.households[mask],
+            median_income=self.median_income[mask] if self.median_income is not None else None
+        )
+
+    def within(self, lat: float, lon: float, radius_miles: float) -> 'BlockGroupDemand':
+        """Block groups whose centroid lies within a radius of a point"""
+        distances = haversine_matrix([lat], [lon], self.lat, self.lon)[0]
+        return self.subset(distances <= radius_miles)
+
+    def with_income(self, income_by_geoid: Dict[str, float]) -> 'BlockGroupDemand':
+        """Attach ACS median household income keyed by 12-digit block-group GEOID"""
+        income = np.array([income_by_geoid.get(geoid, np.nan) for geoid in self.geoids], dtype=float)
+        return BlockGroupDemand(self.geoids, self.lat, self.lon, self.population,
+                                self.households, income)
+
+
+def load_block_group_centroids(path: str = None, state_fips: str = "55",
+                               avg_household_size: float = 2.4,
+                               download: bool = True) -> BlockGroupDemand:
+    """Load Census block-group population centroids, downloading them if missing
+
+    Reads the Census "centers of population" file (STATEFP, COUNTYFP, TRACTCE,
+    BLKGRPCE, POPULATION, LATITUDE, LONGITUDE). Households are estimated from
+    population until ACS household counts are attached.
+    """
+    path = Path(path or os.path.join(DEFAULT_CACHE_DIR, f"CenPop2020_Mean_BG{state_fips}.txt"))
+
+    if not path.exists():
+        if not download or not REQUESTS_AVAILABLE:
+            raise FileNotFoundError(f"Block-group centroid file not found: {path}")
+        url = BLOCK_GROUP_CENTROIDS_URL.format(state_fips=state_fips)
+        logger.info(f"Downloading block-group centroids from {url}")
+        response = requests.get(url, timeout=60)
+        response.raise_for_status()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(response.content)
+
+    geoids, lats, lons, population = [], [], [], []
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            geoids.append(f"{row['STATEFP']}{row['COUNTYFP']}{row['TRACTCE']}{row['BLKGRPCE']}")
+            lats.append(float(row['LATITUDE']))
+            lons.append(float(row['LONGITUDE']))
+            population.append(float(row['POPULATION']))
+
+    population = np.array(population)
+    logger.info(f"Loaded {len(geoids):,} block-group centroids from {path}")
+    return BlockGroupDemand(
+        geoids=np.array(geoids),
+        lat=np.array(lats),
+        lon=np.array(lons),
+        population=population,
+        households=population / avg_household_size
+    )
+
+
+@dataclass
+class HuffConfig:
+    """Huff model parameters"""
+    attractiveness_exponent: float = 1.0    # alpha
+    distance_decay: float = 2.0             # beta
+    max_distance_miles: float = 15.0        # Beyond this a store draws nothing
+    min_distance_miles: float = 0.25        # Floor so co-located demand stays finite
+    reference_income: float = 67000.0       # Wisconsin median household income
+    income_elasticity: float = 0.5          # Spending response to relative income
+    candidate_batch_size: int = 256         # Candidate columns evaluated per matrix block
+    region_tile_degrees: float = 0.25       # Sites within one tile share a region matrix
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR
+    memory_cache_size: int = 8
+
+
+@dataclass
+class HuffSiteResult:
+    """Market share of one site and its impact on existing stores"""
+    captured_spending: float
+    market_share: float                 # Share of trade-area category spending
+    trade_area_spending: float
+    trade_area_households: float
+    competitor_captured_spending: np.ndarray
+    competitor_losses: np.ndarray
+    block_group_probabilities: np.ndarray
+
+    def to_dict(self, store_names: Sequence[str] = None, top_n: int = 10) -> Dict[str, Any]:
+        """JSON-friendly summary with the most affected competitors"""
+        order = np.argsort(-self.competitor_losses)[:top_n]
+        impacted = []
+        for idx in order:
+            if self.competitor_losses[idx] <= 0:
+                break
+            impacted.append({
+                'name': store_names[idx] if store_names is not None else int(idx),
+                'captured_spending_before': float(self.competitor_captured_spending[idx]),
+                'spending_lost': float(self.competitor_losses[idx])
+            })
+        return {
+            'captured_spending': self.captured_spending,
+            'market_share': self.market_share,
+            'trade_area_spending': self.trade_area_spending,
+            'trade_area_households': self.trade_area_households,
+            'most_impacted_competitors': impacted
+        }
+
+
+@dataclass
+class HuffCandidateResult:
+    """Batch results for many candidate sites, one array entry per candidate"""
+    lat: np.ndarray
+    lon: np.ndarray
+    captured_spending: np.ndarray
+    market_share: np.ndarray
+    cannibalized_spending: np.ndarray   # Spending taken from existing stores
+    new_spending: np.ndarray            # Spending from demand no store served
+
+    def ranking(self) -> np.ndarray:
+        """Candidate indices ordered by captured spending, best first"""
+        return np.argsort(-self.captured_spending)
+
+    def to_records(self, top_n: int = None) -> List[Dict[str, float]]:
+        order = self.ranking()[:top_n]
+        return [{
+            'rank': rank + 1,
+            'lat': float(self.lat[idx]),
+            'lon': float(self.lon[idx]),
+            'captured_spending': float(self.captured_spending[idx]),
+            'market_share': float(self.market_share[idx]),
+            'cannibalized_spending': float(self.cannibalized_spending[idx]),
+            'new_spending': float(self.new_spending[idx])
+        } for rank, idx in enumerate(order)]
+
+
+class HuffModelEngine:
+    """Huff market-share model over a fixed region of block groups and stores"""
+
+    # Distance matrices shared by every engine in the process, keyed by region
+    _matrix_cache: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+
+    def __init__(self, demand: BlockGroupDemand, store_lat: Sequence[float],
+                 store_lon: Sequence[float], attractiveness: Sequence[float],
+                 store_names: Sequence[str] = None, region: str = "region",
+                 config: HuffConfig = None):
+        self.demand = demand
+        self.store_lat = np.asarray(store_lat, dtype=float)
+        self.store_lon = np.asarray(store_lon, dtype=float)
+        self.attractiveness = np.asarray(attractiveness, dtype=float)
+        self.store_names = list(store_names) if store_names is not None else None
+        self.config = config or HuffConfig()
+        self.region = region
+        self._distances = None
+        self._utilities = None
+
+    @property
+    def cache_key(self) -> str:
+        """Region name plus a digest of the coordinates, so stale matrices never match"""
+        digest = hashlib.sha1()
+        for values in (self.demand.lat, self.demand.lon, self.store_lat, self.store_lon):
+            digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+        safe_region = "".join(c if c.isalnum() or c in "-_" else "_" for c in self.region)
+        return f"{safe_region}_{digest.hexdigest()[:16]}"
+
+    def distance_matrix(self) -> np.ndarray:
+        """Block-group x store distances in miles, cached per region"""
+        if self._distances is not None:
+            return self._distances
+
+        key = self.cache_key
+        cache = HuffModelEngine._matrix_cache
+        if key in cache:
+            cache.move_to_end(key)
+            self._distances = cache[key]
+            return self._distances
+
+        cache_path = Path(self.config.cache_dir) / f"{key}.npz" if self.config.cache_dir else None
+        if cache_path is not None and cache_path.exists():
+            with np.load(cache_path) as stored:
+                distances = stored['distances']
+            logger.debug(f"Loaded Huff distance matrix {key} from disk")
+        else:
+            distances = haversine_matrix(self.demand.lat, self.demand.lon,
+                                         self.store_lat, self.store_lon).astype(np.float32)
+            if cache_path is not None:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                np.savez_compressed(cache_path, distances=distances)
+
+        cache[key] = distances
+        while len(cache) > self.config.memory_cache_size:
+            cache.popitem(last=False)
+        self._distances = distances
+        return distances
+
+    def _utility(self, distances: np.ndarray, attractiveness: np.ndarray) -> np.ndarray:
+        """Huff utility A^alpha * d^-beta, zero beyond the maximum travel distance"""
+        config = self.config
+        floored = np.maximum(distances, config.min_distance_miles)
+        utility = (np.asarray(attractiveness, dtype=float) ** config.attractiveness_exponent
+                   * floored ** -config.distance_decay)
+        return np.where(distances <= config.max_distance_miles, utility, 0.0)
+
+    def utilities(self) -> np.ndarray:
+        """Utility matrix for the existing stores"""
+        if self._utilities is None:
+            self._utilities = self._utility(self.distance_matrix(), self.attractiveness[None, :])
+        return self._utilities
+
+    def block_group_spending(self, spending_per_household: float) -> np.ndarray:
+        """Annual category spending per block group, scaled by relative income"""
+        spending = self.demand.households * spending_per_household
+        income = self.demand.median_income
+        if income is not None:
+            ratio = np.where(np.isfinite(income) & (income > 0),
+                             income / self.config.reference_income, 1.0)
+            spending = spending * ratio ** self.config.income_elasticity
+        return spending
+
+    def market_shares(self) -> np.ndarray:
+        """Huff probability that each block group patronizes each store"""
+        utilities = self.utilities()
+        totals = utilities.sum(axis=1, keepdims=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(totals > 0, utilities / totals, 0.0)
+
+    def captured_spending(self, spending_per_household: float) -> np.ndarray:
+        """Annual spending captured by every existing store"""
+        return self.block_group_spending(spending_per_household) @ self.market_shares()
+
+    def evaluate_site(self, lat: float, lon: float, attractiveness: float,
+                      spending_per_household: float) -> HuffSiteResult:
+        """Market share of a new site and the spending it takes from each competitor"""
+        spending = self.block_group_spending(spending_per_household)
+        utilities = self.utilities()
+        existing_totals = utilities.sum(axis=1)
+
+        site_distance = haversine_matrix(self.demand.lat, self.demand.lon, [lat], [lon])[:, 0]
+        site_utility = self._utility(site_distance, attractiveness)
+
+        totals = existing_totals + site_utility
+        with np.errstate(divide='ignore', invalid='ignore'):
+            site_probability = np.where(totals > 0, site_utility / totals, 0.0)
+            before = np.where(existing_totals[:, None] > 0, utilities / existing_totals[:, None], 0.0)
+            after = np.where(totals[:, None] > 0, utilities / totals[:, None], 0.0)
+
+        competitor_before = spending @ before
+        competitor_after = spending @ after
+        captured = float(spending @ site_probability)
+
+        in_trade_area = site_distance <= self.config.max_distance_miles
+        trade_area_spending = float(spending[in_trade_area].sum())
+
+        return HuffSiteResult(
+            captured_spending=captured,
+            market_share=captured / trade_area_spending * 100 if trade_area_spending > 0 else 0.0,
+            trade_area_spending=trade_area_spending,
+            trade_area_households=float(self.demand.households[in_trade_area].sum()),
+            competitor_captured_spending=competitor_before,
+            competitor_losses=competitor_before - competitor_after,
+            block_group_probabilities=site_probability
+        )
+
+    def evaluate_candidates(self, lats: Sequence[float], lons: Sequence[float],
+                            attractiveness, spending_per_household: float) -> HuffCandidateResult:
+        """Evaluate many candidate sites against the same block-group/store matrix
+
+        Each candidate is assessed as the only new entrant. Candidates are processed
+        in column blocks so memory stays at n_block_groups x candidate_batch_size.
+        """
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        attractiveness = np.broadcast_to(np.asarray(attractiveness, dtype=float), lats.shape)
+
+        spending = self.block_group_spending(spending_per_household)
+        existing_totals = self.utilities().sum(axis=1)[:, None]
+        served = existing_totals[:, 0] > 0
+
+        captured = np.empty(lats.size)
+        cannibalized = np.empty(lats.size)
+        trade_area = np.empty(lats.size)
+
+        batch = max(1, int(self.config.candidate_batch_size))
+        for start in range(0, lats.size, batch):
+            stop = min(lats.size, start + batch)
+            distances = haversine_matrix(self.demand.lat, self.demand.lon,
+                                         lats[start:stop], lons[start:stop])
+            site_utility = self._utility(distances, attractiveness[None, start:stop])
+            totals = existing_totals + site_utility
+            with np.errstate(divide='ignore', invalid='ignore'):
+                probability = np.where(totals > 0, site_utility / totals, 0.0)
+
+            captured[start:stop] = spending @ probability
+            # Demand that already had a store gives up exactly the candidate's share
+            cannibalized[start:stop] = (spending * served) @ probability
+            trade_area[start:stop] = spending @ (distances <= self.config.max_distance_miles)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            market_share = np.where(trade_area > 0, captured / trade_area * 100, 0.0)
+
+        return HuffCandidateResult(
+            lat=lats,
+            lon=lons,
+            captured_spending=captured,
+            market_share=market_share,
+            cannibalized_spending=cannibalized,
+            new_spending=captured - cannibalized
+        )
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(7)
+    n_block_groups, n_stores, n_candidates = 3000, 150, 500
+    demand = BlockGroupDemand(
+        geoids=np.array([f"55025{i:07d}" for i in range(n_block_groups)]),
+        lat=43.07 + rng.normal(0, 0.12, n_block_groups),
+        lon=-89.40 + rng.normal(0, 0.16, n_block_groups),
+        population=rng.integers(400, 3000, n_block_groups).astype(float),
+        households=rng.integers(150, 1200, n_block_groups).astype(float),
+        median_income=rng.normal(67000, 18000, n_block_groups)
+    )
+    engine = HuffModelEngine(
+        demand,
+        43.07 + rng.normal(0, 0.1, n_stores), -89.40 + rng.normal(0, 0.13, n_stores),
+        store_attractiveness(rng.uniform(3.2, 4.9, n_stores), rng.integers(5, 2000, n_stores)),
+        region="demo_dane", config=HuffConfig(cache_dir=None)
+    )
+
+    start = time.perf_counter()
+    site = engine.evaluate_site(43.0265, -89.4698, 4.0, 3500)
+    candidates = engine.evaluate_candidates(43.07 + rng.normal(0, 0.1, n_candidates),
+                                            -89.40 + rng.normal(0, 0.13, n_candidates), 4.0, 3500)
+    elapsed = time.perf_counter() - start
+
+    print(f"{n_block_groups:,} block groups x {n_stores} stores, {n_candidates} candidates "
+          f"in {elapsed * 1000:.1f} ms")
+    print(f"Site captured spending: ${site.captured_spending:,.0f} ({site.market_share:.2f}% share)")
+    best = candidates.to_records(top_n=1)[0]
+    print(f"Best candidate: ({best['lat']:.4f}, {best['lon']:.4f}) ${best['captured_spending']:,.0f}")
@@ -27,6 +27,13 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 
+# Local FEMA NFHL flood zone lookups (optional, needs shapely)
+try:
+    from flood_zone_index import FloodZoneIndex
+    FLOOD_INDEX_AVAILABLE = True
+except ImportError:
+    FLOOD_INDEX_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -57,6 +64,9 @@ class InfrastructureAnalyzer:
     def __init__(self):
         """Initialize the infrastructure analyzer"""
         
+        # Local FEMA NFHL flood zones (None until built with flood_zone_index.py)
+        self.flood_zones = FloodZoneIndex.open_default() if FLOOD_INDEX_AVAILABLE else None
+        
         # Wisconsin utility providers database
         self.wisconsin_utilities = {
             'milwaukee': {
@@ -419,6 +429,12 @@ class InfrastructureAnalyzer:
             'emergency_preparedness_score': 80 if is_major_city else 70
         }
         
+        if lat is not None and lon is not None and self.flood_zones is not None:
+            flood = self.flood_zones.assess(lat, lon)
+            analysis['flood_zone'] = flood['flood_zone']
+            analysis['flood_risk_score'] = flood['risk_score']
+            analysis['special_flood_hazard_area'] = flood['special_flood_hazard_area']
+        
         # Calculate safety score based on response times and services
         safety_score = (
             (100 - analysis['fire_response_time'] * 5) * 0.25 +
@@ -534,6 +550,8 @@ class InfrastructureAnalyzer:
             risk_factors.append(25)
         if safety['hospital_distance'] > 10:
             risk_factors.append(15)
+        if safety.get('special_flood_hazard_area'):
+            risk_factors.append(25)
         
         # Technology risks
         if technology['internet_reliability_score'] < 80:
@@ -667,6 +685,9 @@ class InfrastructureAnalyzer:
         if safety.get('fire_response_time', 0) > 8:
             challenges.append("Extended fire department response times increase operational risk")
         
+        if safety.get('special_flood_hazard_area'):
+            challenges.append(f"Site lies in FEMA flood zone {safety['flood_zone']}; flood insurance and mitigation required")
+        
         if technology.get('max_internet_speed', 1000) < 100:
             challenges.append("Limited high-speed internet options may constrain technology needs")
         
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Isochrone Engine
+================
+
+Offline drive-time isochrones over the local road graph. Origins are snapped
+to a fixed grid of origin cells, each cell's nearest road node is expanded
+with a time-bounded Dijkstra search using per-highway-class speeds, and the
+reached road network (including partially travelled edges) is turned into a
+polygon with an alpha shape.
+
+Features:
+- No network access once the road graph store is built
+- Many origins per Dijkstra call, grouped so each region's graph loads once
+- Alpha-shape polygons that follow the road network, holes included
+- Polygons cached in memory and on disk per (origin cell, interval)
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
+from shapely import wkt
+from shapely.geometry import Point
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import Delaunay, QhullError
+
+from road_graph import RoadGraph, DEFAULT_SPEEDS_MPH, EARTH_RADIUS_MILES, haversine_miles
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join("data_cache", "isochrones")
+MILES_PER_DEGREE = EARTH_RADIUS_MILES * math.pi / 180
+
+# Returns the road graph covering (south, west, north, east)
+GraphLoader = Callable[[Tuple[float, float, float, float]], RoadGraph]
+
+
+@dataclass
+class IsochroneConfig:
+    """Routing and polygon settings for drive-time isochrones"""
+    intervals: Tuple[int, ...] = (5, 10, 15)   # Minutes
+    speeds_mph: Dict[str, float] = field(default_factory=dict)  # Overrides DEFAULT_SPEEDS_MPH
+    access_speed_mph: float = 10.0      # Off-network leg from origin to nearest road node
+    cell_size_degrees: float = 0.0025   # Origin cell (~280 m); sites in a cell share polygons
+    region_size_degrees: float = 0.25   # Origins in the same region share one graph load
+    alpha_miles: float = 0.75           # Longest triangle edge kept in the alpha shape
+    fringe_miles: float = 0.1           # Buffer around reached roads
+    origin_batch_size: int = 32         # Dijkstra sources per call
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR
+
+    @property
+    def profile(self) -> str:
+        """Digest of every setting that changes polygon shape, used to namespace the cache"""
+        settings = asdict(self)
+        for key in ('origin_batch_size', 'region_size_degrees', 'cache_dir'):
+            settings.pop(key)
+        return hashlib.sha1(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:12]
+
+
+class IsochroneEngine:
+    """Batch drive-time isochrones from a local road graph"""
+
+    def __init__(self, graph_loader: GraphLoader, config: IsochroneConfig = None):
+        self.graph_loader = graph_loader
+        self.config = config or IsochroneConfig()
+        self._memory_cache: Dict[str, Dict[int, object]] = {}
+        self._cache_dir = (Path(self.config.cache_dir) / self.config.profile
+                           if self.config.cache_dir else None)
+
+    def origin_cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        size = self.config.cell_size_degrees
+        return int(math.floor(lat / size)), int(math.floor(lon / size))
+
+    def cell_center(self, cell: Tuple[int, int]) -> Tuple[float, float]:
+        size = self.config.cell_size_degrees
+        return (cell[0] + 0.5) * size, (cell[1] + 0.5) * size
+
+    def isochrones(self, lat: float, lon: float, intervals: Sequence[int] = None) -> Dict[str, object]:
+        """{"5_min": polygon, ...} for one origin"""
+        return self.batch_isochrones([(lat, lon)], intervals)[0]
+
+    def batch_isochrones(self, points: Sequence[Tuple[float, float]],
+                         intervals: Sequence[int] = None) -> List[Dict[str, object]]:
+        """Isochrone polygons (lon/lat) for many (lat, lon) origins"""
+        intervals = sorted(set(intervals or self.config.intervals))
+        cells = [self.origin_cell(lat, lon) for lat, lon in points]
+
+        pending = sorted({cell for cell in cells if not self._load_cached(cell, intervals)})
+        if pending:
+            self._compute_cells(pending, intervals)
+
+        return [{f"{interval}_min": self._memory_cache[self._cell_key(cell)][interval]
+                 for interval in intervals} for cell in cells]
+
+    # ------------------------------------------------------------------ cache
+
+    def _cell_key(self, cell: Tuple[int, int]) -> str:
+        return f"{cell[0]}_{cell[1]}"
+
+    def _load_cached(self, cell: Tuple[int, int], intervals: Sequence[int]) -> bool:
+        """True if every interval for the cell is in memory (loading from disk if needed)"""
+        key = self._cell_key(cell)
+        cached = self._memory_cache.setdefault(key, {})
+        if all(interval in cached for interval in intervals):
+            return True
+        if self._cache_dir is not None:
+            path = self._cache_dir / f"{key}.json"
+            if path.exists():
+                with open(path) as f:
+                    for interval, geometry in json.load(f).items():
+                        cached.setdefault(int(interval), wkt.loads(geometry))
+        return all(interval in cached for interval in intervals)
+
+    def _store_cached(self, cell: Tuple[int, int], polygons: Dict[int, object]):
+        key = self._cell_key(cell)
+        cached = self._memory_cache.setdefault(key, {})
+        cached.update(polygons)
+        if self._cache_dir is not None:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(self._cache_dir / f"{key}.json", 'w') as f:
+                json.dump({str(interval): polygon.wkt for interval, polygon in cached.items()}, f)
+
+    # ---------------------------------------------------------------- routing
+
+    def _reach_miles(self, minutes: float) -> float:
+        speeds = dict(DEFAULT_SPEEDS_MPH, **self.config.speeds_mph)
+        return max(speeds.values()) * minutes / 60.0
+
+    def _compute_cells(self, cells: List[Tuple[int, int]], intervals: Sequence[int]):
+        """Group cells by region so each region's road graph is loaded once"""
+        config = self.config
+        regions: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        for cell in cells:
+            lat, lon = self.cell_center(cell)
+            region = (int(math.floor(lat / config.region_size_degrees)),
+                      int(math.floor(lon / config.region_size_degrees)))
+            regions.setdefault(region, []).append(cell)
+
+        reach = self._reach_miles(max(intervals))
+        for region_cells in regions.values():
+            centers = np.array([self.cell_center(cell) for cell in region_cells])
+            mid_lat = float(centers[:, 0].mean())
+            dlat = reach / MILES_PER_DEGREE
+            dlon = reach / (MILES_PER_DEGREE * max(0.1, math.cos(math.radians(mid_lat))))
+            bounds = (centers[:, 0].min() - dlat, centers[:, 1].min() - dlon,
+                      centers[:, 0].max() + dlat, centers[:, 1].max() + dlon)
+            graph = self.graph_loader(bounds)
+            logger.info(f"Routing {len(region_cells)} isochrone origins on "
+                        f"{graph.num_nodes:,} nodes / {graph.num_edges:,} edges")
+
+            for start in range(0, len(region_cells), config.origin_batch_size):
+                batch = region_cells[start:start + config.origin_batch_size]
+                batch_centers = centers[start:start + config.origin_batch_size]
+                polygons = self._route_batch(graph, batch_centers, intervals)
+                for cell, cell_polygons in zip(batch, polygons):
+                    self._store_cached(cell, cell_polygons)
+
+    def _route_batch(self, graph: RoadGraph, origins: np.ndarray,
+                     intervals: Sequence[int]) -> List[Dict[int, object]]:
+        """Bounded multi-source Dijkstra, then one polygon per origin and interval"""
+        config = self.config
+        max_minutes = float(max(intervals))
+
+        if graph.num_nodes == 0:
+            return [{interval: self._fallback_polygon(lat, lon, interval) for interval in intervals}
+                    for lat, lon in origins]
+
+        nodes = np.atleast_1d(graph.nearest_node(origins[:, 0], origins[:, 1]))
+        snap_miles = np.atleast_1d(haversine_miles(origins[:, 0], origins[:, 1],
+                                                    graph.node_lat[nodes], graph.node_lon[nodes]))
+        access_minutes = snap_miles / config.access_speed_mph * 60.0
+
+        adjacency = graph.adjacency('time', config.speeds_mph)
+        edge_minutes = graph.edge_travel_minutes(config.speeds_mph)
+        times = dijkstra(adjacency, directed=False, indices=nodes, limit=max_minutes)
+        times += access_minutes[:, None]
+
+        results = []
+        for row, (lat, lon) in enumerate(origins):
+            results.append({
+                interval: self._polygon(graph, edge_minutes, times[row], float(interval), lat, lon)
+                for interval in intervals
+            })
+        return results
+
+    # --------------------------------------------------------------- polygons
+
+    def _reached_points(self, graph: RoadGraph, edge_minutes: np.ndarray,
+                        times: np.ndarray, budget: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Points along every road reachable within the budget, densified for the alpha shape"""
+        # Each edge is travelled into from both ends, as far as the remaining budget allows
+        start = np.concatenate([graph.edge_from, graph.edge_to])
+        end = np.concatenate([graph.edge_to, graph.edge_from])
+        minutes = np.concatenate([edge_minutes, edge_minutes])
+        length = np.concatenate([graph.edge_length, graph.edge_length])
+
+        reached = times[start] <= budget
+        start, end = start[reached], end[reached]
+        fraction = np.clip((budget - times[start]) / np.maximum(minutes[reached], 1e-9), 0.0, 1.0)
+
+        lat_a, lon_a = graph.node_lat[start], graph.node_lon[start]
+        lat_b, lon_b = graph.node_lat[end], graph.node_lon[end]
+
+        # Sample each reached stretch at no more than half the alpha distance
+        spacing = self.config.alpha_miles / 2
+        samples = np.maximum(1, np.ceil(length[reached] * fraction / spacing)).astype(np.int64)
+        edge_index = np.repeat(np.arange(samples.size), samples)
+        step = np.arange(edge_index.size) - np.repeat(np.cumsum(samples) - samples, samples)
+        position = (step + 1) / samples[edge_index] * fraction[edge_index]
+
+        lat = np.concatenate([lat_a, lat_a[edge_index] + (lat_b - lat_a)[edge_index] * position])
+        lon = np.concatenate([lon_a, lon_a[edge_index] + (lon_b - lon_a)[edge_index] * position])
+        return lat, lon
+
+    def _polygon(self, graph: RoadGraph, edge_minutes: np.ndarray, times: np.ndarray,
+                 budget: float, origin_lat: float, origin_lon: float):
+        """Alpha shape of the reached road network in lon/lat"""
+        config = self.config
+        lat, lon = self._reached_points(graph, edge_minutes, times, budget)
+        if lat.size == 0:
+            return self._fallback_polygon(origin_lat, origin_lon, budget)
+
+        # Work in local miles so alpha and fringe distances are isotropic
+        x_scale = MILES_PER_DEGREE * math.cos(math.radians(origin_lat))
+        points = np.column_stack([(lon - origin_lon) * x_scale, (lat - origin_lat) * MILES_PER_DEGREE])
+        # Snap to half the fringe width; finer detail is lost in the fringe buffer anyway
+        snap = config.fringe_miles / 2
+        grid = np.round(points / snap).astype(np.int64)
+        _, first = np.unique((grid[:, 0] << 32) + grid[:, 1], return_index=True)
+        points = grid[first] * snap
+
+        shape = None
+        covered = np.zeros(points.shape[0], dtype=bool)
+        if points.shape[0] >= 4:
+            try:
+                simplices = Delaunay(points).simplices
+                triangles = points[simplices]
+                edges = np.linalg.norm(triangles - np.roll(triangles, 1, axis=1), axis=2)
+                keep = edges.max(axis=1) <= config.alpha_miles
+                if keep.any():
+                    pieces = shapely.polygons(np.concatenate([triangles[keep], triangles[keep][:, :1]], axis=1))
+                    shape = self._union_triangles(pieces[shapely.area(pieces) > 1e-9])
+                    covered[simplices[keep].ravel()] = True
+            except QhullError:
+                shape = None
+
+        # Only points outside every kept triangle need their own buffer
+        fringe = config.fringe_miles
+        shapes = [] if shape is None else [shape.buffer(fringe, quad_segs=4)]
+        if not covered.all():
+            shapes.append(shapely.multipoints(points[~covered]).buffer(fringe, quad_segs=4))
+        shape = shapely.union_all(shapes)
+        shape = shapely.make_valid(shape)
+
+        return shapely.transform(shape, lambda xy: np.column_stack([
+            xy[:, 0] / x_scale + origin_lon, xy[:, 1] / MILES_PER_DEGREE + origin_lat]))
+
+    @staticmethod
+    def _union_triangles(pieces: np.ndarray):
+        """Fast coverage union of Delaunay triangles, with the general union as a fallback"""
+        if pieces.size == 0:
+            return None
+        if hasattr(shapely, 'coverage_union_all'):
+            try:
+                return shapely.coverage_union_all(pieces)
+            except shapely.errors.GEOSException:
+                pass
+        return shapely.union_all(pieces)
+
+    def _fallback_polygon(self, lat: float, lon: float, minutes: float):
+        """Ellipse in degrees equal to a circle in miles, for areas with no road data"""
+        return circle_polygon(lat, lon, self._reach_miles(minutes) * 0.5)
+
+
+def circle_polygon(lat: float, lon: float, radius_miles: float, quad_segs: int = 16):
+    """Circle of radius_miles in lon/lat, stretched east-west for latitude"""
+    x_scale = MILES_PER_DEGREE * math.cos(math.radians(lat))
+    circle = Point(0, 0).buffer(radius_miles, quad_segs=quad_segs)
+    return shapely.transform(circle, lambda xy: np.column_stack([
+        xy[:, 0] / x_scale + lon, xy[:, 1] / MILES_PER_DEGREE + lat]))
@@ -59,6 +59,7 @@ def load_real_sba_data():
                         'franchise_name': row.get('FranchiseName', '').strip(),
                         'lender_name': row.get('ThirdPartyLender_Name', '').strip(),
                         'borrower_address': row.get('BorrStreet', '').strip(),
+                        'loan_status': row.get('LoanStatus', '').strip(),
                         'data_source': 'SBA_504_FOIA'
                     }
                     
@@ -4,17 +4,59 @@ Market Opportunity Scanner
 
 Scans Wisconsin cities and regions to identify optimal business opportunities
 based on competitive analysis, demographics, and market gaps.
+
+The osm_businesses table is fetched once into an in-memory spatial index
+(OSMBusinessIndex); city profiles, city centres and every (city, business
+type) saturation check are then evaluated from that index with NumPy,
+optionally spread across a process pool.
 """
 
 import logging
+import math
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Tuple
+from pathlib import Path
+from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass, asdict
+import numpy as np
 from google.cloud import bigquery
 from osm_competitive_analysis import OSMCompetitiveAnalysis, MarketSaturation
+from opportunity_grid import OpportunityGrid
+from osm_business_index import OSMBusinessIndex, DEFAULT_CACHE_DIR as BUSINESS_CACHE_DIR
+from market_saturation import (COMPETITIVE_GROUPS, OPPORTUNITY_THRESHOLDS, SATURATION_LEVELS,
+                               RECOMMENDED_ACTIONS, saturation_scores)
 import json
 
+# Cached city-centre lookup table (city -> [lat, lon])
+CITY_CENTERS_PATH = os.path.join(BUSINESS_CACHE_DIR, "city_centers.json")
+
+# Below this many (city, type) pairs a process pool costs more than it saves
+MIN_PAIRS_FOR_POOL = 2000
+
+
+def score_sites(index: OSMBusinessIndex, business_type: str, lat: np.ndarray, lon: np.ndarray,
+                radius_miles: float) -> Dict[str, np.ndarray]:
+    """Competitor counts and saturation scores for many sites of one business type"""
+    counts = index.count_within(lat, lon, [radius_miles], COMPETITIVE_GROUPS.get(business_type, [business_type]))
+    total, franchise = counts['total'][:, 0], counts['franchise'][:, 0]
+    score, level = saturation_scores(total / (math.pi * radius_miles ** 2), business_type)
+    return {'total': total, 'franchise': franchise, 'saturation': score, 'level': level}
+
+
+_WORKER_INDEX: Optional[OSMBusinessIndex] = None
+
+
+def _init_worker(columns: Dict[str, np.ndarray]):
+    """Rebuild the business index once per pool worker"""
+    global _WORKER_INDEX
+    _WORKER_INDEX = OSMBusinessIndex(columns)
+
+
+def _score_chunk(task: Tuple[str, np.ndarray, np.ndarray, float]) -> Dict[str, np.ndarray]:
+    business_type, lat, lon, radius_miles = task
+    return score_sites(_WORKER_INDEX, business_type, lat, lon, radius_miles)
+
 
 @dataclass
 class MarketOpportunity:
@@ -47,25 +89,36 @@ class CityProfile:
 class MarketOpportunityScanner:
     """Scanner for identifying optimal business opportunities"""
     
-    def __init__(self, project_id: str = "location-optimizer-1"):
-        """Initialize market opportunity scanner"""
+    def __init__(self, project_id: str = "location-optimizer-1", workers: int = None,
+                 business_index: OSMBusinessIndex = None):
+        """
+        Initialize market opportunity scanner
+        
+        Args:
+            project_id: Google Cloud project ID
+            workers: Process pool size for large scans (None or 1 scans in-process)
+            business_index: Preloaded business index (fetched from BigQuery on first use otherwise)
+        """
         self.analyzer = OSMCompetitiveAnalysis(project_id)
         self.client = bigquery.Client(project=project_id)
         self.project_id = project_id
         self.dataset_id = "raw_business_data"
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.workers = workers
+        self._business_index = business_index
+        self._city_centers: Optional[Dict[str, Tuple[float, float]]] = None
+        self._opportunity_grid: Optional[OpportunityGrid] = None
         
         # Business type opportunity thresholds
-        self.opportunity_thresholds = {
-            'food_beverage': {'min_pop': 5000, 'max_competitors_per_1k': 2.0},
-            'retail': {'min_pop': 3000, 'max_competitors_per_1k': 3.0},
-            'automotive': {'min_pop': 8000, 'max_competitors_per_1k': 1.0},
-            'healthcare': {'min_pop': 10000, 'max_competitors_per_1k': 0.8},
-            'personal_services': {'min_pop': 4000, 'max_competitors_per_1k': 2.5},
-            'professional_services': {'min_pop': 5000, 'max_competitors_per_1k': 2.0},
-            'fitness': {'min_pop': 8000, 'max_competitors_per_1k': 0.5},
-            'hospitality': {'min_pop': 15000, 'max_competitors_per_1k': 0.3}
-        }
+        self.opportunity_thresholds = {btype: dict(t) for btype, t in OPPORTUNITY_THRESHOLDS.items()}
+    
+    @property
+    def business_index(self) -> OSMBusinessIndex:
+        """osm_businesses in memory: local cache if fresh, else one BigQuery fetch"""
+        if self._business_index is None:
+            self._business_index = OSMBusinessIndex.load_or_fetch(self.client, self.project_id, self.dataset_id)
+            self.logger.info(f"Loaded {len(self._business_index):,} OSM businesses into memory")
+        return self._business_index
     
     def get_city_profiles(self) -> List[CityProfile]:
         """
@@ -74,57 +127,36 @@ class MarketOpportunityScanner:
         Returns:
             List of city business profiles
         """
-        query = f"""
-        SELECT 
-            address_city as city,
-            COUNT(*) as total_businesses,
-            SUM(CASE WHEN franchise_indicator = true THEN 1 ELSE 0 END) as franchise_count,
-            business_type,
-            COUNT(*) as type_count
-        FROM `{self.project_id}.{self.dataset_id}.osm_businesses`
-        WHERE address_city IS NOT NULL
-        GROUP BY address_city, business_type
-        ORDER BY address_city, type_count DESC
-        """
-        
         try:
-            results = self.client.query(query).result()
+            index = self.business_index
+            cities = np.asarray(index.columns['address_city']).astype(str)
+            has_city = cities != ''
+            city_names, city_codes = np.unique(cities[has_city], return_inverse=True)
+            type_codes = index.type_codes[has_city]
+            franchise = index.franchise[has_city]
             
-            # Group by city
-            city_data = {}
-            for row in results:
-                city = row.city
-                if city not in city_data:
-                    city_data[city] = {
-                        'total_businesses': 0,
-                        'franchise_count': 0,
-                        'business_types': {}
-                    }
-                
-                city_data[city]['business_types'][row.business_type] = row.type_count
-                city_data[city]['total_businesses'] += row.type_count
-                city_data[city]['franchise_count'] += row.franchise_count
+            # (city, type) counts and per-city totals in one pass
+            type_counts = np.zeros((city_names.size, index.types.size), dtype=np.int64)
+            np.add.at(type_counts, (city_codes, type_codes), 1)
+            totals = type_counts.sum(axis=1)
+            franchise_counts = np.bincount(city_codes, weights=franchise, minlength=city_names.size)
             
-            # Convert to CityProfile objects
             profiles = []
-            for city, data in city_data.items():
-                franchise_percentage = (data['franchise_count'] / data['total_businesses']) * 100
+            for i, city in enumerate(city_names):
+                present = np.nonzero(type_counts[i])[0]
+                business_types = {str(index.types[t]): int(type_counts[i, t]) for t in present}
                 
                 # Get dominant industries (top 3)
-                sorted_types = sorted(data['business_types'].items(), 
-                                    key=lambda x: x[1], reverse=True)
+                sorted_types = sorted(business_types.items(), key=lambda x: x[1], reverse=True)
                 dominant_industries = [btype for btype, count in sorted_types[:3]]
                 
-                # Estimate business density (simplified)
-                business_density = data['total_businesses'] / 10  # Rough estimate
-                
                 profile = CityProfile(
-                    city=city,
+                    city=str(city),
                     county="Unknown",  # Would need county mapping
-                    total_businesses=data['total_businesses'],
-                    business_types=data['business_types'],
-                    franchise_percentage=franchise_percentage,
-                    business_density=business_density,
+                    total_businesses=int(totals[i]),
+                    business_types=business_types,
+                    franchise_percentage=franchise_counts[i] / totals[i] * 100,
+                    business_density=totals[i] / 10,  # Rough estimate
                     dominant_industries=dominant_industries
                 )
                 profiles.append(profile)
@@ -170,82 +202,128 @@ class MarketOpportunityScanner:
         return market_gaps
     
     def scan_wisconsin_opportunities(self, business_type: str = None,
-                                   min_opportunity_score: float = 60.0) -> List[MarketOpportunity]:
+                                   min_opportunity_score: float = 60.0,
+                                   radius_miles: float = 5.0) -> List[MarketOpportunity]:
         """
         Scan Wisconsin for market opportunities
         
         Args:
             business_type: Specific business type to analyze (None for all)
             min_opportunity_score: Minimum opportunity score threshold
+            radius_miles: Saturation analysis radius around each city centre
             
         Returns:
             List of market opportunities
         """
         city_profiles = self.get_city_profiles()
-        opportunities = []
-        
         analysis_date = datetime.now().strftime('%Y-%m-%d')
         
+        # Collect every (city, business type) pair first, then score them together
+        pairs = []
         for profile in city_profiles:
             # Skip very small cities
             if profile.total_businesses < 20:
                 continue
             
-            # Estimate city center coordinates (simplified)
-            # In practice, you'd want to geocode city names
             city_coords = self._get_city_coordinates(profile.city)
             if not city_coords:
                 continue
             
-            lat, lon = city_coords
-            
+            market_gaps = self.identify_market_gaps(profile)
             # Determine business types to analyze
-            if business_type:
-                types_to_analyze = [business_type]
-            else:
-                market_gaps = self.identify_market_gaps(profile)
-                types_to_analyze = market_gaps[:3]  # Top 3 opportunities
-            
+            types_to_analyze = [business_type] if business_type else market_gaps[:3]  # Top 3 opportunities
             for btype in types_to_analyze:
-                try:
-                    # Analyze market saturation
-                    saturation = self.analyzer.assess_market_saturation(
-                        lat, lon, btype, radius_miles=5.0, area_name=profile.city
-                    )
-                    
-                    # Only include high-opportunity markets
-                    if saturation.opportunity_score >= min_opportunity_score:
-                        # Estimate population
-                        estimated_population = profile.total_businesses * 50
-                        
-                        opportunity = MarketOpportunity(
-                            city=profile.city,
-                            county="Wisconsin",  # Simplified
-                            business_type=btype,
-                            opportunity_score=saturation.opportunity_score,
-                            competition_level=saturation.saturation_level,
-                            total_competitors=saturation.total_competitors,
-                            franchise_competition=saturation.franchise_competitors,
-                            market_gap_indicator=btype in self.identify_market_gaps(profile),
-                            population_estimate=estimated_population,
-                            recommendation=saturation.recommended_action,
-                            analysis_date=analysis_date
-                        )
-                        opportunities.append(opportunity)
-                
-                except Exception as e:
-                    self.logger.warning(f"Error analyzing {profile.city} for {btype}: {e}")
-                    continue
+                pairs.append((profile, btype, city_coords, btype in market_gaps))
+        
+        scores = self._score_pairs([(btype, coords) for _, btype, coords, _ in pairs], radius_miles)
+        
+        opportunities = []
+        for (profile, btype, _, is_gap), result in zip(pairs, scores):
+            opportunity_score = 100 - result['saturation']
+            # Only include high-opportunity markets
+            if opportunity_score < min_opportunity_score:
+                continue
+            opportunities.append(MarketOpportunity(
+                city=profile.city,
+                county="Wisconsin",  # Simplified
+                business_type=btype,
+                opportunity_score=opportunity_score,
+                competition_level=SATURATION_LEVELS[result['level']],
+                total_competitors=result['total'],
+                franchise_competition=result['franchise'],
+                market_gap_indicator=is_gap,
+                population_estimate=profile.total_businesses * 50,  # Estimate population
+                recommendation=RECOMMENDED_ACTIONS[result['level']],
+                analysis_date=analysis_date
+            ))
         
         # Sort by opportunity score
         opportunities.sort(key=lambda x: x.opportunity_score, reverse=True)
         
-        self.logger.info(f"Found {len(opportunities)} market opportunities")
+        self.logger.info(f"Found {len(opportunities)} market opportunities from {len(pairs)} city/type pairs")
         return opportunities
     
+    def _score_pairs(self, pairs: List[Tuple[str, Tuple[float, float]]],
+                     radius_miles: float) -> List[Dict]:
+        """Saturation results for (business type, (lat, lon)) pairs, grouped by type"""
+        results: List[Dict] = [None] * len(pairs)
+        by_type: Dict[str, List[int]] = {}
+        for i, (btype, _) in enumerate(pairs):
+            by_type.setdefault(btype, []).append(i)
+        
+        tasks, positions = [], []
+        chunks = max(1, self.workers or 1)
+        for btype, members in by_type.items():
+            for chunk in np.array_split(np.array(members), min(chunks, len(members))):
+                lat = np.array([pairs[i][1][0] for i in chunk])
+                lon = np.array([pairs[i][1][1] for i in chunk])
+                tasks.append((btype, lat, lon, radius_miles))
+                positions.append(chunk)
+        
+        if self.workers and self.workers > 1 and len(pairs) >= MIN_PAIRS_FOR_POOL:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(self.business_index.columns,)) as pool:
+                outputs = list(pool.map(_score_chunk, tasks))
+        else:
+            index = self.business_index
+            outputs = [score_sites(index, *task) for task in tasks]
+        
+        for chunk, output in zip(positions, outputs):
+            for j, i in enumerate(chunk):
+                results[i] = {
+                    'total': int(output['total'][j]),
+                    'franchise': int(output['franchise'][j]),
+                    'saturation': float(output['saturation'][j]),
+                    'level': int(output['level'][j])
+                }
+        return results
+    
+    def find_best_cells(self, business_type: str, county: str = None, top_n: int = 20,
+                        min_population: int = 0, market_gaps_only: bool = False) -> List[Dict]:
+        """
+        Best hex cells for a business type from the precomputed statewide opportunity grid
+        
+        Args:
+            business_type: Business type to rank cells for
+            county: County name or FIPS code to restrict to (None for statewide)
+            top_n: Number of cells to return
+            min_population: Minimum population within the grid's scoring radius
+            market_gaps_only: Only return cells flagged as market gaps
+            
+        Returns:
+            List of cell records sorted by opportunity score (empty if the grid is not built)
+        """
+        if self._opportunity_grid is None:
+            self._opportunity_grid = OpportunityGrid.open_default()
+            if self._opportunity_grid is None:
+                self.logger.warning("Opportunity grid not built; run `opportunity_grid.py build`")
+                return []
+        return self._opportunity_grid.best_cells(business_type, county, top_n,
+                                                 min_population, market_gaps_only)
+    
     def _get_city_coordinates(self, city_name: str) -> Tuple[float, float]:
         """
-        Get approximate coordinates for a city (simplified implementation)
+        Get approximate coordinates for a city from the cached city-centre table
         
         Args:
             city_name: Name of the city
@@ -253,24 +331,33 @@ class MarketOpportunityScanner:
         Returns:
             Tuple of (latitude, longitude) or None if not found
         """
-        # Get coordinates from existing business data
-        query = f"""
-        SELECT AVG(latitude) as avg_lat, AVG(longitude) as avg_lon
-        FROM `{self.project_id}.{self.dataset_id}.osm_businesses`
-        WHERE address_city = '{city_name}'
-        AND latitude IS NOT NULL 
-        AND longitude IS NOT NULL
-        """
-        
-        try:
-            results = self.client.query(query).result()
-            for row in results:
-                if row.avg_lat and row.avg_lon:
-                    return (row.avg_lat, row.avg_lon)
-        except Exception as e:
-            self.logger.warning(f"Could not get coordinates for {city_name}: {e}")
-        
-        return None
+        if self._city_centers is None:
+            self._city_centers = self._load_city_centers()
+        return self._city_centers.get(city_name)
+    
+    def _load_city_centers(self) -> Dict[str, Tuple[float, float]]:
+        """City -> mean business location, cached on disk per business index fetch"""
+        index = self.business_index
+        path = Path(CITY_CENTERS_PATH)
+        if index.fetched and path.exists():
+            try:
+                with open(path) as f:
+                    cached = json.load(f)
+                # A table built from an older fetch would miss newly added cities
+                if cached.get('index_fetched') == index.fetched:
+                    return {city: tuple(coords) for city, coords in cached['centers'].items()}
+            except Exception as e:
+                self.logger.warning(f"Could not read city centre table: {e}")
+        
+        centers = index.city_centroids()
+        if index.fetched:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(path, 'w') as f:
+                    json.dump({'index_fetched': index.fetched, 'centers': centers}, f, indent=1, sort_keys=True)
+            except Exception as e:
+                self.logger.warning(f"Could not save city centre table: {e}")
+        return centers
     
     def generate_opportunity_report(self, opportunities: List[MarketOpportunity],
                                   business_type: str = None) -> str:
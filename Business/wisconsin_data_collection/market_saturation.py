@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Market Saturation
+=================
+
+Competitor-density saturation scoring shared by OSMCompetitiveAnalysis, the
+market opportunity scanner and the statewide opportunity grid. Scores are
+computed with NumPy so a single site and a few hundred thousand grid cells go
+through the same thresholds.
+
+Features:
+- Competitive business-type groups and per-type density thresholds
+- Vectorized saturation score, level and opportunity score
+- Per-type population thresholds for market-gap detection
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Business types that compete with each target type
+COMPETITIVE_GROUPS: Dict[str, List[str]] = {
+    'food_beverage': ['food_beverage', 'restaurant'],
+    'retail': ['retail'],
+    'automotive': ['automotive'],
+    'healthcare': ['healthcare'],
+    'personal_services': ['personal_services'],
+    'professional_services': ['professional_services'],
+    'fitness': ['fitness'],
+    'hospitality': ['hospitality']
+}
+
+# Business type specific thresholds (competitors per sq mile)
+SATURATION_THRESHOLDS: Dict[str, Dict[str, float]] = {
+    'food_beverage': {'low': 2, 'medium': 5, 'high': 10},
+    'retail': {'low': 3, 'medium': 8, 'high': 15},
+    'automotive': {'low': 1, 'medium': 3, 'high': 6},
+    'healthcare': {'low': 1, 'medium': 2, 'high': 4},
+    'personal_services': {'low': 2, 'medium': 5, 'high': 10},
+    'professional_services': {'low': 3, 'medium': 7, 'high': 12},
+    'fitness': {'low': 0.5, 'medium': 1.5, 'high': 3},
+    'hospitality': {'low': 0.5, 'medium': 1, 'high': 2}
+}
+
+# Minimum population and competitors per 1,000 residents a market supports
+OPPORTUNITY_THRESHOLDS: Dict[str, Dict[str, float]] = {
+    'food_beverage': {'min_pop': 5000, 'max_competitors_per_1k': 2.0},
+    'retail': {'min_pop': 3000, 'max_competitors_per_1k': 3.0},
+    'automotive': {'min_pop': 8000, 'max_competitors_per_1k': 1.0},
+    'healthcare': {'min_pop': 10000, 'max_competitors_per_1k': 0.8},
+    'personal_services': {'min_pop': 4000, 'max_competitors_per_1k': 2.5},
+    'professional_services': {'min_pop': 5000, 'max_competitors_per_1k': 2.0},
+    'fitness': {'min_pop': 8000, 'max_competitors_per_1k': 0.5},
+    'hospitality': {'min_pop': 15000, 'max_competitors_per_1k': 0.3}
+}
+
+SATURATION_LEVELS = ['Low', 'Medium', 'High', 'Saturated']
+RECOMMENDED_ACTIONS = [
+    'Strong opportunity - enter market',
+    'Moderate opportunity - differentiate offering',
+    'Challenging market - focus on unique value proposition',
+    'Avoid market - oversaturated'
+]
+
+# Share of the supportable competitor count below which a market counts as a gap
+MARKET_GAP_RATIO = 0.7
+
+
+def saturation_scores(competitor_density, business_type: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Saturation score (0-100) and level index into SATURATION_LEVELS for each density
+
+    Piecewise-linear in competitors per square mile: 0-25 up to the 'low'
+    threshold, 25-50 to 'medium', 50-85 to 'high', then +3 per extra
+    competitor per square mile, capped at 100.
+    """
+    density = np.asarray(competitor_density, dtype=float)
+    thresholds = SATURATION_THRESHOLDS.get(business_type, SATURATION_THRESHOLDS['retail'])
+    low, medium, high = thresholds['low'], thresholds['medium'], thresholds['high']
+
+    level = np.searchsorted(np.array([low, medium, high]), density, side='left')
+    score = np.select(
+        [level == 0, level == 1, level == 2],
+        [density / low * 25,
+         25 + (density - low) / (medium - low) * 25,
+         50 + (density - medium) / (high - medium) * 35],
+        default=np.minimum(100, 85 + (density - high) * 3)
+    )
+    return score, level
+
+
+def classify_saturation(competitor_density: float, business_type: str) -> Tuple[str, float, str, float]:
+    """(saturation level, saturation score, recommended action, opportunity score) for one area"""
+    score, level = saturation_scores(competitor_density, business_type)
+    score, level = float(score), int(level)
+    return SATURATION_LEVELS[level], score, RECOMMENDED_ACTIONS[level], 100 - score
+
+
+def market_gaps(population, competitors, business_type: str) -> np.ndarray:
+    """True where the population supports the type and competitors are well below capacity"""
+    thresholds = OPPORTUNITY_THRESHOLDS.get(business_type, OPPORTUNITY_THRESHOLDS['retail'])
+    population = np.asarray(population, dtype=float)
+    expected = population / 1000 * thresholds['max_competitors_per_1k']
+    return (population >= thresholds['min_pop']) & (np.asarray(competitors) < expected * MARKET_GAP_RATIO)
@@ -152,6 +152,9 @@ class SBALoanRecord(BaseModel):
     # Lender information
     lender_name: Optional[str] = Field(None, description="Lender institution name")
     
+    # Loan outcome (PIF paid in full, CHGOFF charged off, EXEMPT/COMMIT open, CANCLD cancelled)
+    loan_status: Optional[str] = Field(None, description="SBA loan status")
+    
     # Metadata
     data_source: str = Field(default="SBA", description="Data source")
     data_extraction_date: datetime = Field(default_factory=datetime.now)
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo Engine
+==================
+
+Vectorized Monte Carlo simulation of monthly operating profit and break-even
+timing for Section 4.3 risk analysis. All scenarios are drawn as NumPy arrays
+from a seeded Generator and processed in fixed-size chunks, so 1M+ paths run
+in well under a second with bounded memory.
+
+Features:
+- Correlated revenue/cost drivers via Cholesky factorization
+- Ramp-up curve and monthly seasonality applied to break-even timing
+- Optional quasi-random (scrambled Sobol) sampling when SciPy is installed
+- Tail metrics (5% VaR, expected shortfall) with convergence diagnostics
+"""
+
+import logging
+import math
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Quasi-random sampling support (optional)
+try:
+    from scipy.stats import qmc
+    from scipy.special import ndtri
+    QMC_AVAILABLE = True
+except ImportError:
+    QMC_AVAILABLE = False
+    qmc = None
+    ndtri = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MonteCarloConfig:
+    """Simulation settings for the Monte Carlo engine"""
+    num_simulations: int = 1_000_000
+    chunk_size: int = 65_536
+    seed: Optional[int] = 42
+    quasi_random: bool = False
+    horizon_months: int = 60
+    breakeven_target_months: int = 18
+    var_confidence: float = 0.95
+    revenue_volatility: float = 0.20    # Std deviation as fraction of base revenue
+    cost_volatility: float = 0.10       # Std deviation as fraction of base costs
+    revenue_cost_correlation: float = 0.50
+    ramp_up_months: int = 6             # Linear ramp to full capacity
+    annual_growth_rate: float = 0.05    # Growth after the first year
+    convergence_batches: int = 20       # Batch-means batches for tail standard errors
+    convergence_tolerance: float = 0.02  # Max relative standard error of VaR
+
+    def __post_init__(self):
+        if self.num_simulations < 2:
+            raise ValueError(f"num_simulations must be at least 2, got {self.num_simulations}")
+
+
+@dataclass
+class MonteCarloResult:
+    """Summary statistics and convergence diagnostics from a simulation run"""
+    num_simulations: int
+    profitability_probability: float
+    breakeven_probability: float
+    value_at_risk: float
+    expected_shortfall: float
+    avg_monthly_profit: float
+    profit_std_deviation: float
+    median_breakeven_months: float
+    mean_profit_standard_error: float
+    profitability_standard_error: float
+    value_at_risk_standard_error: float
+    expected_shortfall_standard_error: float
+    converged: bool
+    convergence_path: List[Dict[str, float]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, float]:
+        """Flatten to the monte_carlo_results dict used by RiskAssessment"""
+        return {
+            'profitability_probability': self.profitability_probability,
+            'breakeven_probability': self.breakeven_probability,
+            'value_at_risk': abs(self.value_at_risk) if self.value_at_risk < 0 else 0,
+            'expected_shortfall': abs(self.expected_shortfall) if self.expected_shortfall < 0 else 0,
+            'avg_monthly_profit': self.avg_monthly_profit,
+            'profit_std_deviation': self.profit_std_deviation,
+            'median_breakeven_months': self.median_breakeven_months,
+            'num_simulations': self.num_simulations,
+            'mean_profit_standard_error': self.mean_profit_standard_error,
+            'profitability_standard_error': self.profitability_standard_error,
+            'value_at_risk_standard_error': self.value_at_risk_standard_error,
+            'expected_shortfall_standard_error': self.expected_shortfall_standard_error,
+            'converged': self.converged
+        }
+
+
+class MonteCarloEngine:
+    """Chunked, vectorized profit and break-even simulator"""
+
+    def __init__(self, config: MonteCarloConfig = None):
+        self.config = config or MonteCarloConfig()
+        if self.config.quasi_random and not QMC_AVAILABLE:
+            logger.warning("SciPy not available - falling back to pseudo-random sampling")
+            self.config.quasi_random = False
+
+    def build_revenue_curve(self, seasonal_factors: Optional[np.ndarray] = None) -> np.ndarray:
+        """Monthly revenue multipliers (ramp-up x growth x seasonality) over the horizon"""
+        config = self.config
+        months = np.arange(config.horizon_months)
+        year = months // 12
+
+        ramp = np.minimum(1.0, (months + 1) / max(1, config.ramp_up_months))
+        growth = np.where(year == 0, ramp, 1.0 + config.annual_growth_rate * year)
+
+        if seasonal_factors is None:
+            seasonal_factors = np.ones(12)
+        seasonal_factors = np.asarray(seasonal_factors, dtype=float)
+        seasonal_factors = seasonal_factors / seasonal_factors.mean()
+
+        return growth * seasonal_factors[months % 12]
+
+    def _cholesky_factor(self) -> np.ndarray:
+        """Lower-triangular factor of the revenue/cost correlation matrix"""
+        rho = float(np.clip(self.config.revenue_cost_correlation, -0.999, 0.999))
+        return np.linalg.cholesky(np.array([[1.0, rho], [rho, 1.0]]))
+
+    def _standard_normals(self, rng: np.random.Generator, sampler, n: int) -> np.ndarray:
+        """Draw an (n, 2) block of independent standard normals"""
+        if sampler is not None:
+            uniforms = sampler.random(n)
+            # Keep uniforms strictly inside (0, 1) so the inverse CDF stays finite
+            return ndtri(np.clip(uniforms, 1e-12, 1 - 1e-12))
+        return rng.standard_normal((n, 2))
+
+    def simulate(self, monthly_revenue_base: float, monthly_costs_base: float,
+                 startup_costs: float, seasonal_factors: Optional[np.ndarray] = None) -> MonteCarloResult:
+        """Run the simulation and summarize profit and break-even distributions"""
+        config = self.config
+        n = int(config.num_simulations)
+        chunk_size = int(config.chunk_size)
+        sampler = None
+        if config.quasi_random:
+            sampler = qmc.Sobol(d=2, scramble=True, seed=config.seed)
+            # Sobol points are balanced in power-of-two blocks
+            chunk_size = 1 << max(1, int(math.log2(max(2, chunk_size))))
+        rng = np.random.default_rng(config.seed)
+
+        chol = self._cholesky_factor()
+        scale = np.array([monthly_revenue_base * config.revenue_volatility,
+                          monthly_costs_base * config.cost_volatility])
+        base = np.array([monthly_revenue_base, monthly_costs_base])
+
+        revenue_curve = self.build_revenue_curve(seasonal_factors)
+
+        monthly_profits = np.empty(n)
+        breakeven_months = np.empty(n)
+
+        for start in range(0, n, chunk_size):
+            stop = min(n, start + chunk_size)
+            z = self._standard_normals(rng, sampler, stop - start)
+            drivers = base + (z @ chol.T) * scale
+            revenue = np.ascontiguousarray(drivers[:, 0])
+            costs = np.ascontiguousarray(drivers[:, 1])
+
+            monthly_profits[start:stop] = revenue - costs
+
+            # Cumulative profit month by month: revenue follows the ramp/seasonal
+            # curve, operating costs are incurred in full from opening day
+            breakeven = breakeven_months[start:stop]
+            breakeven.fill(config.horizon_months)
+            cumulative_profit = np.zeros(stop - start)
+            pending = np.ones(stop - start, dtype=bool)
+            monthly_revenue = np.empty(stop - start)
+            for month, factor in enumerate(revenue_curve, start=1):
+                np.multiply(revenue, factor, out=monthly_revenue)
+                cumulative_profit += monthly_revenue
+                cumulative_profit -= costs
+                recovered = cumulative_profit >= startup_costs
+                recovered &= pending
+                breakeven[recovered] = month
+                pending &= ~recovered
+
+        return self._summarize(monthly_profits, breakeven_months)
+
+    def _tail_metrics(self, profits: np.ndarray) -> Tuple[float, float]:
+        """Value at risk and expected shortfall of the lower tail"""
+        alpha = 1.0 - self.config.var_confidence
+        var = float(np.quantile(profits, alpha))
+        tail = profits[profits <= var]
+        shortfall = float(tail.mean()) if tail.size else var
+        return var, shortfall
+
+    def _summarize(self, profits: np.ndarray, breakeven_months: np.ndarray) -> MonteCarloResult:
+        """Point estimates plus standard errors for every headline metric"""
+        config = self.config
+        n = profits.size
+
+        profitable = profits > 0
+        p_profit = float(profitable.mean())
+        p_breakeven = float((breakeven_months <= config.breakeven_target_months).mean())
+        mean_profit = float(profits.mean())
+        std_profit = float(profits.std())
+        var, shortfall = self._tail_metrics(profits)
+
+        # Batch means for the tail statistics, which have no simple closed form SE
+        batches = min(n, max(2, min(config.convergence_batches, n // 100 or 2)))
+        batch_tails = np.array([self._tail_metrics(batch) for batch in np.array_split(profits, batches)])
+        var_se = float(batch_tails[:, 0].std(ddof=1) / math.sqrt(batches))
+        shortfall_se = float(batch_tails[:, 1].std(ddof=1) / math.sqrt(batches))
+
+        # VaR estimates on growing prefixes show how the tail settles with N
+        convergence_path = []
+        checkpoint = 1000
+        while checkpoint < n:
+            prefix_var, prefix_shortfall = self._tail_metrics(profits[:checkpoint])
+            convergence_path.append({'num_simulations': checkpoint,
+                                     'value_at_risk': prefix_var,
+                                     'expected_shortfall': prefix_shortfall})
+            checkpoint *= 10
+        convergence_path.append({'num_simulations': n, 'value_at_risk': var,
+                                 'expected_shortfall': shortfall})
+
+        scale = max(abs(var), std_profit, 1.0)
+        converged = var_se / scale <= config.convergence_tolerance
+
+        return MonteCarloResult(
+            num_simulations=n,
+            profitability_probability=p_profit * 100,
+            breakeven_probability=p_breakeven * 100,
+            value_at_risk=var,
+            expected_shortfall=shortfall,
+            avg_monthly_profit=mean_profit,
+            profit_std_deviation=std_profit,
+            median_breakeven_months=float(np.median(breakeven_months)),
+            mean_profit_standard_error=std_profit / math.sqrt(n),
+            profitability_standard_error=math.sqrt(p_profit * (1 - p_profit) / n) * 100,
+            value_at_risk_standard_error=var_se,
+            expected_shortfall_standard_error=shortfall_se,
+            converged=bool(converged),
+            convergence_path=convergence_path
+        )
+
+
+if __name__ == "__main__":
+    import time
+
+    engine = MonteCarloEngine()
+    start = time.perf_counter()
+    result = engine.simulate(65000, 52000, 220000)
+    elapsed = time.perf_counter() - start
+
+    print(f"Paths: {result.num_simulations:,} in {elapsed:.3f}s")
+    print(f"Profitability probability: {result.profitability_probability:.2f}%")
+    print(f"Break-even within 18 months: {result.breakeven_probability:.2f}%")
+    print(f"5% VaR: ${result.value_at_risk:,.0f} (SE ${result.value_at_risk_standard_error:,.0f})")
+    print(f"Expected shortfall: ${result.expected_shortfall:,.0f}")
+    print(f"Converged: {result.converged}")
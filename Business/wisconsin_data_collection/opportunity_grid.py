@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Opportunity Grid
+================
+
+Statewide batch job that tiles Wisconsin into hexagons (see hex_grid) and
+precomputes, for every cell and business type, competitor counts at several
+radii, Census population / households / income, and the saturation and
+opportunity scores used by OSMCompetitiveAnalysis. Radius sums are hex-disk
+convolutions over dense axial rasters, so the whole state is scored in
+seconds. Results are saved as one compressed columnar .npz artifact; queries
+such as "best cells for food & beverage in Dane County" are in-memory
+filters and sorts.
+
+Features:
+- Competitor and franchise counts per business type at each radius
+- Block-group population spread over the cells whose centres it contains
+- Saturation level, opportunity score and market-gap flag per type
+- County filtering, top-N ranking and roll-up to coarser resolutions
+"""
+
+import argparse
+import json
+import logging
+import os
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import shapely
+from scipy.signal import fftconvolve
+
+from block_group_index import BlockGroupIndex
+from hex_grid import (AxialRaster, WISCONSIN_BOUNDS, cell_to_latlng, cell_to_parent, disk_kernel,
+                      hex_area_sq_miles, hex_size_miles)
+from market_saturation import (COMPETITIVE_GROUPS, SATURATION_LEVELS, RECOMMENDED_ACTIONS,
+                               market_gaps, saturation_scores)
+from osm_business_index import OSMBusinessIndex
+
+# BigQuery access for fetching businesses (optional)
+try:
+    from google.cloud import bigquery
+    BIGQUERY_AVAILABLE = True
+except ImportError:
+    BIGQUERY_AVAILABLE = False
+    bigquery = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT_DIR = os.path.join("data_cache", "opportunity_grid")
+
+# Wisconsin counties and their FIPS codes
+WISCONSIN_COUNTIES = {
+    '55001': 'Adams', '55003': 'Ashland', '55005': 'Barron', '55007': 'Bayfield',
+    '55009': 'Brown', '55011': 'Buffalo', '55013': 'Burnett', '55015': 'Calumet',
+    '55017': 'Chippewa', '55019': 'Clark', '55021': 'Columbia', '55023': 'Crawford',
+    '55025': 'Dane', '55027': 'Dodge', '55029': 'Door', '55031': 'Douglas',
+    '55033': 'Dunn', '55035': 'Eau Claire', '55037': 'Florence', '55039': 'Fond du Lac',
+    '55041': 'Forest', '55043': 'Grant', '55045': 'Green', '55047': 'Green Lake',
+    '55049': 'Iowa', '55051': 'Iron', '55053': 'Jackson', '55055': 'Jefferson',
+    '55057': 'Juneau', '55059': 'Kenosha', '55061': 'Kewaunee', '55063': 'La Crosse',
+    '55065': 'Lafayette', '55067': 'Langlade', '55069': 'Lincoln', '55071': 'Manitowoc',
+    '55073': 'Marathon', '55075': 'Marinette', '55077': 'Marquette', '55078': 'Menominee',
+    '55079': 'Milwaukee', '55081': 'Monroe', '55083': 'Oconto', '55085': 'Oneida',
+    '55087': 'Outagamie', '55089': 'Ozaukee', '55091': 'Pepin', '55093': 'Pierce',
+    '55095': 'Polk', '55097': 'Portage', '55099': 'Price', '55101': 'Racine',
+    '55103': 'Richland', '55105': 'Rock', '55107': 'Rusk', '55109': 'Saint Croix',
+    '55111': 'Sauk', '55113': 'Sawyer', '55115': 'Shawano', '55117': 'Sheboygan',
+    '55119': 'Taylor', '55121': 'Trempealeau', '55123': 'Vernon', '55125': 'Vilas',
+    '55127': 'Walworth', '55129': 'Washburn', '55131': 'Washington', '55133': 'Waukesha',
+    '55135': 'Waupaca', '55137': 'Waushara', '55139': 'Winnebago', '55141': 'Wood'
+}
+
+
+@dataclass
+class OpportunityGridConfig:
+    """Grid resolution, radii and business types for the statewide job"""
+    resolution: int = 6                          # ~0.5 mile hexagons (~0.65 sq mi)
+    radii_miles: Tuple[float, ...] = (1.0, 3.0, 5.0)
+    scoring_radius_miles: float = 5.0            # Radius used by the scanner's saturation analysis
+    business_types: Tuple[str, ...] = tuple(COMPETITIVE_GROUPS)
+    bounds: Tuple[float, float, float, float] = WISCONSIN_BOUNDS
+    output_dir: str = DEFAULT_OUTPUT_DIR
+
+    def __post_init__(self):
+        self.radii_miles = tuple(sorted(set(self.radii_miles) | {self.scoring_radius_miles}))
+
+
+def radius_label(radius: float) -> str:
+    return f"{radius:g}mi"
+
+
+def _radius_sums(raster: np.ndarray, kernels: Dict[float, np.ndarray],
+                 rows: np.ndarray, cols: np.ndarray) -> Dict[float, np.ndarray]:
+    """Sum of raster values within each radius of every selected cell"""
+    return {radius: np.maximum(fftconvolve(raster, kernel, mode='same')[rows, cols], 0.0)
+            for radius, kernel in kernels.items()}
+
+
+def build_opportunity_grid(businesses: OSMBusinessIndex, block_groups: BlockGroupIndex,
+                           config: OpportunityGridConfig = None) -> 'OpportunityGrid':
+    """Score every land cell in the bounds for every configured business type"""
+    config = config or OpportunityGridConfig()
+    started = datetime.now()
+    raster = AxialRaster(config.resolution, config.bounds)
+    cell_ids, rows, cols = raster.cells()
+
+    # Land cells are those whose centre falls in a block group
+    lat, lon = cell_to_latlng(cell_ids)
+    point_index, group_index = block_groups.tree.query(shapely.points(lon, lat), predicate='intersects')
+    point_index, first = np.unique(point_index, return_index=True)
+    group_index = group_index[first]
+    cell_ids, rows, cols = cell_ids[point_index], rows[point_index], cols[point_index]
+    lat, lon = lat[point_index], lon[point_index]
+    logger.info(f"Scoring {cell_ids.size:,} land cells at resolution {config.resolution} "
+                f"({hex_size_miles(config.resolution):.2f} mi hexagons)")
+
+    # Spread each block group over the cells whose centres it contains; block groups
+    # smaller than a cell fall back to their centroid's cell
+    cells_per_group = np.bincount(group_index, minlength=len(block_groups))
+    orphans = np.nonzero(cells_per_group == 0)[0]
+    centroid_lat, centroid_lon = block_groups.centroids
+    population = np.nan_to_num(block_groups.population)
+    households = np.nan_to_num(block_groups.households)
+    income = block_groups.attributes.get('median_household_income', np.full(len(block_groups), np.nan))
+    income_households = np.where(np.isnan(income), 0.0, households)
+
+    def spread(values: np.ndarray) -> np.ndarray:
+        grid = np.zeros(raster.shape)
+        np.add.at(grid, (rows, cols), values[group_index] / cells_per_group[group_index])
+        return grid + raster.accumulate(centroid_lat[orphans], centroid_lon[orphans], values[orphans])
+
+    kernels = {radius: disk_kernel(radius, config.resolution) for radius in config.radii_miles}
+    population_sums = _radius_sums(spread(population), kernels, rows, cols)
+    household_sums = _radius_sums(spread(households), kernels, rows, cols)
+    income_weight = _radius_sums(spread(income_households), kernels, rows, cols)
+    income_total = _radius_sums(spread(np.nan_to_num(income) * income_households), kernels, rows, cols)
+
+    columns: Dict[str, np.ndarray] = {
+        'cell_id': cell_ids,
+        'lat': lat.astype(np.float32),
+        'lon': lon.astype(np.float32),
+        'county_fips': np.array([int(geoid[:5]) for geoid in block_groups.geoids[group_index]], dtype=np.int32),
+    }
+    for radius in config.radii_miles:
+        label = radius_label(radius)
+        columns[f'population_{label}'] = np.round(population_sums[radius]).astype(np.int32)
+        columns[f'households_{label}'] = np.round(household_sums[radius]).astype(np.int32)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            columns[f'income_{label}'] = np.where(income_weight[radius] > 0.5,
+                                                  income_total[radius] / income_weight[radius],
+                                                  np.nan).astype(np.float32)
+
+    scoring = config.scoring_radius_miles
+    scoring_area = np.pi * scoring ** 2
+    for business_type in config.business_types:
+        mask = businesses.type_mask(COMPETITIVE_GROUPS.get(business_type, [business_type]))
+        competitors = _radius_sums(raster.accumulate(businesses.lat[mask], businesses.lon[mask]), kernels, rows, cols)
+        franchise = mask & businesses.franchise
+        franchise_sums = _radius_sums(raster.accumulate(businesses.lat[franchise], businesses.lon[franchise]),
+                                      {scoring: kernels[scoring]}, rows, cols)
+
+        for radius in config.radii_miles:
+            columns[f'{business_type}_competitors_{radius_label(radius)}'] = np.round(competitors[radius]).astype(np.int32)
+        columns[f'{business_type}_franchise_{radius_label(scoring)}'] = np.round(franchise_sums[scoring]).astype(np.int32)
+
+        count = np.round(competitors[scoring])
+        score, level = saturation_scores(count / scoring_area, business_type)
+        columns[f'{business_type}_saturation'] = score.astype(np.float32)
+        columns[f'{business_type}_level'] = level.astype(np.int8)
+        columns[f'{business_type}_opportunity'] = (100 - score).astype(np.float32)
+        columns[f'{business_type}_gap'] = market_gaps(population_sums[scoring], count, business_type)
+
+    meta = {
+        'config': asdict(config),
+        'cells': int(cell_ids.size),
+        'cell_area_sq_miles': hex_area_sq_miles(config.resolution),
+        'businesses': len(businesses),
+        'block_groups': len(block_groups),
+        'acs_year': block_groups.acs_year,
+        'built': datetime.now().isoformat(),
+        'build_seconds': round((datetime.now() - started).total_seconds(), 2)
+    }
+    logger.info(f"Built opportunity grid in {meta['build_seconds']}s")
+    return OpportunityGrid(columns, meta)
+
+
+class OpportunityGrid:
+    """Columnar, in-memory opportunity scores per hex cell"""
+
+    def __init__(self, columns: Dict[str, np.ndarray], meta: Dict[str, Any]):
+        self.columns = columns
+        self.meta = meta
+
+    def __len__(self) -> int:
+        return int(self.columns['cell_id'].size)
+
+    @property
+    def resolution(self) -> int:
+        return int(self.meta['config']['resolution'])
+
+    @property
+    def scoring_label(self) -> str:
+        return radius_label(self.meta['config']['scoring_radius_miles'])
+
+    @property
+    def business_types(self) -> List[str]:
+        return list(self.meta['config']['business_types'])
+
+    # ---------------------------------------------------------------- queries
+
+    @staticmethod
+    def county_fips(county) -> int:
+        """FIPS code for "Dane", "Dane County", "55025" or 55025"""
+        text = str(county).strip()
+        if text.isdigit():
+            return int(text) if len(text) == 5 else int('55' + text.zfill(3))
+        name = text.lower().removesuffix(' county').strip()
+        for fips, county_name in WISCONSIN_COUNTIES.items():
+            if county_name.lower() == name:
+                return int(fips)
+        raise ValueError(f"Unknown Wisconsin county: {county}")
+
+    def select(self, business_type: str, county=None, min_population: int = 0,
+               market_gaps_only: bool = False) -> np.ndarray:
+        """Boolean mask of cells matching the filters"""
+        if business_type not in self.business_types:
+            raise ValueError(f"Business type not in grid: {business_type}")
+        mask = self.columns[f'population_{self.scoring_label}'] >= min_population
+        if county is not None:
+            mask &= self.columns['county_fips'] == self.county_fips(county)
+        if market_gaps_only:
+            mask &= self.columns[f'{business_type}_gap']
+        return mask
+
+    def best_cells(self, business_type: str, county=None, top_n: int = 20,
+                   min_population: int = 0, market_gaps_only: bool = False) -> List[Dict[str, Any]]:
+        """Top cells by opportunity score, ties broken by population within the scoring radius"""
+        indices = np.nonzero(self.select(business_type, county, min_population, market_gaps_only))[0]
+        if indices.size == 0:
+            return []
+        opportunity = self.columns[f'{business_type}_opportunity'][indices]
+        population = self.columns[f'population_{self.scoring_label}'][indices]
+        order = np.lexsort((-population, -opportunity))[:top_n]
+        return [self.cell_record(int(i), business_type) for i in indices[order]]
+
+    def cell_record(self, i: int, business_type: str) -> Dict[str, Any]:
+        label = self.scoring_label
+        level = int(self.columns[f'{business_type}_level'][i])
+        county = f"{self.columns['county_fips'][i]:05d}"
+        radii = [radius_label(r) for r in self.meta['config']['radii_miles']]
+        income = float(self.columns[f'income_{label}'][i])
+        return {
+            'cell_id': int(self.columns['cell_id'][i]),
+            'lat': round(float(self.columns['lat'][i]), 6),
+            'lon': round(float(self.columns['lon'][i]), 6),
+            'county': WISCONSIN_COUNTIES.get(county, county),
+            'business_type': business_type,
+            'opportunity_score': round(float(self.columns[f'{business_type}_opportunity'][i]), 1),
+            'saturation_level': SATURATION_LEVELS[level],
+            'recommendation': RECOMMENDED_ACTIONS[level],
+            'market_gap': bool(self.columns[f'{business_type}_gap'][i]),
+            'competitors': {r: int(self.columns[f'{business_type}_competitors_{r}'][i]) for r in radii},
+            'franchise_competitors': int(self.columns[f'{business_type}_franchise_{label}'][i]),
+            'population': {r: int(self.columns[f'population_{r}'][i]) for r in radii},
+            'households': {r: int(self.columns[f'households_{r}'][i]) for r in radii},
+            'median_income': None if np.isnan(income) else round(income)
+        }
+
+    def rollup(self, business_type: str, resolution: int) -> Dict[str, np.ndarray]:
+        """Best child opportunity and cell count per coarser parent cell"""
+        parents = cell_to_parent(self.columns['cell_id'], resolution)
+        unique, inverse = np.unique(parents, return_inverse=True)
+        best = np.full(unique.size, -np.inf, dtype=np.float32)
+        np.maximum.at(best, inverse, self.columns[f'{business_type}_opportunity'])
+        return {'cell_id': unique, 'best_opportunity': best, 'cells': np.bincount(inverse)}
+
+    # ---------------------------------------------------------------- storage
+
+    def save(self, output_dir: str = DEFAULT_OUTPUT_DIR):
+        path = Path(output_dir)
+        path.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(path / "grid.npz", **self.columns)
+        with open(path / "meta.json", 'w') as f:
+            json.dump(self.meta, f, indent=2)
+        logger.info(f"Saved {len(self):,} opportunity cells to {path}")
+
+    @classmethod
+    def load(cls, output_dir: str = DEFAULT_OUTPUT_DIR) -> 'OpportunityGrid':
+        path = Path(output_dir)
+        with open(path / "meta.json") as f:
+            meta = json.load(f)
+        with np.load(path / "grid.npz") as arrays:
+            columns = {name: arrays[name] for name in arrays.files}
+        return cls(columns, meta)
+
+    @classmethod
+    def open_default(cls) -> Optional['OpportunityGrid']:
+        """The default artifact if it has been built, else None"""
+        if not (Path(DEFAULT_OUTPUT_DIR) / "meta.json").exists():
+            return None
+        return cls.load(DEFAULT_OUTPUT_DIR)
+
+
+def main():
+    """Build the grid or query it: opportunity_grid.py build | top <business_type> [--county Dane]"""
+    parser = argparse.ArgumentParser(description="Statewide hex grid of opportunity scores")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="Build the grid from BigQuery businesses and local block groups")
+    build.add_argument('--resolution', type=int, default=OpportunityGridConfig.resolution)
+    build.add_argument('--project', default="location-optimizer-1")
+    top = subparsers.add_parser('top', help="Best cells for a business type")
+    top.add_argument('business_type')
+    top.add_argument('--county')
+    top.add_argument('--top', type=int, default=10)
+    top.add_argument('--min-population', type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == 'build':
+        if not BIGQUERY_AVAILABLE:
+            raise SystemExit("google-cloud-bigquery is required to fetch OSM businesses")
+        block_groups = BlockGroupIndex.open_default()
+        if block_groups is None:
+            raise SystemExit("Block-group index not built; run block_group_index.py first")
+        businesses = OSMBusinessIndex.load_or_fetch(bigquery.Client(project=args.project), args.project)
+        grid = build_opportunity_grid(businesses, block_groups, OpportunityGridConfig(resolution=args.resolution))
+        grid.save()
+        print(f"✅ Scored {len(grid):,} cells x {len(grid.business_types)} business types "
+              f"in {grid.meta['build_seconds']}s")
+        return
+
+    grid = OpportunityGrid.open_default()
+    if grid is None:
+        raise SystemExit("Opportunity grid not built; run `opportunity_grid.py build` first")
+    print(f"🎯 Best cells for {args.business_type}" + (f" in {args.county} County" if args.county else ""))
+    for rank, cell in enumerate(grid.best_cells(args.business_type, args.county, args.top, args.min_population), 1):
+        print(f"   {rank}. ({cell['lat']:.4f}, {cell['lon']:.4f}) {cell['county']} - "
+              f"score {cell['opportunity_score']:.1f}, {cell['saturation_level']}, "
+              f"population {cell['population'][grid.scoring_label]:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+OSM Business Index
+==================
+
+In-memory spatial index of the `osm_businesses` table. The table is pulled
+from BigQuery once, kept as parallel NumPy arrays (cached locally as .npz),
+and searched with a KD-tree on 3-D unit vectors, so radius queries are exact
+great-circle searches that need no warehouse round-trip.
+
+Features:
+- One-time BigQuery fetch with a local columnar cache
+- Radius queries and vectorized competitor counts for many sites and radii
+- Business-type filtering through integer type codes
+- Per-city business-location centroids for city-level scans
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from road_graph import chord_length, haversine_miles, unit_vectors
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join("data_cache", "osm_businesses")
+
+# Columns kept from osm_businesses
+TEXT_COLUMNS = ('osm_id', 'name', 'business_type', 'address_city', 'address_street', 'brand')
+
+
+class OSMBusinessIndex:
+    """KD-tree over OSM business locations with parallel attribute arrays"""
+
+    def __init__(self, columns: Dict[str, np.ndarray], fetched: Optional[str] = None):
+        self.columns = columns
+        self.fetched = fetched  # ISO time of the BigQuery fetch, when known
+        self.lat = np.asarray(columns['latitude'], dtype=float)
+        self.lon = np.asarray(columns['longitude'], dtype=float)
+        self.franchise = np.asarray(columns['franchise_indicator'], dtype=bool)
+        self.types, self.type_codes = np.unique(np.asarray(columns['business_type']).astype(str),
+                                                return_inverse=True)
+        self.tree = cKDTree(unit_vectors(self.lat, self.lon))
+
+    def __len__(self) -> int:
+        return int(self.lat.size)
+
+    # ---------------------------------------------------------------- queries
+
+    def type_mask(self, business_types: Sequence[str] = None) -> np.ndarray:
+        """Boolean mask of businesses whose type is in business_types (all if None)"""
+        if not business_types:
+            return np.ones(len(self), dtype=bool)
+        wanted = np.isin(self.types, list(business_types))
+        return wanted[self.type_codes]
+
+    def query_radius(self, lat: float, lon: float, radius_miles: float,
+                     business_types: Sequence[str] = None,
+                     franchises_only: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """(indices, distances in miles) of businesses within a radius, nearest first"""
+        found = np.asarray(self.tree.query_ball_point(unit_vectors(lat, lon)[0], r=chord_length(radius_miles)),
+                           dtype=np.int64)
+        keep = self.type_mask(business_types)[found]
+        if franchises_only:
+            keep &= self.franchise[found]
+        found = found[keep]
+        distances = haversine_miles(lat, lon, self.lat[found], self.lon[found])
+        order = np.argsort(distances, kind='stable')
+        return found[order], distances[order]
+
+    def count_within(self, lat, lon, radii: Sequence[float],
+                     business_types: Sequence[str] = None) -> Dict[str, np.ndarray]:
+        """
+        Competitor and franchise counts around many sites
+
+        Returns {"total": (sites, radii), "franchise": (sites, radii)} integer arrays.
+        """
+        lat, lon = np.atleast_1d(lat).astype(float), np.atleast_1d(lon).astype(float)
+        radii = np.asarray(radii, dtype=float)
+        mask = self.type_mask(business_types)
+
+        neighbors = self.tree.query_ball_point(unit_vectors(lat, lon), r=chord_length(float(radii.max())))
+        counts = np.array([len(found) for found in neighbors], dtype=np.int64)
+        sites = np.repeat(np.arange(lat.size), counts)
+        found = (np.concatenate([np.asarray(f, dtype=np.int64) for f in neighbors])
+                 if counts.sum() else np.zeros(0, dtype=np.int64))
+        keep = mask[found]
+        sites, found = sites[keep], found[keep]
+
+        distance = haversine_miles(lat[sites], lon[sites], self.lat[found], self.lon[found])
+        # Smallest radius each business falls inside, then cumulative counts across radii
+        ring = np.searchsorted(radii, distance, side='left')
+        inside = ring < radii.size
+        total = np.zeros((lat.size, radii.size), dtype=np.int64)
+        franchise = np.zeros_like(total)
+        np.add.at(total, (sites[inside], ring[inside]), 1)
+        np.add.at(franchise, (sites[inside], ring[inside]), self.franchise[found[inside]].astype(np.int64))
+        return {'total': np.cumsum(total, axis=1), 'franchise': np.cumsum(franchise, axis=1)}
+
+    def records(self, indices: Sequence[int], distances: Sequence[float] = None) -> List[Dict[str, Any]]:
+        """Row dicts for the given businesses"""
+        rows = []
+        for position, i in enumerate(indices):
+            row = {name: (values[i].item() if hasattr(values[i], 'item') else values[i])
+                   for name, values in self.columns.items()}
+            if distances is not None:
+                row['distance_miles'] = float(distances[position])
+            rows.append(row)
+        return rows
+
+    def city_centroids(self) -> Dict[str, Tuple[float, float]]:
+        """Mean business location of every city in the table"""
+        cities = np.asarray(self.columns['address_city']).astype(str)
+        valid = cities != ''
+        names, codes = np.unique(cities[valid], return_inverse=True)
+        counts = np.bincount(codes)
+        lat = np.bincount(codes, weights=self.lat[valid]) / counts
+        lon = np.bincount(codes, weights=self.lon[valid]) / counts
+        return {str(name): (float(a), float(b)) for name, a, b in zip(names, lat, lon)}
+
+    # ------------------------------------------------------------ build/cache
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Dict[str, Any]]) -> 'OSMBusinessIndex':
+        """Index dict-like rows (BigQuery Row objects work), dropping rows without coordinates"""
+        rows = [row for row in rows if row['latitude'] is not None and row['longitude'] is not None]
+        columns = {name: np.array([row[name] or '' for row in rows], dtype=object) for name in TEXT_COLUMNS}
+        columns['latitude'] = np.array([row['latitude'] for row in rows], dtype=float)
+        columns['longitude'] = np.array([row['longitude'] for row in rows], dtype=float)
+        columns['franchise_indicator'] = np.array([bool(row['franchise_indicator']) for row in rows])
+        return cls(columns)
+
+    @classmethod
+    def from_bigquery(cls, client, project_id: str = "location-optimizer-1",
+                      dataset_id: str = "raw_business_data") -> 'OSMBusinessIndex':
+        """Fetch the whole osm_businesses table in one query"""
+        query = f"""
+        SELECT {', '.join(TEXT_COLUMNS)}, latitude, longitude, franchise_indicator
+        FROM `{project_id}.{dataset_id}.osm_businesses`
+        WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+        """
+        rows = list(client.query(query).result())
+        logger.info(f"Fetched {len(rows):,} OSM businesses from BigQuery")
+        return cls.from_rows(rows)
+
+    @classmethod
+    def load_or_fetch(cls, client, project_id: str = "location-optimizer-1",
+                      dataset_id: str = "raw_business_data", cache_dir: str = DEFAULT_CACHE_DIR,
+                      max_age_hours: float = 24.0) -> 'OSMBusinessIndex':
+        """Local cache if fresh enough, otherwise a BigQuery fetch that refreshes the cache"""
+        cached = cls.load(cache_dir, max_age_hours)
+        if cached is not None:
+            return cached
+        index = cls.from_bigquery(client, project_id, dataset_id)
+        index.save(cache_dir)
+        return index
+
+    def save(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        path = Path(cache_dir)
+        path.mkdir(parents=True, exist_ok=True)
+        arrays = {name: (values.astype(str) if values.dtype == object else values)
+                  for name, values in self.columns.items()}
+        np.savez_compressed(path / "businesses.npz", **arrays)
+        self.fetched = self.fetched or datetime.now().isoformat()
+        with open(path / "meta.json", 'w') as f:
+            json.dump({'businesses': len(self), 'fetched': self.fetched}, f, indent=2)
+
+    @classmethod
+    def load(cls, cache_dir: str = DEFAULT_CACHE_DIR,
+             max_age_hours: float = None) -> Optional['OSMBusinessIndex']:
+        """Cached index, or None if missing or older than max_age_hours"""
+        path = Path(cache_dir)
+        if not (path / "meta.json").exists():
+            return None
+        with open(path / "meta.json") as f:
+            fetched = json.load(f)['fetched']
+        age = datetime.now() - datetime.fromisoformat(fetched)
+        if max_age_hours is not None and age.total_seconds() > max_age_hours * 3600:
+            return None
+        with np.load(path / "businesses.npz") as arrays:
+            columns = {name: arrays[name] for name in arrays.files}
+        return cls(columns, fetched)
@@ -17,6 +17,8 @@ from dataclasses import dataclass
 from google.cloud import bigquery
 import json
 
+from market_saturation import COMPETITIVE_GROUPS, classify_saturation
+
 
 @dataclass
 class CompetitorSite:
@@ -76,16 +78,7 @@ class OSMCompetitiveAnalysis:
         self.logger = logging.getLogger(self.__class__.__name__)
         
         # Business type mappings for competitive analysis
-        self.competitive_groups = {
-            'food_beverage': ['food_beverage', 'restaurant'],
-            'retail': ['retail'],
-            'automotive': ['automotive'],
-            'healthcare': ['healthcare'],
-            'personal_services': ['personal_services'],
-            'professional_services': ['professional_services'],
-            'fitness': ['fitness'],
-            'hospitality': ['hospitality']
-        }
+        self.competitive_groups = {btype: list(group) for btype, group in COMPETITIVE_GROUPS.items()}
     
     def haversine_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """
@@ -291,43 +284,10 @@ class OSMCompetitiveAnalysis:
         # Saturation scoring based on competitor density
         competitor_density = total_competitors / area_sq_miles if area_sq_miles > 0 else 0
         
-        # Business type specific thresholds (competitors per sq mile)
-        saturation_thresholds = {
-            'food_beverage': {'low': 2, 'medium': 5, 'high': 10},
-            'retail': {'low': 3, 'medium': 8, 'high': 15},
-            'automotive': {'low': 1, 'medium': 3, 'high': 6},
-            'healthcare': {'low': 1, 'medium': 2, 'high': 4},
-            'personal_services': {'low': 2, 'medium': 5, 'high': 10},
-            'professional_services': {'low': 3, 'medium': 7, 'high': 12},
-            'fitness': {'low': 0.5, 'medium': 1.5, 'high': 3},
-            'hospitality': {'low': 0.5, 'medium': 1, 'high': 2}
-        }
-        
-        thresholds = saturation_thresholds.get(target_business_type, 
-                                             saturation_thresholds['retail'])
-        
-        # Determine saturation level
-        if competitor_density <= thresholds['low']:
-            saturation_level = 'Low'
-            saturation_score = (competitor_density / thresholds['low']) * 25
-            recommended_action = 'Strong opportunity - enter market'
-        elif competitor_density <= thresholds['medium']:
-            saturation_level = 'Medium'
-            saturation_score = 25 + ((competitor_density - thresholds['low']) / 
-                                   (thresholds['medium'] - thresholds['low'])) * 25
-            recommended_action = 'Moderate opportunity - differentiate offering'
-        elif competitor_density <= thresholds['high']:
-            saturation_level = 'High'
-            saturation_score = 50 + ((competitor_density - thresholds['medium']) / 
-                                   (thresholds['high'] - thresholds['medium'])) * 35
-            recommended_action = 'Challenging market - focus on unique value proposition'
-        else:
-            saturation_level = 'Saturated'
-            saturation_score = min(100, 85 + (competitor_density - thresholds['high']) * 3)
-            recommended_action = 'Avoid market - oversaturated'
-        
-        # Calculate opportunity score (inverse of saturation)
-        opportunity_score = 100 - saturation_score
+        # Business type specific thresholds (competitors per sq mile) live in market_saturation
+        saturation_level, saturation_score, recommended_action, opportunity_score = classify_saturation(
+            competitor_density, target_business_type
+        )
         
         return MarketSaturation(
             area_name=area_name,
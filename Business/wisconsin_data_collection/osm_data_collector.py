@@ -15,6 +15,8 @@ from typing import List, Dict, Optional, Any
 from dataclasses import dataclass, asdict
 import yaml
 
+from response_archive import archive_response
+
 
 @dataclass
 class OSMBusinessData:
@@ -196,6 +198,7 @@ out center meta;
                 self.logger.error(f"Overpass API error: {response.status_code} - {response.text}")
                 return {}
             
+            archive_response('osm_overpass', response.content, {'url': self.overpass_url, 'query': query})
             return response.json()
             
         except requests.exceptions.Timeout:
@@ -393,6 +396,22 @@ out center meta;
         
         return all_businesses
     
+    def parse_overpass_elements(self, elements: List[Dict[str, Any]]) -> List[OSMBusinessData]:
+        """Businesses with a name and coordinates among Overpass result elements"""
+        businesses = []
+        for element in elements:
+            try:
+                business = self.parse_osm_element(element)
+                
+                # Filter for businesses with names and coordinates
+                if business.name and business.latitude and business.longitude:
+                    businesses.append(business)
+                
+            except Exception as e:
+                self.logger.warning(f"Error parsing OSM element {element.get('id', 'unknown')}: {e}")
+                continue
+        return businesses
+    
     def _collect_for_bbox(self, bbox: str, area_name: str) -> List[OSMBusinessData]:
         """
         Collect OSM data for a specific bounding box
@@ -417,19 +436,7 @@ out center meta;
             
             elements = result['elements']
             self.logger.info(f"Processing {len(elements)} OSM elements from {area_name}")
-            
-            # Parse each element
-            for element in elements:
-                try:
-                    business = self.parse_osm_element(element)
-                    
-                    # Filter for businesses with names and coordinates
-                    if business.name and business.latitude and business.longitude:
-                        businesses.append(business)
-                    
-                except Exception as e:
-                    self.logger.warning(f"Error parsing OSM element {element.get('id', 'unknown')}: {e}")
-                    continue
+            businesses = self.parse_overpass_elements(elements)
             
             self.logger.info(f"Collected {len(businesses)} businesses from {area_name}")
             
@@ -485,6 +492,17 @@ out center meta;
         return "\n".join(report)
 
 
+_reprocess_collector = None
+
+def reprocess_overpass_response(payload: bytes, request: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Businesses of an archived Overpass response (response archive reprocessor)"""
+    global _reprocess_collector
+    if _reprocess_collector is None:
+        _reprocess_collector = OSMDataCollector()
+    elements = json.loads(payload).get('elements', [])
+    return [asdict(business) for business in _reprocess_collector.parse_overpass_elements(elements)]
+
+
 def test_osm_collector():
     """Test the OSM data collector"""
     logging.basicConfig(level=logging.INFO)
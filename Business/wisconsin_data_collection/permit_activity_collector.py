@@ -16,6 +16,8 @@ from google.oauth2 import service_account
 from bs4 import BeautifulSoup
 import time
 
+from watermark_store import WatermarkStore
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -31,6 +33,9 @@ CREDENTIALS_PATH = "location-optimizer-1-449414f93a5a.json"
 class PermitActivityCollector:
     def __init__(self):
         """Initialize the permit activity collector"""
+        # Per-city high-water marks of loaded application dates
+        self.watermarks = WatermarkStore()
+        
         # BigQuery client
         credentials = service_account.Credentials.from_service_account_file(
             CREDENTIALS_PATH
@@ -271,11 +276,11 @@ class PermitActivityCollector:
         
         return analysis
     
-    def save_to_bigquery(self, permits: List[Dict]):
+    def save_to_bigquery(self, permits: List[Dict]) -> bool:
         """Save permits to BigQuery"""
         if not permits:
             logger.warning("No permits to save")
-            return
+            return True
         
         table_id = f"{PROJECT_ID}.{DATASET_ID}.permit_activity"
         
@@ -283,11 +288,17 @@ class PermitActivityCollector:
         
         if errors:
             logger.error(f"Error inserting to BigQuery: {errors}")
-        else:
-            logger.info(f"Successfully saved {len(permits)} permits")
+            return False
+        logger.info(f"Successfully saved {len(permits)} permits")
+        return True
     
-    def run_collection(self, cities: List[str] = None, days_back: int = 30):
-        """Run permit collection for specified cities"""
+    def run_collection(self, cities: List[str] = None, days_back: int = 30, incremental: bool = True):
+        """
+        Run permit collection for specified cities
+        
+        With incremental, each city is collected only from its last loaded
+        application date (minus overlap); days_back applies to cities without one.
+        """
         if cities is None:
             cities = ['Madison', 'Milwaukee']
         
@@ -296,15 +307,19 @@ class PermitActivityCollector:
         all_permits = []
         
         for city in cities:
+            source = f"WI.permits.{city}"
+            city_days_back = self.watermarks.days_back(source, days_back) if incremental else days_back
             try:
                 if city == 'Madison':
-                    permits = self.collect_madison_permits(days_back)
+                    permits = self.collect_madison_permits(city_days_back)
                 elif city == 'Milwaukee':
-                    permits = self.collect_milwaukee_permits(days_back)
+                    permits = self.collect_milwaukee_permits(city_days_back)
                 else:
                     logger.warning(f"No collector implemented for {city}")
                     continue
                 
+                if incremental:
+                    permits = self.watermarks.unseen(source, permits, lambda p: p['permit_id'])
                 all_permits.extend(permits)
                 
             except Exception as e:
@@ -314,8 +329,13 @@ class PermitActivityCollector:
         # Analyze trends
         analysis = self.analyze_permit_trends(all_permits)
         
-        # Save to BigQuery
-        self.save_to_bigquery(all_permits)
+        # Save to BigQuery, then advance each city's watermark
+        if self.save_to_bigquery(all_permits) and incremental:
+            for city in cities:
+                city_permits = [p for p in all_permits if p['city'] == city]
+                self.watermarks.advance(f"WI.permits.{city}", city_permits,
+                                        lambda p: date.fromisoformat(p['application_date']),
+                                        lambda p: p['permit_id'])
         
         # Print summary
         print(f"\n=== PERMIT ACTIVITY ANALYSIS ===")
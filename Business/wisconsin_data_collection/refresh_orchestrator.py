@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Refresh Orchestrator
+====================
+
+Dependency-aware, parallel execution of data refresh tasks. Each refresh is a
+task with declared dependencies, the host it loads (for per-host concurrency
+limits) and an update frequency. Independent tasks run concurrently; a task
+is skipped while its source is still fresh; task outcomes are checkpointed
+after every state change so a failed run resumes with only the tasks that
+did not finish. A timing report shows where wall-clock time went and which
+chain of tasks bounded the run.
+
+Features:
+- Task graph with dependency checks (cycles and unknown tasks rejected)
+- Freshness rules from update_frequency and last-update probes
+- Per-host concurrency limits on top of a global worker pool
+- Checkpointed task state under data_cache for resumable runs
+- Critical-path timing report
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Any, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_PATH = os.path.join("data_cache", "refresh_state.json")
+
+# update_frequency values used in data_sources.yaml -> days a refresh stays fresh
+FREQUENCY_DAYS = {
+    'daily': 1,
+    'weekly': 7,
+    'monthly': 30,
+    'quarterly': 91,
+    'annual': 365
+}
+
+
+@dataclass
+class RefreshTask:
+    """One refresh step of the data platform"""
+    name: str
+    run: Callable[[], bool]
+    depends_on: Tuple[str, ...] = ()
+    host: str = 'local'
+    update_frequency: Optional[str] = None  # None: always run
+    last_updated: Optional[Callable[[], Optional[datetime]]] = None  # source freshness probe
+    description: str = ''
+
+
+@dataclass
+class TaskOutcome:
+    """Result of a task in one orchestrated run"""
+    status: str  # done, failed, skipped, blocked
+    started: float = 0.0
+    finished: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def seconds(self) -> float:
+        return max(0.0, self.finished - self.started)
+
+
+class RefreshOrchestrator:
+    """Runs refresh tasks in dependency order with bounded, per-host parallelism"""
+
+    def __init__(self, tasks: Sequence[RefreshTask], max_workers: int = 4,
+                 host_limits: Dict[str, int] = None, default_host_limit: int = 1,
+                 state_path: str = DEFAULT_STATE_PATH):
+        self.tasks = {task.name: task for task in tasks}
+        self.max_workers = max_workers
+        self.host_limits = host_limits or {}
+        self.default_host_limit = default_host_limit
+        self.state_path = Path(state_path)
+        self._lock = threading.Lock()
+        self.state = self._load_state()
+        self.outcomes: Dict[str, TaskOutcome] = {}
+        self._validate()
+
+    # ------------------------------------------------------------- graph/state
+
+    def _validate(self):
+        for task in self.tasks.values():
+            unknown = [dep for dep in task.depends_on if dep not in self.tasks]
+            if unknown:
+                raise ValueError(f"Task {task.name} depends on unknown tasks {unknown}")
+        visiting, visited = set(), set()
+
+        def visit(name: str):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Refresh tasks have a dependency cycle through {name}")
+            visiting.add(name)
+            for dep in self.tasks[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.tasks:
+            visit(name)
+
+    def _load_state(self) -> Dict[str, Any]:
+        if self.state_path.exists():
+            try:
+                return json.loads(self.state_path.read_text())
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable refresh state {self.state_path}: {e}")
+        return {'last_success': {}, 'run': None}
+
+    def _save_state(self):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        partial = self.state_path.with_suffix('.tmp')
+        partial.write_text(json.dumps(self.state, indent=2, default=str))
+        os.replace(partial, self.state_path)
+
+    def _record(self, name: str, outcome: TaskOutcome):
+        with self._lock:
+            self.outcomes[name] = outcome
+            self.state['run']['tasks'][name] = outcome.status
+            if outcome.status == 'done':
+                self.state['last_success'][name] = datetime.now().isoformat()
+            self._save_state()
+
+    # -------------------------------------------------------------- freshness
+
+    def last_refreshed(self, name: str) -> Optional[datetime]:
+        """Latest of the source's own last-update probe and our last successful run"""
+        task = self.tasks[name]
+        stamps = []
+        recorded = self.state['last_success'].get(name)
+        if recorded:
+            stamps.append(datetime.fromisoformat(recorded))
+        if task.last_updated is not None:
+            try:
+                probed = task.last_updated()
+                if probed is not None:
+                    stamps.append(probed.replace(tzinfo=None) if isinstance(probed, datetime)
+                                  else datetime(probed.year, probed.month, probed.day))
+            except Exception as e:
+                logger.warning(f"Freshness probe for {name} failed: {e}")
+        return max(stamps) if stamps else None
+
+    def is_fresh(self, name: str, now: datetime = None) -> bool:
+        task = self.tasks[name]
+        if task.update_frequency is None:
+            return False
+        last = self.last_refreshed(name)
+        days = FREQUENCY_DAYS.get(task.update_frequency.lower())
+        if last is None or days is None:
+            return False
+        return (now or datetime.now()) - last < timedelta(days=days)
+
+    # -------------------------------------------------------------------- run
+
+    def run(self, selected: Sequence[str] = None, force: bool = False,
+            resume: bool = True) -> Dict[str, TaskOutcome]:
+        """
+        Run the selected tasks (all by default) and their ordering constraints
+
+        Dependencies outside the selection are treated as satisfied. With
+        resume, tasks completed by an unfinished earlier run of the same
+        selection are not repeated. With force, freshness rules are ignored.
+        """
+        selected = list(selected or self.tasks)
+        unknown = [name for name in selected if name not in self.tasks]
+        if unknown:
+            raise ValueError(f"Unknown refresh tasks: {unknown}")
+
+        previous = self.state.get('run')
+        resumed = set()
+        if resume and previous and not previous.get('finished') and sorted(previous['selected']) == sorted(selected):
+            resumed = {name for name, status in previous['tasks'].items() if status in ('done', 'skipped')}
+            if resumed:
+                print(f"♻️  Resuming previous refresh run: {len(resumed)} task(s) already complete")
+        self.state['run'] = {'selected': selected, 'started': datetime.now().isoformat(),
+                             'finished': None, 'tasks': {name: 'done' for name in resumed}}
+        self._save_state()
+
+        self.outcomes = {name: TaskOutcome('done') for name in resumed}
+        pending = [name for name in selected if name not in resumed]
+        running: Dict[Any, str] = {}
+        host_running: Dict[str, int] = {}
+        self.t0 = time.time()
+
+        def settled(name: str) -> bool:
+            return name in self.outcomes or name not in selected
+
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as pool:
+            while pending or running:
+                for name in list(pending):
+                    task = self.tasks[name]
+                    if not all(settled(dep) for dep in task.depends_on):
+                        continue
+                    if any(self.outcomes.get(dep, TaskOutcome('done')).status in ('failed', 'blocked')
+                           for dep in task.depends_on):
+                        pending.remove(name)
+                        now = time.time() - self.t0
+                        self._record(name, TaskOutcome('blocked', now, now, 'dependency failed'))
+                        continue
+                    if not force and self.is_fresh(name):
+                        pending.remove(name)
+                        now = time.time() - self.t0
+                        self._record(name, TaskOutcome('skipped', now, now))
+                        print(f"⏭️  {name}: still fresh ({task.update_frequency}), skipping")
+                        continue
+                    limit = self.host_limits.get(task.host, self.default_host_limit)
+                    if len(running) >= self.max_workers or host_running.get(task.host, 0) >= limit:
+                        continue
+                    pending.remove(name)
+                    host_running[task.host] = host_running.get(task.host, 0) + 1
+                    running[pool.submit(self._execute, task)] = name
+
+                if not running:
+                    if pending:
+                        # Nothing runnable and nothing running: re-scan (blocked/skipped resolved above)
+                        continue
+                    break
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    host_running[self.tasks[name].host] -= 1
+                    self._record(name, future.result())
+
+        self.state['run']['finished'] = datetime.now().isoformat()
+        if any(outcome.status in ('failed', 'blocked') for outcome in self.outcomes.values()):
+            # Leave the run open so the next invocation resumes it
+            self.state['run']['finished'] = None
+        self._save_state()
+        self.print_timing_report()
+        return self.outcomes
+
+    def _execute(self, task: RefreshTask) -> TaskOutcome:
+        started = time.time() - self.t0
+        try:
+            success = task.run()
+            error = None if success else 'task reported failure'
+        except Exception as e:
+            logger.error(f"Refresh task {task.name} failed: {e}")
+            success, error = False, str(e)
+        return TaskOutcome('done' if success else 'failed', started, time.time() - self.t0, error)
+
+    # ----------------------------------------------------------------- report
+
+    def critical_path(self) -> List[str]:
+        """Chain of executed tasks ending at the last finish, following the latest-finishing dependency"""
+        ran = {name: outcome for name, outcome in self.outcomes.items() if outcome.status == 'done' and outcome.finished}
+        if not ran:
+            return []
+        path = [max(ran, key=lambda name: ran[name].finished)]
+        while True:
+            deps = [dep for dep in self.tasks[path[-1]].depends_on if dep in ran]
+            if not deps:
+                break
+            path.append(max(deps, key=lambda name: ran[name].finished))
+        return path[::-1]
+
+    def print_timing_report(self):
+        print(f"\n{'='*80}")
+        print("⏱️  Refresh Timing Report")
+        print(f"{'='*80}")
+        print(f"{'TASK':24} {'STATUS':9} {'START':>9} {'DURATION':>10}")
+        for name, outcome in sorted(self.outcomes.items(), key=lambda item: item[1].started):
+            print(f"{name:24} {outcome.status:9} {outcome.started:8.1f}s {outcome.seconds:9.1f}s"
+                  + (f"  ({outcome.error})" if outcome.error else ''))
+        wall = max((outcome.finished for outcome in self.outcomes.values()), default=0.0)
+        busy = sum(outcome.seconds for outcome in self.outcomes.values())
+        path = self.critical_path()
+        if path:
+            print(f"\n🧭 Critical path ({sum(self.outcomes[name].seconds for name in path):.1f}s): "
+                  f"{' → '.join(path)}")
+        print(f"⏰ Wall time {wall:.1f}s for {busy:.1f}s of task time")
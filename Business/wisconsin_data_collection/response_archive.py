@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Response Archive
+================
+
+Local, compressed archive of the raw responses collectors fetch. Every
+payload (DFI result pages, Overpass, Census, BLS and Google Places responses)
+is handed to the archive before it is parsed. Payloads are stored once per
+distinct content, addressed by SHA-256 and zstd-compressed, and every fetch
+is indexed by source, request key and fetch time. The reprocess command
+replays archived payloads of a source through the collector's current
+parser on all cores, so parser changes can be applied to past collections
+without calling any upstream API.
+
+Features:
+- Content-addressed blobs under data_cache/response_archive (one copy per payload)
+- zstd compression when zstandard is installed, gzip otherwise
+- Per-source JSON-lines index of request key, request parameters and fetch time
+- API keys and tokens stripped from archived request parameters
+- Parallel reprocessing with the registered per-source parsers
+"""
+
+import argparse
+import gzip
+import hashlib
+import importlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+# zstd compression (optional; gzip is used without it)
+try:
+    import zstandard as zstd
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+    zstd = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_DIR = os.path.join("data_cache", "response_archive")
+
+ZSTD_LEVEL = 10
+
+# Request parameters never written to the archive
+SECRET_PARAMS = {'key', 'api_key', 'apikey', 'registrationkey', 'token', 'access_token', 'client_secret'}
+
+# Source -> "module:function" parser, called as function(payload: bytes, request: dict) -> list of dicts
+REPROCESSORS = {
+    'dfi_search': 'dfi_collector:reprocess_search_page',
+    'osm_overpass': 'osm_data_collector:reprocess_overpass_response',
+    'census_acs': 'census_collector:reprocess_acs_response',
+    'census_pep': 'census_collector:reprocess_pep_response',
+    'bls_timeseries': 'bls_collector:reprocess_bls_response',
+    'google_places_nearby': 'google_places_collector:reprocess_places_response',
+}
+
+Payload = Union[bytes, str, Dict[str, Any], List[Any]]
+
+
+def _scrub(value: Any) -> Any:
+    """Request parameters without secrets (nested dicts/lists included)"""
+    if isinstance(value, dict):
+        return {k: _scrub(v) for k, v in value.items() if str(k).lower() not in SECRET_PARAMS}
+    if isinstance(value, (list, tuple)):
+        return [_scrub(v) for v in value]
+    return value
+
+
+def _as_bytes(payload: Payload) -> bytes:
+    if isinstance(payload, bytes):
+        return payload
+    if isinstance(payload, str):
+        return payload.encode('utf-8')
+    return json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+
+
+@dataclass
+class ArchivedResponse:
+    """Index entry of one archived fetch"""
+    source: str
+    request_key: str
+    fetched_at: str
+    digest: str
+    size: int
+    request: Dict[str, Any] = field(default_factory=dict)
+
+
+class ResponseArchive:
+    """Content-addressed, compressed store of raw responses with a per-source index"""
+
+    def __init__(self, root: str = DEFAULT_ARCHIVE_DIR, level: int = ZSTD_LEVEL):
+        self.root = Path(root)
+        self.level = level
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------ write
+
+    @staticmethod
+    def request_key(request: Dict[str, Any]) -> str:
+        """Stable key of a (secret-free) request description"""
+        canonical = json.dumps(request, sort_keys=True, default=str)
+        return hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:20]
+
+    def _blob_path(self, digest: str, suffix: str) -> Path:
+        return self.root / "blobs" / digest[:2] / f"{digest}.{suffix}"
+
+    def _index_path(self, source: str) -> Path:
+        return self.root / "index" / f"{source}.jsonl"
+
+    def put(self, source: str, payload: Payload, request: Dict[str, Any] = None,
+            fetched_at: datetime = None) -> ArchivedResponse:
+        """Archive one fetched payload; identical content is stored only once"""
+        data = _as_bytes(payload)
+        digest = hashlib.sha256(data).hexdigest()
+        if not (self._blob_path(digest, 'zst').exists() or self._blob_path(digest, 'gz').exists()):
+            suffix = 'zst' if ZSTD_AVAILABLE else 'gz'
+            compressed = (zstd.ZstdCompressor(level=self.level).compress(data) if ZSTD_AVAILABLE
+                          else gzip.compress(data, compresslevel=6))
+            path = self._blob_path(digest, suffix)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Unique temp name: threads and processes may archive the same content at once
+            partial = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.part")
+            partial.write_bytes(compressed)
+            os.replace(partial, path)
+
+        request = _scrub(request or {})
+        entry = ArchivedResponse(source, self.request_key(request),
+                                 (fetched_at or datetime.now()).isoformat(), digest, len(data), request)
+        index = self._index_path(source)
+        with self._lock:
+            index.parent.mkdir(parents=True, exist_ok=True)
+            with open(index, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(asdict(entry), default=str) + '\n')
+        return entry
+
+    # ------------------------------------------------------------------- read
+
+    def get(self, digest: str) -> bytes:
+        """Raw payload of an archived response"""
+        path = self._blob_path(digest, 'zst')
+        if path.exists():
+            if not ZSTD_AVAILABLE:
+                raise RuntimeError(f"Archived response {digest} is zstd-compressed; install zstandard")
+            return zstd.ZstdDecompressor().decompress(path.read_bytes())
+        return gzip.decompress(self._blob_path(digest, 'gz').read_bytes())
+
+    def sources(self) -> List[str]:
+        index_dir = self.root / "index"
+        return sorted(path.stem for path in index_dir.glob("*.jsonl")) if index_dir.exists() else []
+
+    def entries(self, source: str, since: datetime = None, until: datetime = None,
+                latest_only: bool = False) -> List[ArchivedResponse]:
+        """Index entries of a source in fetch order, optionally only each request's latest fetch"""
+        index = self._index_path(source)
+        if not index.exists():
+            return []
+        entries = []
+        with open(index, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = ArchivedResponse(**json.loads(line))
+                except (ValueError, TypeError):
+                    continue  # partially written line
+                fetched = datetime.fromisoformat(entry.fetched_at)
+                if (since and fetched < since) or (until and fetched > until):
+                    continue
+                entries.append(entry)
+        if latest_only:
+            latest = {entry.request_key: entry for entry in entries}
+            entries = sorted(latest.values(), key=lambda entry: entry.fetched_at)
+        return entries
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Fetches, distinct requests, distinct payloads and raw bytes per source"""
+        stats = {}
+        for source in self.sources():
+            entries = self.entries(source)
+            stats[source] = {
+                'fetches': len(entries),
+                'requests': len({entry.request_key for entry in entries}),
+                'payloads': len({entry.digest for entry in entries}),
+                'raw_bytes': sum(entry.size for entry in entries)
+            }
+        return stats
+
+    def stored_bytes(self) -> int:
+        blobs = self.root / "blobs"
+        return sum(path.stat().st_size for path in blobs.rglob("*.*") if path.suffix in ('.zst', '.gz')) \
+            if blobs.exists() else 0
+
+
+_default_archive: Optional[ResponseArchive] = None
+_default_lock = threading.Lock()
+
+
+def archive_response(source: str, payload: Payload, request: Dict[str, Any] = None) -> Optional[ArchivedResponse]:
+    """
+    Archive a fetched payload in the default archive
+
+    Never raises: archiving must not break a collection run. Set
+    RESPONSE_ARCHIVE=0 to disable archiving.
+    """
+    global _default_archive
+    if os.environ.get('RESPONSE_ARCHIVE', '1') == '0':
+        return None
+    try:
+        with _default_lock:
+            if _default_archive is None:
+                _default_archive = ResponseArchive()
+                if not ZSTD_AVAILABLE:
+                    logger.info("zstandard not installed; archiving responses with gzip")
+        return _default_archive.put(source, payload, request)
+    except Exception as e:
+        logger.warning(f"Could not archive {source} response: {e}")
+        return None
+
+
+# -------------------------------------------------------------- reprocessing
+
+def _resolve(target: str) -> Callable[[bytes, Dict[str, Any]], List[Dict[str, Any]]]:
+    module, function = target.split(':')
+    return getattr(importlib.import_module(module), function)
+
+
+def _reprocess_batch(args: Tuple[str, str, List[Dict[str, Any]]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Worker: parse a batch of archived responses (runs in a separate process)"""
+    root, target, batch = args
+    archive = ResponseArchive(root)
+    try:
+        parse = _resolve(target)
+    except Exception as e:
+        # An unimportable parser module fails this batch, not the whole run
+        return [], [f"{entry['request_key']} ({entry['fetched_at']}): parser {target} unavailable: {e}"
+                    for entry in batch]
+    results, failures = [], []
+    for entry in batch:
+        try:
+            for record in parse(archive.get(entry['digest']), entry['request']):
+                record['archive_fetched_at'] = entry['fetched_at']
+                record['archive_request_key'] = entry['request_key']
+                results.append(record)
+        except Exception as e:
+            failures.append(f"{entry['request_key']} ({entry['fetched_at']}): {e}")
+    return results, failures
+
+
+def reprocess(source: str, archive: ResponseArchive = None, workers: int = None,
+              since: datetime = None, until: datetime = None, latest_only: bool = True,
+              batch_size: int = 32, parser: str = None) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Re-run the current parser of a source over its archived responses
+
+    Yields parsed records batch by batch (archive order). Each record carries
+    archive_fetched_at and archive_request_key. Failures are logged.
+    """
+    archive = archive or ResponseArchive()
+    target = parser or REPROCESSORS.get(source)
+    if target is None:
+        raise ValueError(f"No reprocessor registered for source '{source}'")
+    entries = [asdict(entry) for entry in archive.entries(source, since, until, latest_only)]
+    batches = [(str(archive.root), target, entries[i:i + batch_size])
+               for i in range(0, len(entries), batch_size)]
+    logger.info(f"Reprocessing {len(entries):,} archived {source} responses in {len(batches)} batches")
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for results, failures in pool.map(_reprocess_batch, batches):
+            for failure in failures:
+                logger.warning(f"Reprocessing {source} failed for {failure}")
+            yield results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Raw response archive: statistics and offline reprocessing")
+    parser.add_argument('--archive-dir', default=DEFAULT_ARCHIVE_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('stats', help='Archived fetches and storage per source')
+    replay = commands.add_parser('reprocess', help="Re-run a source's current parser over archived responses")
+    replay.add_argument('source', choices=sorted(REPROCESSORS))
+    replay.add_argument('--output', help='JSON-lines output file (.gz to compress); default <source>_reprocessed.jsonl.gz')
+    replay.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    replay.add_argument('--since', type=datetime.fromisoformat, help='Only responses fetched at/after this ISO date')
+    replay.add_argument('--until', type=datetime.fromisoformat, help='Only responses fetched at/before this ISO date')
+    replay.add_argument('--all-fetches', action='store_true',
+                        help="Replay every fetch, not only each request's latest")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    archive = ResponseArchive(args.archive_dir)
+
+    if args.command == 'stats':
+        print(f"📦 Response archive {archive.root} ({'zstd' if ZSTD_AVAILABLE else 'gzip'})")
+        stats = archive.stats()
+        for source, counts in stats.items():
+            print(f"   {source:24} {counts['fetches']:8,} fetches {counts['requests']:8,} requests "
+                  f"{counts['payloads']:8,} payloads {counts['raw_bytes'] / 1e6:10.1f} MB raw")
+        raw = sum(counts['raw_bytes'] for counts in stats.values())
+        stored = archive.stored_bytes()
+        print(f"💾 {raw / 1e6:.1f} MB of responses stored in {stored / 1e6:.1f} MB")
+        return
+
+    output = Path(args.output or f"{args.source}_reprocessed.jsonl.gz")
+    opener = gzip.open if output.suffix == '.gz' else open
+    started, records = datetime.now(), 0
+    with opener(output, 'wt', encoding='utf-8') as f:
+        for batch in reprocess(args.source, archive, args.workers, args.since, args.until,
+                               latest_only=not args.all_fetches):
+            for record in batch:
+                f.write(json.dumps(record, default=str) + '\n')
+            records += len(batch)
+    seconds = (datetime.now() - started).total_seconds()
+    print(f"✅ Reprocessed {args.source}: {records:,} records written to {output} in {seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,6 +22,8 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 
+from huff_model_engine import CATEGORY_SPENDING_PER_HOUSEHOLD
+
 # Import existing analyzers for data integration
 try:
     from trade_area_analyzer import TradeAreaAnalyzer
@@ -33,6 +35,20 @@ try:
 except ImportError as e:
     logging.warning(f"Some dependencies not available: {e}")
 
+# Local ACS block-group radius summaries (optional)
+try:
+    from block_group_index import BlockGroupIndex
+    from demographic_summary_engine import DemographicSummaryEngine
+    DEMOGRAPHIC_ENGINE_AVAILABLE = True
+except ImportError:
+    DEMOGRAPHIC_ENGINE_AVAILABLE = False
+
+# Radii (miles) of the primary, secondary and extended trade areas
+TRADE_AREA_RADII = (3.0, 7.0, 15.0)
+
+# Gravity model inputs that the block-group Huff model replaces when it runs
+HUFF_REPLACED_INPUTS = ('gravity_market_share', 'accessibility_score', 'visibility_score')
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -58,6 +74,9 @@ class RevenueProjection:
     cash_flow_timing: Dict[str, Any] = None  # Seasonal cash flow patterns
     revenue_concentration_risk: float = 0.0  # Customer concentration percentage
     sba_compliance_metrics: Dict[str, Any] = None  # SBA-specific calculations
+    
+    # Assumption sensitivity (tornado rankings, elasticities, ±10% impacts)
+    sensitivity_analysis: Dict[str, Any] = None
 
 class RevenueProjectionsAnalyzer:
     """Comprehensive revenue projections analysis for Section 4.1"""
@@ -148,6 +167,39 @@ class RevenueProjectionsAnalyzer:
             }
         }
         
+        # Model calibration assumptions (swept by the sensitivity analysis)
+        self.model_assumptions = {
+            'base_capture_rate': 0.05,        # Market penetration base capture rate
+            'gravity_market_share': 0.08,     # Gravity model market share
+            'traffic_conversion_rate': 0.002  # Share of passing traffic that converts
+        }
+        
+        # Annual per household category spending by business type
+        self.category_spending = dict(CATEGORY_SPENDING_PER_HOUSEHOLD)
+        
+        # Plausible range for every model input: (input group, low, high, range type)
+        # 'relative' scales the base value, 'offset' adds to it, 'absolute' replaces it
+        self.sensitivity_ranges = {
+            'primary_population': ('demographic', 0.75, 1.25, 'relative'),
+            'secondary_population': ('demographic', 0.75, 1.25, 'relative'),
+            'extended_population': ('demographic', 0.75, 1.25, 'relative'),
+            'median_income': ('demographic', 0.80, 1.20, 'relative'),
+            'total_households': ('demographic', 0.80, 1.20, 'relative'),
+            'direct_competitors': ('competitive', -2, 3, 'offset'),
+            'success_probability': ('habitat', 0.50, 0.95, 'absolute'),
+            'environmental_score': ('habitat', 0.50, 0.95, 'absolute'),
+            'daily_traffic_volume': ('traffic', 0.60, 1.40, 'relative'),
+            'accessibility_score': ('traffic', 50, 95, 'absolute'),
+            'visibility_score': ('traffic', 50, 95, 'absolute'),
+            'avg_transaction': ('industry', 0.80, 1.20, 'relative'),
+            'visit_frequency': ('industry', 0.70, 1.30, 'relative'),
+            'avg_annual_revenue': ('industry', 0.80, 1.20, 'relative'),
+            'base_capture_rate': ('assumptions', 0.03, 0.08, 'absolute'),
+            'gravity_market_share': ('assumptions', 0.05, 0.12, 'absolute'),
+            'traffic_conversion_rate': ('assumptions', 0.001, 0.004, 'absolute'),
+            'category_spending': ('assumptions', 0.75, 1.25, 'relative')
+        }
+        
         # Initialize external analyzers with error handling
         try:
             self.trade_area_analyzer = TradeAreaAnalyzer()
@@ -158,6 +210,12 @@ class RevenueProjectionsAnalyzer:
             self.trade_area_analyzer = None
             self.competitive_analyzer = None
             self.habitat_analyzer = None
+        
+        self.demographic_engine = None
+        if DEMOGRAPHIC_ENGINE_AVAILABLE:
+            index = BlockGroupIndex.open_default()
+            if index is not None:
+                self.demographic_engine = DemographicSummaryEngine(index)
     
     def analyze_revenue_projections(self, business_type: str, address: str, 
                                   lat: float, lon: float) -> RevenueProjection:
@@ -178,6 +236,9 @@ class RevenueProjectionsAnalyzer:
         try:
             # 1. Collect demographic and trade area data
             demographic_data = self._analyze_demographics(lat, lon)
+            huff = self._analyze_huff_market_share(business_type, address, lat, lon)
+            demographic_data['huff_captured_spending'] = huff['captured_spending'] if huff else None
+            demographic_data['huff_spending_per_household'] = huff['spending_per_household'] if huff else None
             
             # 2. Analyze competitive environment
             competitive_data = self._analyze_competition(business_type, lat, lon)
@@ -197,6 +258,24 @@ class RevenueProjectionsAnalyzer:
                 habitat_data, traffic_data, industry_data
             )
             
+            # 6b. Sweep every assumption for tornado and elasticity tables
+            sensitivity = self.run_sensitivity_analysis(
+                business_type, demographic_data, competitive_data,
+                habitat_data, traffic_data, industry_data
+            )
+            sensitivity['impact_table'] = self._calculate_impact_table(
+                business_type, demographic_data, competitive_data,
+                habitat_data, traffic_data, industry_data
+            )
+            sensitivity['base_inputs'] = {
+                'population': demographic_data['primary_population'] + demographic_data['secondary_population']
+                              + demographic_data['extended_population'],
+                'income': demographic_data['median_income'],
+                'competition': competitive_data['direct_competitors'],
+                'traffic': traffic_data['daily_traffic_volume'],
+                'capture_rate': self.model_assumptions['base_capture_rate']
+            }
+            
             # 7. Generate scenario-based projections
             scenarios = self._generate_revenue_scenarios(revenue_models, industry_data)
             
@@ -228,7 +307,8 @@ class RevenueProjectionsAnalyzer:
                 working_capital_requirements=sba_metrics['working_capital'],
                 cash_flow_timing=sba_metrics['cash_flow_timing'],
                 revenue_concentration_risk=sba_metrics['concentration_risk'],
-                sba_compliance_metrics=sba_metrics['compliance_metrics']
+                sba_compliance_metrics=sba_metrics['compliance_metrics'],
+                sensitivity_analysis=sensitivity
             )
             
             return projection
@@ -253,13 +333,50 @@ class RevenueProjectionsAnalyzer:
                     'total_households': trade_data.get('total_households', 35000),
                     'population_density': trade_data.get('population_density', 2500)
                 }
+            elif self.demographic_engine:
+                return self._radius_demographics(lat, lon)
             else:
                 # Fallback demographic estimates
                 return self._get_fallback_demographics()
         except Exception as e:
             logger.warning(f"Demographic analysis failed: {e}")
+            if self.demographic_engine:
+                try:
+                    return self._radius_demographics(lat, lon)
+                except Exception as engine_error:
+                    logger.warning(f"Radius demographics failed: {engine_error}")
             return self._get_fallback_demographics()
     
+    def _radius_demographics(self, lat: float, lon: float) -> Dict[str, Any]:
+        """Primary/secondary/extended ring demographics from local ACS block groups"""
+        summaries = self.demographic_engine.summarize(lat, lon, TRADE_AREA_RADII)
+        primary, secondary, extended = (summaries[radius] for radius in TRADE_AREA_RADII)
+        fallback = self._get_fallback_demographics()
+        return {
+            'primary_population': primary['population']['total'],
+            'secondary_population': secondary['population']['total'] - primary['population']['total'],
+            'extended_population': extended['population']['total'] - secondary['population']['total'],
+            'median_income': secondary['economic']['median_income'] or fallback['median_income'],
+            'total_households': secondary['population']['households'],
+            'population_density': primary['population']['density']
+        }
+    
+    def _analyze_huff_market_share(self, business_type: str, address: str,
+                                   lat: float, lon: float) -> Optional[Dict[str, Any]]:
+        """Huff model result (captured spending, share) for the site, None if unavailable"""
+        try:
+            analyzer = UniversalCompetitiveAnalyzer(business_type, lat, lon, address)
+            analyzer.load_data()
+            spending = self._get_model_assumptions(
+                business_type.lower().replace(' ', '_'))['category_spending']
+            huff = analyzer.run_huff_analysis(spending_per_household=spending)
+            logger.info(f"Huff model captured spending: ${huff['captured_spending']:,.0f} "
+                        f"({huff['market_share']:.2f}% share)")
+            return huff
+        except Exception as e:
+            logger.warning(f"Huff market share model unavailable: {e}")
+            return None
+    
     def _analyze_competition(self, business_type: str, lat: float, lon: float) -> Dict[str, Any]:
         """Analyze competitive environment for revenue impact"""
         logger.info("Analyzing competitive environment")
@@ -326,20 +443,22 @@ class RevenueProjectionsAnalyzer:
     
     def _calculate_revenue_models(self, business_type: str, demographic_data: Dict, 
                                 competitive_data: Dict, habitat_data: Dict, 
-                                traffic_data: Dict, industry_data: Dict) -> Dict[str, float]:
-        """Calculate revenue using multiple models"""
+                                traffic_data: Dict, industry_data: Dict,
+                                assumptions: Dict = None) -> Dict[str, float]:
+        """Calculate revenue using multiple models (inputs may be scalars or NumPy arrays)"""
         logger.info("Calculating revenue using multiple models")
         
+        assumptions = self._get_model_assumptions(business_type, assumptions)
         models = {}
         
         # 1. Market Penetration Model
         models['market_penetration'] = self._market_penetration_model(
-            demographic_data, competitive_data, industry_data
+            demographic_data, competitive_data, industry_data, assumptions
         )
         
         # 2. Gravity Model
         models['gravity_model'] = self._gravity_model(
-            demographic_data, traffic_data, industry_data
+            demographic_data, traffic_data, industry_data, assumptions
         )
         
         # 3. Habitat Suitability Model
@@ -349,19 +468,28 @@ class RevenueProjectionsAnalyzer:
         
         # 4. Consumer Spending Model
         models['consumer_spending'] = self._consumer_spending_model(
-            demographic_data, competitive_data, business_type
+            demographic_data, competitive_data, business_type, assumptions
         )
         
         # 5. Traffic-Based Model
         models['traffic_based'] = self._traffic_based_model(
-            traffic_data, industry_data
+            traffic_data, industry_data, assumptions
         )
         
         return models
     
+    def _get_model_assumptions(self, business_type: str, assumptions: Dict = None) -> Dict[str, Any]:
+        """Default model assumptions, overridden by any provided values"""
+        merged = dict(self.model_assumptions)
+        merged['category_spending'] = self.category_spending.get(business_type, self.category_spending['default'])
+        if assumptions:
+            merged.update(assumptions)
+        return merged
+    
     def _market_penetration_model(self, demographic_data: Dict, competitive_data: Dict, 
-                                industry_data: Dict) -> float:
+                                industry_data: Dict, assumptions: Dict = None) -> float:
         """Calculate revenue using market penetration model"""
+        assumptions = assumptions or self.model_assumptions
         
         # Base calculation: Population × Capture Rate × Average Transaction × Visit Frequency
         total_population = (
@@ -371,12 +499,12 @@ class RevenueProjectionsAnalyzer:
         )
         
         # Adjust capture rate based on competition
-        base_capture_rate = 0.05  # 5% base capture rate
-        competition_adjustment = max(0.3, 1 - (competitive_data['direct_competitors'] * 0.15))
+        base_capture_rate = assumptions['base_capture_rate']
+        competition_adjustment = np.maximum(0.3, 1 - (competitive_data['direct_competitors'] * 0.15))
         capture_rate = base_capture_rate * competition_adjustment
         
         # Income adjustment
-        income_adjustment = min(1.5, demographic_data['median_income'] / 60000)
+        income_adjustment = np.minimum(1.5, demographic_data['median_income'] / 60000)
         
         annual_revenue = (
             total_population * 
@@ -389,8 +517,19 @@ class RevenueProjectionsAnalyzer:
         return annual_revenue
     
     def _gravity_model(self, demographic_data: Dict, traffic_data: Dict, 
-                      industry_data: Dict) -> float:
+                      industry_data: Dict, assumptions: Dict = None) -> float:
         """Calculate revenue using gravity model"""
+        assumptions = assumptions or self.model_assumptions
+        
+        # Block-group Huff model replaces the single-ring formula when available.
+        # Captured spending is linear in household category spending, so it is
+        # rescaled to the (possibly swept) category_spending assumption.
+        huff_captured_spending = demographic_data.get('huff_captured_spending')
+        if huff_captured_spending is not None:
+            huff_spending = demographic_data.get('huff_spending_per_household')
+            if huff_spending and 'category_spending' in assumptions:
+                return huff_captured_spending * assumptions['category_spending'] / huff_spending
+            return huff_captured_spending
         
         # Distance-weighted population analysis
         accessibility_factor = traffic_data['accessibility_score'] / 100
@@ -402,7 +541,7 @@ class RevenueProjectionsAnalyzer:
         
         # Per capita spending estimate
         per_capita_annual = industry_data['avg_transaction'] * industry_data['visit_frequency']
-        market_share = 0.08  # 8% market share assumption
+        market_share = assumptions['gravity_market_share']
         
         annual_revenue = effective_population * per_capita_annual * market_share
         
@@ -421,38 +560,30 @@ class RevenueProjectionsAnalyzer:
         return annual_revenue
     
     def _consumer_spending_model(self, demographic_data: Dict, competitive_data: Dict, 
-                               business_type: str) -> float:
+                               business_type: str, assumptions: Dict = None) -> float:
         """Calculate revenue using consumer spending allocation model"""
+        assumptions = self._get_model_assumptions(business_type, assumptions)
         
         # Estimate category spending based on business type
-        spending_categories = {
-            'restaurant': 3500,  # Annual per household food service spending
-            'hair_salon': 800,   # Annual per household personal care
-            'auto_repair': 1200, # Annual per household vehicle maintenance
-            'retail_clothing': 1800,  # Annual per household clothing
-            'gym': 600,         # Annual per household fitness
-            'coffee_shop': 1200, # Annual per household beverages
-            'gas_station': 4000, # Annual per household fuel
-            'hardware_store': 800 # Annual per household home improvement
-        }
-        
-        category_spending = spending_categories.get(business_type, 1500)
+        category_spending = assumptions['category_spending']
         total_households = demographic_data['total_households']
         
         # Market share based on competition
-        competitors = competitive_data['direct_competitors']
-        market_share = 1 / (competitors + 1) if competitors > 0 else 0.25
+        competitors = np.asarray(competitive_data['direct_competitors'], dtype=float)
+        market_share = np.where(competitors > 0, 1 / (np.maximum(competitors, 0) + 1), 0.25)
         
         annual_revenue = total_households * category_spending * market_share
         
-        return annual_revenue
+        return annual_revenue if np.ndim(annual_revenue) else float(annual_revenue)
     
-    def _traffic_based_model(self, traffic_data: Dict, industry_data: Dict) -> float:
+    def _traffic_based_model(self, traffic_data: Dict, industry_data: Dict,
+                             assumptions: Dict = None) -> float:
         """Calculate revenue using traffic-based model"""
+        assumptions = assumptions or self.model_assumptions
         
         # Convert traffic to customer visits
         daily_traffic = traffic_data['daily_traffic_volume']
-        conversion_rate = 0.002  # 0.2% of traffic converts to customers
+        conversion_rate = assumptions['traffic_conversion_rate']
         
         daily_customers = daily_traffic * conversion_rate
         annual_customers = daily_customers * 365
@@ -461,6 +592,157 @@ class RevenueProjectionsAnalyzer:
         
         return annual_revenue
     
+    def run_sensitivity_analysis(self, business_type: str, demographic_data: Dict,
+                                 competitive_data: Dict, habitat_data: Dict,
+                                 traffic_data: Dict, industry_data: Dict,
+                                 points_per_assumption: int = 101) -> Dict[str, Any]:
+        """
+        Sweep every model input across its plausible range in one vectorized call
+        
+        Returns tornado rankings (revenue swing between range ends), elasticities
+        at the base case for the blended projection and each model, and the full
+        response curves for charting.
+        """
+        base_inputs = {
+            'demographic': demographic_data,
+            'competitive': competitive_data,
+            'habitat': habitat_data,
+            'traffic': traffic_data,
+            'industry': industry_data,
+            'assumptions': self._get_model_assumptions(business_type)
+        }
+        names = list(self.sensitivity_ranges.keys())
+        if demographic_data.get('huff_captured_spending') is not None:
+            # The Huff model has its own distance decay and attractiveness, so the
+            # single-ring gravity inputs no longer feed any model
+            names = [name for name in names if name not in HUFF_REPLACED_INPUTS]
+        block = points_per_assumption + 2  # range sweep plus ±1% for elasticity
+        total = len(names) * block
+        
+        # Every variable is held at its base value except inside its own block
+        batch = {group: dict(values) for group, values in base_inputs.items()}
+        sweeps = {}
+        for i, name in enumerate(names):
+            group, low, high, range_type = self.sensitivity_ranges[name]
+            base_value = float(base_inputs[group][name])
+            if range_type == 'relative':
+                low, high = base_value * low, base_value * high
+            elif range_type == 'offset':
+                low, high = max(0.0, base_value + low), base_value + high
+            sweep = np.linspace(low, high, points_per_assumption)
+            sweeps[name] = (base_value, sweep)
+            
+            column = batch[group].get(name)
+            if not isinstance(column, np.ndarray):
+                column = np.full(total, base_value)
+                batch[group][name] = column
+            column[i * block:i * block + points_per_assumption] = sweep
+            column[i * block + points_per_assumption] = base_value * 1.01
+            column[i * block + points_per_assumption + 1] = base_value * 0.99
+        
+        models = self._calculate_revenue_models(
+            business_type, batch['demographic'], batch['competitive'], batch['habitat'],
+            batch['traffic'], batch['industry'], batch['assumptions']
+        )
+        model_names = list(models.keys())
+        model_matrix = np.vstack([np.broadcast_to(models[m], (total,)) for m in model_names])
+        blended = model_matrix.mean(axis=0)
+        
+        base_models = self._calculate_revenue_models(
+            business_type, demographic_data, competitive_data, habitat_data,
+            traffic_data, industry_data
+        )
+        base_revenue = float(np.mean(list(base_models.values())))
+        
+        tornado = []
+        elasticities = {}
+        curves = {}
+        for i, name in enumerate(names):
+            base_value, sweep = sweeps[name]
+            offset = i * block
+            curve = blended[offset:offset + points_per_assumption]
+            up = offset + points_per_assumption
+            down = up + 1
+            
+            tornado.append({
+                'variable': name,
+                'base_value': base_value,
+                'low_value': float(sweep[0]),
+                'high_value': float(sweep[-1]),
+                'revenue_at_low': float(curve[0]),
+                'revenue_at_high': float(curve[-1]),
+                'revenue_min': float(curve.min()),
+                'revenue_max': float(curve.max()),
+                'swing': float(curve.max() - curve.min())
+            })
+            
+            # Arc elasticity from the ±1% points around the base case
+            with np.errstate(divide='ignore', invalid='ignore'):
+                model_elasticity = (model_matrix[:, up] - model_matrix[:, down]) / (
+                    0.02 * np.array([base_models[m] for m in model_names]))
+            model_elasticity = np.nan_to_num(model_elasticity)
+            blended_elasticity = (blended[up] - blended[down]) / (0.02 * base_revenue) if base_revenue else 0.0
+            elasticities[name] = {
+                'blended': float(blended_elasticity) if base_value else 0.0,
+                **{m: float(e) if base_value else 0.0 for m, e in zip(model_names, model_elasticity)}
+            }
+            curves[name] = {'values': sweep.tolist(), 'revenue': curve.tolist()}
+        
+        tornado.sort(key=lambda row: row['swing'], reverse=True)
+        for rank, row in enumerate(tornado, start=1):
+            row['rank'] = rank
+        
+        return {
+            'base_revenue': base_revenue,
+            'evaluations': total * len(model_names),
+            'tornado': tornado,
+            'elasticities': elasticities,
+            'curves': curves
+        }
+    
+    def _calculate_impact_table(self, business_type: str, demographic_data: Dict,
+                                competitive_data: Dict, habitat_data: Dict,
+                                traffic_data: Dict, industry_data: Dict) -> Dict[str, Dict[str, float]]:
+        """Blended revenue at ±10% for the headline variables in the 4.1 impact table"""
+        variables = {
+            'population': ('demographic', ['primary_population', 'secondary_population',
+                                           'extended_population', 'total_households']),
+            'income': ('demographic', ['median_income']),
+            'competition': ('competitive', ['direct_competitors']),
+            'traffic': ('traffic', ['daily_traffic_volume']),
+            'capture': ('assumptions', ['base_capture_rate'])
+        }
+        inputs = {
+            'demographic': dict(demographic_data),
+            'competitive': dict(competitive_data),
+            'habitat': habitat_data,
+            'traffic': dict(traffic_data),
+            'industry': industry_data,
+            'assumptions': self._get_model_assumptions(business_type)
+        }
+        
+        # Rows 2i / 2i+1 are the +10% / -10% cases for variable i
+        total = 2 * len(variables)
+        for i, (group, keys) in enumerate(variables.values()):
+            for key in keys:
+                column = inputs[group][key]
+                if not isinstance(column, np.ndarray):
+                    column = np.full(total, float(column))
+                    inputs[group][key] = column
+                column[2 * i] *= 1.10
+                column[2 * i + 1] *= 0.90
+        
+        models = self._calculate_revenue_models(
+            business_type, inputs['demographic'], inputs['competitive'], inputs['habitat'],
+            inputs['traffic'], inputs['industry'], inputs['assumptions']
+        )
+        blended = np.vstack([np.broadcast_to(values, (total,)) for values in models.values()]).mean(axis=0)
+        
+        return {
+            name: {'plus': float(blended[2 * i]), 'minus': float(blended[2 * i + 1])}
+            for i, name in enumerate(variables)
+        }
+    
     def _generate_revenue_scenarios(self, revenue_models: Dict[str, float], 
                                   industry_data: Dict) -> Dict[str, float]:
         """Generate conservative, realistic, and optimistic scenarios"""
@@ -737,8 +1019,29 @@ class RevenueProjectionsAnalyzer:
             
             # Monthly projections table
             "{sba_monthly_projections_table}": self._generate_monthly_projections_table(projection),
+            
+            # Sensitivity analysis
+            "{revenue_tornado_table}": self._generate_tornado_table(projection),
+            "{revenue_elasticity_table}": self._generate_elasticity_table(projection),
         }
         
+        # ±10% variable impact table
+        if projection.sensitivity_analysis:
+            impacts = projection.sensitivity_analysis['impact_table']
+            base_inputs = projection.sensitivity_analysis['base_inputs']
+            replacements.update({
+                "{base_population:,}": f"{base_inputs['population']:,.0f}",
+                "{base_income:,}": f"{base_inputs['income']:,.0f}",
+                "{base_competition}": f"{base_inputs['competition']}",
+                "{base_traffic:,}": f"{base_inputs['traffic']:,.0f}",
+                "{base_capture_rate}": f"{base_inputs['capture_rate'] * 100:.1f}",
+            })
+            for name, prefix in [('population', 'population'), ('income', 'income'),
+                                 ('competition', 'competition'), ('traffic', 'traffic'),
+                                 ('capture', 'capture')]:
+                replacements[f"{{{prefix}_plus_impact:,}}"] = f"{impacts[name]['plus']:,.0f}"
+                replacements[f"{{{prefix}_minus_impact:,}}"] = f"{impacts[name]['minus']:,.0f}"
+        
         # Apply all replacements
         populated_content = template_content
         for placeholder, value in replacements.items():
@@ -887,6 +1190,43 @@ class RevenueProjectionsAnalyzer:
         else:
             return "SBA 7(a) Standard"
 
+    def _generate_tornado_table(self, projection: RevenueProjection, top_n: int = 10) -> str:
+        """Generate tornado ranking table of assumptions by revenue swing"""
+        if not projection.sensitivity_analysis:
+            return "Sensitivity analysis not available"
+        
+        table_rows = [
+            "| Rank | Variable | Range Tested | Revenue at Low | Revenue at High | Swing |",
+            "|------|----------|--------------|----------------|-----------------|-------|"
+        ]
+        for row in projection.sensitivity_analysis['tornado'][:top_n]:
+            label = row['variable'].replace('_', ' ').title()
+            low, high = (f"{value:,.0f}" if abs(value) >= 100 else f"{value:.4g}"
+                         for value in (row['low_value'], row['high_value']))
+            table_rows.append(
+                f"| {row['rank']} | {label} | {low} – {high} | "
+                f"${row['revenue_at_low']:,.0f} | ${row['revenue_at_high']:,.0f} | ${row['swing']:,.0f} |"
+            )
+        return "\n".join(table_rows)
+    
+    def _generate_elasticity_table(self, projection: RevenueProjection, top_n: int = 10) -> str:
+        """Generate elasticity table (% revenue change per 1% input change) by model"""
+        if not projection.sensitivity_analysis:
+            return "Sensitivity analysis not available"
+        
+        elasticities = projection.sensitivity_analysis['elasticities']
+        ranked = [row['variable'] for row in projection.sensitivity_analysis['tornado'][:top_n]]
+        model_names = [name for name in elasticities[ranked[0]] if name != 'blended'] if ranked else []
+        
+        header = "| Variable | Blended | " + " | ".join(name.replace('_', ' ').title() for name in model_names) + " |"
+        divider = "|" + "---|" * (len(model_names) + 2)
+        table_rows = [header, divider]
+        for variable in ranked:
+            values = elasticities[variable]
+            cells = " | ".join(f"{values[name]:.2f}" for name in model_names)
+            table_rows.append(f"| {variable.replace('_', ' ').title()} | {values['blended']:.2f} | {cells} |")
+        return "\n".join(table_rows)
+    
     def _generate_monthly_projections_table(self, projection: RevenueProjection) -> str:
         """Generate formatted table of monthly projections for SBA template"""
         if not projection.monthly_cash_flow_projections:
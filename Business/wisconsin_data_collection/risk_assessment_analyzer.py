@@ -27,6 +27,15 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 
+from monte_carlo_engine import MonteCarloEngine, MonteCarloConfig
+from stress_test_engine import StressTestEngine, StressGridConfig, scenario_survival_probability
+# Local FEMA NFHL flood zone lookups (optional, needs shapely)
+try:
+    from flood_zone_index import FloodZoneIndex
+    FLOOD_INDEX_AVAILABLE = True
+except ImportError:
+    FLOOD_INDEX_AVAILABLE = False
+
 # Import existing analyzers for data integration
 try:
     from integrated_business_analyzer import IntegratedBusinessAnalyzer
@@ -62,13 +71,25 @@ class RiskAssessment:
     default_probability_adjusted: float
     regulatory_compliance_score: float
     stress_test_survival_rate: float
+    stress_test_grid: Dict[str, Any] = None
+    flood_zone: Dict[str, Any] = None
 
 class RiskAssessmentAnalyzer:
     """Comprehensive risk assessment for Section 4.3"""
     
-    def __init__(self):
+    def __init__(self, monte_carlo_config: MonteCarloConfig = None,
+                 stress_grid_config: StressGridConfig = None):
         """Initialize the risk assessment analyzer"""
         
+        # Simulation settings (1M correlated paths by default)
+        self.monte_carlo_config = monte_carlo_config or MonteCarloConfig()
+        
+        # Stress grid axes (~100k revenue x cost x rate x ramp-delay points by default)
+        self.stress_grid_config = stress_grid_config or StressGridConfig()
+        
+        # Local FEMA NFHL flood zones (None until built with flood_zone_index.py)
+        self.flood_zones = FloodZoneIndex.open_default() if FLOOD_INDEX_AVAILABLE else None
+        
         # Industry risk benchmarks by business type
         self.industry_risk_benchmarks = {
             'restaurant': {
@@ -356,7 +377,8 @@ class RiskAssessmentAnalyzer:
         }
 
     def analyze_comprehensive_risk(self, business_type: str, location: str, 
-                                 integrated_data: Dict = None) -> RiskAssessment:
+                                 integrated_data: Dict = None,
+                                 lat: float = None, lon: float = None) -> RiskAssessment:
         """Perform comprehensive risk assessment integrating all previous sections"""
         
         logger.info(f"Starting comprehensive risk assessment for {business_type} at {location}")
@@ -365,6 +387,14 @@ class RiskAssessmentAnalyzer:
         if integrated_data is None:
             integrated_data = self._generate_fallback_data(business_type, location)
         
+        # Site flood hazard from the local NFHL index feeds operational risk
+        flood_zone = None
+        if lat is not None and lon is not None and self.flood_zones is not None:
+            flood_zone = self.flood_zones.assess(lat, lon)
+            integrated_data = {**integrated_data,
+                               'flood_risk_score': flood_zone['risk_score'],
+                               'special_flood_hazard_area': flood_zone['special_flood_hazard_area']}
+        
         # Analyze each risk dimension
         market_risk = self._analyze_market_risk(business_type, integrated_data)
         financial_risk = self._analyze_financial_risk(business_type, integrated_data)
@@ -391,7 +421,8 @@ class RiskAssessmentAnalyzer:
         
         # Identify key risk factors
         key_risk_factors = self._identify_key_risk_factors(
-            business_type, market_risk, financial_risk, operational_risk, strategic_risk
+            business_type, market_risk, financial_risk, operational_risk, strategic_risk,
+            flood_zone
         )
         
         # Generate risk mitigation strategies
@@ -422,6 +453,9 @@ class RiskAssessmentAnalyzer:
             stress_test_results, composite_risk
         )
         
+        # Full shock grid: survival surfaces and DSCR breakpoints
+        stress_test_grid = self._run_stress_test_grid(integrated_data, composite_risk)
+        
         return RiskAssessment(
             business_type=business_type,
             location=location,
@@ -441,7 +475,9 @@ class RiskAssessmentAnalyzer:
             stress_test_results=stress_test_results,
             default_probability_adjusted=default_probability_adjusted,
             regulatory_compliance_score=regulatory_compliance_score,
-            stress_test_survival_rate=stress_test_survival_rate
+            stress_test_survival_rate=stress_test_survival_rate,
+            stress_test_grid=stress_test_grid,
+            flood_zone=flood_zone
         )
 
     def _analyze_market_risk(self, business_type: str, data: Dict) -> float:
@@ -532,6 +568,8 @@ class RiskAssessmentAnalyzer:
         visibility_score = data.get('visibility_score', 80)
         parking_score = data.get('parking_score', 70)
         location_risk = 100 - ((traffic_volume + visibility_score + parking_score) / 3)
+        if 'flood_risk_score' in data:
+            location_risk = location_risk * 0.75 + data['flood_risk_score'] * 0.25
         
         # Labor and staffing risk (35% weight)
         local_unemployment = data.get('unemployment_rate', 4.5)
@@ -638,53 +676,44 @@ class RiskAssessmentAnalyzer:
     def _run_monte_carlo_simulation(self, business_type: str, data: Dict) -> Dict[str, float]:
         """Run Monte Carlo simulation for risk sensitivity analysis"""
         
-        # Simulation parameters
-        num_simulations = 1000
-        
         # Base financial parameters
         monthly_revenue_base = data.get('realistic_monthly_revenue', 80000)
         monthly_costs_base = data.get('realistic_monthly_operating', 65000)
+        startup_costs = data.get('total_startup_costs', 200000)
         
-        # Variance assumptions
-        revenue_std = monthly_revenue_base * 0.20  # 20% standard deviation
-        cost_std = monthly_costs_base * 0.10  # 10% standard deviation
+        seasonal_factors = self._get_seasonal_factors(business_type, data, monthly_revenue_base)
         
-        # Run simulations
-        monthly_profits = []
-        breakeven_months = []
+        engine = MonteCarloEngine(self.monte_carlo_config)
+        result = engine.simulate(monthly_revenue_base, monthly_costs_base,
+                                 startup_costs, seasonal_factors)
         
-        for _ in range(num_simulations):
-            # Generate random revenue and cost scenarios
-            monthly_revenue = np.random.normal(monthly_revenue_base, revenue_std)
-            monthly_costs = np.random.normal(monthly_costs_base, cost_std)
-            
-            monthly_profit = monthly_revenue - monthly_costs
-            monthly_profits.append(monthly_profit)
-            
-            # Calculate months to break-even for this scenario
-            if monthly_profit > 0:
-                startup_costs = data.get('total_startup_costs', 200000)
-                months_to_breakeven = startup_costs / monthly_profit
-                breakeven_months.append(min(60, months_to_breakeven))  # Cap at 60 months
-            else:
-                breakeven_months.append(60)  # Never breaks even
-        
-        # Calculate statistics
-        profitability_probability = (np.array(monthly_profits) > 0).mean() * 100
-        breakeven_probability = (np.array(breakeven_months) <= 18).mean() * 100
-        
-        # Value at Risk (95% confidence)
-        value_at_risk = np.percentile(monthly_profits, 5)
-        expected_shortfall = np.mean([p for p in monthly_profits if p <= value_at_risk])
+        if not result.converged:
+            logger.warning(f"Monte Carlo VaR not converged after {result.num_simulations:,} paths "
+                           f"(SE ${result.value_at_risk_standard_error:,.0f})")
         
-        return {
-            'profitability_probability': profitability_probability,
-            'breakeven_probability': breakeven_probability,
-            'value_at_risk': abs(value_at_risk) if value_at_risk < 0 else 0,
-            'expected_shortfall': abs(expected_shortfall) if expected_shortfall < 0 else 0,
-            'avg_monthly_profit': np.mean(monthly_profits),
-            'profit_std_deviation': np.std(monthly_profits)
-        }
+        return result.to_dict()
+    
+    def _get_seasonal_factors(self, business_type: str, data: Dict,
+                              monthly_revenue_base: float) -> Optional[np.ndarray]:
+        """Monthly seasonal multipliers from revenue projections (Section 4.1)"""
+        
+        seasonal_adjustments = data.get('seasonal_adjustments')
+        if not seasonal_adjustments:
+            try:
+                from revenue_projections_analyzer import RevenueProjectionsAnalyzer
+                seasonal_adjustments = RevenueProjectionsAnalyzer()._calculate_seasonal_adjustments(
+                    business_type, {'realistic': monthly_revenue_base * 12}
+                )
+            except Exception as e:
+                logger.warning(f"Seasonal adjustments unavailable, assuming flat months: {e}")
+                return None
+        
+        factors = np.array([float(seasonal_adjustments.get(f"{month:02d}", 0)) for month in range(1, 13)])
+        if factors.min() <= 0:
+            return None
+        
+        # Adjustments are monthly revenue amounts; normalize to multipliers around 1.0
+        return factors / factors.mean()
 
     def _generate_risk_scenarios(self, market_risk: float, financial_risk: float,
                                operational_risk: float, strategic_risk: float) -> Dict[str, Dict[str, float]]:
@@ -728,11 +757,16 @@ class RiskAssessmentAnalyzer:
 
     def _identify_key_risk_factors(self, business_type: str, market_risk: float, 
                                  financial_risk: float, operational_risk: float, 
-                                 strategic_risk: float) -> List[str]:
+                                 strategic_risk: float, flood_zone: Dict = None) -> List[str]:
         """Identify the most critical risk factors"""
         
         risk_factors = []
         
+        # Mapped flood hazard at the site outranks the generic factors
+        if flood_zone and flood_zone['special_flood_hazard_area']:
+            risk_factors.append(f"Site in FEMA Special Flood Hazard Area (zone {flood_zone['flood_zone']}); "
+                                f"flood insurance required for federally backed financing")
+        
         # High-risk thresholds
         high_risk_threshold = 70
         
@@ -930,40 +964,46 @@ class RiskAssessmentAnalyzer:
         baseline_costs = integrated_data.get('realistic_monthly_operating', 52000) * 12
         baseline_profit_margin = ((baseline_revenue - baseline_costs) / baseline_revenue) * 100
         
-        stress_results = {}
+        # Evaluate all named scenarios as arrays in one pass
+        scenario_names = list(self.stress_test_scenarios.keys())
+        scenarios = self.stress_test_scenarios.values()
+        revenue_impact = np.array([scenario['revenue_impact'] for scenario in scenarios])
+        cost_impact = np.array([scenario['cost_impact'] for scenario in scenarios])
+        duration = np.array([scenario['duration_months'] for scenario in scenarios])
+        recovery = np.array([scenario['recovery_months'] for scenario in scenarios])
+        default_multiplier = np.array([scenario['default_rate_multiplier'] for scenario in scenarios])
+        probability = np.array([scenario['probability'] for scenario in scenarios])
+        
+        # Calculate stressed metrics
+        stressed_revenue = baseline_revenue * (1 + revenue_impact / 100)
+        stressed_costs = baseline_costs * (1 + cost_impact / 100)
+        stressed_profit = stressed_revenue - stressed_costs
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stressed_margin = np.where(stressed_revenue > 0, stressed_profit / stressed_revenue * 100, -100)
+        
+        # Calculate survival probability
+        survival_prob = scenario_survival_probability(stressed_margin, duration, recovery, composite_risk)
+        
+        # Calculate expected loss
+        industry_defaults = self._analyze_industry_default_rates(business_type)
+        stressed_default_rate = industry_defaults['default_rate_5yr'] * default_multiplier
+        expected_loss = stressed_default_rate * (100 - industry_defaults['recovery_rate']) / 100
         
-        for scenario_name, scenario in self.stress_test_scenarios.items():
-            # Calculate stressed metrics
-            stressed_revenue = baseline_revenue * (1 + scenario['revenue_impact'] / 100)
-            stressed_costs = baseline_costs * (1 + scenario['cost_impact'] / 100)
-            stressed_profit = stressed_revenue - stressed_costs
-            stressed_margin = (stressed_profit / stressed_revenue) * 100 if stressed_revenue > 0 else -100
-            
-            # Calculate survival probability
-            survival_prob = self._calculate_scenario_survival_probability(
-                scenario, composite_risk, stressed_margin
-            )
-            
-            # Calculate expected loss
-            default_multiplier = scenario['default_rate_multiplier']
-            industry_defaults = self._analyze_industry_default_rates(business_type)
-            stressed_default_rate = industry_defaults['default_rate_5yr'] * default_multiplier
-            
-            expected_loss = stressed_default_rate * (100 - industry_defaults['recovery_rate']) / 100
-            
+        stress_results = {}
+        for i, scenario_name in enumerate(scenario_names):
             stress_results[scenario_name] = {
-                'revenue_impact_pct': scenario['revenue_impact'],
-                'cost_impact_pct': scenario['cost_impact'],
-                'stressed_annual_revenue': stressed_revenue,
-                'stressed_annual_costs': stressed_costs,
-                'stressed_annual_profit': stressed_profit,
-                'stressed_profit_margin': stressed_margin,
-                'survival_probability': survival_prob,
-                'stressed_default_rate': stressed_default_rate,
-                'expected_loss_pct': expected_loss,
-                'duration_months': scenario['duration_months'],
-                'recovery_months': scenario['recovery_months'],
-                'scenario_probability': scenario['probability']
+                'revenue_impact_pct': float(revenue_impact[i]),
+                'cost_impact_pct': float(cost_impact[i]),
+                'stressed_annual_revenue': float(stressed_revenue[i]),
+                'stressed_annual_costs': float(stressed_costs[i]),
+                'stressed_annual_profit': float(stressed_profit[i]),
+                'stressed_profit_margin': float(stressed_margin[i]),
+                'survival_probability': float(survival_prob[i]),
+                'stressed_default_rate': float(stressed_default_rate[i]),
+                'expected_loss_pct': float(expected_loss[i]),
+                'duration_months': int(duration[i]),
+                'recovery_months': int(recovery[i]),
+                'scenario_probability': float(probability[i])
             }
         
         return stress_results
@@ -1036,19 +1076,13 @@ class RiskAssessmentAnalyzer:
                                            composite_risk: float) -> float:
         """Calculate overall survival rate across all stress scenarios"""
         
-        total_weighted_survival = 0
-        total_weight = 0
-        
-        for scenario_name, results in stress_results.items():
-            scenario_prob = results['scenario_probability'] / 100
-            survival_prob = results['survival_probability']
-            
-            total_weighted_survival += survival_prob * scenario_prob
-            total_weight += scenario_prob
+        scenario_prob = np.array([results['scenario_probability'] for results in stress_results.values()]) / 100
+        survival_prob = np.array([results['survival_probability'] for results in stress_results.values()])
         
         # Average survival rate weighted by scenario probability
+        total_weight = scenario_prob.sum()
         if total_weight > 0:
-            weighted_avg_survival = total_weighted_survival / total_weight
+            weighted_avg_survival = float((survival_prob * scenario_prob).sum() / total_weight)
         else:
             weighted_avg_survival = 80.0  # Default
         
@@ -1061,31 +1095,27 @@ class RiskAssessmentAnalyzer:
     def _calculate_scenario_survival_probability(self, scenario: Dict, composite_risk: float,
                                                stressed_margin: float) -> float:
         """Calculate survival probability for a specific stress scenario"""
+        return float(scenario_survival_probability(
+            stressed_margin, scenario['duration_months'], scenario['recovery_months'], composite_risk
+        ))
+    
+    def _run_stress_test_grid(self, integrated_data: Dict, composite_risk: float) -> Dict[str, Any]:
+        """Evaluate the full revenue x cost x rate x ramp-delay shock grid"""
         
-        # Base survival probability depends on stressed profit margin
-        if stressed_margin > 10:
-            base_survival = 90
-        elif stressed_margin > 5:
-            base_survival = 75
-        elif stressed_margin > 0:
-            base_survival = 60
-        elif stressed_margin > -10:
-            base_survival = 35
-        else:
-            base_survival = 15
-        
-        # Adjust for scenario duration
-        duration_penalty = min(20, scenario['duration_months'] / 2)  # Longer duration = higher risk
-        
-        # Adjust for composite risk
-        risk_penalty = composite_risk / 5  # Scale composite risk to penalty
+        annual_revenue = integrated_data.get('realistic_monthly_revenue', 65000) * 12
+        annual_costs = integrated_data.get('realistic_monthly_operating', 52000) * 12
         
-        # Adjust for recovery time
-        recovery_bonus = max(0, 10 - scenario['recovery_months'] / 2)  # Faster recovery = bonus
+        # Loan terms mirror the Section 4.1 DSCR assumptions unless provided
+        loan_amount = integrated_data.get('loan_amount', min(annual_revenue * 0.4, 300000))
+        interest_rate = integrated_data.get('interest_rate', 0.07)
+        loan_term_years = integrated_data.get('loan_term_years', 10)
         
-        final_survival = base_survival - duration_penalty - risk_penalty + recovery_bonus
+        engine = StressTestEngine(self.stress_grid_config)
+        grid = engine.evaluate(annual_revenue, annual_costs, loan_amount,
+                               interest_rate, loan_term_years, composite_risk)
         
-        return max(5.0, min(95.0, final_survival))
+        logger.info(f"Evaluated {grid.num_points:,} stress grid points")
+        return grid.to_dict()
     
     def _normalize_business_type(self, business_type: str) -> str:
         """Normalize business type string to match database keys"""
@@ -1148,6 +1178,10 @@ class RiskAssessmentAnalyzer:
             # 5. Monte Carlo Results
             chart_paths['monte_carlo'] = self._create_monte_carlo_chart(analysis, output_dir)
             
+            # 6. Stress Test Survival Surface
+            if analysis.stress_test_grid:
+                chart_paths['stress_surface'] = self._create_stress_surface_chart(analysis, output_dir)
+            
             logger.info(f"Generated {len(chart_paths)} risk assessment charts")
             return chart_paths
             
@@ -1459,6 +1493,57 @@ class RiskAssessmentAnalyzer:
         
         return chart_path
 
+    def _create_stress_surface_chart(self, analysis: RiskAssessment, output_dir: str) -> str:
+        """Create survival probability surface and DSCR breakpoint chart from the stress grid"""
+        
+        grid = analysis.stress_test_grid
+        axes = grid['axes']
+        surfaces = grid['surfaces']
+        breakpoints = grid['breakpoints']
+        
+        revenue_decline = np.array(axes['revenue_decline']) * 100
+        cost_inflation = np.array(axes['cost_inflation']) * 100
+        rate_change = np.array(axes['rate_change']) * 100
+        
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 7))
+        
+        # 1. Survival probability over revenue decline x cost inflation, DSCR 1.25 contour
+        survival = np.array(surfaces['survival_revenue_cost'])
+        dscr = np.array(surfaces['dscr_revenue_cost'])
+        contour = ax1.contourf(cost_inflation, revenue_decline, survival, levels=20, cmap='RdYlGn', vmin=0, vmax=100)
+        fig.colorbar(contour, ax=ax1, label='Survival Probability (%)')
+        dscr_line = ax1.contour(cost_inflation, revenue_decline, dscr,
+                                levels=[self.stress_grid_config.dscr_threshold], colors='black', linewidths=2)
+        ax1.clabel(dscr_line, fmt=lambda v: f'DSCR {v:.2f}')
+        ax1.set_xlabel('Cost Inflation (%)')
+        ax1.set_ylabel('Revenue Decline (%)')
+        ax1.set_title('Survival Probability Surface')
+        
+        # 2. Revenue decline that breaks DSCR threshold, by cost inflation and rate change
+        breakpoint_surface = np.array(surfaces['revenue_breakpoint_cost_rate']) * 100
+        for j in range(0, len(rate_change), max(1, len(rate_change) // 4)):
+            ax2.plot(cost_inflation, breakpoint_surface[:, j], linewidth=2,
+                     label=f'Rate {rate_change[j]:+.1f} pts')
+        ax2.set_xlabel('Cost Inflation (%)')
+        ax2.set_ylabel('Revenue Decline at DSCR Breakpoint (%)')
+        ax2.set_title(f'Revenue Shock Pushing DSCR Below {self.stress_grid_config.dscr_threshold:.2f}')
+        if 'revenue_decline_at_dscr_threshold' in breakpoints:
+            ax2.axhline(breakpoints['revenue_decline_at_dscr_threshold'], color='red', linestyle='--',
+                        label=f"Baseline: {breakpoints['revenue_decline_at_dscr_threshold']:.1f}%")
+        ax2.legend()
+        ax2.grid(True, alpha=0.3)
+        
+        plt.suptitle(f'Stress Test Grid ({grid["summary"]["grid_points"]:,} scenarios) - {analysis.business_type}',
+                     fontsize=16, fontweight='bold')
+        plt.tight_layout()
+        
+        # Save chart
+        chart_path = f"{output_dir}/stress_test_surface.png"
+        plt.savefig(chart_path, dpi=300, bbox_inches='tight')
+        plt.close()
+        
+        return chart_path
+
 if __name__ == "__main__":
     # Test the analyzer
     analyzer = RiskAssessmentAnalyzer()
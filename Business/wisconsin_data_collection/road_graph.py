@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Road Graph
+==========
+
+Compact, integer-indexed road network shared by the traffic, centrality and
+isochrone analyses. Nodes are dense int32 indices with coordinate arrays,
+edges are parallel arrays (from, to, length, highway class), and adjacency is
+exposed as a SciPy CSR matrix so graph algorithms run in compiled code
+instead of over NetworkX dicts keyed by "lat,lon" strings.
+
+Features:
+- Build from Overpass `out geom` responses with OSM node IDs preserved
+- Length- or travel-time-weighted sparse adjacency (cached per weight)
+- KD-tree nearest-node snapping
+- Fixed geographic tiling used for caching per-tile results
+"""
+
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_MILES = 3959.0
+
+# Tile edge length in degrees (~5.5 km north-south in Wisconsin)
+TILE_SIZE_DEGREES = 0.05
+
+# Highway classes in priority order with default free-flow speeds (mph)
+HIGHWAY_CLASSES = [
+    "motorway", "trunk", "primary", "secondary", "tertiary",
+    "unclassified", "residential", "service", "link", "other"
+]
+DEFAULT_SPEEDS_MPH = {
+    "motorway": 65, "trunk": 55, "primary": 45, "secondary": 40, "tertiary": 35,
+    "unclassified": 30, "residential": 25, "service": 15, "link": 35, "other": 20
+}
+DRIVABLE_HIGHWAYS = (
+    "motorway", "trunk", "primary", "secondary", "tertiary", "unclassified", "residential",
+    "service", "motorway_link", "trunk_link", "primary_link", "secondary_link", "tertiary_link"
+)
+
+
+def highway_class_index(highway: str) -> int:
+    """Index into HIGHWAY_CLASSES for an OSM highway tag"""
+    if highway and highway.endswith("_link"):
+        return HIGHWAY_CLASSES.index("link")
+    if highway in HIGHWAY_CLASSES:
+        return HIGHWAY_CLASSES.index(highway)
+    return HIGHWAY_CLASSES.index("other")
+
+
+def haversine_miles(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Element-wise great-circle distance in miles"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(1.0, a)))
+
+
+def unit_vectors(lat, lon) -> np.ndarray:
+    """3-D unit vectors for points, so KD-tree chord queries are exact great-circle searches"""
+    lat, lon = np.radians(np.asarray(lat, dtype=float)), np.radians(np.asarray(lon, dtype=float))
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def chord_length(miles: float) -> float:
+    """Unit-sphere chord matching a great-circle distance in miles"""
+    return 2.0 * math.sin(min(math.pi, miles / EARTH_RADIUS_MILES) / 2.0)
+
+
+def tile_key(lat: float, lon: float, tile_size: float = TILE_SIZE_DEGREES) -> Tuple[int, int]:
+    """(row, col) of the fixed grid tile containing a point"""
+    return int(math.floor(lat / tile_size)), int(math.floor(lon / tile_size))
+
+
+def tile_id(key: Tuple[int, int]) -> str:
+    """Filesystem-safe tile identifier"""
+    return f"{key[0]}_{key[1]}"
+
+
+def tile_bounds(key: Tuple[int, int], tile_size: float = TILE_SIZE_DEGREES,
+                buffer: float = 0.0) -> Tuple[float, float, float, float]:
+    """(south, west, north, east) of a tile, optionally expanded by a buffer"""
+    south, west = key[0] * tile_size, key[1] * tile_size
+    return (south - buffer, west - buffer, south + tile_size + buffer, west + tile_size + buffer)
+
+
+@dataclass
+class RoadGraph:
+    """Undirected road network with int node IDs and parallel edge arrays"""
+    node_lat: np.ndarray
+    node_lon: np.ndarray
+    edge_from: np.ndarray
+    edge_to: np.ndarray
+    edge_length: np.ndarray                 # Miles
+    edge_class: np.ndarray                  # Index into HIGHWAY_CLASSES
+    node_osm_id: Optional[np.ndarray] = None
+    edge_name: Optional[np.ndarray] = None      # Index into a name table, -1 if unnamed
+    _adjacency: Dict[Any, sp.csr_matrix] = field(default_factory=dict, repr=False)
+    _kdtree: Optional[cKDTree] = field(default=None, repr=False)
+
+    @property
+    def num_nodes(self) -> int:
+        return int(self.node_lat.size)
+
+    @property
+    def num_edges(self) -> int:
+        return int(self.edge_from.size)
+
+    @property
+    def density(self) -> float:
+        n = self.num_nodes
+        return 2.0 * self.num_edges / (n * (n - 1)) if n > 1 else 0.0
+
+    @classmethod
+    def from_overpass(cls, osm_data: Dict) -> 'RoadGraph':
+        """Build from an Overpass `out geom` response of highway ways"""
+        node_index: Dict[Any, int] = {}
+        lats: List[float] = []
+        lons: List[float] = []
+        osm_ids: List[int] = []
+        edge_from: List[int] = []
+        edge_to: List[int] = []
+        edge_class: List[int] = []
+
+        for way in osm_data.get('elements', []):
+            if way.get('type') != 'way' or 'geometry' not in way:
+                continue
+            geometry = way['geometry']
+            # Node IDs let ways share intersections exactly; fall back to coordinates
+            way_nodes = way.get('nodes')
+            if not way_nodes or len(way_nodes) != len(geometry):
+                way_nodes = [(round(point['lat'], 7), round(point['lon'], 7)) for point in geometry]
+            highway_class = highway_class_index(way.get('tags', {}).get('highway', 'other'))
+
+            previous = None
+            for key, point in zip(way_nodes, geometry):
+                index = node_index.get(key)
+                if index is None:
+                    index = len(lats)
+                    node_index[key] = index
+                    lats.append(point['lat'])
+                    lons.append(point['lon'])
+                    osm_ids.append(key if isinstance(key, int) else -1)
+                if previous is not None and previous != index:
+                    edge_from.append(previous)
+                    edge_to.append(index)
+                    edge_class.append(highway_class)
+                previous = index
+
+        node_lat = np.array(lats, dtype=np.float64)
+        node_lon = np.array(lons, dtype=np.float64)
+        edge_from = np.array(edge_from, dtype=np.int32)
+        edge_to = np.array(edge_to, dtype=np.int32)
+        edge_length = haversine_miles(node_lat[edge_from], node_lon[edge_from],
+                                      node_lat[edge_to], node_lon[edge_to]).astype(np.float32)
+
+        return cls(node_lat=node_lat, node_lon=node_lon, edge_from=edge_from, edge_to=edge_to,
+                   edge_length=edge_length, edge_class=np.array(edge_class, dtype=np.int8),
+                   node_osm_id=np.array(osm_ids, dtype=np.int64))
+
+    def edge_travel_minutes(self, speeds_mph: Dict[str, float] = None) -> np.ndarray:
+        """Free-flow travel time of each edge in minutes"""
+        speeds = dict(DEFAULT_SPEEDS_MPH, **(speeds_mph or {}))
+        class_speeds = np.array([speeds[name] for name in HIGHWAY_CLASSES], dtype=np.float64)
+        return self.edge_length / class_speeds[self.edge_class] * 60.0
+
+    def adjacency(self, weight: str = 'length', speeds_mph: Dict[str, float] = None) -> sp.csr_matrix:
+        """Symmetric CSR adjacency weighted by length (miles) or travel time (minutes)"""
+        cache_key = (weight, tuple(sorted((speeds_mph or {}).items())))
+        if cache_key not in self._adjacency:
+            if weight == 'length':
+                weights = self.edge_length.astype(np.float64)
+            elif weight == 'time':
+                weights = self.edge_travel_minutes(speeds_mph)
+            else:
+                raise ValueError(f"Unknown edge weight: {weight}")
+            # csgraph treats explicit zeros as missing edges, so keep a tiny floor
+            weights = np.maximum(weights, 1e-9)
+            n = self.num_nodes
+            rows = np.concatenate([self.edge_from, self.edge_to])
+            cols = np.concatenate([self.edge_to, self.edge_from])
+            # Parallel edges collapse to the shortest one (tocsr would sum them)
+            matrix = self._min_duplicate_edges(rows, cols, np.concatenate([weights, weights]), n)
+            self._adjacency[cache_key] = matrix
+        return self._adjacency[cache_key]
+
+    @staticmethod
+    def _min_duplicate_edges(rows: np.ndarray, cols: np.ndarray, weights: np.ndarray, n: int) -> sp.csr_matrix:
+        order = np.lexsort((weights, cols, rows))
+        rows, cols, weights = rows[order], cols[order], weights[order]
+        first = np.ones(rows.size, dtype=bool)
+        first[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        return sp.csr_matrix((weights[first], (rows[first], cols[first])), shape=(n, n))
+
+    def _projected(self, lat, lon) -> np.ndarray:
+        """Equirectangular projection (miles) around the graph's mean latitude"""
+        scale = math.cos(math.radians(float(np.mean(self.node_lat)))) if self.num_nodes else 1.0
+        miles_per_degree = EARTH_RADIUS_MILES * math.pi / 180
+        return np.column_stack([np.asarray(lat, dtype=float) * miles_per_degree,
+                                np.asarray(lon, dtype=float) * miles_per_degree * scale])
+
+    def nearest_node(self, lat, lon) -> np.ndarray:
+        """Index of the closest node to each point (scalar in, scalar out)"""
+        if self._kdtree is None:
+            self._kdtree = cKDTree(self._projected(self.node_lat, self.node_lon))
+        _, index = self._kdtree.query(self._projected(np.atleast_1d(lat), np.atleast_1d(lon)))
+        return index if np.ndim(lat) else int(index[0])
+
+    def subgraph(self, node_mask: np.ndarray) -> Tuple['RoadGraph', np.ndarray]:
+        """Induced subgraph on a node mask, plus the original index of each kept node"""
+        kept = np.nonzero(node_mask)[0]
+        remap = np.full(self.num_nodes, -1, dtype=np.int64)
+        remap[kept] = np.arange(kept.size)
+        edge_mask = node_mask[self.edge_from] & node_mask[self.edge_to]
+        graph = RoadGraph(
+            node_lat=self.node_lat[kept],
+            node_lon=self.node_lon[kept],
+            edge_from=remap[self.edge_from[edge_mask]].astype(np.int32),
+            edge_to=remap[self.edge_to[edge_mask]].astype(np.int32),
+            edge_length=self.edge_length[edge_mask],
+            edge_class=self.edge_class[edge_mask],
+            node_osm_id=self.node_osm_id[kept] if self.node_osm_id is not None else None,
+            edge_name=self.edge_name[edge_mask] if self.edge_name is not None else None
+        )
+        return graph, kept
+
+    def within_bounds(self, south: float, west: float, north: float, east: float) -> Tuple['RoadGraph', np.ndarray]:
+        """Subgraph of nodes inside a lat/lon box"""
+        mask = ((self.node_lat >= south) & (self.node_lat <= north)
+                & (self.node_lon >= west) & (self.node_lon <= east))
+        return self.subgraph(mask)
+
+    def largest_component(self) -> Tuple['RoadGraph', np.ndarray]:
+        """Largest connected component, plus the original index of each kept node"""
+        if self.num_nodes == 0:
+            return self, np.arange(0)
+        _, labels = connected_components(self.adjacency(), directed=False)
+        largest = np.argmax(np.bincount(labels))
+        return self.subgraph(labels == largest)
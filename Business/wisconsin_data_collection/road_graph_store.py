@@ -0,0 +1,540 @@
+#!/usr/bin/env python3
+"""
+Road Graph Store
+================
+
+Persistent, tiled road network built once from a Wisconsin OpenStreetMap
+extract. Drivable ways are contracted to an integer-indexed junction graph
+(edge length in miles plus highway class and name) and written as plain .npy
+arrays partitioned by fixed geographic tile, so analyses memory-map only the
+tiles they touch instead of issuing an Overpass query per site.
+
+Features:
+- Ingests .osm.pbf (via pyosmium) or .osm / .osm.bz2 XML extracts
+- Degree-2 contraction: only junctions and way ends become graph nodes
+- Per-tile memory-mapped node/edge arrays plus transit stops
+- Subgraph extraction around any point or bounding box as a RoadGraph
+
+Usage:
+    python road_graph_store.py build wisconsin-latest.osm.pbf [--store-dir data_cache/road_graph]
+    python road_graph_store.py info
+"""
+
+import argparse
+import bz2
+import json
+import logging
+import math
+import os
+import time
+import xml.etree.ElementTree as ET
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+
+import numpy as np
+
+from road_graph import (
+    RoadGraph, DRIVABLE_HIGHWAYS, TILE_SIZE_DEGREES, HIGHWAY_CLASSES,
+    highway_class_index, haversine_miles, tile_id
+)
+
+# PBF extract support (optional)
+try:
+    import osmium
+    OSMIUM_AVAILABLE = True
+except ImportError:
+    OSMIUM_AVAILABLE = False
+    osmium = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = os.path.join("data_cache", "road_graph")
+WISCONSIN_EXTRACT_URL = "https://download.geofabrik.de/north-america/us/wisconsin-latest.osm.pbf"
+
+NODE_ARRAYS = ("node_index", "node_osm_id", "node_lat", "node_lon")
+EDGE_ARRAYS = ("edge_from", "edge_to", "edge_length", "edge_class", "edge_name")
+STOP_ARRAYS = ("stop_lat", "stop_lon", "stop_type", "stop_name")
+TRANSIT_TYPES = ["bus_stop", "train_station"]
+
+
+def transit_type(tags: Dict[str, str]) -> Optional[str]:
+    """Transit stop type for an OSM node, or None"""
+    if tags.get('railway') in ('station', 'halt'):
+        return 'train_station'
+    if tags.get('highway') == 'bus_stop' or tags.get('public_transport') in ('stop_position', 'platform'):
+        return 'bus_stop'
+    return None
+
+
+class _ExtractAccumulator:
+    """Flat arrays of drivable way node references, coordinates and attributes"""
+
+    def __init__(self):
+        self.refs = array('q')
+        self.lats = array('d')
+        self.lons = array('d')
+        self.way_offsets = array('q', [0])
+        self.way_class = array('b')
+        self.way_name = array('l')
+        self.names: Dict[str, int] = {}
+        self.stop_lat = array('d')
+        self.stop_lon = array('d')
+        self.stop_type = array('b')
+        self.stop_name = array('l')
+
+    def name_index(self, name: Optional[str]) -> int:
+        if not name:
+            return -1
+        return self.names.setdefault(name, len(self.names))
+
+    def add_way(self, refs: List[int], lats: List[float], lons: List[float], tags: Dict[str, str]):
+        if len(refs) < 2:
+            return
+        self.refs.extend(refs)
+        self.lats.extend(lats)
+        self.lons.extend(lons)
+        self.way_offsets.append(len(self.refs))
+        self.way_class.append(highway_class_index(tags.get('highway')))
+        # Route numbers (I-94, US 151) matter more than street names for access analysis
+        self.way_name.append(self.name_index(tags.get('ref') or tags.get('name')))
+
+    def add_stop(self, lat: float, lon: float, stop_type: str, name: Optional[str]):
+        self.stop_lat.append(lat)
+        self.stop_lon.append(lon)
+        self.stop_type.append(TRANSIT_TYPES.index(stop_type))
+        self.stop_name.append(self.name_index(name))
+
+
+if OSMIUM_AVAILABLE:
+    class _PbfHandler(osmium.SimpleHandler):
+        """Streams drivable ways (with node locations) and transit stops"""
+
+        def __init__(self, accumulator: _ExtractAccumulator):
+            super().__init__()
+            self.accumulator = accumulator
+
+        def node(self, n):
+            if not n.tags:
+                return
+            tags = {tag.k: tag.v for tag in n.tags}
+            stop_type = transit_type(tags)
+            if stop_type and n.location.valid():
+                self.accumulator.add_stop(n.location.lat, n.location.lon, stop_type, tags.get('name'))
+
+        def way(self, w):
+            if w.tags.get('highway') not in DRIVABLE_HIGHWAYS:
+                return
+            refs, lats, lons = [], [], []
+            for node in w.nodes:
+                if node.location.valid():
+                    refs.append(node.ref)
+                    lats.append(node.location.lat)
+                    lons.append(node.location.lon)
+            self.accumulator.add_way(refs, lats, lons, {tag.k: tag.v for tag in w.tags})
+
+
+def _open_xml(path: Path):
+    return bz2.open(path, 'rb') if path.suffix == '.bz2' else open(path, 'rb')
+
+
+def _iter_xml_elements(path: Path) -> Iterator[ET.Element]:
+    """Top-level node/way/relation elements, detached from the root once processed
+
+    Clearing each element alone would leave it attached to <osm>, so memory
+    would still grow with the whole extract; the root is cleared after each one.
+    """
+    with _open_xml(path) as f:
+        context = ET.iterparse(f, events=('start', 'end'))
+        _, root = next(context)
+        for event, element in context:
+            if event == 'end' and element.tag in ('node', 'way', 'relation'):
+                yield element
+                element.clear()
+                root.clear()
+
+
+def _read_xml_extract(path: Path, accumulator: _ExtractAccumulator, chunk_size: int = 1_000_000):
+    """Two streaming passes: drivable way refs first, then coordinates of only those nodes"""
+    ways: List[Tuple[List[int], Dict[str, str]]] = []
+    for element in _iter_xml_elements(path):
+        if element.tag == 'way':
+            tags = {tag.get('k'): tag.get('v') for tag in element.iter('tag')}
+            if tags.get('highway') in DRIVABLE_HIGHWAYS:
+                ways.append(([int(nd.get('ref')) for nd in element.iter('nd')], tags))
+
+    needed = np.unique(np.fromiter((ref for refs, _ in ways for ref in refs), dtype=np.int64))
+    found_ids, found_lat, found_lon = [], [], []
+    ids, lats, lons = array('q'), array('d'), array('d')
+
+    def flush():
+        chunk_ids = np.array(ids, dtype=np.int64)
+        keep = np.isin(chunk_ids, needed)
+        found_ids.append(chunk_ids[keep])
+        found_lat.append(np.array(lats, dtype=np.float64)[keep])
+        found_lon.append(np.array(lons, dtype=np.float64)[keep])
+        del ids[:], lats[:], lons[:]
+
+    for element in _iter_xml_elements(path):
+        if element.tag == 'node':
+            lat, lon = float(element.get('lat')), float(element.get('lon'))
+            ids.append(int(element.get('id')))
+            lats.append(lat)
+            lons.append(lon)
+            tags = {tag.get('k'): tag.get('v') for tag in element.iter('tag')}
+            stop_type = transit_type(tags) if tags else None
+            if stop_type:
+                accumulator.add_stop(lat, lon, stop_type, tags.get('name'))
+            if len(ids) >= chunk_size:
+                flush()
+    flush()
+
+    node_ids = np.concatenate(found_ids)
+    order = np.argsort(node_ids)
+    node_ids = node_ids[order]
+    node_lat = np.concatenate(found_lat)[order]
+    node_lon = np.concatenate(found_lon)[order]
+
+    if node_ids.size == 0:
+        return
+    for refs, tags in ways:
+        refs = np.asarray(refs, dtype=np.int64)
+        position = np.minimum(np.searchsorted(node_ids, refs), node_ids.size - 1)
+        valid = node_ids[position] == refs
+        accumulator.add_way(refs[valid].tolist(), node_lat[position[valid]].tolist(),
+                            node_lon[position[valid]].tolist(), tags)
+
+
+def contract_ways(refs: np.ndarray, lats: np.ndarray, lons: np.ndarray, way_offsets: np.ndarray,
+                  way_class: np.ndarray, way_name: np.ndarray) -> Dict[str, np.ndarray]:
+    """Collapse way polylines into a junction-to-junction graph
+
+    A node survives contraction if it is shared by more than one way position
+    (an intersection) or is the first/last node of a way. Edge lengths are the
+    summed polyline lengths between consecutive surviving nodes.
+    """
+    num_refs = refs.size
+    way_of_position = np.repeat(np.arange(way_offsets.size - 1), np.diff(way_offsets))
+
+    _, inverse, counts = np.unique(refs, return_inverse=True, return_counts=True)
+    is_junction = counts[inverse] > 1
+    is_junction[way_offsets[:-1]] = True
+    is_junction[way_offsets[1:] - 1] = True
+
+    # Cumulative polyline length, with no length carried across way boundaries
+    segment = np.zeros(num_refs)
+    segment[1:] = haversine_miles(lats[:-1], lons[:-1], lats[1:], lons[1:])
+    segment[way_offsets[:-1]] = 0.0
+    cumulative = np.cumsum(segment)
+
+    junction_positions = np.nonzero(is_junction)[0]
+    start, stop = junction_positions[:-1], junction_positions[1:]
+    same_way = way_of_position[start] == way_of_position[stop]
+    start, stop = start[same_way], stop[same_way]
+
+    # Dense node IDs for surviving junctions only
+    junction_refs, first_position, node_of_junction = np.unique(
+        refs[junction_positions], return_index=True, return_inverse=True)
+    node_lat = lats[junction_positions][first_position]
+    node_lon = lons[junction_positions][first_position]
+    dense = np.full(num_refs, -1, dtype=np.int64)
+    dense[junction_positions] = node_of_junction
+
+    edge_from = dense[start]
+    edge_to = dense[stop]
+    edge_length = cumulative[stop] - cumulative[start]
+    keep = edge_from != edge_to
+    ways = way_of_position[start][keep]
+
+    return {
+        'node_osm_id': junction_refs,
+        'node_lat': node_lat,
+        'node_lon': node_lon,
+        'edge_from': edge_from[keep].astype(np.int32),
+        'edge_to': edge_to[keep].astype(np.int32),
+        'edge_length': edge_length[keep].astype(np.float32),
+        'edge_class': way_class[ways].astype(np.int8),
+        'edge_name': way_name[ways].astype(np.int32)
+    }
+
+
+class RoadGraphStore:
+    """Tiled, memory-mapped road network built from an OSM extract"""
+
+    def __init__(self, store_dir: str = DEFAULT_STORE_DIR):
+        self.store_dir = Path(store_dir)
+        self._manifest = None
+        self._names = None
+        self._tiles: Dict[str, Dict[str, np.ndarray]] = {}
+
+    @classmethod
+    def open_default(cls) -> Optional['RoadGraphStore']:
+        """The default store if it has been built, else None"""
+        store = cls()
+        return store if store.exists() else None
+
+    def exists(self) -> bool:
+        return (self.store_dir / "manifest.json").exists()
+
+    @property
+    def manifest(self) -> Dict[str, Any]:
+        if self._manifest is None:
+            with open(self.store_dir / "manifest.json") as f:
+                self._manifest = json.load(f)
+        return self._manifest
+
+    @property
+    def names(self) -> List[str]:
+        if self._names is None:
+            with open(self.store_dir / "names.json") as f:
+                self._names = json.load(f)
+        return self._names
+
+    @property
+    def tile_size(self) -> float:
+        return self.manifest['tile_size_degrees']
+
+    # ------------------------------------------------------------------ build
+
+    def build(self, extract_path: str, tile_size: float = TILE_SIZE_DEGREES) -> Dict[str, Any]:
+        """Ingest an OSM extract, contract it and write per-tile arrays"""
+        path = Path(extract_path)
+        start_time = time.time()
+        accumulator = _ExtractAccumulator()
+
+        if path.suffix == '.pbf':
+            if not OSMIUM_AVAILABLE:
+                raise ImportError("pyosmium is required for .pbf extracts (pip install osmium)")
+            logger.info(f"Reading PBF extract {path}")
+            _PbfHandler(accumulator).apply_file(str(path), locations=True, idx='flex_mem')
+        else:
+            logger.info(f"Reading XML extract {path}")
+            _read_xml_extract(path, accumulator)
+
+        graph = contract_ways(
+            np.frombuffer(accumulator.refs, dtype=np.int64),
+            np.frombuffer(accumulator.lats, dtype=np.float64),
+            np.frombuffer(accumulator.lons, dtype=np.float64),
+            np.frombuffer(accumulator.way_offsets, dtype=np.int64),
+            np.frombuffer(accumulator.way_class, dtype=np.int8),
+            np.asarray(accumulator.way_name, dtype=np.int64)
+        )
+        logger.info(f"Contracted {len(accumulator.refs):,} way nodes to "
+                    f"{graph['node_lat'].size:,} junctions and {graph['edge_from'].size:,} edges")
+
+        stops = {
+            'stop_lat': np.frombuffer(accumulator.stop_lat, dtype=np.float64),
+            'stop_lon': np.frombuffer(accumulator.stop_lon, dtype=np.float64),
+            'stop_type': np.frombuffer(accumulator.stop_type, dtype=np.int8),
+            'stop_name': np.asarray(accumulator.stop_name, dtype=np.int32)
+        }
+        names = [None] * len(accumulator.names)
+        for name, index in accumulator.names.items():
+            names[index] = name
+
+        manifest = self._write_tiles(graph, stops, tile_size)
+        manifest.update({
+            'source': str(path),
+            'built_at': datetime.now().isoformat(),
+            'build_seconds': round(time.time() - start_time, 1),
+            'highway_classes': HIGHWAY_CLASSES,
+            'transit_types': TRANSIT_TYPES
+        })
+        with open(self.store_dir / "names.json", 'w') as f:
+            json.dump(names, f)
+        with open(self.store_dir / "manifest.json", 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        self._manifest, self._names, self._tiles = manifest, names, {}
+        return manifest
+
+    def _write_tiles(self, graph: Dict[str, np.ndarray], stops: Dict[str, np.ndarray],
+                     tile_size: float) -> Dict[str, Any]:
+        """Partition nodes, edges (by from-node) and stops into tile directories"""
+        tiles_dir = self.store_dir / "tiles"
+        tiles_dir.mkdir(parents=True, exist_ok=True)
+
+        def tile_codes(lat, lon):
+            return np.floor(lat / tile_size).astype(np.int64), np.floor(lon / tile_size).astype(np.int64)
+
+        node_row, node_col = tile_codes(graph['node_lat'], graph['node_lon'])
+        stop_row, stop_col = tile_codes(stops['stop_lat'], stops['stop_lon'])
+        keys = np.unique(np.concatenate([
+            np.column_stack([node_row, node_col]), np.column_stack([stop_row, stop_col])]), axis=0)
+
+        edge_row, edge_col = node_row[graph['edge_from']], node_col[graph['edge_from']]
+        node_index = np.arange(graph['node_lat'].size, dtype=np.int32)
+        tiles = {}
+
+        for row, col in keys:
+            name = tile_id((int(row), int(col)))
+            tile_dir = tiles_dir / name
+            tile_dir.mkdir(exist_ok=True)
+            node_mask = (node_row == row) & (node_col == col)
+            edge_mask = (edge_row == row) & (edge_col == col)
+            stop_mask = (stop_row == row) & (stop_col == col)
+
+            arrays = {'node_index': node_index[node_mask],
+                      'node_osm_id': graph['node_osm_id'][node_mask],
+                      'node_lat': graph['node_lat'][node_mask],
+                      'node_lon': graph['node_lon'][node_mask]}
+            arrays.update({field: graph[field][edge_mask] for field in EDGE_ARRAYS})
+            arrays.update({field: stops[field][stop_mask] for field in STOP_ARRAYS})
+            for field, values in arrays.items():
+                np.save(tile_dir / f"{field}.npy", np.ascontiguousarray(values))
+
+            tiles[name] = {'nodes': int(node_mask.sum()), 'edges': int(edge_mask.sum()),
+                           'stops': int(stop_mask.sum())}
+
+        return {
+            'tile_size_degrees': tile_size,
+            'num_nodes': int(graph['node_lat'].size),
+            'num_edges': int(graph['edge_from'].size),
+            'num_stops': int(stops['stop_lat'].size),
+            'tiles': tiles
+        }
+
+    # ----------------------------------------------------------------- query
+
+    def _tile(self, name: str) -> Optional[Dict[str, np.ndarray]]:
+        """Memory-mapped arrays for one tile (None if the tile is empty)"""
+        if name not in self.manifest['tiles']:
+            return None
+        if name not in self._tiles:
+            tile_dir = self.store_dir / "tiles" / name
+            self._tiles[name] = {
+                field: np.load(tile_dir / f"{field}.npy", mmap_mode='r')
+                for field in NODE_ARRAYS + EDGE_ARRAYS + STOP_ARRAYS
+            }
+        return self._tiles[name]
+
+    def _tiles_in_bounds(self, bounds: Tuple[float, float, float, float]) -> List[Dict[str, np.ndarray]]:
+        south, west, north, east = bounds
+        size = self.tile_size
+        tiles = []
+        for row in range(math.floor(south / size), math.floor(north / size) + 1):
+            for col in range(math.floor(west / size), math.floor(east / size) + 1):
+                tile = self._tile(tile_id((row, col)))
+                if tile is not None:
+                    tiles.append(tile)
+        return tiles
+
+    def graph_in_bounds(self, bounds: Tuple[float, float, float, float]) -> RoadGraph:
+        """Road graph induced by the nodes inside (south, west, north, east)"""
+        south, west, north, east = bounds
+        tiles = self._tiles_in_bounds(bounds)
+        if not tiles:
+            return RoadGraph(np.empty(0), np.empty(0), np.empty(0, np.int32), np.empty(0, np.int32),
+                             np.empty(0, np.float32), np.empty(0, np.int8))
+
+        nodes = {field: np.concatenate([tile[field] for tile in tiles]) for field in NODE_ARRAYS}
+        inside = ((nodes['node_lat'] >= south) & (nodes['node_lat'] <= north)
+                  & (nodes['node_lon'] >= west) & (nodes['node_lon'] <= east))
+        order = np.argsort(nodes['node_index'][inside])
+        node_index = nodes['node_index'][inside][order]
+
+        edges = {field: np.concatenate([tile[field] for tile in tiles]) for field in EDGE_ARRAYS}
+        if node_index.size:
+            local_from = np.minimum(np.searchsorted(node_index, edges['edge_from']), node_index.size - 1)
+            local_to = np.minimum(np.searchsorted(node_index, edges['edge_to']), node_index.size - 1)
+            keep = (node_index[local_from] == edges['edge_from']) & (node_index[local_to] == edges['edge_to'])
+        else:
+            local_from = local_to = np.empty(0, dtype=np.int64)
+            keep = np.zeros(edges['edge_from'].size, dtype=bool)
+
+        return RoadGraph(
+            node_lat=nodes['node_lat'][inside][order],
+            node_lon=nodes['node_lon'][inside][order],
+            edge_from=local_from[keep].astype(np.int32),
+            edge_to=local_to[keep].astype(np.int32),
+            edge_length=edges['edge_length'][keep],
+            edge_class=edges['edge_class'][keep],
+            node_osm_id=nodes['node_osm_id'][inside][order],
+            edge_name=edges['edge_name'][keep]
+        )
+
+    def graph_around(self, lat: float, lon: float, radius_miles: float) -> RoadGraph:
+        """Road graph within a square of half-width radius_miles around a point"""
+        dlat = radius_miles / 69.0
+        dlon = radius_miles / (69.0 * max(0.1, math.cos(math.radians(lat))))
+        return self.graph_in_bounds((lat - dlat, lon - dlon, lat + dlat, lon + dlon))
+
+    def transit_stops_around(self, lat: float, lon: float, radius_miles: float) -> List[Dict[str, Any]]:
+        """Transit stops within a radius, nearest first"""
+        dlat = radius_miles / 69.0
+        dlon = radius_miles / (69.0 * max(0.1, math.cos(math.radians(lat))))
+        tiles = self._tiles_in_bounds((lat - dlat, lon - dlon, lat + dlat, lon + dlon))
+        if not tiles:
+            return []
+        stops = {field: np.concatenate([tile[field] for tile in tiles]) for field in STOP_ARRAYS}
+        distances = haversine_miles(lat, lon, stops['stop_lat'], stops['stop_lon'])
+        names = self.names
+        return [{
+            'transit_type': TRANSIT_TYPES[stops['stop_type'][i]],
+            'name': names[stops['stop_name'][i]] if stops['stop_name'][i] >= 0 else None,
+            'lat': float(stops['stop_lat'][i]),
+            'lon': float(stops['stop_lon'][i]),
+            'distance_miles': float(distances[i])
+        } for i in np.argsort(distances) if distances[i] <= radius_miles]
+
+    def highways_around(self, lat: float, lon: float, radius_miles: float,
+                        classes: Tuple[str, ...] = ("motorway", "trunk", "primary")) -> List[Dict[str, Any]]:
+        """Nearest junction on each named major highway within a radius"""
+        graph = self.graph_around(lat, lon, radius_miles)
+        if graph.num_edges == 0:
+            return []
+        class_codes = [HIGHWAY_CLASSES.index(name) for name in classes]
+        major = np.isin(graph.edge_class, class_codes) & (graph.edge_name >= 0)
+        endpoints = np.concatenate([graph.edge_from[major], graph.edge_to[major]])
+        edge_names = np.concatenate([graph.edge_name[major], graph.edge_name[major]])
+        edge_classes = np.concatenate([graph.edge_class[major], graph.edge_class[major]])
+        distances = haversine_miles(lat, lon, graph.node_lat[endpoints], graph.node_lon[endpoints])
+
+        names = self.names
+        nearest: Dict[int, Dict[str, Any]] = {}
+        for i in np.argsort(distances):
+            if distances[i] > radius_miles:
+                break
+            name_index = int(edge_names[i])
+            if name_index not in nearest:
+                node = endpoints[i]
+                nearest[name_index] = {
+                    'name': names[name_index],
+                    'highway_class': HIGHWAY_CLASSES[edge_classes[i]],
+                    'lat': float(graph.node_lat[node]),
+                    'lon': float(graph.node_lon[node]),
+                    'distance_miles': float(distances[i])
+                }
+        return list(nearest.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect the tiled road graph store")
+    parser.add_argument("command", choices=["build", "info"])
+    parser.add_argument("extract", nargs="?", help=f"OSM extract (.osm.pbf, .osm or .osm.bz2), "
+                                                   f"e.g. {WISCONSIN_EXTRACT_URL}")
+    parser.add_argument("--store-dir", default=DEFAULT_STORE_DIR)
+    parser.add_argument("--tile-size", type=float, default=TILE_SIZE_DEGREES)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    store = RoadGraphStore(args.store_dir)
+
+    if args.command == "build":
+        if not args.extract:
+            parser.error("build requires an OSM extract path")
+        manifest = store.build(args.extract, args.tile_size)
+    else:
+        if not store.exists():
+            parser.error(f"No road graph store at {args.store_dir}")
+        manifest = store.manifest
+
+    print(f"🛣️  Road graph store: {args.store_dir}")
+    print(f"   Nodes: {manifest['num_nodes']:,}  Edges: {manifest['num_edges']:,}  "
+          f"Transit stops: {manifest['num_stops']:,}")
+    print(f"   Tiles: {len(manifest['tiles']):,} at {manifest['tile_size_degrees']}°")
+
+
+if __name__ == "__main__":
+    main()
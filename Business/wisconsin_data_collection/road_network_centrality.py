@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Road Network Centrality
+=======================
+
+Approximate, cached centrality of the road network for Section 3.1 network
+analysis. Each fixed geographic tile's road graph (plus a buffer so edge
+nodes see their surroundings) is built once on the sparse RoadGraph backend,
+scored, and persisted; "centrality at this site" is then a nearest-node lookup.
+
+Features:
+- k-sample (Brandes-Pich) betweenness with Hoeffding bounds and standard errors
+- Sampled closeness from the same shortest-path trees (Eppstein-Wang)
+- Sparse eigenvector centrality via ARPACK
+- Per-tile .npz persistence keyed by tile and sampling settings
+"""
+
+import logging
+import math
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Any, Optional, Tuple
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+from scipy.sparse.linalg import eigsh, ArpackNoConvergence
+
+from road_graph import RoadGraph, TILE_SIZE_DEGREES, tile_key, tile_id, tile_bounds
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join("data_cache", "centrality")
+
+# Returns the road graph covering (south, west, north, east)
+GraphLoader = Callable[[Tuple[float, float, float, float]], RoadGraph]
+
+
+@dataclass
+class CentralityConfig:
+    """Sampling and tiling settings for approximate centrality"""
+    num_samples: int = 256              # Source nodes for betweenness/closeness
+    confidence: float = 0.95            # For the Hoeffding error bound
+    seed: int = 42
+    source_batch_size: int = 128        # Dijkstra sources solved per call
+    tile_size_degrees: float = TILE_SIZE_DEGREES
+    buffer_degrees: float = 0.02        # Context graph beyond the tile edges
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR
+
+
+def approximate_centrality(graph: RoadGraph, num_samples: int = 256, seed: int = 42,
+                           confidence: float = 0.95, source_batch_size: int = 128) -> Dict[str, Any]:
+    """Sampled betweenness and closeness plus eigenvector centrality for every node
+
+    Betweenness follows Brandes-Pich: single-source dependencies from k random
+    sources, scaled by n/k. Road edge lengths are real-valued, so shortest paths
+    are unique and each dependency equals the node's subtree size in the
+    source's shortest-path tree minus one. Values use NetworkX normalization
+    (undirected, divided by (n-1)(n-2)).
+    """
+    n = graph.num_nodes
+    adjacency = graph.adjacency('length')
+    k = int(min(num_samples, n))
+    rng = np.random.default_rng(seed)
+    sources = np.sort(rng.choice(n, size=k, replace=False)) if k < n else np.arange(n)
+
+    dependency_sum = np.zeros(n)
+    dependency_sq_sum = np.zeros(n)
+    distance_sum = np.zeros(n)
+    max_distance = 0.0
+
+    for start in range(0, k, source_batch_size):
+        batch = sources[start:start + source_batch_size]
+        distances, predecessors = dijkstra(adjacency, directed=False, indices=batch,
+                                           return_predecessors=True)
+        rows = batch.size
+        finite = np.isfinite(distances)
+        distance_sum += np.where(finite, distances, 0.0).sum(axis=0)
+        max_distance = max(max_distance, float(distances[finite].max(initial=0.0)))
+
+        # Subtree sizes for all trees at once: sweep nodes from farthest to nearest
+        # in every row, adding each node's size into its predecessor's. Each column
+        # touches one node per row, so the scatter-add has no duplicate targets.
+        order = np.argsort(-np.where(finite, distances, -1.0), axis=1, kind='stable')
+        offsets = (np.arange(rows) * n)[:, None]
+        flat_order = order + offsets
+        flat_parent = np.where(predecessors >= 0, predecessors + offsets, -1).ravel()
+        sizes = finite.astype(np.float64).ravel()
+        for column in range(n):
+            nodes = flat_order[:, column]
+            parents = flat_parent[nodes]
+            has_parent = parents >= 0
+            sizes[parents[has_parent]] += sizes[nodes[has_parent]]
+
+        dependencies = np.maximum(sizes.reshape(rows, n) - 1.0, 0.0)
+        dependencies[np.arange(rows), batch] = 0.0  # Sources are path endpoints
+        dependency_sum += dependencies.sum(axis=0)
+        dependency_sq_sum += (dependencies ** 2).sum(axis=0)
+
+    # Per-sample estimator X_s = n * delta_s(v) / ((n-1)(n-2)) lies in [0, n/(n-1)]
+    norm = (n - 1) * (n - 2) if n > 2 else 1.0
+    sample_mean = dependency_sum / k
+    sample_var = np.maximum(dependency_sq_sum / k - sample_mean ** 2, 0.0)
+    betweenness = n * sample_mean / norm
+    betweenness_se = (n / norm) * np.sqrt(sample_var / max(1, k - 1)) if k < n else np.zeros(n)
+    betweenness_bound = ((n / (n - 1) if n > 1 else 1.0)
+                         * math.sqrt(math.log(2 / (1 - confidence)) / (2 * k))) if k < n else 0.0
+
+    # Closeness: average distance to every node estimated from the sampled sources
+    with np.errstate(divide='ignore', invalid='ignore'):
+        estimated_total = distance_sum * n / k
+        closeness = np.where(estimated_total > 0, (n - 1) / estimated_total, 0.0)
+    closeness_bound = (max_distance * math.sqrt(math.log(max(n, 2)) / k)) if k < n else 0.0
+
+    return {
+        'betweenness': betweenness,
+        'betweenness_standard_error': betweenness_se,
+        'betweenness_error_bound': float(betweenness_bound),
+        'closeness': closeness,
+        'closeness_error_bound_miles': float(closeness_bound),
+        'eigenvector': eigenvector_centrality(graph),
+        'num_samples': k
+    }
+
+
+def eigenvector_centrality(graph: RoadGraph) -> np.ndarray:
+    """Leading eigenvector of the length-weighted adjacency, unit L2 norm"""
+    n = graph.num_nodes
+    if n < 3:
+        return np.full(n, 1.0 / math.sqrt(max(n, 1)))
+    adjacency = graph.adjacency('length')
+    try:
+        _, vectors = eigsh(adjacency, k=1, which='LA', maxiter=n * 20, tol=1e-6)
+        vector = np.abs(vectors[:, 0])
+    except ArpackNoConvergence as e:
+        logger.warning(f"Eigenvector centrality did not converge: {e}")
+        vector = np.abs(e.eigenvectors[:, 0]) if e.eigenvectors.size else np.ones(n)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+@dataclass
+class TileCentrality:
+    """Centrality arrays for the nodes inside one tile"""
+    tile: str
+    node_lat: np.ndarray
+    node_lon: np.ndarray
+    betweenness: np.ndarray
+    betweenness_standard_error: np.ndarray
+    closeness: np.ndarray
+    eigenvector: np.ndarray
+    betweenness_error_bound: float
+    closeness_error_bound_miles: float
+    num_samples: int
+    network_size: int
+    network_density: float
+
+    _SCALARS = ('betweenness_error_bound', 'closeness_error_bound_miles',
+                'num_samples', 'network_size', 'network_density')
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {name: getattr(self, name) for name in (
+            'node_lat', 'node_lon', 'betweenness', 'betweenness_standard_error',
+            'closeness', 'eigenvector')}
+        scalars = {name: np.asarray(getattr(self, name)) for name in self._SCALARS}
+        np.savez_compressed(path, tile=np.asarray(self.tile), **arrays, **scalars)
+
+    @classmethod
+    def load(cls, path: Path) -> 'TileCentrality':
+        with np.load(path) as stored:
+            values = {name: stored[name] for name in stored.files}
+        values['tile'] = str(values['tile'])
+        for name in cls._SCALARS:
+            values[name] = values[name].item()
+        return cls(**values)
+
+    def _rank(self, values: np.ndarray, index: int) -> int:
+        return int((values > values[index]).sum()) + 1
+
+    def lookup(self, lat: float, lon: float) -> Dict[str, Any]:
+        """Centrality of the tile node nearest to a point"""
+        scale = math.cos(math.radians(lat))
+        offsets = (self.node_lat - lat) ** 2 + ((self.node_lon - lon) * scale) ** 2
+        index = int(np.argmin(offsets))
+        return {
+            'node_index': index,
+            'snap_distance_miles': float(math.sqrt(offsets[index]) * 69.09),
+            'betweenness': float(self.betweenness[index]),
+            'betweenness_standard_error': float(self.betweenness_standard_error[index]),
+            'betweenness_rank': self._rank(self.betweenness, index),
+            'closeness': float(self.closeness[index]),
+            'closeness_rank': self._rank(self.closeness, index),
+            'eigenvector': float(self.eigenvector[index]),
+            'eigenvector_rank': self._rank(self.eigenvector, index),
+            'nodes_in_tile': int(self.node_lat.size)
+        }
+
+
+class RoadCentralityIndex:
+    """Per-tile centrality built once, persisted, and answered by lookup"""
+
+    def __init__(self, graph_loader: GraphLoader, config: CentralityConfig = None):
+        self.graph_loader = graph_loader
+        self.config = config or CentralityConfig()
+        self._tiles: Dict[str, TileCentrality] = {}
+
+    def _cache_path(self, tile: str) -> Optional[Path]:
+        if not self.config.cache_dir:
+            return None
+        config = self.config
+        name = f"{tile}_t{config.tile_size_degrees:g}_b{config.buffer_degrees:g}_k{config.num_samples}.npz"
+        return Path(config.cache_dir) / name
+
+    def get_tile(self, lat: float, lon: float) -> TileCentrality:
+        """Centrality for the tile containing a point, computing it on first use"""
+        config = self.config
+        key = tile_key(lat, lon, config.tile_size_degrees)
+        tile = tile_id(key)
+        if tile in self._tiles:
+            return self._tiles[tile]
+
+        path = self._cache_path(tile)
+        if path is not None and path.exists():
+            self._tiles[tile] = TileCentrality.load(path)
+            return self._tiles[tile]
+
+        result = self.build_tile(key)
+        if path is not None:
+            result.save(path)
+        self._tiles[tile] = result
+        return result
+
+    def build_tile(self, key: Tuple[int, int]) -> TileCentrality:
+        """Score the buffered tile graph and keep the nodes inside the tile"""
+        config = self.config
+        bounds = tile_bounds(key, config.tile_size_degrees, config.buffer_degrees)
+        graph, _ = self.graph_loader(bounds).largest_component()
+        if graph.num_nodes < 3:
+            raise ValueError(f"Road graph for tile {tile_id(key)} has too few nodes")
+
+        logger.info(f"Computing centrality for tile {tile_id(key)}: "
+                    f"{graph.num_nodes:,} nodes, {graph.num_edges:,} edges, k={config.num_samples}")
+        metrics = approximate_centrality(graph, config.num_samples, config.seed,
+                                         config.confidence, config.source_batch_size)
+
+        south, west, north, east = tile_bounds(key, config.tile_size_degrees)
+        inside = ((graph.node_lat >= south) & (graph.node_lat < north)
+                  & (graph.node_lon >= west) & (graph.node_lon < east))
+        if not inside.any():
+            inside = np.ones(graph.num_nodes, dtype=bool)
+
+        return TileCentrality(
+            tile=tile_id(key),
+            node_lat=graph.node_lat[inside],
+            node_lon=graph.node_lon[inside],
+            betweenness=metrics['betweenness'][inside],
+            betweenness_standard_error=metrics['betweenness_standard_error'][inside],
+            closeness=metrics['closeness'][inside],
+            eigenvector=metrics['eigenvector'][inside],
+            betweenness_error_bound=metrics['betweenness_error_bound'],
+            closeness_error_bound_miles=metrics['closeness_error_bound_miles'],
+            num_samples=metrics['num_samples'],
+            network_size=graph.num_nodes,
+            network_density=graph.density
+        )
+
+    def centrality_at(self, lat: float, lon: float) -> Dict[str, Any]:
+        """Centrality at the road node nearest to a site"""
+        tile = self.get_tile(lat, lon)
+        result = tile.lookup(lat, lon)
+        result.update({
+            'tile': tile.tile,
+            'num_samples': tile.num_samples,
+            'betweenness_error_bound': tile.betweenness_error_bound,
+            'closeness_error_bound_miles': tile.closeness_error_bound_miles,
+            'confidence': self.config.confidence,
+            'network_size': tile.network_size,
+            'network_density': tile.network_density
+        })
+        return result
+
+
+if __name__ == "__main__":
+    import time
+
+    # Synthetic 120 x 120 street grid with jittered block lengths
+    rng = np.random.default_rng(0)
+    side = 120
+    ids = np.arange(side * side).reshape(side, side)
+    lat = 43.0 + np.repeat(np.arange(side), side) * 0.0004 + rng.normal(0, 0.00003, side * side)
+    lon = -89.4 + np.tile(np.arange(side), side) * 0.0005 + rng.normal(0, 0.00003, side * side)
+    edge_from = np.concatenate([ids[:, :-1].ravel(), ids[:-1, :].ravel()]).astype(np.int32)
+    edge_to = np.concatenate([ids[:, 1:].ravel(), ids[1:, :].ravel()]).astype(np.int32)
+    from road_graph import haversine_miles
+    grid = RoadGraph(lat, lon, edge_from, edge_to,
+                     haversine_miles(lat[edge_from], lon[edge_from], lat[edge_to], lon[edge_to]).astype(np.float32),
+                     np.full(edge_from.size, 6, dtype=np.int8))
+
+    start = time.perf_counter()
+    metrics = approximate_centrality(grid, num_samples=256)
+    elapsed = time.perf_counter() - start
+    center = grid.nearest_node(43.024, -89.37)
+    print(f"{grid.num_nodes:,} nodes, {grid.num_edges:,} edges, k=256 in {elapsed:.2f}s")
+    print(f"Center betweenness {metrics['betweenness'][center]:.4f} "
+          f"(SE {metrics['betweenness_standard_error'][center]:.4f}, "
+          f"bound +/-{metrics['betweenness_error_bound']:.4f})")
+    print(f"Center closeness {metrics['closeness'][center]:.4f}, "
+          f"eigenvector {metrics['eigenvector'][center]:.4f}")
@@ -28,11 +28,11 @@ def run_full_dfi_collection():
         print('🏢 Initializing DFI collector...')
         collector = DFIBusinessCollector()
         
-        # Collect recent DFI registrations (last 90 days)
+        # Collect DFI registrations since the last load (last 90 days on the first run)
         print('🔍 Collecting recent Wisconsin business registrations...')
-        print('   Searching for target business types in last 90 days')
+        print('   Searching for target business types since the last loaded registration')
         
-        businesses = collector.collect_recent_registrations(days_back=90)
+        businesses = collector.collect_recent_registrations(days_back=90, incremental=True)
         
         print(f'\n📊 Collection Results:')
         print(f'   Total businesses found: {len(businesses)}')
@@ -100,6 +100,9 @@ def run_full_dfi_collection():
             return False
         else:
             print(f'✅ Successfully loaded {len(rows_to_insert)} businesses into BigQuery!')
+            if not collector.commit_watermark(businesses):
+                gaps = collector.failed_keywords + collector.truncated_keywords
+                print(f'⚠️  Watermark not advanced; incomplete searches: {", ".join(gaps)}')
         
         # Verify the data was loaded
         print(f'\n🔍 Verifying data in BigQuery...')
@@ -64,7 +64,7 @@ class Phase1DataCollectionOrchestrator:
             self.results['traffic'] = {'success': False, 'error': error_msg}
             return self.results['traffic']
     
-    def run_zoning_collection(self, counties: List[str] = None, max_records_per_county: int = 2000) -> Dict[str, Any]:
+    def run_zoning_collection(self, counties: List[str] = None, max_records_per_county: int = None) -> Dict[str, Any]:
         """Run zoning data collection"""
         self.logger.info("Starting zoning data collection")
         
@@ -112,7 +112,7 @@ class Phase1DataCollectionOrchestrator:
     def run_all_phase1_collections(self, 
                                   traffic_max_records: int = 10000,
                                   zoning_counties: List[str] = None,
-                                  zoning_max_per_county: int = 2000,
+                                  zoning_max_per_county: int = None,
                                   spending_years: List[int] = None) -> Dict[str, Any]:
         """
         Run all Phase 1 data collections
@@ -120,7 +120,7 @@ class Phase1DataCollectionOrchestrator:
         Args:
             traffic_max_records: Max traffic records to collect
             zoning_counties: Counties for zoning data (None for all configured)
-            zoning_max_per_county: Max zoning records per county  
+            zoning_max_per_county: Max zoning records per county (None for whole layers)
             spending_years: Years for consumer spending data
             
         Returns:
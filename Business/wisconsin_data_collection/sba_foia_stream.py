@@ -0,0 +1,192 @@
+"""
+SBA FOIA Streaming Reader
+=========================
+
+Streaming ingestion of the national SBA 7(a)/504 FOIA CSV files. Downloads
+are written to a local cache in fixed-size blocks (never held in memory),
+revalidated with ETag/Last-Modified on later runs, and resumed with HTTP
+range requests when interrupted. The cached CSV is then read in chunks with
+pandas' C parser, keeping only the columns the collector maps, and each
+chunk is filtered by borrower state and approval date before any record
+objects are built.
+
+Features:
+- Block-wise download to data_cache/sba_foia with conditional revalidation
+- Range resume of partial downloads (If-Range on the cached validator)
+- Chunked CSV reads with column pruning and vectorized state/date filters
+- PyArrow streaming reader (state filter on Arrow columns) when available
+- Constant memory regardless of file size
+"""
+
+import csv
+import hashlib
+import json
+import logging
+import os
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+import pandas as pd
+
+# PyArrow's multithreaded CSV reader is used when installed
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import csv as pa_csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join("data_cache", "sba_foia")
+
+# FOIA column -> SBALoanRecord field
+FOIA_COLUMNS = {
+    'BorrName': 'borrower_name',
+    'BorrStreet': 'borrower_address',
+    'BorrCity': 'borrower_city',
+    'BorrState': 'borrower_state',
+    'BorrZip': 'borrower_zip',
+    'LocationID': 'loan_id',
+    'ApprovalDate': 'approval_date',
+    'GrossApproval': 'loan_amount',
+    'NaicsCode': 'naics_code',
+    'BusinessType': 'business_type',
+    'JobsSupported': 'jobs_supported',
+    'FranchiseCode': 'franchise_code',
+    'FranchiseName': 'franchise_name',
+    'ThirdPartyLender_Name': 'lender_name',
+    'Program': 'program_type',
+    'LoanStatus': 'loan_status'
+}
+
+DOWNLOAD_BLOCK_BYTES = 1 << 20
+CSV_CHUNK_ROWS = 250_000
+
+
+class FOIAFileCache:
+    """Local copies of FOIA files with HTTP revalidation and range resume"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    def _paths(self, url: str):
+        name = url.rstrip('/').rsplit('/', 1)[-1] or 'foia.csv'
+        digest = hashlib.sha1(url.encode()).hexdigest()[:10]
+        base = self.cache_dir / f"{digest}_{name}"
+        return base, base.with_name(base.name + '.part'), base.with_name(base.name + '.json')
+
+    def fetch(self, session, url: str, timeout: int = 120) -> Path:
+        """Path to an up-to-date local copy of url, downloading only what changed"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path, partial, meta_path = self._paths(url)
+        meta = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+
+        headers = {}
+        if path.exists():
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        elif partial.exists() and (meta.get('etag') or meta.get('last_modified')):
+            headers['Range'] = f"bytes={partial.stat().st_size}-"
+            headers['If-Range'] = meta.get('etag') or meta['last_modified']
+
+        with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+            if response.status_code == 304:
+                logger.info(f"SBA FOIA file unchanged, using cached copy: {path.name}")
+                return path
+            response.raise_for_status()
+
+            meta = {'url': url, 'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified')}
+            meta_path.write_text(json.dumps(meta, indent=2))
+
+            # 206 continues the partial file; 200 means the server sent the whole body
+            mode = 'ab' if response.status_code == 206 else 'wb'
+            written = partial.stat().st_size if mode == 'ab' else 0
+            with open(partial, mode) as f:
+                for block in response.iter_content(chunk_size=DOWNLOAD_BLOCK_BYTES):
+                    f.write(block)
+                    written += len(block)
+
+        os.replace(partial, path)
+        meta['downloaded'] = datetime.now().isoformat()
+        meta['bytes'] = written
+        meta_path.write_text(json.dumps(meta, indent=2))
+        logger.info(f"Downloaded SBA FOIA file {path.name} ({written / 1e6:.1f} MB)")
+        return path
+
+
+def _pyarrow_batches(path, state: str, stats: Dict[str, int]) -> Iterator[pd.DataFrame]:
+    """State-filtered record batches read with PyArrow, as DataFrames"""
+    with open(path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        header = next(csv.reader(f), [])
+    columns = [column for column in header if column in FOIA_COLUMNS]
+    reader = pa_csv.open_csv(
+        str(path),
+        read_options=pa_csv.ReadOptions(block_size=16 << 20),
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True, invalid_row_handler=lambda row: 'skip'),
+        convert_options=pa_csv.ConvertOptions(include_columns=columns,
+                                              column_types={column: pa.string() for column in columns},
+                                              strings_can_be_null=False)
+    )
+    for batch in reader:
+        stats['rows'] += batch.num_rows
+        states = pc.utf8_upper(pc.utf8_trim_whitespace(batch.column('BorrState')))
+        selected = batch.filter(pc.equal(states, state))
+        if selected.num_rows:
+            yield selected.to_pandas()
+
+
+def _pandas_chunks(source, chunk_rows: int, stats: Dict[str, int], state: str) -> Iterator[pd.DataFrame]:
+    """State-filtered chunks read with the pandas C parser"""
+    reader = pd.read_csv(source, usecols=lambda column: column in FOIA_COLUMNS, dtype=str,
+                         chunksize=chunk_rows, encoding='utf-8', encoding_errors='replace',
+                         keep_default_na=False)
+    for chunk in reader:
+        stats['rows'] += len(chunk)
+        if 'BorrState' not in chunk:
+            raise ValueError("SBA FOIA file has no BorrState column")
+        yield chunk[chunk['BorrState'].str.strip().str.upper() == state]
+
+
+def read_state_loans(source, state: str = 'WI', since: Optional[date] = None,
+                     chunk_rows: int = CSV_CHUNK_ROWS, stats: Dict[str, int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Chunks of FOIA rows for one borrower state approved on or after since
+
+    source may be a path or a binary file-like object (e.g. a streamed HTTP body;
+    file-like sources always use the pandas reader). Columns are the FOIA names
+    present in FOIA_COLUMNS, all read as strings; ApprovalDate is replaced by a
+    parsed datetime64 column.
+    """
+    cutoff = pd.Timestamp(since) if since is not None else None
+    stats = stats if stats is not None else {}
+    stats.setdefault('rows', 0)
+    stats.setdefault('state_rows', 0)
+
+    if PYARROW_AVAILABLE and isinstance(source, (str, os.PathLike)):
+        chunks = _pyarrow_batches(source, state, stats)
+    else:
+        chunks = _pandas_chunks(source, chunk_rows, stats, state)
+
+    for chunk in chunks:
+        stats['state_rows'] += len(chunk)
+        if chunk.empty:
+            continue
+
+        approval = pd.to_datetime(chunk['ApprovalDate'], format='%m/%d/%Y', errors='coerce')
+        # Some releases use ISO dates; parse whatever the fixed format missed
+        retry = approval.isna() & (chunk['ApprovalDate'].str.strip() != '')
+        if retry.any():
+            approval[retry] = pd.to_datetime(chunk.loc[retry, 'ApprovalDate'], errors='coerce')
+        keep = approval.notna()
+        if cutoff is not None:
+            keep &= approval >= cutoff
+        if keep.any():
+            chunk = chunk[keep].copy()
+            chunk['ApprovalDate'] = approval[keep]
+            yield chunk
@@ -19,6 +19,8 @@ from typing import Dict, List, Any, Optional, Tuple
 from trade_area_analyzer import TradeAreaAnalyzer
 from universal_competitive_analyzer import UniversalCompetitiveAnalyzer
 from transportation_accessibility_analysis import TransportationAccessibilityAnalyzer
+from elevation_service import ElevationService, FEET_PER_METER
+from flood_zone_index import FloodZoneIndex
 # Removed business_habitat_analyzer import - moved to Section 3.3
 
 logger = logging.getLogger(__name__)
@@ -29,6 +31,10 @@ class SiteCharacteristicsAnalyzer:
     def __init__(self):
         self.trade_area_analyzer = TradeAreaAnalyzer()
         self.accessibility_analyzer = TransportationAccessibilityAnalyzer()
+        # Local DEM (None until tiles are imported with elevation_service.py)
+        self.elevation_service = ElevationService.open_default()
+        # Local FEMA NFHL flood zones (None until built with flood_zone_index.py)
+        self.flood_zones = FloodZoneIndex.open_default()
         # Removed habitat_analyzer - moved to Section 3.3
         
     def analyze_site_characteristics(self, business_type: str, address: str, 
@@ -111,8 +117,9 @@ class SiteCharacteristicsAnalyzer:
         """Analyze physical site characteristics"""
         logger.info("Analyzing physical site characteristics")
         
-        # Automated elevation data (simplified)
+        # Automated elevation and slope from the local DEM
         elevation = self._get_elevation(lat, lon)
+        terrain = self._get_terrain(lat, lon)
         
         # Manual data integration
         if manual_data and "physical_site" in manual_data:
@@ -124,7 +131,9 @@ class SiteCharacteristicsAnalyzer:
             "topography": {
                 "elevation": elevation,
                 "topographical_features": manual_physical.get("topographical_features", "Level terrain"),
-                "slope_analysis": manual_physical.get("slope_analysis", "Minimal slope"),
+                "slope_analysis": manual_physical.get("slope_analysis", self._describe_slope(terrain)),
+                "slope_percent": terrain.get("slope_percent"),
+                "aspect_degrees": terrain.get("aspect_degrees"),
                 "grade_conditions": manual_physical.get("grade_conditions", "Suitable for development"),
                 "natural_barriers": manual_physical.get("natural_barriers", "None identified"),
                 "drainage_patterns": manual_physical.get("drainage_patterns", "Adequate drainage")
@@ -471,13 +480,41 @@ class SiteCharacteristicsAnalyzer:
     
     # Helper methods
     def _get_elevation(self, lat: float, lon: float) -> int:
-        """Get elevation data (simplified)"""
+        """Get elevation in feet from the local DEM"""
         try:
-            # This would connect to elevation API in production
+            if self.elevation_service is not None:
+                meters = self.elevation_service.elevation(lat, lon)
+                if meters is not None:
+                    return int(round(meters * FEET_PER_METER))
             return 1000  # Default elevation
-        except:
+        except Exception as e:
+            logger.warning(f"DEM elevation lookup failed: {e}")
             return 1000
     
+    def _get_terrain(self, lat: float, lon: float) -> Dict[str, Optional[float]]:
+        """Slope and aspect around the site from the local DEM (empty if unavailable)"""
+        if self.elevation_service is None:
+            return {}
+        try:
+            terrain = self.elevation_service.terrain(lat, lon)
+            return terrain if terrain['elevation_m'] is not None else {}
+        except Exception as e:
+            logger.warning(f"DEM terrain lookup failed: {e}")
+            return {}
+    
+    def _describe_slope(self, terrain: Dict[str, Optional[float]]) -> str:
+        """Slope category for the report"""
+        slope = terrain.get("slope_percent")
+        if slope is None:
+            return "Minimal slope"
+        if slope < 2:
+            return f"Minimal slope ({slope:.1f}%)"
+        elif slope < 5:
+            return f"Gentle slope ({slope:.1f}%)"
+        elif slope < 10:
+            return f"Moderate slope ({slope:.1f}%) - grading may be required"
+        return f"Steep slope ({slope:.1f}%) - significant site work likely"
+    
     def _calculate_visibility_score(self, lat: float, lon: float) -> int:
         """Calculate visibility score based on location"""
         # Simplified visibility scoring
@@ -503,7 +540,12 @@ class SiteCharacteristicsAnalyzer:
     
     def _assess_flood_risk(self, lat: float, lon: float) -> str:
         """Assess flood risk for location"""
-        return "Low risk"
+        if self.flood_zones is None:
+            return "Low risk"
+        flood = self.flood_zones.assess(lat, lon)
+        if flood['flood_zone'] is None:
+            return flood['category']
+        return f"{flood['category']} - FEMA zone {flood['flood_zone']}"
     
     def _generate_competitor_site_comparison(self, competitors: List) -> List[Dict]:
         """Generate competitor site comparison"""
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Stress Test Engine
+==================
+
+Vectorized stress-testing grid for Section 4.3 risk analysis. Evaluates the
+full Cartesian product of revenue decline x cost inflation x interest rate
+change x ramp-up delay as broadcast NumPy arrays in a single pass, producing
+DSCR and survival-probability surfaces plus lender breakpoints such as the
+revenue decline that pushes DSCR below 1.25.
+
+Features:
+- ~100k grid points evaluated in milliseconds
+- Survival probability model shared with the named stress scenarios
+- Closed-form DSCR breakpoints across every combination of the other shocks
+- 2-D survival, DSCR and first-year DSCR surfaces ready for risk charts
+- First-year DSCR breakpoints for each ramp-up delay
+"""
+
+import logging
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, Any, Union
+
+logger = logging.getLogger(__name__)
+
+ArrayLike = Union[float, np.ndarray]
+
+
+def amortized_annual_payment(principal: ArrayLike, annual_rate: ArrayLike,
+                             term_years: int) -> np.ndarray:
+    """Annual debt service for a monthly-amortizing loan (array-aware)"""
+    principal = np.asarray(principal, dtype=float)
+    monthly_rate = np.asarray(annual_rate, dtype=float) / 12
+    num_payments = term_years * 12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = (1 + monthly_rate) ** num_payments
+        payment = principal * monthly_rate * factor / (factor - 1)
+    payment = np.where(monthly_rate > 0, payment, principal / num_payments)
+    return payment * 12
+
+
+def scenario_survival_probability(stressed_margin: ArrayLike, duration_months: ArrayLike,
+                                  recovery_months: ArrayLike, composite_risk: float) -> np.ndarray:
+    """Survival probability (%) from stressed profit margin, stress duration and recovery time"""
+    stressed_margin = np.asarray(stressed_margin, dtype=float)
+
+    # Base survival probability depends on stressed profit margin
+    base_survival = np.select(
+        [stressed_margin > 10, stressed_margin > 5, stressed_margin > 0, stressed_margin > -10],
+        [90.0, 75.0, 60.0, 35.0],
+        default=15.0
+    )
+
+    # Longer duration = higher risk, faster recovery = bonus
+    duration_penalty = np.minimum(20, np.asarray(duration_months, dtype=float) / 2)
+    recovery_bonus = np.maximum(0, 10 - np.asarray(recovery_months, dtype=float) / 2)
+
+    # Scale composite risk to penalty
+    risk_penalty = composite_risk / 5
+
+    final_survival = base_survival - duration_penalty - risk_penalty + recovery_bonus
+    return np.clip(final_survival, 5.0, 95.0)
+
+
+@dataclass
+class StressGridConfig:
+    """Shock axes and loan assumptions for the stress grid"""
+    revenue_declines: np.ndarray = field(default_factory=lambda: np.linspace(0.0, 0.50, 51))
+    cost_inflations: np.ndarray = field(default_factory=lambda: np.linspace(0.0, 0.30, 31))
+    rate_changes: np.ndarray = field(default_factory=lambda: np.linspace(-0.02, 0.04, 13))
+    ramp_delays: np.ndarray = field(default_factory=lambda: np.array([0, 3, 6, 9, 12]))
+    base_ramp_months: int = 6           # Months to full capacity with no delay
+    stress_duration_months: int = 12    # Duration used for grid survival penalties
+    recovery_months: int = 6
+    dscr_threshold: float = 1.25        # SBA / bank minimum
+    survival_threshold: float = 50.0
+
+
+@dataclass
+class StressGridResult:
+    """Grid arrays (indexed revenue x cost x rate x delay), surfaces and breakpoints"""
+    axes: Dict[str, np.ndarray]
+    dscr: np.ndarray
+    first_year_dscr: np.ndarray
+    profit_margin: np.ndarray
+    survival_probability: np.ndarray
+    revenue_breakpoints: np.ndarray
+    surfaces: Dict[str, np.ndarray]
+    breakpoints: Dict[str, float]
+    summary: Dict[str, float]
+
+    @property
+    def num_points(self) -> int:
+        return int(self.dscr.size)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly view (axes, 2-D surfaces, breakpoints and summary only)"""
+        return {
+            'axes': {name: values.tolist() for name, values in self.axes.items()},
+            'surfaces': {name: values.tolist() for name, values in self.surfaces.items()},
+            'breakpoints': self.breakpoints,
+            'summary': self.summary
+        }
+
+
+class StressTestEngine:
+    """Evaluates a Cartesian grid of financial shocks in one broadcast pass"""
+
+    def __init__(self, config: StressGridConfig = None):
+        self.config = config or StressGridConfig()
+
+    def first_year_ramp_factor(self, ramp_delays: ArrayLike) -> np.ndarray:
+        """Average first-year capacity for a linear ramp delayed by N months"""
+        ramp_months = self.config.base_ramp_months + np.asarray(ramp_delays, dtype=float)
+        months = np.arange(1, 13)
+        capacity = np.minimum(1.0, months / np.maximum(1.0, ramp_months)[..., None])
+        return capacity.mean(axis=-1)
+
+    def evaluate(self, annual_revenue: float, annual_costs: float, loan_amount: float,
+                 interest_rate: float, loan_term_years: int, composite_risk: float) -> StressGridResult:
+        """Evaluate DSCR, margin and survival probability over the full shock grid"""
+        config = self.config
+        declines = np.asarray(config.revenue_declines, dtype=float)
+        inflations = np.asarray(config.cost_inflations, dtype=float)
+        rate_changes = np.asarray(config.rate_changes, dtype=float)
+        delays = np.asarray(config.ramp_delays, dtype=float)
+
+        # Broadcast axes: (revenue, cost, rate, delay)
+        revenue = (annual_revenue * (1 - declines))[:, None, None, None]
+        costs = (annual_costs * (1 + inflations))[None, :, None, None]
+        rates = np.maximum(0.0, interest_rate + rate_changes)
+        debt_service = amortized_annual_payment(loan_amount, rates, loan_term_years)[None, None, :, None]
+        ramp = self.first_year_ramp_factor(delays)[None, None, None, :]
+
+        operating_income = revenue - costs
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dscr = np.where(debt_service > 0, operating_income / debt_service, np.inf)
+            first_year_dscr = np.where(debt_service > 0,
+                                       (revenue * ramp - costs) / debt_service, np.inf)
+            profit_margin = np.where(revenue > 0, operating_income / revenue * 100, -100.0)
+
+        shape = (declines.size, inflations.size, rates.size, delays.size)
+        dscr = np.broadcast_to(dscr, shape)
+        first_year_dscr = np.broadcast_to(first_year_dscr, shape)
+        profit_margin = np.broadcast_to(profit_margin, shape)
+
+        duration = (config.stress_duration_months + delays)[None, None, None, :]
+        survival = scenario_survival_probability(profit_margin, duration,
+                                                 config.recovery_months, composite_risk)
+        survival = np.broadcast_to(survival, shape)
+
+        # DSCR is linear in revenue, so the breaking revenue decline is closed-form
+        # for every (cost, rate) pair: R(1 - d) - C = threshold * DS
+        with np.errstate(divide='ignore', invalid='ignore'):
+            revenue_breakpoints = 1 - (config.dscr_threshold * debt_service[0, 0, :, 0][None, :]
+                                       + (annual_costs * (1 + inflations))[:, None]) / annual_revenue
+        revenue_breakpoints = np.clip(revenue_breakpoints, 0.0, 1.0)
+
+        rate_index = int(np.argmin(np.abs(rate_changes)))
+        surfaces = {
+            'survival_revenue_cost': survival[:, :, rate_index, 0],
+            'dscr_revenue_cost': dscr[:, :, rate_index, 0],
+            'survival_revenue_delay': survival[:, 0, rate_index, :],
+            'first_year_dscr_revenue_delay': first_year_dscr[:, 0, rate_index, :],
+            'revenue_breakpoint_cost_rate': revenue_breakpoints
+        }
+
+        breakpoints = self._find_breakpoints(annual_revenue, annual_costs, loan_amount,
+                                             interest_rate, loan_term_years, composite_risk,
+                                             declines, survival[:, 0, rate_index, 0], delays)
+
+        summary = {
+            'grid_points': int(np.prod(shape)),
+            'share_dscr_above_threshold': float((dscr >= config.dscr_threshold).mean() * 100),
+            'share_survival_above_threshold': float((survival >= config.survival_threshold).mean() * 100),
+            'mean_survival_probability': float(survival.mean()),
+            'share_first_year_dscr_above_threshold': float((first_year_dscr >= config.dscr_threshold).mean() * 100),
+            'worst_case_dscr': float(dscr.min()),
+            'worst_case_first_year_dscr': float(first_year_dscr.min()),
+            'worst_case_survival': float(survival.min())
+        }
+
+        return StressGridResult(
+            axes={'revenue_decline': declines, 'cost_inflation': inflations,
+                  'rate_change': rate_changes, 'ramp_delay_months': delays},
+            dscr=dscr,
+            first_year_dscr=first_year_dscr,
+            profit_margin=profit_margin,
+            survival_probability=survival,
+            revenue_breakpoints=revenue_breakpoints,
+            surfaces=surfaces,
+            breakpoints=breakpoints,
+            summary=summary
+        )
+
+    def _find_breakpoints(self, annual_revenue: float, annual_costs: float, loan_amount: float,
+                          interest_rate: float, loan_term_years: int, composite_risk: float,
+                          declines: np.ndarray, survival_by_decline: np.ndarray,
+                          delays: np.ndarray) -> Dict[str, float]:
+        """Single-shock breakpoints with all other shocks held at baseline"""
+        threshold = self.config.dscr_threshold
+        base_debt_service = float(amortized_annual_payment(loan_amount, interest_rate, loan_term_years))
+        base_income = annual_revenue - annual_costs
+
+        breakpoints = {
+            'baseline_dscr': base_income / base_debt_service if base_debt_service > 0 else float('inf')
+        }
+
+        if base_debt_service > 0 and annual_revenue > 0:
+            breakpoints['revenue_decline_at_dscr_threshold'] = float(np.clip(
+                1 - (threshold * base_debt_service + annual_costs) / annual_revenue, 0.0, 1.0) * 100)
+        if base_debt_service > 0 and annual_costs > 0:
+            breakpoints['cost_inflation_at_dscr_threshold'] = float(max(
+                0.0, (annual_revenue - threshold * base_debt_service) / annual_costs - 1) * 100)
+
+        # Debt service is monotone in rate, so bisect for the breaking rate increase
+        max_debt_service = base_income / threshold
+        if base_debt_service > 0 and max_debt_service > base_debt_service:
+            low, high = interest_rate, interest_rate + 0.50
+            if amortized_annual_payment(loan_amount, high, loan_term_years) > max_debt_service:
+                for _ in range(60):
+                    mid = (low + high) / 2
+                    if amortized_annual_payment(loan_amount, mid, loan_term_years) > max_debt_service:
+                        high = mid
+                    else:
+                        low = mid
+                breakpoints['rate_increase_at_dscr_threshold'] = (low - interest_rate) * 100
+        elif base_debt_service > 0:
+            breakpoints['rate_increase_at_dscr_threshold'] = 0.0
+
+        # First-year DSCR is revenue * ramp - costs over debt service, so the
+        # breaking revenue decline for each ramp delay is closed-form as well
+        if base_debt_service > 0 and annual_revenue > 0:
+            ramp = self.first_year_ramp_factor(delays)
+            first_year_dscr = (annual_revenue * ramp - annual_costs) / base_debt_service
+            breakpoints['baseline_first_year_dscr'] = float(first_year_dscr[0])
+            for delay, factor in zip(delays, ramp):
+                breakpoints[f'revenue_decline_at_first_year_dscr_threshold_delay_{int(delay)}m'] = float(np.clip(
+                    1 - (threshold * base_debt_service + annual_costs) / (annual_revenue * factor), 0.0, 1.0) * 100)
+            failing_delays = np.nonzero(first_year_dscr < threshold)[0]
+            if failing_delays.size:
+                breakpoints['ramp_delay_at_first_year_dscr_threshold'] = float(delays[failing_delays[0]])
+
+        # First revenue decline on the grid where survival falls below threshold
+        failing = np.nonzero(survival_by_decline < self.config.survival_threshold)[0]
+        if failing.size:
+            breakpoints['revenue_decline_at_survival_threshold'] = float(declines[failing[0]] * 100)
+
+        return breakpoints
+
+
+if __name__ == "__main__":
+    import time
+
+    engine = StressTestEngine()
+    start = time.perf_counter()
+    result = engine.evaluate(780000, 624000, 300000, 0.07, 10, 55.0)
+    elapsed = time.perf_counter() - start
+
+    print(f"Grid points: {result.num_points:,} in {elapsed * 1000:.1f} ms")
+    for name, value in result.breakpoints.items():
+        print(f"  {name}: {value:.2f}")
+    for name, value in result.summary.items():
+        print(f"  {name}: {value:.2f}")
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Trade Area Analyzer - Drive-time based customer accessibility analysis
-Uses OpenRouteService for isochrone generation and Census data for population counts
+Uses local road-network isochrones (OpenRouteService as a fallback) and Census data for population counts
 """
 
 import os
@@ -11,13 +11,17 @@ import requests
 from datetime import datetime, date
 from typing import Dict, List, Tuple, Optional
 import geopandas as gpd
-from shapely.geometry import Point, Polygon, mapping
+from shapely.geometry import Polygon, mapping
 from shapely import wkt
 import pandas as pd
 from google.cloud import bigquery
 from google.oauth2 import service_account
 import time
 
+from road_graph_store import RoadGraphStore
+from isochrone_engine import IsochroneEngine, IsochroneConfig, circle_polygon
+from block_group_index import BlockGroupIndex
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -34,6 +38,10 @@ CREDENTIALS_PATH = "location-optimizer-1-96b6102d3548.json"
 ORS_BASE_URL = "https://api.openrouteservice.org/v2/isochrones/driving-car"
 ORS_API_KEY = os.environ.get("ORS_API_KEY", "5b3ce3597851110001cf6248d33b6d517e6840ddaebe04692fec12ec")
 
+# Straight-line radius (miles) standing in for each drive time when no road data is available
+# 5 min = ~3 miles, 10 min = ~6 miles, 15 min = ~10 miles
+OFFLINE_RADIUS_MILES = {5: 3.0, 10: 6.0, 15: 10.0}
+
 # Census API configuration
 CENSUS_API_KEY = os.environ.get("CENSUS_API_KEY", "")  # Get from https://api.census.gov/data/key_signup.html
 CENSUS_BASE_URL = "https://api.census.gov/data/2022/acs/acs5"
@@ -53,10 +61,20 @@ class TradeAreaAnalyzer:
             self.offline_mode = True
         else:
             self.offline_mode = False
+        
+        # Local road graph isochrones need no network access and are cached per origin cell
+        self.road_graph_store = RoadGraphStore.open_default()
+        self.isochrone_engine = None
+        if self.road_graph_store is not None:
+            self.isochrone_engine = IsochroneEngine(self.road_graph_store.graph_in_bounds, IsochroneConfig())
+        self.isochrone_source = None
+        
+        # Local block-group polygons answer ring population queries without BigQuery
+        self.block_group_index = BlockGroupIndex.open_default()
     
     def generate_isochrones(self, lat: float, lon: float, intervals: List[int] = [5, 10, 15]) -> Dict:
         """
-        Generate drive-time isochrones using OpenRouteService
+        Generate drive-time isochrones from the local road graph, falling back to OpenRouteService
         
         Args:
             lat: Latitude of the location
@@ -66,6 +84,14 @@ class TradeAreaAnalyzer:
         Returns:
             Dictionary with isochrone polygons for each interval
         """
+        if self.isochrone_engine is not None:
+            try:
+                isochrones = self.isochrone_engine.isochrones(lat, lon, intervals)
+                self.isochrone_source = "Local_Road_Network"
+                return isochrones
+            except Exception as e:
+                logger.error(f"Error generating local isochrones: {e}")
+        
         if self.offline_mode:
             # Generate approximate circular buffers for offline mode
             return self._generate_offline_isochrones(lat, lon, intervals)
@@ -104,6 +130,7 @@ class TradeAreaAnalyzer:
                 
                 isochrones[f"{interval}_min"] = polygon
             
+            self.isochrone_source = "OpenRouteService"
             return isochrones
             
         except Exception as e:
@@ -111,19 +138,34 @@ class TradeAreaAnalyzer:
             # Fall back to circular approximation
             return self._generate_offline_isochrones(lat, lon, intervals)
     
+    def generate_isochrones_batch(self, points: List[Tuple[float, float]],
+                                  intervals: List[int] = [5, 10, 15]) -> List[Dict]:
+        """
+        Generate isochrones for many (lat, lon) sites in one pass
+        
+        Sites are routed together on the local road graph; without one, each
+        site falls back to generate_isochrones.
+        """
+        if self.isochrone_engine is not None:
+            try:
+                isochrones = self.isochrone_engine.batch_isochrones(points, intervals)
+                self.isochrone_source = "Local_Road_Network"
+                return isochrones
+            except Exception as e:
+                logger.error(f"Error generating local isochrones: {e}")
+        
+        return [self.generate_isochrones(lat, lon, intervals) for lat, lon in points]
+    
     def _generate_offline_isochrones(self, lat: float, lon: float, intervals: List[int]) -> Dict:
         """Generate approximate isochrones using circular buffers"""
-        # Approximate distances based on average speeds
-        # 5 min = ~3 miles, 10 min = ~6 miles, 15 min = ~10 miles
-        distance_map = {5: 0.043, 10: 0.087, 15: 0.145}  # Degrees (rough approximation)
-        
-        point = Point(lon, lat)
+        # Circles are built in miles so they are not squashed north-south like degree buffers
         isochrones = {}
         
         for interval in intervals:
-            buffer_distance = distance_map.get(interval, interval * 0.0087)
-            isochrones[f"{interval}_min"] = point.buffer(buffer_distance)
+            radius_miles = OFFLINE_RADIUS_MILES.get(interval, interval * 0.6)
+            isochrones[f"{interval}_min"] = circle_polygon(lat, lon, radius_miles)
         
+        self.isochrone_source = "Circular_Approximation"
         return isochrones
     
     def get_census_blocks_in_polygon(self, polygon: Polygon, state_fips: str = "55") -> pd.DataFrame:
@@ -169,6 +211,23 @@ class TradeAreaAnalyzer:
             # Return empty dataframe if query fails
             return pd.DataFrame()
     
+    def get_ring_populations(self, isochrones: Dict) -> Dict[str, int]:
+        """
+        Population inside each isochrone polygon (cumulative, keyed like the isochrones)
+        
+        Uses the local block-group index when it has been built, otherwise one
+        BigQuery intersection query per polygon.
+        """
+        if self.block_group_index is not None:
+            aggregates = self.block_group_index.ring_aggregates(isochrones)
+            return {name: int(round(aggregate.population)) for name, aggregate in aggregates.items()}
+        
+        populations = {}
+        for name, polygon in isochrones.items():
+            df = self.get_census_blocks_in_polygon(polygon)
+            populations[name] = int(df['population_in_polygon'].sum()) if not df.empty else 0
+        return populations
+    
     def analyze_trade_area(self, business_id: str, business_name: str, 
                          business_type: str, lat: float, lon: float,
                          address: str = "", city: str = "", state: str = "WI") -> Dict:
@@ -198,22 +257,16 @@ class TradeAreaAnalyzer:
             "last_updated": datetime.now()
         }
         
-        # Get population for each ring
-        if "5_min" in isochrones:
-            df_5min = self.get_census_blocks_in_polygon(isochrones["5_min"])
-            results["customers_0_5_min"] = df_5min['population_in_polygon'].sum() if not df_5min.empty else 0
-        
-        if "10_min" in isochrones:
-            df_10min = self.get_census_blocks_in_polygon(isochrones["10_min"])
-            total_10min = df_10min['population_in_polygon'].sum() if not df_10min.empty else 0
-            # Subtract 5-minute population to get ring population
-            results["customers_5_10_min"] = max(0, total_10min - results["customers_0_5_min"])
+        # Get population for each ring (all rings in one pass)
+        populations = self.get_ring_populations(isochrones)
+        total_5min = populations.get("5_min", 0)
+        total_10min = populations.get("10_min", total_5min)
+        total_15min = populations.get("15_min", total_10min)
         
-        if "15_min" in isochrones:
-            df_15min = self.get_census_blocks_in_polygon(isochrones["15_min"])
-            total_15min = df_15min['population_in_polygon'].sum() if not df_15min.empty else 0
-            # Subtract 10-minute population to get ring population
-            results["customers_10_15_min"] = max(0, total_15min - total_10min)
+        results["customers_0_5_min"] = total_5min
+        # Subtract inner totals to get ring populations
+        results["customers_5_10_min"] = max(0, total_10min - total_5min)
+        results["customers_10_15_min"] = max(0, total_15min - total_10min)
         
         # Calculate accessibility scores (simplified for now)
         results["car_accessibility_score"] = 0.9  # High car accessibility in Wisconsin
@@ -225,7 +278,7 @@ class TradeAreaAnalyzer:
         results["market_saturation_index"] = 0.0
         
         # Data source
-        results["data_source"] = "OpenRouteService" if not self.offline_mode else "Circular_Approximation"
+        results["data_source"] = self.isochrone_source or "Circular_Approximation"
         
         # Placeholder values for time-based populations (would use LEHD data)
         total_pop = results["customers_0_5_min"] + results["customers_5_10_min"] + results["customers_10_15_min"]
@@ -299,7 +352,7 @@ class TradeAreaAnalyzer:
                 self.save_to_bigquery(trade_area)
                 
                 # Rate limiting for free API tier
-                if not self.offline_mode:
+                if self.isochrone_source == "OpenRouteService":
                     time.sleep(2)  # OpenRouteService free tier limit
                     
             except Exception as e:
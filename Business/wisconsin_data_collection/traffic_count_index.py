@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Traffic Count Index
+===================
+
+Local nearest-segment index of WisDOT AADT traffic counts. Count stations
+collected by WisconsinTrafficDataCollector (or read back from the
+raw_traffic.traffic_counts table) are kept as parallel NumPy arrays, one
+row per station with its latest count, and searched with a KD-tree on 3-D
+unit vectors so k-nearest and radius queries are exact great-circle searches.
+
+Features:
+- k nearest counted segments within a radius, for one site or many at once
+- AADT, highway type, route and count year for every match
+- Incremental merge of newly collected counts (newest year per station wins)
+- Local cache under data_cache/traffic_counts
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from road_graph import EARTH_RADIUS_MILES, chord_length, unit_vectors
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join("data_cache", "traffic_counts")
+
+TEXT_COLUMNS = ('station_id', 'location_id', 'route_name', 'highway_type', 'functional_class', 'county')
+NUMERIC_COLUMNS = ('latitude', 'longitude', 'aadt', 'measurement_year', 'truck_percentage')
+
+
+def _field(record, name: str):
+    """Attribute of a TrafficDataRecord, or key of a dict/BigQuery row"""
+    if hasattr(record, 'get'):
+        return record.get(name)
+    return getattr(record, name, None)
+
+
+class TrafficCountIndex:
+    """KD-tree over AADT count stations with parallel attribute arrays"""
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = self._latest_per_station(columns)
+        self.lat = self.columns['latitude']
+        self.lon = self.columns['longitude']
+        self.aadt = self.columns['aadt']
+        self.tree = cKDTree(unit_vectors(self.lat, self.lon).reshape(-1, 3))
+
+    def __len__(self) -> int:
+        return int(self.lat.size)
+
+    @staticmethod
+    def _latest_per_station(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        One row per station: the most recent measurement year (later rows win ties)
+
+        Rows without AADT or year are dropped first, so a station falls back
+        to its latest complete count.
+        """
+        columns = {name: np.asarray(columns[name], dtype=object if name in TEXT_COLUMNS else float)
+                   for name in TEXT_COLUMNS + NUMERIC_COLUMNS}
+        complete = ~(np.isnan(columns['aadt']) | np.isnan(columns['measurement_year']))
+        columns = {name: values[complete] for name, values in columns.items()}
+        stations = columns['station_id'].astype(str)
+        n = stations.size
+        # Sort by (station, year, arrival order) and keep each station's last row
+        order = np.lexsort((np.arange(n), columns['measurement_year'], stations))
+        last = np.append(stations[order][1:] != stations[order][:-1], True) if n else np.zeros(0, dtype=bool)
+        keep = np.sort(order[last])
+        columns = {name: values[keep] for name, values in columns.items()}
+        columns['aadt'] = columns['aadt'].astype(np.int64)
+        columns['measurement_year'] = columns['measurement_year'].astype(np.int64)
+        return columns
+
+    # ---------------------------------------------------------------- queries
+
+    def nearest(self, lat, lon, k: int = 3, radius_miles: float = 2.0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (indices, distances in miles) of the k nearest stations within the radius
+
+        Arrays have one row per site and k columns, nearest first; missing
+        neighbours are index -1 and distance inf.
+        """
+        lat = np.atleast_1d(np.asarray(lat, dtype=float))
+        lon = np.atleast_1d(np.asarray(lon, dtype=float))
+        if len(self) == 0:
+            return np.full((lat.size, k), -1, dtype=np.int64), np.full((lat.size, k), np.inf)
+
+        chords, found = self.tree.query(unit_vectors(lat, lon), k=k,
+                                        distance_upper_bound=chord_length(radius_miles))
+        chords, found = chords.reshape(lat.size, k), found.reshape(lat.size, k)
+        missing = found >= len(self)
+        miles = 2.0 * EARTH_RADIUS_MILES * np.arcsin(np.minimum(1.0, np.where(missing, 0.0, chords) / 2.0))
+        return np.where(missing, -1, found).astype(np.int64), np.where(missing, np.inf, miles)
+
+    def nearby(self, lat: float, lon: float, k: int = 3, radius_miles: float = 2.0) -> List[Dict[str, Any]]:
+        """Counted segments near one site, nearest first"""
+        return self.nearby_many([lat], [lon], k, radius_miles)[0]
+
+    def nearby_many(self, lat, lon, k: int = 3, radius_miles: float = 2.0) -> List[List[Dict[str, Any]]]:
+        """Counted segments near every site, nearest first"""
+        indices, distances = self.nearest(lat, lon, k, radius_miles)
+        return [self.records(row[row >= 0], dist[row >= 0]) for row, dist in zip(indices, distances)]
+
+    def records(self, indices: Sequence[int], distances: Sequence[float] = None) -> List[Dict[str, Any]]:
+        """Segment dicts in the shape the traffic analyzer consumes"""
+        rows = []
+        for position, i in enumerate(indices):
+            truck = self.columns['truck_percentage'][i]
+            row = {
+                'route_name': self.columns['route_name'][i],
+                'aadt': int(self.aadt[i]),
+                'highway_type': self.columns['highway_type'][i],
+                'functional_class': self.columns['functional_class'][i],
+                'county': self.columns['county'][i],
+                'station_id': self.columns['station_id'][i],
+                'measurement_year': int(self.columns['measurement_year'][i]),
+                'truck_percentage': None if np.isnan(truck) else float(truck),
+                'latitude': float(self.lat[i]),
+                'longitude': float(self.lon[i])
+            }
+            if distances is not None:
+                row['distance'] = round(float(distances[position]), 2)
+            rows.append(row)
+        return rows
+
+    # ------------------------------------------------------------ build/cache
+
+    @staticmethod
+    def _columns_from_records(records: Sequence[Any]) -> Dict[str, np.ndarray]:
+        records = [r for r in records if _field(r, 'latitude') is not None and _field(r, 'longitude') is not None]
+        columns = {name: np.array([str(_field(r, name) or '') for r in records], dtype=object)
+                   for name in TEXT_COLUMNS}
+        for name in NUMERIC_COLUMNS:
+            values = [_field(r, name) for r in records]
+            columns[name] = np.array([np.nan if v is None else float(v) for v in values], dtype=float)
+        return columns
+
+    @classmethod
+    def from_records(cls, records: Sequence[Any]) -> 'TrafficCountIndex':
+        """Index TrafficDataRecords, dicts or BigQuery rows"""
+        return cls(cls._columns_from_records(records))
+
+    @classmethod
+    def from_bigquery(cls, client, project_id: str = "location-optimizer-1",
+                      dataset_id: str = "raw_traffic") -> 'TrafficCountIndex':
+        """All stored counts from the traffic_counts table"""
+        query = f"""
+        SELECT station_id, location_id, highway_name AS route_name, highway_type, functional_class,
+               county, latitude, longitude, aadt, measurement_year, truck_percentage
+        FROM `{project_id}.{dataset_id}.traffic_counts`
+        WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+          AND aadt IS NOT NULL AND measurement_year IS NOT NULL
+        """
+        rows = list(client.query(query).result())
+        logger.info(f"Fetched {len(rows):,} traffic counts from BigQuery")
+        return cls.from_records(rows)
+
+    def merged(self, records: Sequence[Any]) -> 'TrafficCountIndex':
+        """New index with records merged in (a station's newer count replaces its older one)"""
+        new = self._columns_from_records(records)
+        return TrafficCountIndex({name: np.concatenate([self.columns[name].astype(new[name].dtype), new[name]])
+                                  for name in TEXT_COLUMNS + NUMERIC_COLUMNS})
+
+    @classmethod
+    def update_default(cls, records: Sequence[Any], cache_dir: str = DEFAULT_CACHE_DIR) -> 'TrafficCountIndex':
+        """Merge newly collected counts into the cached index and save it"""
+        existing = cls.load(cache_dir)
+        index = existing.merged(records) if existing is not None else cls.from_records(records)
+        index.save(cache_dir)
+        logger.info(f"Traffic count index now holds {len(index):,} stations")
+        return index
+
+    @classmethod
+    def open_default(cls) -> Optional['TrafficCountIndex']:
+        """The default cache if it has been built, else None"""
+        try:
+            return cls.load(DEFAULT_CACHE_DIR)
+        except Exception as e:
+            logger.warning(f"Could not load traffic count index: {e}")
+            return None
+
+    def save(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        path = Path(cache_dir)
+        path.mkdir(parents=True, exist_ok=True)
+        arrays = {name: (values.astype(str) if values.dtype == object else values)
+                  for name, values in self.columns.items()}
+        np.savez_compressed(path / "counts.npz", **arrays)
+        with open(path / "meta.json", 'w') as f:
+            json.dump({'stations': len(self), 'updated': datetime.now().isoformat()}, f, indent=2)
+
+    @classmethod
+    def load(cls, cache_dir: str = DEFAULT_CACHE_DIR) -> Optional['TrafficCountIndex']:
+        """Cached index, or None if none has been saved"""
+        path = Path(cache_dir)
+        if not (path / "meta.json").exists():
+            return None
+        with np.load(path / "counts.npz") as arrays:
+            columns = {name: arrays[name] for name in arrays.files}
+        return cls(columns)
@@ -16,6 +16,8 @@ from dataclasses import dataclass
 from pydantic import BaseModel, Field, validator
 
 from base_collector import BaseDataCollector, DataCollectionError
+from traffic_count_index import TrafficCountIndex
+from arcgis_harvester import ArcGISLayerHarvester
 
 
 @dataclass
@@ -182,15 +184,24 @@ class WisconsinTrafficDataCollector(BaseDataCollector):
         try:
             self.logger.info("Collecting Wisconsin DOT traffic count data")
             
-            # Fetch data from ArcGIS service
-            response = self._make_request(self.wisdot_endpoints['traffic_counts'])
-            data = response.json()
-            
-            if 'features' not in data:
-                raise DataCollectionError("Invalid response format from WisDOT API")
-            
-            features = data['features'][:max_records]
-            self.logger.info(f"Processing {len(features)} traffic count features")
+            # Page through the feature service in parallel (GeoJSON, WGS84);
+            # fall back to the portal's single GeoJSON download. The harvest is
+            # consumed here so page failures also reach the fallback.
+            try:
+                harvester = ArcGISLayerHarvester(
+                    self.session, self.wisdot_endpoints['traffic_counts_api'],
+                    output_format='geojson', workers=4
+                )
+                features = list(harvester.features(max_records))
+            except Exception as e:
+                self.logger.warning(f"Feature service harvest unavailable ({e}); using GeoJSON download")
+                response = self._make_request(self.wisdot_endpoints['traffic_counts'])
+                data = response.json()
+                
+                if 'features' not in data:
+                    raise DataCollectionError("Invalid response format from WisDOT API")
+                
+                features = data['features'][:max_records]
             
             for feature in features:
                 try:
@@ -483,6 +494,9 @@ class WisconsinTrafficDataCollector(BaseDataCollector):
             if all_records:
                 success = self.save_traffic_data_to_bigquery(all_records)
                 summary['success'] = success
+                
+                # Merge the new counts into the local nearest-segment index
+                summary['indexed_stations'] = len(TrafficCountIndex.update_default(all_records))
             else:
                 self.logger.warning("No traffic records collected")
                 summary['success'] = False
@@ -13,7 +13,6 @@ import math
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
-import networkx as nx
 import requests
 import time
 
@@ -21,6 +20,10 @@ import time
 from transportation_accessibility_analysis import TransportationAccessibilityAnalyzer
 from traffic_data_collector import WisconsinTrafficDataCollector
 from trade_area_analyzer import TradeAreaAnalyzer
+from road_graph import RoadGraph, DRIVABLE_HIGHWAYS
+from road_graph_store import RoadGraphStore
+from road_network_centrality import RoadCentralityIndex, CentralityConfig
+from traffic_count_index import TrafficCountIndex
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +51,10 @@ class TrafficTransportationAnalyzer:
         self.traffic_collector = WisconsinTrafficDataCollector()
         self.accessibility_analyzer = TransportationAccessibilityAnalyzer()
         self.trade_area_analyzer = TradeAreaAnalyzer()
+        self.road_graph_store = RoadGraphStore.open_default()
+        self.centrality_index = RoadCentralityIndex(self._load_road_graph, CentralityConfig())
+        # WisDOT AADT stations (None until a traffic collection run has built the index)
+        self.traffic_index = TrafficCountIndex.open_default()
         
     def analyze_traffic_transportation(self, business_type: str, address: str, 
                                      lat: float, lon: float) -> Dict[str, Any]:
@@ -361,11 +368,8 @@ class TrafficTransportationAnalyzer:
         logger.info("Analyzing network centrality")
         
         try:
-            # Get road network data from OpenStreetMap
-            road_network = self._get_road_network(lat, lon)
-            
-            # Calculate centrality metrics
-            centrality_metrics = self._calculate_centrality_metrics(road_network, lat, lon)
+            # Per-tile approximate centrality, computed once and looked up per site
+            centrality_metrics = self._calculate_centrality_metrics(lat, lon)
             
             # Analyze strategic positioning
             strategic_analysis = self._analyze_strategic_positioning(centrality_metrics, lat, lon)
@@ -381,148 +385,65 @@ class TrafficTransportationAnalyzer:
             logger.warning(f"Network centrality analysis failed: {str(e)}")
             return self._generate_fallback_centrality_analysis()
     
-    def _get_road_network(self, lat: float, lon: float, radius: float = 0.02) -> nx.Graph:
-        """Get road network from OpenStreetMap"""
-        try:
-            # Create bounding box around location
-            bbox = f"{lat-radius},{lon-radius},{lat+radius},{lon+radius}"
-            
-            # Overpass API query for road network
-            overpass_url = "http://overpass-api.de/api/interpreter"
-            query = f"""
-            [out:json][timeout:25];
-            (
-              way["highway"~"^(motorway|trunk|primary|secondary|tertiary|residential)$"]({bbox});
-            );
-            out geom;
-            """
-            
-            response = requests.get(overpass_url, params={'data': query}, timeout=30)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return self._build_network_graph(data)
-            else:
-                logger.warning(f"Failed to fetch road network: {response.status_code}")
-                return self._create_mock_network()
-                
-        except Exception as e:
-            logger.warning(f"Error fetching road network: {str(e)}")
-            return self._create_mock_network()
-    
-    def _build_network_graph(self, osm_data: Dict) -> nx.Graph:
-        """Build NetworkX graph from OSM data"""
-        G = nx.Graph()
-        
-        # Add nodes and edges from OSM ways
-        for way in osm_data.get('elements', []):
-            if way.get('type') == 'way' and 'geometry' in way:
-                nodes = way['geometry']
-                highway_type = way.get('tags', {}).get('highway', 'unknown')
-                
-                # Add nodes
-                for node in nodes:
-                    node_id = f"{node['lat']:.6f},{node['lon']:.6f}"
-                    G.add_node(node_id, lat=node['lat'], lon=node['lon'])
-                
-                # Add edges between consecutive nodes
-                for i in range(len(nodes) - 1):
-                    node1 = f"{nodes[i]['lat']:.6f},{nodes[i]['lon']:.6f}"
-                    node2 = f"{nodes[i+1]['lat']:.6f},{nodes[i+1]['lon']:.6f}"
-                    
-                    # Calculate edge weight (distance)
-                    distance = self._haversine_distance(
-                        nodes[i]['lat'], nodes[i]['lon'],
-                        nodes[i+1]['lat'], nodes[i+1]['lon']
-                    )
-                    
-                    G.add_edge(node1, node2, weight=distance, highway_type=highway_type)
-        
-        return G
-    
-    def _create_mock_network(self) -> nx.Graph:
-        """Create a mock network for testing"""
-        G = nx.Graph()
-        
-        # Create a simple grid network
-        for i in range(5):
-            for j in range(5):
-                node_id = f"node_{i}_{j}"
-                G.add_node(node_id, lat=43.0 + i*0.01, lon=-89.0 + j*0.01)
-                
-                # Add edges to adjacent nodes
-                if i > 0:
-                    G.add_edge(f"node_{i-1}_{j}", node_id, weight=1.0)
-                if j > 0:
-                    G.add_edge(f"node_{i}_{j-1}", node_id, weight=1.0)
-        
-        return G
-    
-    def _calculate_centrality_metrics(self, G: nx.Graph, lat: float, lon: float) -> Dict[str, Any]:
-        """Calculate centrality metrics for the network"""
-        if len(G.nodes()) < 2:
-            return self._generate_fallback_centrality_metrics()
+    def _load_road_graph(self, bounds: Tuple[float, float, float, float]) -> RoadGraph:
+        """Drivable road network inside (south, west, north, east)
+
+        Reads the local tiled road graph store when it has been built, otherwise
+        falls back to an Overpass query for the bounding box.
+        """
+        if self.road_graph_store:
+            return self.road_graph_store.graph_in_bounds(bounds)
+        
+        south, west, north, east = bounds
+        bbox = f"{south},{west},{north},{east}"
+        
+        # Overpass API query for road network
+        overpass_url = "http://overpass-api.de/api/interpreter"
+        query = f"""
+        [out:json][timeout:60];
+        (
+          way["highway"~"^({'|'.join(DRIVABLE_HIGHWAYS)})$"]({bbox});
+        );
+        out geom;
+        """
         
-        # Find the node closest to our location
-        target_node = self._find_closest_node(G, lat, lon)
+        response = requests.get(overpass_url, params={'data': query}, timeout=90)
+        response.raise_for_status()
+        return RoadGraph.from_overpass(response.json())
+    
+    def _calculate_centrality_metrics(self, lat: float, lon: float) -> Dict[str, Any]:
+        """Look up approximate centrality for the road node nearest the site"""
+        centrality = self.centrality_index.centrality_at(lat, lon)
         
-        # Calculate centrality measures
-        try:
-            betweenness = nx.betweenness_centrality(G, weight='weight')
-            closeness = nx.closeness_centrality(G, distance='weight')
-            eigenvector = nx.eigenvector_centrality(G, max_iter=1000, tol=1e-6, weight='weight')
-            
-            # Get centrality values for our target node
-            target_betweenness = betweenness.get(target_node, 0)
-            target_closeness = closeness.get(target_node, 0)
-            target_eigenvector = eigenvector.get(target_node, 0)
-            
-            return {
-                "betweenness": {
-                    "value": target_betweenness,
-                    "score": min(100, target_betweenness * 1000),  # Scale to 0-100
-                    "rank": self._calculate_rank(betweenness, target_node)
-                },
-                "closeness": {
-                    "value": target_closeness,
-                    "score": min(100, target_closeness * 100),  # Scale to 0-100
-                    "rank": self._calculate_rank(closeness, target_node)
-                },
-                "eigenvector": {
-                    "value": target_eigenvector,
-                    "score": min(100, target_eigenvector * 100),  # Scale to 0-100
-                    "rank": self._calculate_rank(eigenvector, target_node)
-                },
-                "network_size": len(G.nodes()),
-                "network_density": nx.density(G)
+        return {
+            "betweenness": {
+                "value": centrality["betweenness"],
+                "score": min(100, centrality["betweenness"] * 1000),  # Scale to 0-100
+                "rank": centrality["betweenness_rank"],
+                "standard_error": centrality["betweenness_standard_error"],
+                "error_bound": centrality["betweenness_error_bound"]
+            },
+            "closeness": {
+                "value": centrality["closeness"],
+                "score": min(100, centrality["closeness"] * 100),  # Scale to 0-100
+                "rank": centrality["closeness_rank"],
+                "error_bound_miles": centrality["closeness_error_bound_miles"]
+            },
+            "eigenvector": {
+                "value": centrality["eigenvector"],
+                "score": min(100, centrality["eigenvector"] * 100),  # Scale to 0-100
+                "rank": centrality["eigenvector_rank"]
+            },
+            "network_size": centrality["network_size"],
+            "network_density": centrality["network_density"],
+            "approximation": {
+                "method": "k-sample betweenness (Brandes-Pich)",
+                "num_samples": centrality["num_samples"],
+                "confidence": centrality["confidence"],
+                "tile": centrality["tile"],
+                "snap_distance_miles": centrality["snap_distance_miles"]
             }
-            
-        except Exception as e:
-            logger.warning(f"Error calculating centrality metrics: {str(e)}")
-            return self._generate_fallback_centrality_metrics()
-    
-    def _find_closest_node(self, G: nx.Graph, lat: float, lon: float) -> str:
-        """Find the node closest to the given coordinates"""
-        min_distance = float('inf')
-        closest_node = None
-        
-        for node in G.nodes():
-            node_data = G.nodes[node]
-            if 'lat' in node_data and 'lon' in node_data:
-                distance = self._haversine_distance(lat, lon, node_data['lat'], node_data['lon'])
-                if distance < min_distance:
-                    min_distance = distance
-                    closest_node = node
-        
-        return closest_node or list(G.nodes())[0]
-    
-    def _calculate_rank(self, centrality_dict: Dict, target_node: str) -> int:
-        """Calculate the rank of the target node in centrality"""
-        sorted_nodes = sorted(centrality_dict.items(), key=lambda x: x[1], reverse=True)
-        for i, (node, _) in enumerate(sorted_nodes):
-            if node == target_node:
-                return i + 1
-        return len(sorted_nodes)
+        }
     
     def _analyze_strategic_positioning(self, centrality_metrics: Dict, lat: float, lon: float) -> Dict[str, Any]:
         """Analyze strategic network positioning"""
@@ -742,33 +663,13 @@ class TrafficTransportationAnalyzer:
         
         return R * c
     
-    def _get_nearby_traffic_data(self, lat: float, lon: float, radius: float = 2.0) -> List[Dict[str, Any]]:
-        """Get traffic data for nearby roads"""
-        # This would query the traffic database in production
-        # For now, return sample data
-        return [
-            {
-                "route_name": "US-51",
-                "aadt": 35000,
-                "highway_type": "US Highway",
-                "distance": 0.5,
-                "peak_hour_factor": 0.12
-            },
-            {
-                "route_name": "WI-29",
-                "aadt": 28000,
-                "highway_type": "State Highway",
-                "distance": 1.2,
-                "peak_hour_factor": 0.10
-            },
-            {
-                "route_name": "County Road A",
-                "aadt": 8500,
-                "highway_type": "County Highway",
-                "distance": 0.3,
-                "peak_hour_factor": 0.08
-            }
-        ]
+    def _get_nearby_traffic_data(self, lat: float, lon: float, radius: float = 2.0,
+                                 k: int = 5) -> List[Dict[str, Any]]:
+        """Get AADT counts for the nearest counted roads (miles), nearest first"""
+        if self.traffic_index is None:
+            logger.warning("No traffic count index; run traffic_data_collector.py to build it")
+            return []
+        return self.traffic_index.nearby(lat, lon, k=k, radius_miles=radius)
     
     def _create_fallback_traffic_data(self) -> Dict[str, Any]:
         """Create fallback traffic data when no nearby data available"""
@@ -19,6 +19,8 @@ import math
 from datetime import datetime
 import time
 
+from road_graph_store import RoadGraphStore
+
 @dataclass
 class HighwayAccess:
     """Highway accessibility information"""
@@ -69,6 +71,9 @@ class TransportationAccessibilityAnalyzer:
         # Overpass API for OpenStreetMap data
         self.overpass_url = "http://overpass-api.de/api/interpreter"
         
+        # Local tiled road network, used instead of Overpass once built
+        self.road_graph_store = RoadGraphStore.open_default()
+        
     def _setup_logging(self) -> logging.Logger:
         """Setup logging"""
         logger = logging.getLogger('transportation_analyzer')
@@ -111,6 +116,9 @@ class TransportationAccessibilityAnalyzer:
         """Find nearby highway access points"""
         self.logger.info(f"Finding highway access near {latitude}, {longitude}")
         
+        if self.road_graph_store:
+            return self._find_highway_access_local(latitude, longitude)
+        
         # Convert miles to degrees (approximate)
         radius_deg = self.highway_search_radius / 69.0
         
@@ -138,12 +146,7 @@ class TransportationAccessibilityAnalyzer:
                     name = tags.get('name', ref)
                     
                     # Determine highway type
-                    if highway_type == 'motorway' or (ref and ref.startswith('I-')):
-                        hw_type = 'interstate'
-                    elif highway_type == 'trunk' or (ref and ref.startswith('US ')):
-                        hw_type = 'us_highway'
-                    else:
-                        hw_type = 'state_highway'
+                    hw_type = self._classify_highway(highway_type, ref)
                     
                     # Find closest point on the highway
                     if element['geometry']:
@@ -179,10 +182,48 @@ class TransportationAccessibilityAnalyzer:
         
         return unique_accesses[:10]  # Return top 10
     
+    def _classify_highway(self, highway_type: str, ref: str) -> str:
+        """Map OSM highway class and route number to interstate/us_highway/state_highway"""
+        if highway_type == 'motorway' or (ref and ref.startswith('I-')):
+            return 'interstate'
+        elif highway_type == 'trunk' or (ref and ref.startswith('US ')):
+            return 'us_highway'
+        return 'state_highway'
+    
+    def _find_highway_access_local(self, latitude: float, longitude: float) -> List[HighwayAccess]:
+        """Highway access from the local road graph store"""
+        highways = self.road_graph_store.highways_around(latitude, longitude, self.highway_search_radius)
+        
+        accesses = [
+            HighwayAccess(
+                highway_name=highway['name'],
+                highway_type=self._classify_highway(highway['highway_class'], highway['name']),
+                distance_miles=round(highway['distance_miles'], 2),
+                access_point='intersection',
+                access_lat=highway['lat'],
+                access_lon=highway['lon']
+            )
+            for highway in highways
+        ]
+        return accesses[:10]  # Already nearest-first, one entry per highway
+    
     def find_public_transit_access(self, latitude: float, longitude: float) -> List[PublicTransitAccess]:
         """Find nearby public transit access points"""
         self.logger.info(f"Finding public transit near {latitude}, {longitude}")
         
+        if self.road_graph_store:
+            stops = self.road_graph_store.transit_stops_around(latitude, longitude, self.transit_search_radius)
+            return [
+                PublicTransitAccess(
+                    transit_type=stop['transit_type'],
+                    stop_name=stop['name'] or "Transit Stop",
+                    distance_miles=round(stop['distance_miles'], 2),
+                    routes=[],
+                    frequency=self._estimate_transit_frequency(stop['transit_type'], {})
+                )
+                for stop in stops[:15]
+            ]
+        
         # Overpass query for public transit
         query = f"""
         [out:json][timeout:25];
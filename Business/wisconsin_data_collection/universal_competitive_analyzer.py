@@ -11,6 +11,18 @@ from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 import json
 
+from huff_model_engine import (
+    CATEGORY_SPENDING_PER_HOUSEHOLD, HuffModelEngine, HuffConfig, haversine_matrix,
+    load_block_group_centroids, region_tile, store_attractiveness
+)
+
+# ACS block-group incomes for the Huff spending adjustment (optional)
+try:
+    from block_group_index import BlockGroupIndex
+    BLOCK_GROUP_INDEX_AVAILABLE = True
+except ImportError:
+    BLOCK_GROUP_INDEX_AVAILABLE = False
+
 def haversine(lon1, lat1, lon2, lat2):
     """Calculate distance between two points using haversine formula"""
     lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
@@ -24,6 +36,9 @@ def haversine(lon1, lat1, lon2, lat2):
 class UniversalCompetitiveAnalyzer:
     """Universal competitive analysis for any business type"""
     
+    # ACS block-group incomes, loaded once per process
+    _block_group_incomes: Optional[Dict[str, float]] = None
+    
     def __init__(self, business_type: str, site_lat: float, site_lng: float, site_address: str):
         """
         Initialize analyzer for specific business type and location
@@ -44,6 +59,7 @@ class UniversalCompetitiveAnalyzer:
         
         self.data = None
         self.analysis_results = {}
+        self.huff_config = HuffConfig()
     
     def _define_competition_categories(self) -> Dict[str, Dict[str, List[str]]]:
         """Define direct, similar, and general competition keywords by business type"""
@@ -322,6 +338,14 @@ class UniversalCompetitiveAnalyzer:
         density_data = self.analysis_results.get('density', {})
         profiles = self.analysis_results.get('competitor_profiles', [])
         
+        # Block-group Huff model when centroid data is available
+        if 'huff_analysis' not in self.analysis_results:
+            try:
+                self.run_huff_analysis()
+            except Exception as e:
+                print(f"⚠️ Huff model unavailable, using competitor multipliers: {e}")
+                self.analysis_results['huff_analysis'] = None
+        
         # Estimate total market size based on competitor analysis
         market_size_analysis = self._estimate_market_size(profiles, density_data)
         
@@ -359,6 +383,84 @@ class UniversalCompetitiveAnalyzer:
         self.analysis_results['market_share_analysis'] = market_share_analysis
         return market_share_analysis
     
+    def _business_category(self, lookup: Dict) -> str:
+        """First lookup key contained in the business type, else 'default'"""
+        business_lower = self.business_type.lower()
+        for category in lookup:
+            if category in business_lower:
+                return category
+        return 'default'
+    
+    @classmethod
+    def block_group_incomes(cls) -> Optional[Dict[str, float]]:
+        """ACS median household income by block-group GEOID from the local block-group index"""
+        if cls._block_group_incomes is None and BLOCK_GROUP_INDEX_AVAILABLE:
+            index = BlockGroupIndex.open_default()
+            if index is not None and 'median_household_income' in index.attributes:
+                cls._block_group_incomes = dict(zip(index.geoids.astype(str).tolist(),
+                                                    index.attributes['median_household_income'].tolist()))
+        return cls._block_group_incomes
+    
+    def run_huff_analysis(self, block_group_file: str = None,
+                          spending_per_household: float = None,
+                          region_radius_miles: float = 20.0,
+                          income_by_geoid: Dict[str, float] = None) -> Dict:
+        """Huff market share of the site against every competitor for the category spending"""
+        print(f"🧲 Running Huff market share model for {self.business_type}...")
+        
+        if spending_per_household is None:
+            spending_per_household = CATEGORY_SPENDING_PER_HOUSEHOLD[
+                self._business_category(CATEGORY_SPENDING_PER_HOUSEHOLD)]
+        
+        # The region is centered on the site's tile, so nearby sites reuse one distance matrix
+        center_lat, center_lng, half_diagonal = region_tile(
+            self.site_lat, self.site_lng, self.huff_config.region_tile_degrees)
+        region_reach = region_radius_miles + half_diagonal
+        
+        demand = load_block_group_centroids(block_group_file)
+        demand = demand.within(center_lat, center_lng, region_reach)
+        if len(demand) == 0:
+            raise ValueError("No block groups within the Huff region")
+        income_by_geoid = income_by_geoid or self.block_group_incomes()
+        if income_by_geoid:
+            demand = demand.with_income(income_by_geoid)
+        
+        # Stores compete for demand across the whole region, not just the 5-mile ring
+        competitors = self.find_competitors_by_category(region_radius_miles + 2 * half_diagonal)
+        stores = pd.concat([competitors['direct'], competitors['similar'], competitors['general']])
+        stores = stores[~stores.index.duplicated()]
+        in_region = haversine_matrix([center_lat], [center_lng], stores['geometry_location_lat'],
+                                     stores['geometry_location_lng'])[0] <= region_reach
+        stores = stores[in_region].sort_index()  # Site-independent order for the matrix cache key
+        attractiveness = store_attractiveness(stores['rating'], stores['user_ratings_total'])
+        
+        # A new entrant is assumed to match the median direct competitor
+        direct = competitors['direct'][competitors['direct']['distance_miles'] <= region_radius_miles]
+        direct_attractiveness = store_attractiveness(direct['rating'], direct['user_ratings_total'])
+        site_attractiveness = (float(np.median(direct_attractiveness)) if direct_attractiveness.size
+                               else float(store_attractiveness([4.0], [50])[0]))
+        
+        engine = HuffModelEngine(
+            demand, stores['geometry_location_lat'], stores['geometry_location_lng'],
+            attractiveness, store_names=stores['name'].tolist(),
+            region=f"{center_lat:.3f}_{center_lng:.3f}_{region_reach:.0f}mi",
+            config=self.huff_config
+        )
+        site_result = engine.evaluate_site(self.site_lat, self.site_lng,
+                                           site_attractiveness, spending_per_household)
+        
+        huff_analysis = site_result.to_dict(store_names=engine.store_names)
+        huff_analysis.update({
+            'spending_per_household': spending_per_household,
+            'site_attractiveness': site_attractiveness,
+            'block_groups': len(demand),
+            'income_adjusted': demand.median_income is not None,
+            'stores_modeled': len(stores)
+        })
+        
+        self.analysis_results['huff_analysis'] = huff_analysis
+        return huff_analysis
+    
     def _estimate_market_size(self, profiles: List[Dict], density_data: Dict) -> Dict:
         """Estimate total addressable market size based on competitor analysis"""
         
@@ -373,12 +475,7 @@ class UniversalCompetitiveAnalyzer:
         }
         
         # Determine business category for revenue estimation
-        business_category = 'default'
-        business_lower = self.business_type.lower()
-        for category in revenue_multipliers:
-            if category in business_lower:
-                business_category = category
-                break
+        business_category = self._business_category(revenue_multipliers)
         
         avg_competitor_revenue = revenue_multipliers[business_category]
         
@@ -386,6 +483,22 @@ class UniversalCompetitiveAnalyzer:
         direct_competitors_5mi = density_data.get(5, {}).get('direct_competitors', 0)
         similar_competitors_5mi = density_data.get(5, {}).get('similar_competitors', 0)
         
+        # Huff model: market is household category spending within the site's
+        # trade area and achievable revenue is the share it captures from all stores
+        huff = self.analysis_results.get('huff_analysis')
+        if huff:
+            return {
+                'total_market_size': round(huff['trade_area_spending'], 0),
+                'achievable_revenue': round(huff['captured_spending'], 0),
+                'avg_competitor_revenue': avg_competitor_revenue,
+                'market_saturation': min(direct_competitors_5mi / 10.0, 0.85),
+                'direct_competitors_5mi': direct_competitors_5mi,
+                'similar_competitors_5mi': similar_competitors_5mi,
+                'market_growth_factor': 1.0,
+                'huff_market_share': huff['market_share'],
+                'estimation_method': 'huff_model'
+            }
+        
         # Market size calculation
         if direct_competitors_5mi == 0:
             # No direct competition - estimate based on similar businesses
@@ -415,7 +528,8 @@ class UniversalCompetitiveAnalyzer:
             'market_saturation': market_saturation,
             'direct_competitors_5mi': direct_competitors_5mi,
             'similar_competitors_5mi': similar_competitors_5mi,
-            'market_growth_factor': market_growth_factor
+            'market_growth_factor': market_growth_factor,
+            'estimation_method': 'competitor_multipliers'
         }
     
     def _calculate_market_share_scenarios(self, projected_revenue: float, market_size: Dict) -> Dict:
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Watermark Store
+===============
+
+Per-source high-water marks for incremental collection. After a successful
+load, a collector records the latest timestamp (registration date, approval
+date, permit application date) or ID it loaded. The next run asks only for
+data newer than that mark minus a small safety overlap. IDs loaded inside the
+overlap are remembered, so re-fetched boundary records are dropped before
+parsing results reach the loader.
+
+Features:
+- Date, datetime and integer-ID watermarks that only move forward
+- Lookback windows (days_back) derived from the mark with a safety overlap
+- Overlap de-duplication by record ID
+- Single JSON file under data_cache, written atomically and thread-safe
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join("data_cache", "watermarks.json")
+
+# Re-request this much before the mark to catch late-posted records
+DEFAULT_OVERLAP_DAYS = 3
+
+Mark = Union[date, datetime, int]
+
+
+def _normalize(value: Mark) -> Union[datetime, int]:
+    """Dates as midnight datetimes so date and datetime marks compare"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return int(value)
+
+
+def _encode(value: Union[datetime, int]) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _decode(value: Any) -> Union[datetime, int]:
+    return datetime.fromisoformat(value) if isinstance(value, str) else int(value)
+
+
+class WatermarkStore:
+    """High-water marks and overlap IDs keyed by source name"""
+
+    def __init__(self, path: str = DEFAULT_PATH, overlap_days: float = DEFAULT_OVERLAP_DAYS):
+        self.path = Path(path)
+        self.overlap = timedelta(days=overlap_days)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            try:
+                self._entries = json.loads(self.path.read_text())
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable watermark file {self.path}: {e}")
+
+    def get(self, source: str) -> Optional[Mark]:
+        """Current mark of a source, or None before its first successful load"""
+        entry = self._entries.get(source)
+        return _decode(entry['mark']) if entry else None
+
+    def since(self, source: str, default_days: int, now: datetime = None) -> datetime:
+        """Start of the next request window: mark minus overlap, else default_days ago"""
+        now = now or datetime.now()
+        mark = self.get(source)
+        if mark is None or isinstance(mark, int):
+            return now - timedelta(days=default_days)
+        return mark - self.overlap
+
+    def days_back(self, source: str, default_days: int, now: datetime = None) -> int:
+        """Whole-day lookback covering since(), for collectors that take days_back"""
+        now = now or datetime.now()
+        start = self.since(source, default_days, now)
+        return max(1, math.ceil((now - start).total_seconds() / 86400))
+
+    def unseen(self, source: str, records: Iterable[Any], key: Callable[[Any], Any]) -> List[Any]:
+        """Records whose ID was not already loaded in the overlap of the last run"""
+        seen = self._entries.get(source, {}).get('overlap_ids', {})
+        records = list(records)
+        fresh = [record for record in records if str(key(record)) not in seen]
+        if len(fresh) < len(records):
+            logger.info(f"{source}: skipped {len(records) - len(fresh)} records already loaded")
+        return fresh
+
+    def advance(self, source: str, records: Iterable[Any], mark_of: Callable[[Any], Optional[Mark]],
+                key: Callable[[Any], Any] = None):
+        """
+        Move the mark to the latest value among successfully loaded records
+
+        The mark never moves backwards. With key, IDs of records inside the new
+        overlap window (including ones kept from earlier runs) are remembered
+        for unseen().
+        """
+        records = list(records)
+        marks = [(mark_of(record), record) for record in records]
+        marks = [(_normalize(mark), record) for mark, record in marks if mark is not None]
+        if not marks:
+            return
+
+        with self._lock:
+            entry = self._entries.get(source, {})
+            current = _decode(entry['mark']) if entry else None
+            if current is not None and type(current) != type(marks[0][0]):
+                current, entry = None, {}
+            latest = max([mark for mark, _ in marks] + ([current] if current is not None else []))
+
+            # ID -> mark of the records inside the overlap below the new mark
+            overlap_ids = {}
+            if key is not None:
+                floor = latest if isinstance(latest, int) else latest - self.overlap
+                candidates = {record_id: _decode(value) for record_id, value in entry.get('overlap_ids', {}).items()}
+                candidates.update({str(key(record)): mark for mark, record in marks})
+                overlap_ids = {record_id: _encode(mark) for record_id, mark in candidates.items() if mark >= floor}
+
+            self._entries[source] = {
+                'mark': _encode(latest),
+                'overlap_ids': overlap_ids,
+                'records_loaded': len(records),
+                'updated': datetime.now().isoformat()
+            }
+            self._write()
+        logger.info(f"{source}: watermark advanced to {latest}")
+
+    def reset(self, source: str = None):
+        """Forget one source's mark (or all), forcing a full lookback next run"""
+        with self._lock:
+            if source is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(source, None)
+            self._write()
+
+    def _write(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        partial = self.path.with_suffix('.tmp')
+        partial.write_text(json.dumps(self._entries, indent=2))
+        os.replace(partial, self.path)
@@ -13,13 +13,14 @@ from typing import List, Dict, Optional
 from bs4 import BeautifulSoup
 import pandas as pd
 
-from base_collector import BaseDataCollector
+from base_collector import BaseDataCollector, DataCollectionError
 from models import (
     BusinessEntity, SBALoanRecord, BusinessLicense,
     BusinessType, BusinessStatus, DataSource
 )
 from dfi_collector import DFIBusinessCollector, DFIBusinessRecord
 from census_collector import CensusDataCollector
+from sba_foia_stream import FOIA_COLUMNS, FOIAFileCache, read_state_loans
 
 
 class WisconsinDataCollector(BaseDataCollector):
@@ -40,6 +41,9 @@ class WisconsinDataCollector(BaseDataCollector):
         # Initialize Census collector
         self.census_collector = CensusDataCollector()
         
+        # Local copies of the national SBA FOIA files
+        self.sba_foia_cache = FOIAFileCache()
+        
         # Wisconsin-specific mappings
         self.county_mappings = {
             'Milwaukee': 'Milwaukee',
@@ -220,14 +224,17 @@ class WisconsinDataCollector(BaseDataCollector):
     
     def run_full_wisconsin_collection(self, days_back: int = 30, 
                                     include_demographics: bool = True,
-                                    geographic_levels: List[str] = None) -> Dict[str, any]:
+                                    geographic_levels: List[str] = None,
+                                    incremental: bool = True) -> Dict[str, any]:
         """
         Run complete Wisconsin data collection including demographics
         
         Args:
-            days_back: Number of days to look back for business data
+            days_back: Number of days to look back for business data (for sources
+                without a watermark when incremental)
             include_demographics: Whether to collect Census demographics
             geographic_levels: Census geographic levels to collect
+            incremental: Request only data newer than each source's watermark
             
         Returns:
             Dictionary with collection summary
@@ -246,16 +253,26 @@ class WisconsinDataCollector(BaseDataCollector):
         }
         
         try:
-            # Collect business registrations
-            businesses = self.collect_business_registrations(days_back)
+            windows = self._collection_windows({
+                'business_registrations': days_back,
+                'sba_loans': days_back * 2,  # Look back further for loans
+                'business_licenses': days_back
+            }, incremental)
+            collected = {
+                'business_registrations': self.collect_business_registrations(windows['business_registrations']),
+                'sba_loans': self.collect_sba_loans(windows['sba_loans']),
+                'business_licenses': self.collect_business_licenses(windows['business_licenses'])
+            }
+            if incremental:
+                collected = self._drop_loaded(collected)
+            
+            businesses = collected['business_registrations']
             summary['businesses_collected'] = len(businesses)
             
-            # Collect SBA loans
-            loans = self.collect_sba_loans(days_back * 2)  # Look back further for loans
+            loans = collected['sba_loans']
             summary['sba_loans_collected'] = len(loans)
             
-            # Collect business licenses
-            licenses = self.collect_business_licenses(days_back)
+            licenses = collected['business_licenses']
             summary['licenses_collected'] = len(licenses)
             
             # Collect Census demographics if requested
@@ -270,6 +287,8 @@ class WisconsinDataCollector(BaseDataCollector):
             # Store all data to BigQuery
             if businesses or loans or licenses:
                 self._store_collected_data(businesses, loans, licenses)
+                if incremental:
+                    self._advance_watermarks(collected)
             
             summary['success'] = True
             summary['end_time'] = datetime.now()
@@ -290,17 +309,9 @@ class WisconsinDataCollector(BaseDataCollector):
                             licenses: List[BusinessLicense]):
         """Store all collected data to BigQuery"""
         try:
-            # Store business entities
-            if businesses:
-                self._store_businesses_to_bigquery(businesses)
-            
-            # Store SBA loans
-            if loans:
-                self._store_loans_to_bigquery(loans)
-            
-            # Store business licenses
-            if licenses:
-                self._store_licenses_to_bigquery(licenses)
+            # Businesses, SBA loans and licenses through the shared BigQuery loaders
+            if not self.save_to_bigquery(businesses, loans, licenses):
+                raise DataCollectionError("BigQuery load failed")
                 
         except Exception as e:
             self.logger.error(f"Error storing collected data: {e}")
@@ -388,31 +399,21 @@ class WisconsinDataCollector(BaseDataCollector):
             cutoff_date = datetime.now() - timedelta(days=days_back)
             
             for url in sba_urls:
-                self.logger.info(f"Downloading SBA FOIA data from: {url}")
+                self.logger.info(f"Fetching SBA FOIA data from: {url}")
                 try:
-                    response = self._make_request(url, timeout=120)  # Large files need more time
-                    
-                    # Parse CSV data
-                    from io import StringIO
-                    import csv
+                    # Stream to a revalidated local copy, then read it in filtered chunks
+                    path = self.sba_foia_cache.fetch(self.session, url)
+                    stats = {}
                     
-                    # Use csv reader for better memory efficiency with large files
-                    csv_reader = csv.DictReader(StringIO(response.text))
-                    wisconsin_count = 0
-                    total_count = 0
-                    
-                    for row in csv_reader:
-                        total_count += 1
-                        
-                        # Filter for Wisconsin loans
-                        borrower_state = row.get('BorrState', '').strip().upper()
-                        if borrower_state == 'WI':
-                            wisconsin_count += 1
+                    for chunk in read_state_loans(path, state='WI', since=cutoff_date.date(), stats=stats):
+                        for row in chunk.to_dict('records'):
+                            row['ApprovalDate'] = row['ApprovalDate'].strftime('%m/%d/%Y')
                             loan_record = self._parse_sba_loan_record(row)
-                            if loan_record and loan_record.approval_date >= cutoff_date.date():
+                            if loan_record:
                                 loans.append(loan_record)
                     
-                    self.logger.info(f"Processed {total_count} total loans, found {wisconsin_count} Wisconsin loans")
+                    self.logger.info(f"Processed {stats.get('rows', 0)} total loans, "
+                                     f"found {stats.get('state_rows', 0)} Wisconsin loans")
                             
                 except Exception as e:
                     self.logger.warning(f"Could not fetch SBA data from {url}: {e}")
@@ -491,23 +492,7 @@ class WisconsinDataCollector(BaseDataCollector):
         """Parse SBA loan record from CSV row (dict or pandas Series)"""
         try:
             # Map actual SBA CSV column names to model fields
-            column_mappings = {
-                'BorrName': 'borrower_name',
-                'BorrStreet': 'borrower_address', 
-                'BorrCity': 'borrower_city',
-                'BorrState': 'borrower_state',
-                'BorrZip': 'borrower_zip',
-                'LocationID': 'loan_id',
-                'ApprovalDate': 'approval_date',
-                'GrossApproval': 'loan_amount',
-                'NaicsCode': 'naics_code',
-                'BusinessType': 'business_type',
-                'JobsSupported': 'jobs_supported',
-                'FranchiseCode': 'franchise_code',
-                'FranchiseName': 'franchise_name',
-                'ThirdPartyLender_Name': 'lender_name',
-                'Program': 'program_type'
-            }
+            column_mappings = FOIA_COLUMNS
             
             # Extract data - handle both dict and pandas Series
             loan_data = {}
@@ -248,6 +248,7 @@ class WisconsinDataCollector:
                     'franchise_name': row.get('FranchiseName', ''),
                     'lender_name': row.get('LenderName', ''),
                     'program_type': row.get('Program', ''),
+                    'loan_status': row.get('LoanStatus', ''),
                     'data_source': 'SBA_Wisconsin'
                 }
                 loans.append(loan_data)
@@ -19,6 +19,7 @@ from urllib.parse import urljoin, urlparse
 import re
 
 from base_collector import BaseDataCollector, DataCollectionError
+from arcgis_harvester import ArcGISLayerHarvester
 
 
 class ZoningDataRecord(BaseModel):
@@ -217,15 +218,18 @@ class WisconsinZoningDataCollector(BaseDataCollector):
             'residential': ['R', 'RES', 'RESIDENTIAL', 'R-1', 'R-2', 'R-3']
         }
         
+        # Concurrent page requests per ArcGIS layer
+        self.arcgis_workers = 4
+        
         self.logger.info("Wisconsin Zoning Data Collector initialized")
     
-    def collect_county_zoning_data(self, county: str, max_records: int = 5000) -> List[ZoningDataRecord]:
+    def collect_county_zoning_data(self, county: str, max_records: int = None) -> List[ZoningDataRecord]:
         """
         Collect zoning data for a specific county
         
         Args:
             county: County name
-            max_records: Maximum number of records to collect
+            max_records: Maximum number of records to collect (None for the whole layer)
             
         Returns:
             List of ZoningDataRecord objects
@@ -257,12 +261,12 @@ class WisconsinZoningDataCollector(BaseDataCollector):
         
         return zoning_records
     
-    def collect_all_counties_zoning_data(self, max_records_per_county: int = 2000) -> List[ZoningDataRecord]:
+    def collect_all_counties_zoning_data(self, max_records_per_county: int = None) -> List[ZoningDataRecord]:
         """
         Collect zoning data for all configured counties
         
         Args:
-            max_records_per_county: Maximum records per county
+            max_records_per_county: Maximum records per county (None for whole layers)
             
         Returns:
             List of ZoningDataRecord objects
@@ -288,29 +292,16 @@ class WisconsinZoningDataCollector(BaseDataCollector):
         records = []
         
         try:
-            # Build query URL
-            base_url = config['zoning_service']
-            query_params = {
-                'where': '1=1',
-                'outFields': '*',
-                'returnGeometry': 'true',
-                'f': 'json',
-                'resultRecordCount': min(max_records, 1000)  # ArcGIS limit
-            }
-            
-            query_url = f"{base_url}/query"
-            
-            response = self._make_request(query_url, params=query_params)
-            data = response.json()
-            
-            if 'features' not in data:
-                self.logger.warning(f"No features returned for {county} County")
-                return records
-            
-            features = data['features']
-            self.logger.info(f"Processing {len(features)} zoning features for {county} County")
+            # Every page of the layer, fetched in parallel; polygons are only
+            # used for a centroid, so they are generalized server-side (~1 m)
+            harvester = ArcGISLayerHarvester(
+                self.session, config['zoning_service'],
+                max_allowable_offset=1e-5, workers=self.arcgis_workers
+            )
             
-            for feature in features:
+            harvested = 0
+            for feature in harvester.features(max_records):
+                harvested += 1
                 try:
                     record = self._parse_arcgis_zoning_feature(feature, county, config['zoning_service'])
                     if record:
@@ -320,6 +311,12 @@ class WisconsinZoningDataCollector(BaseDataCollector):
                     self.logger.debug(f"Error parsing zoning feature: {e}")
                     continue
             
+            if max_records and harvested >= max_records:
+                self.logger.warning(f"{county} County zoning layer capped at {max_records} features; "
+                                    f"pass max_records=None for the whole layer")
+            
+            self.logger.info(f"Parsed {len(records)} zoning features for {county} County")
+            
         except Exception as e:
             self.logger.error(f"Error collecting ArcGIS data for {county}: {e}")
         
@@ -448,13 +445,13 @@ class WisconsinZoningDataCollector(BaseDataCollector):
             self.logger.error(f"Error saving zoning data to BigQuery: {e}")
             return False
     
-    def run_zoning_collection(self, counties: List[str] = None, max_records_per_county: int = 2000) -> Dict[str, Any]:
+    def run_zoning_collection(self, counties: List[str] = None, max_records_per_county: int = None) -> Dict[str, Any]:
         """
         Run complete zoning data collection
         
         Args:
             counties: List of counties to collect (None for all configured)
-            max_records_per_county: Maximum records per county
+            max_records_per_county: Maximum records per county (None for whole layers)
             
         Returns:
             Collection summary dictionary